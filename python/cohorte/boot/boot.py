@@ -35,7 +35,9 @@ import traceback
 import cohorte
 import cohorte.boot.constants as constants
 import cohorte.version
+import pelix.constants
 import pelix.framework
+import pelix.remote
 from pelix.ipopo.constants import get_ipopo_svc_ref
 
 # Ensure that the content of PYTHONPATH has priority over other paths
@@ -577,6 +579,11 @@ def main(args=None):
                             cohorte.PROP_HOME: home,
                             cohorte.PROP_BASE: base}
 
+    # Index the properties used to look for imported services
+    framework_properties[pelix.constants.REGISTRY_INDEXED_PROPERTIES] = \
+        [pelix.remote.PROP_ENDPOINT_FRAMEWORK_UUID,
+         pelix.remote.PROP_ENDPOINT_ID]
+
     # TODO add envs property if it's passed in order to be retrieve by environmentParameter component 
     if args.env_isolate_param:
          # The isolate environment paremter
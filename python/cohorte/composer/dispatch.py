@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Composer: concurrent dispatch of orders
+
+Calls the composers of several isolates or nodes concurrently, waiting for
+their answers up to a deadline.
+
+:author: agent
+:license: Apache Software License 2.0
+:version: 3.0.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import logging
+import threading
+import time
+
+# Pelix
+import pelix.threadpool
+
+# ------------------------------------------------------------------------------
+
+# Bundle version
+import cohorte.version
+__version__=cohorte.version.__version__
+
+# ------------------------------------------------------------------------------
+
+_logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+
+
+class DispatchResult(object):
+    """
+    Result of a dispatch: some calls might have failed or not have answered
+    before the deadline
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Key -> Result of the call
+        self.results = {}
+
+        # Key -> Exception raised by the call
+        self.errors = {}
+
+        # Keys of the calls which didn't answer in time
+        self.late = set()
+
+        # Keys of the late calls which won't be executed: not started before
+        # the deadline, or previous call with the same key still running
+        # (only when late calls aren't queued)
+        self.cancelled = set()
+
+        # Duration of the whole dispatch, in seconds
+        self.duration = 0
+
+    def __str__(self):
+        """
+        String representation
+        """
+        return "DispatchResult({0} results, {1} errors, {2} late, " \
+            "{3} cancelled, {4:.3f}s)".format(
+                len(self.results), len(self.errors), len(self.late),
+                len(self.cancelled), self.duration)
+
+
+class _Call(object):
+    """
+    A call handled by the dispatcher
+    """
+    # States of a call
+    PENDING, RUNNING, CANCELLED, DONE = range(4)
+
+    __slots__ = ('key', 'method', 'args', 'state', 'abandoned', 'following',
+                 'success', 'value', 'event')
+
+    def __init__(self, key, method, args):
+        """
+        Sets up members
+
+        :param key: Key of the call
+        :param method: Method to call
+        :param args: Method arguments
+        """
+        self.key = key
+        self.method = method
+        self.args = args
+        self.state = _Call.PENDING
+
+        # The caller doesn't wait for the result anymore
+        self.abandoned = False
+
+        # Call with the same key to start once this one is done
+        self.following = None
+
+        # Result of the call
+        self.success = False
+        self.value = None
+        self.event = threading.Event()
+
+
+class Dispatcher(object):
+    """
+    Calls methods concurrently in a thread pool, waiting for their results up
+    to a deadline.
+
+    At the deadline, the calls which didn't start yet are cancelled. Those
+    still running go on, but the caller doesn't wait for them: their errors
+    are logged, and no other call with the same key is started until they
+    return. Methods with side effects on the caller state must apply them
+    themselves, as their result might come too late.
+
+    Orders which must not be lost are dispatched with queue_late: they are
+    never cancelled, and those with the key of a late call are executed, in
+    order, once it returns.
+    """
+    def __init__(self, nb_threads, logname=None):
+        """
+        Sets up members
+
+        :param nb_threads: Maximum number of concurrent calls
+        :param logname: Name of the logger of the thread pool
+        """
+        self._pool = pelix.threadpool.ThreadPool(nb_threads, logname=logname)
+
+        # Key -> last call still running or queued after its deadline
+        self._running_late = {}
+
+        # Aggregated statistics
+        self._stats = {'dispatches': 0, 'calls': 0, 'errors': 0, 'late': 0,
+                       'cancelled': 0, 'total_time': 0.0, 'max_time': 0.0}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the thread pool
+        """
+        self._pool.start()
+
+    def stop(self):
+        """
+        Stops the thread pool
+        """
+        self._pool.stop()
+
+    def get_stats(self):
+        """
+        Returns the aggregated statistics of the dispatches: number of
+        dispatches, of calls, of errors, of late and of cancelled calls, total
+        and maximum time of a dispatch (in seconds)
+
+        :return: A dictionary
+        """
+        with self._lock:
+            return self._stats.copy()
+
+    def get_running_late(self):
+        """
+        Returns the keys of the calls still running or queued after their
+        deadline
+
+        :return: A set of keys
+        """
+        with self._lock:
+            return set(self._running_late)
+
+    def wait_late(self, keys, timeout):
+        """
+        Waits for the calls with the given keys still running or queued after
+        their deadline
+
+        :param keys: Keys of calls
+        :param timeout: Maximum time to wait, in seconds
+        :return: The keys of the calls still running after the timeout
+        """
+        deadline = time.time() + timeout
+        with self._lock:
+            calls = [self._running_late[key] for key in keys
+                     if key in self._running_late]
+
+        for call in calls:
+            call.event.wait(max(deadline - time.time(), 0))
+
+        with self._lock:
+            return set(key for key in keys if key in self._running_late)
+
+    def __run(self, call):
+        """
+        Executes a call in a pool thread, unless it has been cancelled. Its
+        exceptions are caught to avoid the thread pool logging them.
+
+        :param call: A _Call object
+        """
+        with self._lock:
+            if call.state == _Call.CANCELLED:
+                return
+
+            call.state = _Call.RUNNING
+
+        try:
+            call.success, call.value = True, call.method(*call.args)
+        except Exception as ex:
+            call.success, call.value = False, ex
+
+        with self._lock:
+            call.state = _Call.DONE
+            abandoned = call.abandoned
+            following = call.following
+            if self._running_late.get(call.key) is call:
+                del self._running_late[call.key]
+
+        if following is not None:
+            # Next call with the same key
+            self._pool.enqueue(self.__run, following)
+
+        call.event.set()
+        if abandoned and not call.success:
+            _logger.error("Late call %s failed: %s", call.key, call.value)
+
+    def dispatch(self, calls, timeout, queue_late=False):
+        """
+        Executes the given calls concurrently
+
+        :param calls: A key -> (method, arguments tuple) dictionary
+        :param timeout: Maximum time to wait for all the calls, in seconds
+        :param queue_late: If True, the calls are never cancelled: those with
+                           the key of a late call are executed after it
+        :return: A DispatchResult object
+        """
+        result = DispatchResult()
+        if not calls:
+            return result
+
+        start = time.time()
+        deadline = start + timeout
+
+        pending = []
+        started = []
+        with self._lock:
+            for key, (method, args) in calls.items():
+                call = _Call(key, method, args)
+                previous = self._running_late.get(key)
+                if previous is None:
+                    started.append(call)
+                elif queue_late:
+                    # Execute it after the previous call
+                    previous.following = call
+                    self._running_late[key] = call
+                else:
+                    # Previous call still running
+                    result.late.add(key)
+                    result.cancelled.add(key)
+                    continue
+
+                pending.append(call)
+
+        for call in started:
+            self._pool.enqueue(self.__run, call)
+
+        for call in pending:
+            call.event.wait(max(deadline - time.time(), 0))
+            with self._lock:
+                if call.state == _Call.PENDING and not queue_late:
+                    # Not started in time: cancel it
+                    call.state = _Call.CANCELLED
+                    result.cancelled.add(call.key)
+                    result.late.add(call.key)
+                    continue
+
+                elif call.state != _Call.DONE:
+                    # Still running or queued: don't wait for it
+                    call.abandoned = True
+                    self._running_late.setdefault(call.key, call)
+                    result.late.add(call.key)
+                    continue
+
+            if call.success:
+                result.results[call.key] = call.value
+            else:
+                result.errors[call.key] = call.value
+
+        result.duration = duration = time.time() - start
+        with self._lock:
+            stats = self._stats
+            stats['dispatches'] += 1
+            stats['calls'] += len(calls)
+            stats['errors'] += len(result.errors)
+            stats['late'] += len(result.late)
+            stats['cancelled'] += len(result.cancelled)
+            stats['total_time'] += duration
+            stats['max_time'] = max(stats['max_time'], duration)
+
+        _logger.debug("%s", result)
+        return result
@@ -139,40 +139,24 @@ class IPopoAgent(object):
         properties.setdefault(pelix.remote.PROP_EXPORTED_INTERFACES, "*")
         return properties
 
-    def __try_instantiate(self, component):
+    def __store_instantiated(self, component):
         """
-        Tries to instantiate a component
+        Stores a component instantiated by iPOPO
 
         :param component: A component bean
-        :return: True if the component has been validated, False if its factory
-                 is missing
-        :raise Exception: Error instantiating the component
         """
+        factory = component.factory
         try:
-            # Prepare properties (filters...)
-            factory = component.factory
-            properties = self._compute_properties(component)
+            remaining = self.__remaining[factory]
+            remaining.discard(component)
+            if not remaining:
+                del self.__remaining[factory]
+        except KeyError:
+            # Component wasn't a remaining one
+            pass
 
-            # Instantiate the component
-            self._ipopo.instantiate(factory, component.name, properties)
-
-            # Component instantiated
-            try:
-                remaining = self.__remaining[factory]
-                remaining.discard(component)
-                if not remaining:
-                    del self.__remaining[factory]
-            except KeyError:
-                # Component wasn't a remaining one
-                pass
-
-            # Store it
-            self.__components.setdefault(factory, set()).add(component)
-            return True
-        except TypeError:
-            # Missing factory: maybe later
-            _logger.warning("iPOPO agent: factory missing for %s", component)
-            return False
+        # Store it
+        self.__components.setdefault(factory, set()).add(component)
 
     def handle(self, components):
         """
@@ -185,7 +169,7 @@ class IPopoAgent(object):
         with self.__lock:
             # Beans of the components to instantiate
             components = set(components)
-            instantiated = set()
+            to_instantiate = {}
             for component in components:
                 try:
                     # Check if component is already running
@@ -207,23 +191,69 @@ class IPopoAgent(object):
 
                 # Store the name
                 self.__names[component.name] = component
+                to_instantiate[component.name] = component
+
+            if not to_instantiate:
+                return set()
 
+            # Compute the properties of each component: an error only fails
+            # its component
+            errors = {}
+            to_create = []
+            for name, component in to_instantiate.items():
                 try:
-                    # Try instantiation (updates local storage)
-                    if self.__try_instantiate(component):
-                        instantiated.add(component)
-
-                    else:
-                        # Factory not found, keep track of the component
-                        self.__remaining.setdefault(component.factory, set()) \
-                            .add(component)
+                    to_create.append((component.factory, name,
+                                      self._compute_properties(component)))
                 except Exception as ex:
+                    errors[name] = ex
+
+            if to_create:
+                # Instantiate all components in a single batch
+                errors.update(self._ipopo.instantiate_many(to_create)[1])
+
+            instantiated = set()
+            for name, component in to_instantiate.items():
+                error = errors.get(name)
+                if error is None:
+                    # Component instantiated (updates local storage)
+                    self.__store_instantiated(component)
+                    instantiated.add(component)
+
+                elif isinstance(error, TypeError):
+                    # Missing factory: maybe later
+                    _logger.warning("iPOPO agent: factory missing for %s",
+                                    component)
+                    self.__remaining.setdefault(component.factory, set()) \
+                        .add(component)
+
+                else:
                     # Other errors
-                    _logger.exception("Error instantiating component %s: %s",
-                                      component, ex)
+                    _logger.error("Error instantiating component %s: %s",
+                                  component, error)
 
             return instantiated
 
+    def __forget(self, component, storage):
+        """
+        Removes a killed component from the given storage
+
+        :param component: A component bean
+        :param storage: The storage holding the bean (instantiated or
+                        remaining components)
+        """
+        try:
+            # Clean up the storage
+            components = storage[component.factory]
+            components.remove(component)
+            if not components:
+                del storage[component.factory]
+        except KeyError:
+            # Strange: the component is not where it is supposed to be
+            _logger.warning("Component %s is not stored where it is "
+                            "supposed to be (%s components)", component.name,
+                            "instantiated" if storage is self.__components
+                            else "remaining")
+
     def kill(self, name):
         """
         Kills the component with the given name
@@ -235,9 +265,6 @@ class IPopoAgent(object):
             # Get the component bean
             component = self.__names.pop(name)
 
-            # Bean storage
-            storage = self.__components
-
             try:
                 # Kill the component
                 self._ipopo.kill(name)
@@ -249,16 +276,41 @@ class IPopoAgent(object):
                 # Bean is stored in the instantiated components dictionary
                 storage = self.__components
 
-            try:
-                # Clean up the storage
-                components = storage[component.factory]
-                components.remove(component)
-                if not components:
-                    del storage[component.factory]
-            except KeyError:
-                # Strange: the component is not where it is supposed to be
-                _logger.warning("Component %s is not stored where it is "
-                                "supposed to be (%s components)", name,
-                                "instantiated" if storage is self.__components
-                                else "remaining")
+            self.__forget(component, storage)
+
+    def kill_many(self, names):
+        """
+        Kills the components with the given names. Unknown names are ignored.
+
+        :param names: Names of the components to kill
+        """
+        with self.__lock:
+            # Get the component beans
+            components = {}
+            for name in names:
+                try:
+                    components[name] = self.__names.pop(name)
+                except KeyError:
+                    # Unknown component
+                    pass
+
+            if not components:
                 return
+
+            # Kill the components in a single batch
+            errors = self._ipopo.kill_many(list(components))
+            for name, component in components.items():
+                error = errors.get(name)
+                if error is None:
+                    # Bean is stored in the instantiated components dictionary
+                    self.__forget(component, self.__components)
+                elif isinstance(error, ValueError):
+                    # iPOPO didn't know about the component,
+                    # remove it from the remaining ones
+                    self.__forget(component, self.__remaining)
+                else:
+                    # Error killing the component: it has been removed from
+                    # the iPOPO registry anyway
+                    _logger.error("Error killing component %s: %s",
+                                  component, error)
+                    self.__forget(component, self.__components)
@@ -224,13 +224,7 @@ class IsolateComposer(object):
 
             if self._agent is not None:
                 # An agent can kill the components
-                for name in names:
-                    try:
-                        # Kill the component
-                        self._agent.kill(name)
-                    except ValueError:
-                        # Unknown component
-                        pass
+                self._agent.kill_many(names)
             else:
                 # Update the remaining components
                 self._remaining.difference_update(
@@ -16,3 +16,9 @@ PROP_RECOMPOSITION_DELAY = "cohorte.recomposition.delay"
 """
 Delay to wait before running the next re-distribution in the Node Composer
 """
+
+PROP_START_TIMEOUT = "cohorte.composer.node.start.timeout"
+"""
+Maximum time, in seconds, the Node Composer waits for an isolate it started
+to bind its composer before computing a new distribution
+"""
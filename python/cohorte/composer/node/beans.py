@@ -108,6 +108,9 @@ class EligibleIsolate(object):
         # Components returned by self.components()
         self.__visible_components = set(self.__components)
 
+        # Frozen copy of the visible components, reset when they change
+        self.__frozen_components = None
+
     def __str__(self):
         """
         String representation
@@ -140,7 +143,10 @@ class EligibleIsolate(object):
 
         :param components: A list of components
         """
+        size = len(self.__visible_components)
         self.__visible_components.difference_update(components)
+        if len(self.__visible_components) != size:
+            self.__frozen_components = None
 
     def unhide(self, component):
         """
@@ -149,8 +155,10 @@ class EligibleIsolate(object):
 
         :param component: A component to unhide
         """
-        if component in self.__components:
+        if component in self.__components \
+                and component not in self.__visible_components:
             self.__visible_components.add(component)
+            self.__frozen_components = None
 
     def accepted_rename(self):
         """
@@ -221,16 +229,19 @@ class EligibleIsolate(object):
     @property
     def components(self):
         """
-        Returns the (frozen) set of components associated to this isolate
+        Returns the (frozen) set of components associated to this isolate.
+        The same object is returned as long as the components don't change.
         """
-        return frozenset(self.__visible_components)
+        if self.__frozen_components is None:
+            self.__frozen_components = frozenset(self.__visible_components)
+        return self.__frozen_components
 
     @property
     def new_components(self):
         """
         Returns the (frozen) set of components added to this isolate
         """
-        return frozenset(self.__visible_components)
+        return self.components
 
     @property
     def factories(self):
@@ -249,7 +260,9 @@ class EligibleIsolate(object):
             self.language = component.language
 
         self.__components.add(component)
-        self.__visible_components.add(component)
+        if component not in self.__visible_components:
+            self.__visible_components.add(component)
+            self.__frozen_components = None
 
 # ------------------------------------------------------------------------------
 
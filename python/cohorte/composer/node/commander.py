@@ -27,6 +27,7 @@ Node Commander; gives orders to isolate composers
 # Standard library
 import logging
 import threading
+import time
 
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Requires, Provides, \
@@ -36,6 +37,7 @@ from pelix.ipopo.decorators import ComponentFactory, Requires, Provides, \
 # Composer
 import cohorte
 import cohorte.composer
+from cohorte.composer.dispatch import Dispatcher
 
 # ------------------------------------------------------------------------------
 
@@ -53,6 +55,8 @@ _logger = logging.getLogger(__name__)
 @ComponentFactory()
 @Provides(cohorte.composer.SERVICE_COMMANDER_NODE)
 @Property('_node_uid', cohorte.composer.PROP_NODE_UID)
+@Property('_timeout', 'commander.timeout', 10)
+@Property('_nb_threads', 'commander.threads', 10)
 @Requires('_status', cohorte.composer.SERVICE_STATUS_NODE)
 @Requires('_injected_composers', cohorte.composer.SERVICE_COMPOSER_ISOLATE,
           aggregate=True, optional=True)
@@ -79,12 +83,28 @@ class NodeCommander(object):
         # Thread protection
         self._lock = threading.RLock()
 
+        # Isolates being started: name -> start time
+        self._starting = {}
+
+        # Notified when a starting isolate binds its composer or is lost
+        self._starting_condition = threading.Condition(self._lock)
+
         # Validation flag
         self.__validated = False
 
         # Node UID
         self._node_uid = None
 
+        # Maximum time to wait for the isolate composers (in seconds)
+        self._timeout = 10
+
+        # Concurrent calls to the isolate composers
+        self._nb_threads = 10
+        self._dispatcher = None
+
+        # Names of the isolates which didn't answer the last request
+        self._unresponsive = set()
+
     @BindField('_injected_composers')
     def _bind_composer(self, _, service, svc_ref):
         """
@@ -166,18 +186,25 @@ class NodeCommander(object):
         """
         self.__validated = False
         self._node_uid = None
+        self._dispatcher.stop()
+        self._dispatcher = None
 
     @Validate
     def validate(self, context):
         """
         Component validated
         """
+        self._dispatcher = Dispatcher(self._nb_threads,
+                                      "NodeCommander-Dispatcher")
+        self._dispatcher.start()
+
         self.__validated = True
         self._node_uid = context.get_property(cohorte.PROP_NODE_UID)
 
         # Handle already injected services
-        for service, svc_ref in self._injected_composers_refs.items():
-            self.__handle_composer(svc_ref, service)
+        with self._lock:
+            for service, svc_ref in self._injected_composers_refs.items():
+                self.__handle_composer(svc_ref, service)
 
     def __check_node(self, svc_ref):
         """
@@ -213,6 +240,19 @@ class NodeCommander(object):
         # Give it its orders
         self.__push_orders(isolate_name, composer)
 
+        # The isolate is now ready
+        self.__isolate_started(isolate_name)
+
+    def __isolate_started(self, isolate_name):
+        """
+        Releases the waiters of the given isolate, if it was starting.
+        Must be called while holding the lock.
+
+        :param isolate_name: Name of the isolate
+        """
+        if self._starting.pop(isolate_name, None) is not None:
+            self._starting_condition.notify_all()
+
     def __push_orders(self, isolate_name, composer):
         """
         Pushes orders to a newly bound composer
@@ -235,6 +275,9 @@ class NodeCommander(object):
         :param name: Name of the lost isolate
         """
         with self._lock:
+            # Don't wait for it anymore
+            self.__isolate_started(name)
+
             try:
                 # Remove its references
                 service = self._isolate_composer.pop(name)
@@ -242,28 +285,109 @@ class NodeCommander(object):
             except KeyError:
                 _logger.debug("No composer associated to isolate %s", name)
 
+    def isolate_starting(self, name):
+        """
+        An isolate is being started: it will be waited for by
+        wait_starting_isolates() until it binds its composer or is lost
+
+        :param name: Name of the starting isolate
+        """
+        with self._lock:
+            if name not in self._isolate_composer:
+                self._starting[name] = time.time()
+
+    def wait_starting_isolates(self, timeout):
+        """
+        Waits for the starting isolates to bind their composer or to be lost.
+        Returns immediately if no isolate is starting.
+
+        :param timeout: Maximum time to wait for an isolate, in seconds,
+                        counted from the start of the isolate
+        :return: The names of the isolates which didn't bind their composer
+                 in time (they are not waited for anymore)
+        """
+        late = set()
+        with self._lock:
+            while self._starting:
+                now = time.time()
+                deadline = min(self._starting.values()) + timeout
+                if deadline > now:
+                    self._starting_condition.wait(deadline - now)
+                    continue
+
+                # Forget the isolates which took too long to start
+                for name, start in list(self._starting.items()):
+                    if start + timeout <= now:
+                        late.add(name)
+                        del self._starting[name]
+
+        return late
+
+    def __dispatch(self, calls, action, queue_late=False):
+        """
+        Calls the isolate composers concurrently and logs the failures
+
+        :param calls: An isolate name -> (method, arguments) dictionary
+        :param action: Description of the calls, for logging
+        :param queue_late: If True, calls to isolates still handling a late
+                           call are executed after it instead of being
+                           cancelled
+        :return: A DispatchResult object
+        """
+        result = self._dispatcher.dispatch(calls, self._timeout, queue_late)
+        for name, ex in result.errors.items():
+            _logger.error("Error calling composer on isolate %s (%s): %s",
+                          name, action, ex)
+
+        if result.late:
+            _logger.warning("No answer from isolates after %.1fs (%s): %s",
+                            self._timeout, action,
+                            ', '.join(sorted(result.late)))
+
+        if result.cancelled:
+            _logger.warning("Isolates not called (%s): %s", action,
+                            ', '.join(sorted(result.cancelled)))
+
+        self._unresponsive = result.late
+        return result
+
+    def get_unresponsive_isolates(self):
+        """
+        Returns the names of the isolates which didn't answer in time to the
+        last request
+
+        :return: A set of isolate names
+        """
+        return self._unresponsive.copy()
+
+    def get_dispatch_stats(self):
+        """
+        Returns the aggregated statistics of the calls to the isolate
+        composers (see Dispatcher.get_stats())
+
+        :return: A dictionary
+        """
+        return self._dispatcher.get_stats()
+
     def get_running_isolates(self):
         """
-        Returns the list of running isolates
+        Returns the list of running isolates. The isolates which don't answer
+        in time are ignored.
 
         :return: A set of isolate beans
         """
         with self._lock:
-            composers = list(self._isolate_composer.values())
+            calls = {name: (composer.get_isolate_info, ())
+                     for name, composer in self._isolate_composer.items()}
+
+        # Request the description of the composers
+        result = self.__dispatch(calls, "get_isolate_info")
 
         isolates = set()
-        for composer in composers:
-            try:
-                # Request the description of the composer
-                isolate_info = composer.get_isolate_info()
-            except Exception as ex:
-                # Something went wrong
-                _logger.error("Error retrieving information about a composer: "
-                              "%s", ex)
-            else:
-                # Type enforcement
-                isolate_info.components = set(isolate_info.components)
-                isolates.add(isolate_info)
+        for isolate_info in result.results.values():
+            # Type enforcement
+            isolate_info.components = set(isolate_info.components)
+            isolates.add(isolate_info)
 
         return isolates
 
@@ -273,17 +397,20 @@ class NodeCommander(object):
 
         :param isolates: A set of Isolate beans
         """
+        calls = {}
         for isolate in isolates:
             try:
                 # Try to call the bound composer
-                self._isolate_composer[isolate.name] \
-                    .instantiate(isolate.components)
+                composer = self._isolate_composer[isolate.name]
             except KeyError:
                 # Unknown node
                 pass
-            except Exception as ex:
-                # Error calling the composer
-                _logger.exception("Error calling isolate %s: %s", isolate, ex)
+            else:
+                calls[isolate.name] = (composer.instantiate,
+                                       (isolate.components,))
+
+        # Orders are never dropped
+        self.__dispatch(calls, "instantiate", True)
 
     def kill(self, components):
         """
@@ -302,7 +429,8 @@ class NodeCommander(object):
                 # Component has not been bound...
                 pass
 
-        # Call the composer
+        # Call the composers
+        calls = {}
         for isolate, names in distribution.items():
             try:
                 # Get the service
@@ -310,12 +438,21 @@ class NodeCommander(object):
             except KeyError:
                 _logger.error("No composer for isolate %s", isolate)
             else:
-                try:
-                    # Call it
-                    composer.kill(names)
-
-                    # Update the status
-                    self._status.remove(names)
-                except Exception as ex:
-                    _logger.exception("Error calling composer on %s: %s",
-                                      isolate, ex)
+                calls[isolate] = (self.__kill_components,
+                                  (composer, isolate, names))
+
+        self.__dispatch(calls, "kill", True)
+
+    def __kill_components(self, composer, isolate, names):
+        """
+        Tells an isolate composer to kill components, then updates the
+        status. Called by the dispatcher: the status is updated even if the
+        composer answers after the deadline, but only for the components
+        which haven't been assigned to another isolate in the meantime.
+
+        :param composer: An isolate composer
+        :param isolate: Name of the isolate hosting the components
+        :param names: Names of the components to kill
+        """
+        composer.kill(names)
+        self._status.remove(names, isolate)
@@ -25,6 +25,7 @@ The Node Composer
 """
 
 # Standard library
+import collections
 import logging
 import threading
 import time
@@ -131,6 +132,12 @@ class NodeComposer(object):
         self._timer = None
         self._lock = threading.Lock()
 
+        # Maximum time to wait for a starting isolate (in seconds)
+        self._start_timeout = 5
+
+        # Statistics of the last redistribution passes
+        self._passes = collections.deque(maxlen=100)
+
         self._controller = True
 
     @Invalidate
@@ -157,6 +164,13 @@ class NodeComposer(object):
             # Keep default value if given one is unreadable
             self._delay = 120
 
+        try:
+            self._start_timeout = float(context.get_property(
+                cohorte.composer.node.PROP_START_TIMEOUT))
+        except (ValueError, TypeError):
+            # Keep default value if given one is unreadable
+            self._start_timeout = 5
+
         self._pool.start()
         self._controller = True
 
@@ -200,19 +214,12 @@ class NodeComposer(object):
         :return: A Component bean -> Bundle bean dictionary
         :raise FactoriesMissing: Some factories are missing
         """
-        bundles = {}
-        not_found = set()
-
-        for component in components:
-            try:
-                # TODO: try to reuse existing bundles (same name)
-                bundles[component] = self._finder.normalize(component)
-            except ValueError:
-                # Factory not found
-                not_found.add(component.factory)
-            except AttributeError:
-                # _finder could be None when stopping the platform
-                pass
+        try:
+            # Each distinct factory is looked up once
+            bundles, not_found = self._finder.normalize_all(components)
+        except AttributeError:
+            # _finder could be None when stopping the platform
+            return {}
 
         if not_found:
             raise FactoriesMissing(not_found)
@@ -241,13 +248,16 @@ class NodeComposer(object):
         """
         return self._commander.get_running_isolates()
 
-    def _distribute(self, components, existing_isolates):
+    def _distribute(self, components, existing_isolates, keep_all=False):
         """
         Computes the distribution of the given components into isolates
 
         :param components: A list of RawComponent beans
         :param existing_isolates: A list of Isolate beans, corresponding to
                                   already running isolates
+        :param keep_all: If True, the distribution also contains the existing
+                         isolates which kept some components without
+                         receiving new ones
         :return: A tuple (distribution, new_isolates), both parts being sets of
                  Isolate beans
         """
@@ -272,6 +282,13 @@ class NodeComposer(object):
             isolate.components.update(updated.new_components)
             dist_beans.add(isolate)
 
+        if keep_all:
+            # Isolates left as is, minus the components which moved
+            updated_isolates = set(updated_isolates)
+            for eligible in eligible_isolates:
+                if eligible.components and eligible not in updated_isolates:
+                    dist_beans.add(eligible.to_isolate())
+
         # FIXME: enhance returned tuple
         return dist_beans, new_beans
 
@@ -291,9 +308,46 @@ class NodeComposer(object):
                            for component in isolate.components}
 
         # Start the isolate (should be done asynchronously)
-        self._monitor.start_isolate(
-            isolate.name, self._compute_kind(isolate), isolate.language,
-            'isolate', isolate_bundles)
+        try:
+            started = self._monitor.start_isolate(
+                isolate.name, self._compute_kind(isolate), isolate.language,
+                'isolate', isolate_bundles)
+        except Exception as ex:
+            _logger.exception("Error starting isolate %s: %s",
+                              isolate.name, ex)
+            started = False
+
+        if not started:
+            # The isolate won't bind its composer: don't wait for it
+            self._commander.isolate_lost(isolate.name)
+
+    def _enqueue_starts(self, new_isolates, bundles):
+        """
+        Tells the monitor to start the given isolates, in the thread pool.
+        The commander will send their orders once their composer will be
+        bound.
+
+        :param new_isolates: Isolates to start
+        :param bundles: Dictionary: Component -> Bundle
+        """
+        for isolate in new_isolates:
+            # Let the next distributions wait for this isolate
+            self._commander.isolate_starting(isolate.name)
+            self._pool.enqueue(self._start_isolate, isolate, bundles)
+
+    def _wait_starting_isolates(self):
+        """
+        Waits for the isolates being started to bind their composer, so that
+        they are considered by the next distribution
+        """
+        start = time.time()
+        late = self._commander.wait_starting_isolates(self._start_timeout)
+        if late:
+            _logger.warning("Isolates not ready after %.1fs: %s",
+                            self._start_timeout, ', '.join(sorted(late)))
+
+        _logger.debug("Waited %.3fs for the starting isolates",
+                      time.time() - start)
 
     def instantiate(self, components):
         """
@@ -305,9 +359,9 @@ class NodeComposer(object):
         with self._lock:
             # Stop the running timer, if any
             self.__stop_timer()
-            # wait already created isolates to get up.
-            # TODO: should enhance this solution!
-            time.sleep(5)
+
+            # Wait for already created isolates to get up
+            self._wait_starting_isolates()
             try:
                 # Compute the implementation language of the components
                 bundles = self._compute_bundles(components)
@@ -337,8 +391,7 @@ class NodeComposer(object):
             # Tell the monitor to start the new isolates.
             # The commander will send their orders once there composer will be
             # bound
-            for isolate in new_isolates:
-                self._pool.enqueue(self._start_isolate, isolate, bundles)
+            self._enqueue_starts(new_isolates, bundles)
 
             # Schedule next redistribution
             self.__start_timer()
@@ -350,12 +403,29 @@ class NodeComposer(object):
         with self._lock:
             _logger.debug("!! Node Composer starts redistribution !!!")
 
-            # Get components
-            components = self._status.get_components()
+            # Wait for already created isolates to get up
+            self._wait_starting_isolates()
+            start = time.time()
+
+            # Only vote again for the components affected by events (crashes,
+            # ratings changes, ...) since the previous pass
+            dirty = self._distributor.pop_dirty()
+            components = [component
+                          for component in self._status.get_components()
+                          if component.name in dirty]
+            if not components:
+                _logger.debug("No component affected since the last pass")
+                self.__store_pass(start, 0, False)
+
+                # Schedule next redistribution
+                self.__start_timer()
+                return
 
-            # Compute a distribution
+            # Compute a distribution of those components, the others staying
+            # on their isolate
             running = self.get_running_isolates()
-            distribution, new_isolates = self._distribute(components, running)
+            distribution, new_isolates = self._distribute(components, running,
+                                                          True)
 
             # Compute the differences with the current distribution
             isolates = set(distribution).difference(new_isolates)
@@ -382,6 +452,7 @@ class NodeComposer(object):
 
             if not any((all_to_remove, extended_isolates, new_isolates)):
                 _logger.debug("No modification to do")
+                self.__store_pass(start, len(components), False)
 
                 # Schedule next redistribution
                 self.__start_timer()
@@ -417,18 +488,51 @@ class NodeComposer(object):
                 # Tell the monitor to start the new isolates.
                 # The commander will send their orders once there composer will
                 # be bound
-                for isolate in new_isolates:
-                    self._pool.enqueue(self._start_isolate, isolate, bundles)
+                self._enqueue_starts(new_isolates, bundles)
+
+            self.__store_pass(start, len(components), True)
 
             # Schedule next redistribution
             self.__start_timer()
 
+    def __store_pass(self, start, nb_voted, modified):
+        """
+        Stores the statistics of a redistribution pass
+
+        :param start: Start time of the pass
+        :param nb_voted: Number of components voted for again
+        :param modified: True if the distribution changed
+        """
+        duration = time.time() - start
+        self._passes.append({'timestamp': start,
+                             'duration': duration,
+                             'components': nb_voted,
+                             'modified': modified})
+        _logger.debug("Redistribution pass: %d component(s) voted again in "
+                      "%.3fs", nb_voted, duration)
+
+    def get_redistribution_stats(self):
+        """
+        Returns the statistics of the last redistribution passes
+
+        :return: A list of dictionaries, from the oldest pass to the latest,
+                 with the start time of the pass, its duration (in seconds),
+                 the number of components voted for again and a flag
+                 indicating if the distribution changed
+        """
+        return list(self._passes)
+
     def kill_isolates(self, names):
         """
         Kills the isolates with the given names on the local node
 
         :param names: A list of isolate names
         """
+        # Names can be given as a generator
+        names = set(names)
+        if not names:
+            return
+
         peers = self._directory.get_peers_for_node(self._node_uid)
         for peer in peers:
             if peer.name in names:
@@ -26,11 +26,20 @@ in the same isolate
 """
 
 # Standard library
+import array
+import heapq
 import itertools
 import logging
 import operator
+import threading
 import time
 
+try:
+    # Optional: vectorized ratings
+    import numpy
+except ImportError:
+    numpy = None
+
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Provides, Instantiate, \
     Invalidate, Validate, Requires
@@ -54,6 +63,417 @@ Rating to use if not yet known.
 92 because between 90 "empty isolate" and 95 "previous isolate"
 """
 
+INCOMPATIBLE_RATING = 5
+""" Below this rating, components are incompatible (forever) """
+
+REJECTED_RATING = 30
+""" Below this rating, the criterion votes against an isolate """
+
+RECOVERY_DELAY = 60
+""" Delay after a crash before the rating of a pair recovers (in seconds) """
+
+RECOVERY_RATE = 5. / 45
+""" Rating recovered per second, i.e. 5 points per 45 seconds timer tick """
+
+MAX_PAIRS = 100000
+"""
+Maximum number of rated pairs kept in memory. Beyond it, the pairs closest to
+the default rating are forgotten first, then the incompatible pairs which
+crashed the longest ago.
+"""
+
+# ------------------------------------------------------------------------------
+
+
+def _new_array(size):
+    """
+    Returns an array of floats initialized to 0
+
+    :param size: Size of the array
+    :return: A NumPy array if available, else an array.array
+    """
+    if numpy is not None:
+        return numpy.zeros(size)
+
+    return array.array('d', [0.]) * size
+
+
+def _grow_array(values, size):
+    """
+    Grows the given array, keeping its content
+
+    :param values: An array returned by _new_array()
+    :param size: New size of the array
+    :return: The grown array
+    """
+    if numpy is not None:
+        grown = numpy.zeros(size)
+        grown[:len(values)] = values
+        return grown
+
+    values.extend([0.] * (size - len(values)))
+    return values
+
+
+class _PairRatings(object):
+    """
+    Sparse store of the compatibility ratings of pairs of components.
+
+    Only the pairs which crashed together are stored, in arrays indexed by
+    slots, with interned components IDs. The rating of a pair recovers
+    linearly towards the default rating after a crash: it is computed when
+    read. Incompatible pairs never recover.
+
+    As all pairs recover at the same rate, the time at which a pair gets back
+    to the default rating is known at its last crash: pairs are kept in a heap
+    sorted by that time, so that recovered pairs are evicted without reading
+    the others. Incompatible pairs are kept in another heap, sorted by time of
+    last crash, and are only evicted to respect the maximum size.
+    """
+    def __init__(self, max_pairs=MAX_PAIRS):
+        """
+        Sets up members
+
+        :param max_pairs: Maximum number of pairs to keep
+        """
+        self.__max_pairs = max_pairs
+
+        # Interned names: Name -> ID, ID -> Name
+        self.__ids = {}
+        self.__names = []
+
+        # (ID, ID) -> Slot (lower ID first)
+        self.__slots = {}
+
+        # ID -> {Partner ID -> Slot}
+        self.__partners = {}
+
+        # Slot -> (ID, ID) or None, and free slots
+        self.__pairs = []
+        self.__free = []
+
+        # Slot -> Generation, incremented on each modification of the slot
+        self.__generations = []
+
+        # Heaps of (time, generation, slot): time of full recovery of the
+        # pairs which can recover, time of last crash of the incompatible
+        # ones. Entries of an older generation than their slot are obsolete.
+        self.__recovering = []
+        self.__incompatible = []
+
+        # Slot -> Rating at the last crash, time of the last crash, and
+        # 1 if the pair is incompatible
+        self.__ratings = _new_array(0)
+        self.__crashes = _new_array(0)
+        self.__frozen = _new_array(0)
+
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        """
+        Returns the number of stored pairs
+        """
+        return len(self.__slots)
+
+    def clear(self):
+        """
+        Clears the store
+        """
+        with self.__lock:
+            self.__init__(self.__max_pairs)
+
+    def __intern(self, name):
+        """
+        Returns the ID of a component name, creating it if necessary
+        """
+        try:
+            return self.__ids[name]
+        except KeyError:
+            new_id = self.__ids[name] = len(self.__names)
+            self.__names.append(name)
+            return new_id
+
+    def __key(self, name_a, name_b):
+        """
+        Returns the slot key of a pair of names, or None if a name is unknown
+        """
+        try:
+            id_a = self.__ids[name_a]
+            id_b = self.__ids[name_b]
+        except KeyError:
+            return None
+
+        return (id_a, id_b) if id_a < id_b else (id_b, id_a)
+
+    def __effective(self, slot, now):
+        """
+        Computes the current rating of the pair in the given slot
+        """
+        rating = self.__ratings[slot]
+        if not self.__frozen[slot]:
+            rating += max(0., now - self.__crashes[slot] - RECOVERY_DELAY) \
+                * RECOVERY_RATE
+
+        return min(rating, DEFAULT_RATING)
+
+    def __effective_all(self, slots, now):
+        """
+        Computes the current ratings of the pairs in the given slots
+
+        :return: An iterable of ratings
+        """
+        if numpy is not None:
+            slots = numpy.asarray(slots, dtype=int)
+            recovery = numpy.maximum(now - self.__crashes[slots]
+                                     - RECOVERY_DELAY, 0) \
+                * RECOVERY_RATE * (1 - self.__frozen[slots])
+            return numpy.minimum(self.__ratings[slots] + recovery,
+                                 DEFAULT_RATING)
+
+        return [self.__effective(slot, now) for slot in slots]
+
+    def get(self, name_a, name_b, now=None):
+        """
+        Returns the current rating of a pair of components
+
+        :param name_a: Name of a component
+        :param name_b: Name of another component
+        :param now: Current time
+        :return: The rating of the pair
+        """
+        with self.__lock:
+            slot = self.__slots.get(self.__key(name_a, name_b))
+            if slot is None:
+                return DEFAULT_RATING
+
+            return self.__effective(slot, now or time.time())
+
+    def get_last_crash(self, name_a, name_b):
+        """
+        Returns the time of the last crash of a pair of components
+
+        :return: The time of the last crash, or 0
+        """
+        with self.__lock:
+            slot = self.__slots.get(self.__key(name_a, name_b))
+            if slot is None:
+                return 0
+
+            return self.__crashes[slot]
+
+    def update(self, name_a, name_b, delta, now):
+        """
+        Updates the rating of a pair after a crash
+
+        :param name_a: Name of a component
+        :param name_b: Name of another component
+        :param delta: Rating modification
+        :param now: Time of the crash
+        :return: The new rating
+        """
+        with self.__lock:
+            id_a = self.__intern(name_a)
+            id_b = self.__intern(name_b)
+            key = (id_a, id_b) if id_a < id_b else (id_b, id_a)
+
+            slot = self.__slots.get(key)
+            if slot is None:
+                rating = DEFAULT_RATING
+                slot = self.__allocate(key)
+            else:
+                rating = self.__effective(slot, now)
+
+            # Normalize the new rating
+            rating = min(max(rating + delta, 0), 100)
+
+            # Store it
+            self.__ratings[slot] = rating
+            self.__crashes[slot] = now
+            if rating < INCOMPATIBLE_RATING:
+                # Lower threshold reached: components are incompatible
+                self.__frozen[slot] = 1
+
+            # Schedule its eviction
+            self.__generations[slot] += 1
+            if self.__frozen[slot]:
+                heapq.heappush(self.__incompatible,
+                               (now, self.__generations[slot], slot))
+            else:
+                recovered = now + RECOVERY_DELAY \
+                    + (DEFAULT_RATING - rating) / RECOVERY_RATE
+                heapq.heappush(self.__recovering,
+                               (recovered, self.__generations[slot], slot))
+
+            if len(self.__recovering) + len(self.__incompatible) \
+                    > 2 * len(self.__slots) + 64:
+                self.__compact_heaps()
+
+            if len(self.__slots) > self.__max_pairs:
+                self.evict(now)
+
+            return rating
+
+    def __allocate(self, key):
+        """
+        Allocates a slot for the given pair
+        """
+        if self.__free:
+            slot = self.__free.pop()
+        else:
+            slot = len(self.__pairs)
+            self.__pairs.append(None)
+            self.__generations.append(0)
+            if slot >= len(self.__ratings):
+                # Grow the arrays
+                size = max(16, 2 * slot)
+                self.__ratings = _grow_array(self.__ratings, size)
+                self.__crashes = _grow_array(self.__crashes, size)
+                self.__frozen = _grow_array(self.__frozen, size)
+
+        id_a, id_b = key
+        self.__pairs[slot] = key
+        self.__slots[key] = slot
+        self.__partners.setdefault(id_a, {})[id_b] = slot
+        self.__partners.setdefault(id_b, {})[id_a] = slot
+        self.__frozen[slot] = 0
+        return slot
+
+    def __release(self, slot):
+        """
+        Releases the given slot
+        """
+        key = self.__pairs[slot]
+        id_a, id_b = key
+        del self.__slots[key]
+        for id_1, id_2 in ((id_a, id_b), (id_b, id_a)):
+            partners = self.__partners[id_1]
+            del partners[id_2]
+            if not partners:
+                del self.__partners[id_1]
+
+        self.__pairs[slot] = None
+        self.__generations[slot] += 1
+        self.__free.append(slot)
+
+    def __compact_heaps(self):
+        """
+        Removes the obsolete entries of the eviction heaps
+        """
+        generations = self.__generations
+        for heap in (self.__recovering, self.__incompatible):
+            heap[:] = [entry for entry in heap
+                       if entry[1] == generations[entry[2]]]
+            heapq.heapify(heap)
+
+    def __pop(self, heap, names, deadline=None):
+        """
+        Releases the slot of the first valid entry of the given heap
+
+        :param heap: An eviction heap
+        :param names: The set of names of evicted components to update
+        :param deadline: If given, only release an entry with an earlier time
+        :return: False if there is no entry to release
+        """
+        while heap and (deadline is None or heap[0][0] <= deadline):
+            _, generation, slot = heapq.heappop(heap)
+            if generation == self.__generations[slot]:
+                names.update(self.__names[idx] for idx in self.__pairs[slot])
+                self.__release(slot)
+                return True
+
+        return False
+
+    def evict(self, now):
+        """
+        Removes the pairs which recovered the default rating, then, if the
+        store is still too large, those closest to recovery and finally the
+        incompatible pairs which crashed the longest ago.
+        Only the evicted pairs are read.
+
+        :param now: Current time
+        :return: The set of names of the components of the evicted pairs
+        """
+        with self.__lock:
+            names = set()
+            while self.__pop(self.__recovering, names, now):
+                pass
+
+            if len(self.__slots) > self.__max_pairs:
+                # Keep some room: evict down to 90% of the maximum size
+                size = self.__max_pairs - self.__max_pairs // 10
+                while len(self.__slots) > size \
+                        and self.__pop(self.__recovering, names):
+                    pass
+
+                nb_incompatible = len(self.__slots)
+                while len(self.__slots) > size \
+                        and self.__pop(self.__incompatible, names):
+                    pass
+
+                nb_incompatible -= len(self.__slots)
+                if nb_incompatible:
+                    _logger.warning("Too many rated pairs: forgot %d "
+                                    "incompatible pair(s)", nb_incompatible)
+
+            return names
+
+    def minimum(self, name, names, nb_others, now):
+        """
+        Computes the worst rating of a component with the others on an
+        isolate, reading only the pairs which crashed
+
+        :param name: Name of the component
+        :param names: Names of the components on the isolate
+        :param nb_others: Number of other components on the isolate
+        :param now: Current time
+        :return: The minimal compatibility rating
+        """
+        with self.__lock:
+            partners = self.__partners.get(self.__ids.get(name))
+            if not partners:
+                return DEFAULT_RATING
+
+            if len(partners) < len(names):
+                component_names = self.__names
+                slots = [slot for partner, slot in partners.items()
+                         if component_names[partner] in names]
+            else:
+                ids = self.__ids
+                slots = [partners[ids[other]] for other in names
+                         if ids.get(other) in partners]
+
+            if not slots:
+                return DEFAULT_RATING
+
+            ratings = self.__effective_all(slots, now)
+            rating = ratings.min() if numpy is not None else min(ratings)
+            if len(slots) < nb_others:
+                # Some pairs never crashed
+                rating = min(rating, DEFAULT_RATING)
+
+            return float(rating)
+
+    def get_pairs(self, threshold, now):
+        """
+        Returns the pairs rated below the given threshold
+
+        :param threshold: A rating
+        :param now: Current time
+        :return: A set of sorted pairs of components names
+        """
+        with self.__lock:
+            slots = [slot for slot, key in enumerate(self.__pairs)
+                     if key is not None]
+            if not slots:
+                return set()
+
+            names = self.__names
+            return set(tuple(sorted((names[self.__pairs[slot][0]],
+                                     names[self.__pairs[slot][1]])))
+                       for rating, slot
+                       in zip(self.__effective_all(slots, now), slots)
+                       if rating < threshold)
+
 # ------------------------------------------------------------------------------
 
 
@@ -70,14 +490,8 @@ class CompatibilityCriterion(object):
         """
         Sets up members
         """
-        # sorted(Component name, Component Name) -> Rating
-        self._ratings = {}
-
-        # sorted(Component name, Component Name) -> Time of last crash
-        self._last_crash = {}
-
-        # Set of sorted(Component name, Component Name)
-        self._incompatible = set()
+        # Ratings of the pairs of components which crashed together
+        self._ratings = _PairRatings()
 
         # Injected
         self._status = None
@@ -102,44 +516,48 @@ class CompatibilityCriterion(object):
         Component invalidated
         """
         self._ratings.clear()
-        self._last_crash.clear()
-        self._incompatible.clear()
 
-    def _update_rating(self, pair, delta):
+    def get_incompatible_pairs(self, rejected=False):
         """
-        Updates the rating of the pair with the given delta
+        Returns the pairs of components known as incompatible
 
-        :param pair: A sorted pair of names
-        :param delta: Rating modification
+        :param rejected: If True, also return the pairs with a rating low
+                         enough to be voted against
+        :return: A frozen set of sorted pairs of components names
         """
-        # Normalize the new rating
-        new_rating = self._ratings.setdefault(pair, DEFAULT_RATING) + delta
-        if new_rating < 0:
-            new_rating = 0
-        elif new_rating > 100:
-            new_rating = 100
-
-        # Store it
-        self._ratings[pair] = new_rating
-
-        if new_rating < 5:
-            # Lower threshold reached: components are incompatible
-            _logger.debug("Pair %s is now incompatible", pair)
-            self._incompatible.add(pair)
+        threshold = REJECTED_RATING if rejected else INCOMPATIBLE_RATING
+        return frozenset(self._ratings.get_pairs(threshold, time.time()))
 
     def handle_event(self, event):
         """
-        Does nothing: this elector only cares about what is written in
-        configuration files
+        Updates the ratings on crashes and cleans them up on timer ticks
+
+        :param event: The event to handle
+        :return: The names of the components which ratings changed
         """
         # Get the implicated components
         components = sorted(set(component.name
                                 for component in event.components))
 
         if event.kind == 'timer':
-            self.on_timer(components)
+            return self.on_timer(components)
         elif event.kind == 'isolate.lost':
             self.on_crash(components)
+            return components
+
+    def _neighbours(self, components):
+        """
+        Checks if the given components are on the same isolate
+
+        :param components: Names of components
+        :return: True if all components are on the same isolate
+        """
+        try:
+            return len(set(self._status.get_isolate_for_component(name)
+                           for name in components)) == 1
+        except KeyError:
+            # Unknown component
+            return False
 
     def on_crash(self, components):
         """
@@ -150,10 +568,13 @@ class CompatibilityCriterion(object):
         # Get the time of the crash
         now = time.time()
 
+        # Check if components are on the same isolate
+        factor = 3 if self._neighbours(components) else 1
+
         # Update their compatibility ratings
-        for pair in itertools.combinations(components, 2):
+        for name_a, name_b in itertools.combinations(components, 2):
             # Get the last crash information
-            last_crash = self._last_crash.get(pair, 0)
+            last_crash = self._ratings.get_last_crash(name_a, name_b)
 
             if now - last_crash < 60:
                 # Less than 60s since last crash
@@ -162,58 +583,52 @@ class CompatibilityCriterion(object):
                 # More than 60s...
                 delta = -1
 
-            # Check if components are on the same isolate
-                if self._status.neighbours(pair):
-                    delta *= 3
-
-            self._update_rating(pair, delta)
-
-            # Update the last crash information
-            self._last_crash[pair] = now
+            if self._ratings.update(name_a, name_b, delta * factor, now) \
+                    < INCOMPATIBLE_RATING:
+                _logger.debug("Pair %s is now incompatible", (name_a, name_b))
 
     def on_timer(self, components):
         """
-        The timer ticks: some components have been OK before last tick and now
+        The timer ticks: ratings recover with time, so this only forgets the
+        pairs which recovered the default rating.
+
+        Well-behaving pairs are not reinforced anymore: their rating stays at
+        DEFAULT_RATING instead of growing towards 100 on each tick, and
+        crashed pairs recover up to DEFAULT_RATING only. Reinforcing them
+        would store every pair of components sharing an isolate. The votes
+        are unchanged as long as they only depend on thresholds (50 and
+        REJECTED_RATING), but the order of the isolates voted for is based on
+        crashes only.
 
         :param components: Names of the components that well behaved
+        :return: The names of the components of the forgotten pairs
         """
-        # Get the tick time
-        now = time.time()
-
-        # Update their compatibility ratings
-        for pair in itertools.combinations(components, 2):
-            if pair not in self._incompatible:
-                # Get the last crash information
-                last_crash = self._last_crash.get(pair, 0)
-                if now - last_crash > 60:
-                    # More than 60s since the last crash
-                    delta = +5
-                else:
-                    # Less than 60s...
-                    delta = +1
-
-                # Check if components are on the same isolate
-                if self._status.neighbours(pair):
-                    delta *= 2
-
-                self._update_rating(pair, delta)
-
-    def vote(self, candidates, subject, ballot):
+        evicted = self._ratings.evict(time.time())
+        if evicted:
+            _logger.debug("Forgot the recovered pairs of %d components",
+                          len(evicted))
+        return evicted
+
+    @staticmethod
+    def __vote(subject, candidates, contents, rate):
         """
-        Votes for the isolate(s) with the minimal compatibility distance
+        Computes the votes for the isolate(s) with the minimal compatibility
+        distance
 
-        :param candidates: Isolates to vote for
         :param subject: The component to place
-        :param ballot: The vote ballot
+        :param candidates: Isolates to vote for
+        :param contents: Names of the components on each isolate
+        :param rate: Method computing the minimal compatibility rating of a
+                     component with the others on an isolate
+        :return: A tuple: (candidates voted for, candidates voted against)
         """
         name = subject.name
         compatibilities = []
         neutral = None
 
-        for candidate in candidates:
+        for candidate, names in zip(candidates, contents):
             # Analyze each candidate
-            components = candidate.components
-            if not components:
+            if not names:
                 # Avoid the "neutral" isolate
                 if not candidate.name:
                     neutral = candidate
@@ -226,21 +641,14 @@ class CompatibilityCriterion(object):
                 compatibilities.append((90, candidate))
 
             else:
-                # Get all factories on the isolate
-                pairs = set(tuple(sorted((name, component.name)))
-                            for component in components)
-
-                # Remove identity
-                pairs.discard((name, name))
-
-                if pairs:
+                # Ignore identity
+                nb_others = len(names) - (name in names)
+                if nb_others:
                     # Compute the worst compatibility rating on this isolate
-                    min_compatibility = min(self._ratings.get(pair,
-                                                              DEFAULT_RATING)
-                                            for pair in pairs)
-                    compatibilities.append((min_compatibility, candidate))
+                    compatibilities.append((rate(name, names, nb_others),
+                                            candidate))
 
-                elif subject in candidate.components:
+                elif name in names:
                     # Isolate where the component already is
                     _logger.info("Previous isolate for component found !")
                     compatibilities.append((95, candidate))
@@ -249,20 +657,71 @@ class CompatibilityCriterion(object):
         compatibilities.sort(key=operator.itemgetter(0), reverse=True)
 
         # Vote
+        votes_for = []
+        votes_against = []
         for compatibility, candidate in compatibilities:
             if compatibility >= 50:
                 # >= 50% of compatibility: OK
-                ballot.append_for(candidate)
+                votes_for.append(candidate)
 
-            elif compatibility < 30:
+            elif compatibility < REJECTED_RATING:
                 # < 30% of compatibility: Reject
-                ballot.append_against(candidate)
+                votes_against.append(candidate)
 
             # else: blank vote
 
-        if not ballot.get_for() and neutral is not None:
+        if not votes_for and neutral is not None:
             # We voted for no one: vote for neutral
-            ballot.append_for(neutral)
+            votes_for.append(neutral)
+
+        return votes_for, votes_against
+
+    def vote(self, candidates, subject, ballot):
+        """
+        Votes for the isolate(s) with the minimal compatibility distance
+
+        :param candidates: Isolates to vote for
+        :param subject: The component to place
+        :param ballot: The vote ballot
+        """
+        now = time.time()
+        contents = [set(component.name for component in candidate.components)
+                    for candidate in candidates]
+        votes_for, votes_against = self.__vote(
+            subject, candidates, contents,
+            lambda name, names, nb_others:
+            self._ratings.minimum(name, names, nb_others, now))
+
+        for candidate in votes_for:
+            ballot.append_for(candidate)
+
+        for candidate in votes_against:
+            ballot.append_against(candidate)
 
         # Lock our vote
         ballot.lock()
+
+    def vote_batch(self, candidates, subjects, ballot):
+        """
+        Votes for a batch of components, with the same rules as vote()
+
+        :param candidates: Isolates to vote for
+        :param subjects: The components to place
+        :param ballot: A BatchBallot bean
+        """
+        now = time.time()
+
+        # Prepare the content of the isolates once
+        contents = [frozenset(component.name
+                              for component in candidate.components)
+                    for candidate in candidates]
+
+        def rate(name, names, nb_others):
+            """
+            Computes the worst rating using only the pairs which crashed
+            """
+            return self._ratings.minimum(name, names, nb_others, now)
+
+        for row, subject in enumerate(subjects):
+            ballot.set_votes(row, *self.__vote(subject, candidates, contents,
+                                               rate))
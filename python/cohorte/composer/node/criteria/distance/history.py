@@ -128,89 +128,160 @@ class HistoryCriterion(object):
                      '\n'.join('- ' + ', '.join(crash)
                                for crash in self._crashes))
 
-    def vote(self, candidates, subject, ballot):
+    def __find_crash(self, name, names):
         """
-        Votes for the isolate(s) with the minimal compatibility distance
+        Looks for a known crashing solution in the future content of an
+        isolate
 
-        :param candidates: Isolates to vote for
-        :param subject: The component to place
-        :param ballot: The vote ballot
+        :param name: Name of the component to place
+        :param names: Names of the components on the isolate
+        :return: The crashing solution, or None
+        """
+        future_content = set(names)
+        future_content.add(name)
+
+        for crash in self._crashes:
+            if future_content.issuperset(crash):
+                # Solution is (a superset of) a crashing solution
+                return crash
+
+    @staticmethod
+    def __vote(name, candidates, contents, find_crash):
         """
-        # Subject component name
-        component_name = subject.name
+        Computes the votes for the isolate(s) which would gather the most
+        components
 
+        :param name: Name of the component to place
+        :param candidates: Isolates to vote for
+        :param contents: Names of the components on each isolate
+        :param find_crash: Method returning the known crashing solution
+                           which would be reached by adding the component to
+                           an isolate, or None
+        :return: A tuple: (candidates voted for, candidates voted against)
+        """
         # Preference for candidate: (number of components, candidate)
         preference = []
+        votes_against = []
 
         # Neutral isolate (last resort)
         neutral_candidate = None
 
-        # Prepare a dictionary: candidate -> components
-        all_components = {}
-        for candidate in candidates:
-            components = sorted(component.name
-                                for component in candidate.components)
-            if not components and not candidate.name:
-                # Found the neutral isolate (do not add it to 'all_components')
+        # Number of other components on each candidate
+        sorted_candidates = []
+        for candidate, names in zip(candidates, contents):
+            if not names and not candidate.name:
+                # Found the neutral isolate
                 neutral_candidate = candidate
             else:
-                if component_name in components:
-                    # Found the isolate where the isolate already is
-                    components.remove(component_name)
-
-                # Store information
-                all_components[candidate] = components
+                # Ignore the isolate where the component already is
+                sorted_candidates.append(
+                    (len(names) - (name in names), candidate, names))
 
         # Sort candidates by number of components already there
-        sorted_candidates = [(len(content), candidate)
-                             for candidate, content in all_components.items()]
-        sorted_candidates.sort(key=lambda x: (-x[0], x[1].name))
+        sorted_candidates.sort(key=lambda x: (-x[0], x[1].name or ""))
 
         # Compute candidate preference (empty or OK)
-        for _, candidate in sorted_candidates:
+        for nb_components, candidate, names in sorted_candidates:
             # Analyze each candidate
-            components = all_components[candidate]
-            if not components:
+            if not nb_components:
                 # No components, we're OK with it
                 preference.append((0, candidate))
 
             else:
                 # Ensure that the content of this isolate won't be a known
                 # crashing solution
-                future_content = set(components)
-                future_content.add(component_name)
-
-                for crash in self._crashes:
-                    if future_content.issuperset(crash):
-                        # Solution is (a superset of) a crashing solution
-                        _logger.info(
-                            "Known bad solution for %s:\n%s\ndue to:\n%s",
-                            component_name,
-                            ', '.join(name for name in sorted(future_content)),
-                            ', '.join(name for name in sorted(crash)))
-                        ballot.append_against(candidate)
-                        break
+                crash = find_crash(name, names)
+                if crash is not None:
+                    _logger.info("Known bad solution for %s on %s, due to:\n%s",
+                                 name, candidate,
+                                 ', '.join(sorted(crash)))
+                    votes_against.append(candidate)
                 else:
                     # Not a crashing solution
-                    preference.append((len(components), candidate))
+                    preference.append((nb_components, candidate))
 
         # TODO: tweak vote preferences to reduce the number of moves
 
         if preference:
             # Sort results (greater is better: it gathers components)
             preference.sort(key=operator.itemgetter(0), reverse=True)
-            _logger.info("Vote preference for %s: %s",
-                         component_name, ', '.join(item[1].name or "Neutral"
-                                                   for item in preference))
+            if _logger.isEnabledFor(logging.INFO):
+                _logger.info("Vote preference for %s: %s",
+                             name, ', '.join(item[1].name or "Neutral"
+                                             for item in preference))
 
             # Vote
-            for _, candidate in preference:
-                ballot.append_for(candidate)
+            return [item[1] for item in preference], votes_against
 
         elif neutral_candidate is not None:
             # We voted for no one: vote for neutral
-            _logger.info("Using neutral candidate for %s", component_name)
-            ballot.append_for(neutral_candidate)
+            _logger.info("Using neutral candidate for %s", name)
+            return [neutral_candidate], votes_against
+
+        return [], votes_against
+
+    def vote(self, candidates, subject, ballot):
+        """
+        Votes for the isolate(s) with the minimal compatibility distance
+
+        :param candidates: Isolates to vote for
+        :param subject: The component to place
+        :param ballot: The vote ballot
+        """
+        contents = [set(component.name for component in candidate.components)
+                    for candidate in candidates]
+        votes_for, votes_against = self.__vote(subject.name, candidates,
+                                               contents, self.__find_crash)
+        for candidate in votes_against:
+            ballot.append_against(candidate)
+
+        for candidate in votes_for:
+            ballot.append_for(candidate)
 
         # Lock our vote
         ballot.lock()
+
+    def vote_batch(self, candidates, subjects, ballot):
+        """
+        Votes for a batch of components, with the same rules as vote()
+
+        :param candidates: Isolates to vote for
+        :param subjects: The components to place
+        :param ballot: A BatchBallot bean
+        """
+        # Prepare the content of the isolates once
+        contents = [frozenset(component.name
+                              for component in candidate.components)
+                    for candidate in candidates]
+
+        # Crashing solutions reached by each isolate, either as is or when
+        # adding a given component: Content -> (crash, Name -> crash)
+        reached = {}
+        for names in contents:
+            if names in reached:
+                continue
+
+            full = None
+            partial = {}
+            for crash in self._crashes:
+                missing = set(crash).difference(names)
+                if not missing:
+                    full = crash
+                elif len(missing) == 1:
+                    partial.setdefault(missing.pop(), crash)
+
+            reached[names] = (full, partial)
+
+        def find_crash(name, names):
+            """
+            Uses the pre-computed crashing solutions
+            """
+            full, partial = reached[names]
+            if full is not None:
+                return full
+
+            return partial.get(name)
+
+        for row, subject in enumerate(subjects):
+            ballot.set_votes(row, *self.__vote(subject.name, candidates,
+                                               contents, find_crash))
@@ -28,6 +28,7 @@ Votes according to components stability (crashes vs time)
 import logging
 import operator
 import time
+import weakref
 
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Provides, Instantiate, \
@@ -49,6 +50,72 @@ _logger = logging.getLogger(__name__)
 # ------------------------------------------------------------------------------
 
 
+class _IsolateStats(object):
+    """
+    Running aggregates of the ratings of the components of an isolate
+    """
+    __slots__ = ('members', 'total', 'total_sq')
+
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Component name -> Rating taken into account
+        self.members = {}
+
+        # Sum of the ratings and of their squares
+        self.total = 0.
+        self.total_sq = 0.
+
+    def add(self, name, rating):
+        """
+        Adds a component to the aggregates
+
+        :param name: Name of the component
+        :param rating: Rating of the component
+        """
+        self.members[name] = rating
+        self.total += rating
+        self.total_sq += rating * rating
+
+    def remove(self, name):
+        """
+        Removes a component from the aggregates
+
+        :param name: Name of the component
+        """
+        rating = self.members.pop(name)
+        self.total -= rating
+        self.total_sq -= rating * rating
+
+    def update(self, name, rating):
+        """
+        Updates the rating of a component
+
+        :param name: Name of the component
+        :param rating: New rating of the component
+        """
+        self.remove(name)
+        self.add(name, rating)
+
+    @property
+    def mean(self):
+        """
+        Mean rating of the components
+        """
+        return self.total / len(self.members)
+
+    @property
+    def variance(self):
+        """
+        Variance of the ratings of the components
+        """
+        mean = self.mean
+        return max(0., self.total_sq / len(self.members) - mean * mean)
+
+# ------------------------------------------------------------------------------
+
+
 @ComponentFactory()
 @Provides(cohorte.composer.SERVICE_NODE_CRITERION_RELIABILITY)
 @Instantiate('cohorte-composer-node-criterion-crash')
@@ -70,6 +137,9 @@ class CrashCriterion(object):
         # Unstable components names
         self._unstable = set()
 
+        # Candidate isolate -> (Components, _IsolateStats)
+        self._isolates = weakref.WeakKeyDictionary()
+
     def __str__(self):
         """
         String representation
@@ -92,6 +162,7 @@ class CrashCriterion(object):
         self._ratings.clear()
         self._last_crash.clear()
         self._unstable.clear()
+        self._isolates.clear()
 
     def _update_rating(self, component, delta):
         """
@@ -99,45 +170,62 @@ class CrashCriterion(object):
 
         :param component: A component name
         :param delta: Rating modification
+        :return: True if the rating changed
         """
         # Normalize the new rating
-        new_rating = self._ratings.setdefault(component, 50) + delta
+        old_rating = self._ratings.setdefault(component, 50)
+        new_rating = old_rating + delta
         if new_rating < 0:
             new_rating = 0
         elif new_rating > 100:
             new_rating = 100
 
+        if new_rating == old_rating:
+            # Bound already reached
+            return False
+
         # Store it
         self._ratings[component] = new_rating
 
+        # Update the statistics of the isolates hosting the component
+        for _, stats in list(self._isolates.values()):
+            if component in stats.members:
+                stats.update(component, new_rating)
+
         if new_rating < 5:
             # Lower threshold reached: components are incompatible
             self._unstable.add(component)
 
+        return True
+
     def handle_event(self, event):
         """
-        Does nothing: this elector only cares about what is written in
-        configuration files
+        Updates the stability ratings on crashes and timer ticks
+
+        :param event: The event to handle
+        :return: The names of the components which rating changed
         """
         # Get the implicated components
         components = sorted(set(component.name
                                 for component in event.components))
 
         if event.kind == 'timer':
-            self.on_timer(components)
+            return self.on_timer(components)
         elif event.kind == 'isolate.lost':
-            self.on_crash(components)
+            return self.on_crash(components)
 
     def on_crash(self, components):
         """
         An isolate has been lost
 
         :param components: Names of the components in the crashed isolate
+        :return: The names of the components which rating changed
         """
         # Get the time of the crash
         now = time.time()
 
         # Update their stability ratings
+        changed = []
         for name in components:
             if name not in self._unstable:
                 # Get the last crash information
@@ -145,25 +233,32 @@ class CrashCriterion(object):
                 time_since_crash = now - last_crash
                 if time_since_crash < 60:
                     # Less than 60s since the last crash
-                    self._update_rating(name, -10)
+                    delta = -10
 
                 else:
                     # More than 60s
-                    self._update_rating(name, -5)
+                    delta = -5
+
+                if self._update_rating(name, delta):
+                    changed.append(name)
 
             # Update the last crash information
             self._last_crash[name] = now
 
+        return changed
+
     def on_timer(self, components):
         """
         The timer ticks: some components have been OK before last tick and now
 
         :param components: Names of the components that well behaved
+        :return: The names of the components which rating changed
         """
         # Get the tick time
         now = time.time()
 
         # Update their stability ratings
+        changed = []
         for name in components:
             if name not in self._unstable:
                 # Get the last crash information
@@ -171,76 +266,145 @@ class CrashCriterion(object):
                 time_since_crash = now - last_crash
                 if time_since_crash > 120:
                     # More than 120s since the last crash
-                    self._update_rating(name, +8)
+                    delta = +8
 
                 elif time_since_crash > 60:
                     # More than 60s since the last crash
-                    self._update_rating(name, +4)
+                    delta = +4
 
-                # do nothing the minute right after a crash
+                else:
+                    # do nothing the minute right after a crash
+                    continue
+
+                if self._update_rating(name, delta):
+                    changed.append(name)
+
+        return changed
 
     def compute_stats(self, components):
         """
         Computes statistics about the components of an isolate
 
         :param components: Components already assigned to the isolate
+        :return: The mean rating of the components
         """
         # Get the components names
         names = set(component.name for component in components)
 
-        # TODO: compute variance too ?
-
         # Mean rating
-        return sum(self._ratings.setdefault(name, 90)
-                   for name in names) / len(names)
+        return float(sum(self._ratings.setdefault(name, 90)
+                         for name in names)) / len(names)
 
-    def vote(self, candidates, subject, ballot):
+    def get_stats(self, candidate, components=None):
         """
-        Votes the isolate that matches the best the stability of the given
-        component
+        Returns the statistics about the components of a candidate isolate.
+        They are updated incrementally, according to the components added or
+        removed since the previous call and to the ratings modifications.
+
+        :param candidate: A candidate isolate
+        :param components: Current components of the isolate (optional)
+        :return: A (mean, variance) tuple
+        """
+        if components is None:
+            components = candidate.components
+
+        try:
+            known, stats = self._isolates[candidate]
+        except KeyError:
+            known, stats = frozenset(), _IsolateStats()
+
+        if known is not components and known != components:
+            # Components moved
+            for component in known.difference(components):
+                stats.remove(component.name)
+
+            for component in components.difference(known):
+                stats.add(component.name,
+                          self._ratings.setdefault(component.name, 90))
+
+            self._isolates[candidate] = (components, stats)
+
+        return stats.mean, stats.variance
+
+    def __vote(self, subject, candidates, contents):
+        """
+        Computes the votes for the isolates that match the best the stability
+        of the given component
 
-        :param candidates: Isolates to vote for
         :param subject: The component to place
-        :param ballot: The vote ballot
+        :param candidates: Isolates to vote for
+        :param contents: Components on each isolate
+        :return: A tuple: (candidates voted for, candidates voted against)
         """
         # Get/Set the rating of the component
         rating = self._ratings.setdefault(subject.name, 50.0)
 
         # Distance with other components
         distances = []
+        votes_against = []
 
-        for candidate in candidates:
-            if candidate.components:
-                if len(candidate.components) == 1 \
-                        and subject in candidate.components:
+        for candidate, components in zip(candidates, contents):
+            if components:
+                if len(components) == 1 and subject in components:
                     # Single one in the isolate where we were
-                    distances.append((0, candidate))
+                    distances.append((0, 0, candidate))
                 elif subject.name in self._unstable:
                     # Don't try to go with other components...
-                    ballot.append_against(candidate)
+                    votes_against.append(candidate)
                 elif rating > 20:
                     # Only accept to work with other components if the given
                     # one is stable enough (> 20% stability rating)
-                    # Compute the mean and variance of the current components
+                    # Get the mean and variance of the current components
                     # ratings
-                    mean = self.compute_stats(candidate.components)
+                    mean, variance = self.get_stats(candidate, components)
                     distance = abs(mean - rating)
                     if distance < 20:
-                        # Prefer small distances
-                        distances.append((distance, candidate))
+                        # Prefer small distances, then homogeneous isolates
+                        distances.append((distance, variance, candidate))
 
             else:
                 # Prefer non-"neutral" isolates
                 if not candidate.name:
-                    distances.append((20, candidate))
+                    distances.append((20, 0, candidate))
 
                 else:
                     # First component of this isolate
-                    distances.append((5, candidate))
+                    distances.append((5, 0, candidate))
 
         # Sort computed distances (lower is better)
-        distances.sort(key=operator.itemgetter(0))
+        distances.sort(key=operator.itemgetter(0, 1))
+        return [distance[2] for distance in distances], votes_against
+
+    def vote(self, candidates, subject, ballot):
+        """
+        Votes the isolate that matches the best the stability of the given
+        component
+
+        :param candidates: Isolates to vote for
+        :param subject: The component to place
+        :param ballot: The vote ballot
+        """
+        votes_for, votes_against = self.__vote(
+            subject, candidates,
+            [candidate.components for candidate in candidates])
+
+        for candidate in votes_against:
+            ballot.append_against(candidate)
 
         # Use them as our vote
-        ballot.set_for(distance[1] for distance in distances)
+        ballot.set_for(votes_for)
         ballot.lock()
+
+    def vote_batch(self, candidates, subjects, ballot):
+        """
+        Votes for a batch of components, with the same rules as vote()
+
+        :param candidates: Isolates to vote for
+        :param subjects: The components to place
+        :param ballot: A BatchBallot bean
+        """
+        # Prepare the content of the isolates once
+        contents = [candidate.components for candidate in candidates]
+
+        for row, subject in enumerate(subjects):
+            ballot.set_votes(row, *self.__vote(subject, candidates, contents))
@@ -30,10 +30,11 @@ criteria.
 # Standard library
 import logging
 import operator
+import threading
 
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Requires, Provides, \
-    Instantiate
+    Property, Instantiate
 
 # Composer
 import cohorte.composer
@@ -63,6 +64,7 @@ _logger = logging.getLogger(__name__)
           cohorte.composer.SERVICE_NODE_CRITERION_RELIABILITY, aggregate=True,
           optional=True)
 @Requires('_vote', cohorte.vote.SERVICE_VOTE_CORE)
+@Property('_batch', 'vote.batch', False)
 @Instantiate('cohorte-composer-node-distributor')
 class IsolateDistributor(object):
     """
@@ -84,6 +86,14 @@ class IsolateDistributor(object):
         # Distribution loop index
         self._nb_distribution = 0
 
+        # Use batches of votes
+        self._batch = False
+
+        # Names of the components affected by the events handled since the
+        # last call to pop_dirty()
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+
     @staticmethod
     def _get_matching_isolates(component, isolates):
         """
@@ -123,10 +133,6 @@ class IsolateDistributor(object):
         for candidate in all_candidates:
             candidate.hide(components)
 
-        # Prepare the return
-        updated_isolates = set()
-        new_isolates = set()
-
         # Prepare parameters of the vote
         # -> -5 votes on "against"
         # -> Remove candidate after 2 "against"
@@ -136,6 +142,47 @@ class IsolateDistributor(object):
         self._nb_distribution += 1
         prefix = "Distribution {0}".format(self._nb_distribution)
 
+        # Prepare the return
+        updated_isolates = set()
+        new_isolates = set()
+
+        if self._batch:
+            # Components with a configured isolate are placed one by one:
+            # their vote can rename or create an isolate
+            self._distribute_sequential(
+                electors, [component for component in components
+                           if component.isolate],
+                all_candidates, prefix, kind, parameters,
+                updated_isolates, new_isolates)
+
+            self._distribute_batch(
+                electors, [component for component in components
+                           if not component.isolate],
+                all_candidates, prefix, kind, parameters,
+                updated_isolates, new_isolates)
+        else:
+            self._distribute_sequential(
+                electors, components, all_candidates, prefix, kind,
+                parameters, updated_isolates, new_isolates)
+
+        return tuple(updated_isolates), tuple(new_isolates)
+
+    def _distribute_sequential(self, electors, components, all_candidates,
+                               prefix, kind, parameters, updated_isolates,
+                               new_isolates):
+        """
+        Computes the distribution of the given components with one vote per
+        component, sorted by name
+
+        :param electors: The electors
+        :param components: A list of RawComponent beans
+        :param all_candidates: The set of existing eligible isolates (updated)
+        :param prefix: Prefix of the names of the votes
+        :param kind: Kind of vote
+        :param parameters: Parameters of the vote
+        :param updated_isolates: The set of updated isolates (updated)
+        :param new_isolates: The set of new isolates (updated)
+        """
         # Sort components by name
         sorted_components = list(components)
         sorted_components.sort(key=operator.attrgetter('name'))
@@ -166,6 +213,9 @@ class IsolateDistributor(object):
                 # Vote without result
                 isolate = neutral
 
+            # Neutral or forced isolate (coup d'État)
+            is_new = isolate not in all_candidates
+
             # Associate the component to the isolate
             isolate.add_component(component)
 
@@ -177,7 +227,7 @@ class IsolateDistributor(object):
                 isolate.accepted_rename()
 
             # Store the isolate
-            if isolate is neutral:
+            if is_new:
                 # New isolate
                 new_isolates.add(isolate)
 
@@ -193,7 +243,127 @@ class IsolateDistributor(object):
                     # Re-hide component
                     other_isolate.hide((component,))
 
-        return tuple(updated_isolates), tuple(new_isolates)
+    def _distribute_batch(self, electors, components, all_candidates,
+                          prefix, kind, parameters, updated_isolates,
+                          new_isolates):
+        """
+        Computes the distribution of the given components with batches of
+        votes: in each pass, all the components of a language are placed at
+        once, according to the state of the isolates at the beginning of the
+        pass. Only one new isolate is created per language and per pass, and
+        components known as incompatible by the electors can't join the same
+        isolate during a pass: the other components are distributed in the
+        next pass.
+
+        :param electors: The electors
+        :param components: A list of RawComponent beans
+        :param all_candidates: The set of existing eligible isolates (updated)
+        :param prefix: Prefix of the names of the votes
+        :param kind: Kind of vote
+        :param parameters: Parameters of the vote
+        :param updated_isolates: The set of updated isolates (updated)
+        :param new_isolates: The set of new isolates (updated)
+        """
+        # Pairs of components that must not join an isolate in the same pass
+        conflicts = {}
+        for elector in electors:
+            try:
+                pairs = elector.get_incompatible_pairs(True)
+            except AttributeError:
+                # This elector doesn't know about incompatibilities
+                continue
+
+            for name_a, name_b in pairs:
+                conflicts.setdefault(name_a, set()).add(name_b)
+                conflicts.setdefault(name_b, set()).add(name_a)
+
+        # Group components by language, sorted by name
+        pending = {}
+        for component in sorted(components, key=operator.attrgetter('name')):
+            pending.setdefault(component.language, []).append(component)
+
+        nb_pass = 0
+        while pending:
+            nb_pass += 1
+            next_pending = {}
+            for language, subjects in sorted(pending.items()):
+                # Compute the isolates that could match these components
+                matching_isolates = sorted(
+                    self._get_matching_isolates(subjects[0], all_candidates),
+                    key=lambda iso: iso.name if iso.name is not None else "")
+
+                # Add an empty isolate in the candidates
+                neutral = beans.EligibleIsolate()
+                matching_isolates.append(neutral)
+
+                for candidate in matching_isolates:
+                    # Show the components in this vote
+                    for component in subjects:
+                        candidate.unhide(component)
+
+                # Vote !
+                results = self._vote.vote_batch(
+                    electors, matching_isolates, subjects,
+                    "{0}-{1}-{2}".format(prefix, language, nb_pass),
+                    kind, parameters)
+
+                # Isolates created by a coup d'État: Name -> Isolate
+                forced = {}
+
+                # Component -> Isolate
+                placed = {}
+
+                # Isolate -> Names of the components placed during this pass
+                pass_content = {}
+                for component, isolate in zip(subjects, results):
+                    if isolate is None:
+                        # Vote without result
+                        isolate = neutral
+
+                    elif isolate not in all_candidates \
+                            and isolate is not neutral:
+                        # Same forced isolate for all components
+                        isolate = forced.setdefault(isolate.name, isolate)
+
+                    if (isolate is neutral and neutral.components) \
+                            or not conflicts.get(component.name, set()) \
+                            .isdisjoint(pass_content.get(isolate, ())):
+                        # A single new isolate per pass and no incompatible
+                        # components placed together: vote again
+                        next_pending.setdefault(language, []) \
+                            .append(component)
+                        continue
+
+                    # Associate the component to the isolate
+                    isolate.add_component(component)
+                    placed[component] = isolate
+                    pass_content.setdefault(isolate, set()).add(component.name)
+
+                    # Add the new isolate for the next pass
+                    all_candidates.add(isolate)
+
+                    # Store the isolate
+                    if isolate is neutral or isolate in forced.values():
+                        # New isolate
+                        new_isolates.add(isolate)
+
+                    elif isolate not in new_isolates:
+                        # Old one updated
+                        updated_isolates.add(isolate)
+
+                for candidate in matching_isolates:
+                    if candidate in pass_content:
+                        # Elected: isolate rename accepted
+                        if not candidate.name:
+                            candidate.accepted_rename()
+                    else:
+                        candidate.rejected_rename()
+
+                    # Re-hide the components placed elsewhere or pending
+                    candidate.hide([component for component in subjects
+                                    if placed.get(component) is not candidate])
+
+            pending = next_pending
 
     def handle_event(self, event):
         """
@@ -205,5 +375,28 @@ class IsolateDistributor(object):
         electors = set(self._distance_criteria)
         electors.update(self._reliability_criteria)
 
+        affected = set()
         for elector in electors:
-            elector.handle_event(event)
+            changed = elector.handle_event(event)
+            if changed:
+                affected.update(changed)
+
+        if not event.good:
+            # A degradation always affects the components involved
+            affected.update(component.name for component in event.components)
+
+        with self._dirty_lock:
+            self._dirty.update(affected)
+
+    def pop_dirty(self):
+        """
+        Returns the names of the components affected by the events handled
+        since the previous call, i.e. which could be placed differently
+
+        :return: A set of components names
+        """
+        with self._dirty_lock:
+            dirty = self._dirty
+            self._dirty = set()
+
+        return dirty
@@ -29,13 +29,19 @@ criteria.
 
 # Standard library
 import logging
+import threading
+import time
 
 # iPOPO Decorators
-from pelix.ipopo.decorators import ComponentFactory, Provides, \
+from pelix.ipopo.decorators import ComponentFactory, Provides, Requires, \
     Instantiate
 
-# OR-Tools Linear solver
-from ortools.linear_solver import pywraplp as ortools
+try:
+    # OR-Tools Linear solver
+    from ortools.linear_solver import pywraplp as ortools
+except ImportError:
+    # Only the greedy solver will be used
+    ortools = None
 
 # Composer
 from cohorte.composer.node.beans import EligibleIsolate
@@ -51,26 +57,185 @@ __version__=cohorte.version.__version__
 
 _logger = logging.getLogger(__name__)
 
+SOLVER_TIME_LIMIT = 5000
+""" Maximum time given to OR-Tools to solve a distribution, in milliseconds """
+
+SOLVER_MAX_VARIABLES = 50000
+""" Above this number of variables, the greedy solution is kept as is """
+
+# ------------------------------------------------------------------------------
+
+
+def _language_group(language):
+    """
+    Returns the group of languages that can share an isolate with the given
+    one
+
+    :param language: A component or isolate language
+    :return: The language group
+    """
+    # FIXME: same trick as the vote distributor (python/python3 comparison)
+    if language and language.startswith('python'):
+        return 'python'
+
+    return language
+
+
+def _greedy_solve(names, conflicts, bins):
+    """
+    Greedy graph coloring: places the most constrained components first, each
+    one in the first bin without incompatible components. New bins are
+    appended when necessary.
+
+    :param names: Names of the components to place
+    :param conflicts: Name -> set of incompatible components names
+    :param bins: List of the sets of names already in each bin (updated)
+    :return: A Name -> bin index dictionary
+    """
+    assignment = {}
+    for name in sorted(names, key=lambda item: (-len(conflicts.get(item, ())),
+                                                item)):
+        incompatible = conflicts.get(name)
+        for idx, content in enumerate(bins):
+            if not incompatible or content.isdisjoint(incompatible):
+                break
+        else:
+            # No compatible bin: open a new one
+            idx = len(bins)
+            bins.append(set())
+
+        bins[idx].add(name)
+        assignment[name] = idx
+
+    return assignment
+
+
+def _ortools_solve(names, conflicts, bins, nb_bins, hint):
+    """
+    Places the given components, minimizing the number of new bins
+
+    :param names: Names of the components to place
+    :param conflicts: Name -> set of incompatible components names
+    :param bins: List of the sets of names already in each bin
+    :param nb_bins: Maximum number of bins, including new ones
+    :param hint: A valid Name -> bin index solution, used as starting point
+    :return: A Name -> bin index dictionary, or None if no solution was found
+    """
+    nb_fixed = len(bins)
+    solver = ortools.Solver("Components distribution",
+                            ortools.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    solver.SetTimeLimit(SOLVER_TIME_LIMIT)
+
+    # Declare variables
+    # ... component on bin, only where no incompatible component is fixed
+    iso = {}
+    for name in names:
+        incompatible = conflicts.get(name, ())
+        for j in range(nb_bins):
+            if j >= nb_fixed or bins[j].isdisjoint(incompatible):
+                iso[name, j] = solver.IntVar(0, 1, "{0} on {1}"
+                                             .format(name, j))
+
+    # ... new bins in use (for the objective)
+    used = [solver.IntVar(0, 1, "Isolate {0}".format(j))
+            for j in range(nb_fixed, nb_bins)]
+
+    # Constraints:
+    # ... 1 bin per component
+    for name in names:
+        solver.Add(solver.Sum(iso[name, j] for j in range(nb_bins)
+                              if (name, j) in iso) == 1)
+
+    # ... a new bin is used as soon as it hosts a component
+    for (name, j), variable in iso.items():
+        if j >= nb_fixed:
+            solver.Add(variable <= used[j - nb_fixed])
+
+    # ... avoid incompatible components in the same bin
+    placed = set(names)
+    for name in names:
+        for other in conflicts.get(name, ()):
+            if other in placed and name < other:
+                for j in range(nb_bins):
+                    if (name, j) in iso and (other, j) in iso:
+                        solver.Add(iso[name, j] + iso[other, j] <= 1)
+
+    # ... new bins are used in order (avoids symmetric solutions)
+    for current, following in zip(used, used[1:]):
+        solver.Add(current >= following)
+
+    # Define the objective: minimize the number of new bins
+    solver.Minimize(solver.Sum(used))
+
+    # Start from the greedy solution
+    variables = list(iso.items())
+    try:
+        solver.SetHint([variable for _, variable in variables],
+                       [1. if hint[name] == j else 0.
+                        for (name, j), _ in variables])
+    except AttributeError:
+        # Hints not supported by this version of OR-Tools
+        pass
+
+    if solver.Solve() not in (ortools.Solver.OPTIMAL,
+                              ortools.Solver.FEASIBLE):
+        return None
+
+    return {name: j for (name, j), variable in variables
+            if variable.solution_value() > .5}
+
 # ------------------------------------------------------------------------------
 
 
 @ComponentFactory()
 @Provides(cohorte.composer.SERVICE_DISTRIBUTOR_ISOLATE)
+@Requires('_distance_criteria',
+          cohorte.composer.SERVICE_NODE_CRITERION_DISTANCE, aggregate=True,
+          optional=True)
 @Instantiate('cohorte-composer-node-distributor')
 class IsolateDistributor(object):
     """
     Clusters components into groups. Each group corresponds to an isolate.
+
+    Components are kept on their current isolate while they are compatible
+    with its other components; only the remaining ones are placed by the
+    solver, which avoids putting incompatible components together while
+    minimizing the number of new isolates.
     """
     def __init__(self):
         """
         Sets up members
         """
+        # Distance criteria, providing the incompatible pairs
+        self._distance_criteria = []
+
         # Number of calls to this distributor
         self._nb_distribution = 0
 
         # Names of components considered unstable
         self.__unstable = set()
 
+        # Names of the components affected by the events handled since the
+        # last call to pop_dirty()
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+
+    def _get_incompatible_pairs(self):
+        """
+        Retrieves the pairs of incompatible components from the criteria
+
+        :return: A set of pairs of components names
+        """
+        pairs = set()
+        for criterion in self._distance_criteria or ():
+            try:
+                pairs.update(criterion.get_incompatible_pairs())
+            except AttributeError:
+                # This criterion doesn't know about incompatibilities
+                pass
+
+        return pairs
+
     def distribute(self, components, existing_isolates):
         """
         Computes the distribution of the given components
@@ -79,6 +244,9 @@ class IsolateDistributor(object):
         :param existing_isolates: A set of pre-existing eligible isolates
         :return: A tuple of tuples: updated and new EligibleIsolate beans
         """
+        start = time.time()
+        self._nb_distribution += 1
+
         # Prepare the lists of updated and new isolates
         updated_isolates = set()
         new_isolates = set()
@@ -86,6 +254,15 @@ class IsolateDistributor(object):
         # Create a map name -> isolate bean
         map_isolates = {isolate.name: isolate for isolate in existing_isolates}
 
+        # Store the current isolate of each component, then hide the
+        # components to distribute
+        previous = {}
+        for isolate in existing_isolates:
+            for component in isolate.components:
+                previous[component.name] = isolate
+
+            isolate.hide(components)
+
         # 1. Predefined host isolates
         reserved_isolates = set()
         remaining = set()
@@ -96,8 +273,9 @@ class IsolateDistributor(object):
                 try:
                     # Use existing bean
                     isolate = map_isolates[isolate_name]
-                    isolate.add_component(component)
-                    updated_isolates.add(isolate)
+                    self.__place(isolate, component, previous)
+                    if isolate not in new_isolates:
+                        updated_isolates.add(isolate)
                 except KeyError:
                     # Create a new bean
                     isolate = EligibleIsolate(component.isolate,
@@ -124,149 +302,172 @@ class IsolateDistributor(object):
                 new_isolates.add(isolate)
             else:
                 # Store stable component, grouped by language
-                remaining_stable.setdefault(component.language, set()) \
+                remaining_stable.setdefault(
+                    _language_group(component.language), set()) \
                     .add(component)
 
-        for language, components in remaining_stable.items():
-            # Gather components according to their compatibility
-            updated, added = self.__csp_dist(map_isolates, components,
-                                             language)
+        # ... group candidate isolates the same way
+        candidates = {}
+        for isolate in map_isolates.values():
+            candidates.setdefault(_language_group(isolate.language), []) \
+                .append(isolate)
+
+        # 3. Gather components according to their compatibility
+        pairs = self._get_incompatible_pairs()
+        nb_solved = 0
+        for language, group in remaining_stable.items():
+            updated, added, solved = self.__csp_dist(
+                candidates.get(language, ()), group, pairs, previous)
             updated_isolates.update(updated)
             new_isolates.update(added)
+            nb_solved += solved
+
+        _logger.debug("Distribution %d: %d components (%d solved) in %.3fs: "
+                      "%d updated isolates, %d new ones",
+                      self._nb_distribution, len(components), nb_solved,
+                      time.time() - start, len(updated_isolates),
+                      len(new_isolates))
 
         # Return tuples of updated and new isolates beans
         return tuple(updated_isolates), tuple(new_isolates)
 
-    def __csp_dist(self, map_isolates, components, language):
+    @staticmethod
+    def __place(isolate, component, previous):
+        """
+        Associates the component to the isolate
+
+        :param isolate: An EligibleIsolate bean
+        :param component: The RawComponent bean to place
+        :param previous: Name -> previous EligibleIsolate of the components
         """
-        Gather components using OR-Tools
+        if previous.get(component.name) is isolate:
+            # Component stays there
+            isolate.unhide(component)
+        else:
+            isolate.add_component(component)
 
-        :param map_isolates: A Name -> EligibleIsolate bean map
+    def __csp_dist(self, candidates, components, pairs, previous):
+        """
+        Gathers the components of the same language, avoiding incompatible
+        pairs
+
+        :param candidates: Existing isolates that can host the components
         :param components: Set of components to gather
-        :param language: Implementation language of components
-        :return: A tuple: (updated isolates, new isolates)
+        :param pairs: Set of pairs of incompatible components names
+        :param previous: Name -> previous EligibleIsolate of the components
+        :return: A tuple: (updated isolates, new isolates, number of
+                 components placed by the solver)
         """
         # Normalize entries (components and isolates)
-        components_names = sorted(component.name for component in components)
-        nb_components = len(components_names)
-        isolates_names = sorted(map_isolates.keys())
-
-        # Compute boundaries
-        max_isolates = max(len(components_names), len(isolates_names)) + 1
-
-        # Prepare the incompatibility matrix
-        incompat_matrix = self.__make_incompatibility_matrix(components_names)
-
-        # Prepare the problem solver
-        solver = ortools.Solver("Components distribution",
-                                ortools.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
-
-        # Declare variables
-        # ... component on isolate (Iso_i <=> Iso_i_j = 1)
-        iso = {}
-        for i, name in enumerate(components_names):
-            for j in range(max_isolates):
-                iso[i, j] = solver.IntVar(0, 1, "{0} on {1}".format(name, j))
-
-        # ... assigned isolates (for the objective)
-        assigned_isolates = [solver.IntVar(0, 1, "Isolate {0}".format(i))
-                             for i in range(max_isolates)]
-
-        # ... number of isolates for a component (must be 1)
-        nb_component_isolate = [solver.Sum(iso[i, j]
-                                           for j in range(max_isolates))
-                                for i in range(nb_components)]
-
-        # ... number of components for an isolate
-        nb_isolate_components = [solver.Sum(iso[i, j]
-                                            for i in range(nb_components))
-                                 for j in range(max_isolates)]
-
-        # Constraints:
-        # ... 1 isolate per component
-        for i in range(nb_components):
-            solver.Add(nb_component_isolate[i] == 1)
-
-        # ... assigned isolates values must be updated
-        for j in range(max_isolates):
-            solver.Add(assigned_isolates[j] >=
-                       nb_isolate_components[j] / nb_components)
-
-        # ... Avoid incompatible components on the same isolate
-        for i in range(len(incompat_matrix)):
-            for j in range(max_isolates):
-                # Pair on same isolate: sum = 2
-                solver.Add(iso[incompat_matrix[i][0], j] +
-                           iso[incompat_matrix[i][1], j] <=
-                           assigned_isolates[j])
-
-        # Define the objective: minimize the number of isolates
-        nb_assigned_isolates = solver.Sum(assigned_isolates)
-        solver.Minimize(nb_assigned_isolates)
-
-        # Solve the problem
-        solver.Solve()
-
-        # Print results
-        _logger.info("Number of isolates.: %s",
-                     int(solver.Objective().Value()))
-        _logger.info("Isolates used......: %s",
-                     [int(assigned_isolates[i].SolutionValue())
-                      for i in range(max_isolates)])
-
-        for i in range(nb_components):
-            for j in range(max_isolates):
-                if int(iso[i, j].SolutionValue()) == 1:
-                    break
+        map_components = {component.name: component
+                          for component in components}
+        candidates = sorted(candidates,
+                            key=lambda isolate: isolate.name or "")
+        indexes = {isolate: idx for idx, isolate in enumerate(candidates)}
+
+        # Components staying on each isolate
+        bins = [set(component.name for component in isolate.components)
+                for isolate in candidates]
+
+        # Prepare the incompatibility graph of the concerned components
+        names = set(map_components)
+        for content in bins:
+            names.update(content)
+
+        conflicts = {}
+        for name_a, name_b in pairs:
+            if name_a != name_b and name_a in names and name_b in names:
+                conflicts.setdefault(name_a, set()).add(name_b)
+                conflicts.setdefault(name_b, set()).add(name_a)
+
+        # Warm start: keep components on their isolate, if still compatible
+        assignment = {}
+        to_solve = []
+        for name in sorted(map_components):
+            idx = indexes.get(previous.get(name))
+            if idx is not None \
+                    and bins[idx].isdisjoint(conflicts.get(name, ())):
+                bins[idx].add(name)
+                assignment[name] = idx
             else:
-                # No isolate associated ?
-                j = None
-
-            _logger.info("Component %s: Isolate %s", components_names[i], j)
+                to_solve.append(name)
 
-        _logger.info("WallTime...: %s", solver.WallTime())
-        _logger.info("Iterations.: %s", solver.Iterations())
+        if to_solve:
+            # Only solve the placement of the remaining components
+            assignment.update(self.__solve(to_solve, conflicts, bins))
 
-        # TODO: Prepare result isolates
+        # Prepare result isolates
         updated_isolates = set()
-        added_isolates = [EligibleIsolate(None, language, components)]
-        return updated_isolates, added_isolates
+        added_isolates = {}
+        for name, idx in assignment.items():
+            component = map_components[name]
+            if idx < len(candidates):
+                isolate = candidates[idx]
+                self.__place(isolate, component, previous)
+                updated_isolates.add(isolate)
+            else:
+                added_isolates.setdefault(idx, EligibleIsolate()) \
+                    .add_component(component)
+
+        return updated_isolates, set(added_isolates.values()), len(to_solve)
 
     @staticmethod
-    def __make_incompatibility_matrix(components_names):
+    def __solve(names, conflicts, bins):
         """
-        Prepares the incompatibility matrix
+        Places the given components in the existing bins or in new ones
 
-        :param components_names: List of components names.
-        :return: A sorted incompatibility matrix
+        :param names: Names of the components to place
+        :param conflicts: Name -> set of incompatible components names
+        :param bins: List of the sets of names already in each bin
+        :return: A Name -> bin index dictionary
         """
-        # The incompatibility dictionary: component -> incompatible
-        incompat = {'Component-A': ['Nemesis-A'],
-                    'Component-B': ['Nemesis-B']}
-
-        # Prepare the matrix (set of pairs)
-        incompat_matrix = set()
-        for name, incompat_names in incompat.items():
-            idx_name = components_names.index(name)
-            for incompat_name in incompat_names:
-                try:
-                    idx_incompat = components_names.index(incompat_name)
-                    # Store a sorted tuple (hashable)
-                    incompat_matrix.add(tuple(
-                        sorted((idx_name, idx_incompat))))
-                except ValueError:
-                    # An incompatible component is not in the composition
-                    pass
+        # The greedy solution is always computed: it bounds the problem
+        greedy_bins = [set(content) for content in bins]
+        assignment = _greedy_solve(names, conflicts, greedy_bins)
+
+        nb_bins = len(greedy_bins)
+        if ortools is not None and nb_bins > len(bins) \
+                and len(names) * nb_bins <= SOLVER_MAX_VARIABLES:
+            # New isolates are required: try to reduce their number
+            solution = _ortools_solve(names, conflicts, bins, nb_bins,
+                                      assignment)
+            if solution is not None and len(solution) == len(names):
+                assignment = solution
+            else:
+                _logger.warning("No solution found by OR-Tools, using the "
+                                "greedy distribution")
 
-        # Return a sorted tuple or sorted tuples
-        return tuple(sorted(incompat_matrix))
+        return assignment
 
-    @staticmethod
-    def handle_event(event):
+    def handle_event(self, event):
         """
         Handles a component/composition event
 
         :param event: The event to handle
         """
-        # TODO: notify the crash and incompatibility stores
-        pass
+        # Let the criteria update their incompatibility information
+        affected = set()
+        for criterion in self._distance_criteria or ():
+            changed = criterion.handle_event(event)
+            if changed:
+                affected.update(changed)
+
+        if not event.good:
+            # A degradation always affects the components involved
+            affected.update(component.name for component in event.components)
+
+        with self._dirty_lock:
+            self._dirty.update(affected)
+
+    def pop_dirty(self):
+        """
+        Returns the names of the components affected by the events handled
+        since the previous call, i.e. which could be placed differently
+
+        :return: A set of components names
+        """
+        with self._dirty_lock:
+            dirty = self._dirty
+            self._dirty = set()
+
+        return dirty
@@ -102,10 +102,9 @@ class ComponentFinder(object):
             # Check if we need to stop providing the service
             self._controller = REQUIRED_REPOSITORIES.issubset(self.__kinds)
 
-    def normalize(self, component):
+    def __find(self, component):
         """
-        Adds missing information and corrects others in the given component.
-        Component bean is modified in-place.
+        Looks for the bundle providing the factory of the given component
 
         :param component: A RawComponent bean
         :return: The Bundle bean providing the component
@@ -122,22 +121,72 @@ class ComponentFinder(object):
         for repository in repositories:
             try:
                 # Get the first found bundle
-                bundle = repository.find_factory(
+                return repository.find_factory(
                     component.factory, component.bundle_name,
                     component.bundle_version)[0]
             except KeyError:
                 # Not in this repository
                 pass
-            else:
-                # Found
-                break
-        else:
-            # Factory not found
-            raise ValueError("Component factory not found: {0}"
-                             .format(component.name))
 
-        # Copy bundle information
+        # Factory not found
+        raise ValueError("Component factory not found: {0}"
+                         .format(component.name))
+
+    @staticmethod
+    def __update(component, bundle):
+        """
+        Copies the bundle information into the component bean
+        """
         component.language = bundle.language
         component.bundle_name = bundle.name
         component.bundle_version = str(bundle.version)
+
+    def normalize(self, component):
+        """
+        Adds missing information and corrects others in the given component.
+        Component bean is modified in-place.
+
+        :param component: A RawComponent bean
+        :return: The Bundle bean providing the component
+        :raise ValueError: Component factory not available
+        """
+        bundle = self.__find(component)
+        self.__update(component, bundle)
         return bundle
+
+    def normalize_all(self, components):
+        """
+        Normalizes all the given components (see normalize()). Repositories
+        are queried only once per distinct factory requirement.
+
+        :param components: A list of RawComponent beans
+        :return: A tuple: (Component bean -> Bundle bean dictionary, names of
+                 the missing factories)
+        """
+        # (Language, factory, bundle name, bundle version) -> Bundle or None
+        found = {}
+        bundles = {}
+        missing = set()
+
+        for component in components:
+            key = (component.language, component.factory,
+                   component.bundle_name, component.bundle_version)
+            try:
+                bundle = found[key]
+            except KeyError:
+                try:
+                    bundle = self.__find(component)
+                except ValueError:
+                    # Don't look for it again
+                    bundle = None
+
+                found[key] = bundle
+
+            if bundle is None:
+                missing.add(component.factory)
+                continue
+
+            self.__update(component, bundle)
+            bundles[component] = bundle
+
+        return bundles, missing
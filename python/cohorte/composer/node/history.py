@@ -25,14 +25,16 @@ Node Composer: Node status history
 """
 
 # Standard library
-from pprint import pformat
+import collections
+import json
 import logging
+import os
 import threading
 import time
 
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Provides, Instantiate, \
-    Invalidate
+    Property, Validate, Invalidate
 
 # Composer
 import cohorte.composer
@@ -50,34 +52,135 @@ _logger = logging.getLogger(__name__)
 # ------------------------------------------------------------------------------
 
 
+class _HistoryEntry(object):
+    """
+    A distribution stored in history, as a difference with the previous one
+    """
+    __slots__ = ('timestamp', 'changed', 'removed', 'snapshot')
+
+    def __init__(self, timestamp, changed, removed, snapshot=None):
+        """
+        Sets up members
+
+        :param timestamp: Time stamp of the distribution
+        :param changed: Isolate -> components names, for modified isolates
+        :param removed: Names of the isolates which disappeared
+        :param snapshot: The complete distribution (checkpoints only)
+        """
+        self.timestamp = timestamp
+        self.changed = changed
+        self.removed = removed
+        self.snapshot = snapshot
+
+    def apply(self, distribution):
+        """
+        Applies this difference to the given distribution (in place)
+
+        :param distribution: The distribution at the previous entry
+        """
+        for isolate in self.removed:
+            distribution.pop(isolate, None)
+        distribution.update(self.changed)
+
+    def to_json(self):
+        """
+        Converts this entry to a line of the history file
+        """
+        if self.snapshot is not None:
+            content = {'timestamp': self.timestamp,
+                       'snapshot': self.snapshot}
+        else:
+            content = {'timestamp': self.timestamp,
+                       'changed': self.changed,
+                       'removed': sorted(self.removed)}
+
+        return json.dumps(content, sort_keys=True)
+
+# ------------------------------------------------------------------------------
+
+
 @ComponentFactory()
 @Provides(cohorte.composer.SERVICE_HISTORY_NODE)
+@Property('_max_entries', 'history.max_entries', 1000)
+@Property('_max_age', 'history.max_age', 0)
+@Property('_checkpoint', 'history.checkpoint', 50)
+@Property('_filename', 'history.file', None)
 @Instantiate('cohorte-composer-node-history')
 class NodeHistory(object):
     """
-    Associates components to their hosting isolate
+    Associates components to their hosting isolate.
+
+    Distributions are stored as differences with the previous one, with a
+    complete snapshot every few entries. The history is bounded by a number
+    of entries and by an age (in seconds, 0 to disable), and can be kept in
+    a file to be reloaded on restart.
     """
     def __init__(self):
         """
         Sets up members
         """
-        # Storage: time stamp -> distribution
-        self._storage = {}
+        # Component properties
+        self._max_entries = 1000
+        self._max_age = 0
+        self._checkpoint = 50
+        self._filename = None
+
+        # Storage: _HistoryEntry beans, oldest first
+        self._entries = collections.deque()
         self._lock = threading.Lock()
 
+        # Latest distribution
+        self._last = {}
+
+        # Number of entries since the last snapshot
+        self._since_checkpoint = 0
+
+        # History file
+        self._file = None
+        self._file_lines = 0
+
+    @Validate
+    def validate(self, context):
+        """
+        Component validated
+        """
+        self._max_entries = max(1, int(self._max_entries))
+        self._max_age = float(self._max_age or 0)
+        self._checkpoint = max(1, int(self._checkpoint))
+
+        if self._filename:
+            with self._lock:
+                self.__load()
+                self.__compact()
+
     @Invalidate
     def invalidate(self, context):
         """
         Component invalidated
         """
-        self.clear()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+            self.__reset()
+
+    def __reset(self):
+        """
+        Clears the in-memory storage
+        """
+        self._entries.clear()
+        self._last = {}
+        self._since_checkpoint = 0
 
     def clear(self):
         """
         Clears the storage
         """
         with self._lock:
-            self._storage.clear()
+            self.__reset()
+            if self._file is not None:
+                self.__compact()
 
     def keep_recent(self, timestamp):
         """
@@ -86,18 +189,51 @@ class NodeHistory(object):
         :param timestamp: Minimal timestamp to be kept
         """
         with self._lock:
-            # Sort times
-            stamps = sorted(self._storage.keys())
-            for stamp in stamps:
-                if stamp < timestamp:
-                    del self._storage[stamp]
+            self.__trim(timestamp)
 
     def items(self):
         """
         Returns a sorted list of (time stamp, {isolate -> [names]}) tuples
         """
         with self._lock:
-            return sorted(self._storage.items())
+            result = []
+            distribution = {}
+            for entry in self._entries:
+                if entry.snapshot is not None:
+                    distribution = entry.snapshot.copy()
+                else:
+                    distribution = distribution.copy()
+                    entry.apply(distribution)
+
+                result.append((entry.timestamp, distribution))
+
+            return result
+
+    def distribution_at(self, timestamp):
+        """
+        Reconstructs the distribution which was active at the given time
+
+        :param timestamp: A time stamp
+        :return: A isolate -> components names dictionary (empty if the time
+                 stamp is older than the history)
+        """
+        with self._lock:
+            # Walk back to the nearest snapshot
+            pending = []
+            for entry in reversed(self._entries):
+                if entry.timestamp <= timestamp:
+                    pending.append(entry)
+                    if entry.snapshot is not None:
+                        break
+
+            if not pending:
+                return {}
+
+            distribution = pending.pop().snapshot.copy()
+            for entry in reversed(pending):
+                entry.apply(distribution)
+
+            return distribution
 
     def store(self, distribution):
         """
@@ -108,10 +244,149 @@ class NodeHistory(object):
         # Store the stamp ASAP
         timestamp = time.time()
 
+        distribution = {isolate: tuple(components)
+                        for isolate, components in distribution.items()}
+
         with self._lock:
-            # Store our distribution
-            self._storage[timestamp] = {
-                isolate: tuple(components)
-                for isolate, components in distribution.items()}
-            _logger.info("Node composer stored in history:\n%s",
-                         pformat(self._storage[timestamp]))
+            entry = self.__record(timestamp, distribution)
+            if self._file is not None:
+                self.__write(entry)
+
+            # Apply limits
+            while len(self._entries) > self._max_entries:
+                self.__pop_oldest()
+
+            if self._max_age > 0:
+                self.__trim(timestamp - self._max_age)
+
+            if self._file is not None \
+                    and self._file_lines > 2 * self._max_entries:
+                self.__compact()
+
+        _logger.debug("Node composer stored in history: %d isolate(s) "
+                      "changed, %d removed", len(entry.changed),
+                      len(entry.removed))
+
+    def __trim(self, timestamp):
+        """
+        Removes the entries older than the given time stamp (the lock must be
+        held)
+
+        :param timestamp: Minimal timestamp to be kept
+        """
+        while self._entries and self._entries[0].timestamp < timestamp:
+            self.__pop_oldest()
+
+    def __record(self, timestamp, distribution):
+        """
+        Appends a distribution to the in-memory storage
+
+        :param timestamp: Time stamp of the distribution
+        :param distribution: A isolate -> tuple of components names dictionary
+        :return: The new _HistoryEntry bean
+        """
+        last = self._last
+        changed = {isolate: components
+                   for isolate, components in distribution.items()
+                   if last.get(isolate) != components}
+        removed = frozenset(last).difference(distribution)
+
+        if not self._entries or self._since_checkpoint >= self._checkpoint:
+            # Time for a snapshot
+            snapshot = distribution.copy()
+            self._since_checkpoint = 0
+        else:
+            snapshot = None
+            self._since_checkpoint += 1
+
+        entry = _HistoryEntry(timestamp, changed, removed, snapshot)
+        self._entries.append(entry)
+        self._last = distribution
+        return entry
+
+    def __pop_oldest(self):
+        """
+        Removes the oldest entry, converting the next one to a snapshot if
+        necessary
+        """
+        oldest = self._entries.popleft()
+        if not self._entries:
+            # Nothing left: the next entry will be a snapshot
+            return
+
+        following = self._entries[0]
+        if following.snapshot is None:
+            # The oldest snapshot won't be used anymore: update it in place
+            distribution = oldest.snapshot
+            following.apply(distribution)
+            following.snapshot = distribution
+
+    def __load(self):
+        """
+        Loads the history file, then opens it to append new entries
+        """
+        try:
+            with open(self._filename) as history_file:
+                lines = history_file.readlines()
+        except IOError:
+            # No history yet
+            lines = []
+
+        distribution = {}
+        for line in lines:
+            try:
+                content = json.loads(line)
+                timestamp = float(content['timestamp'])
+                if 'snapshot' in content:
+                    distribution = {
+                        isolate: tuple(components) for isolate, components
+                        in content['snapshot'].items()}
+                else:
+                    distribution = distribution.copy()
+                    for isolate in content['removed']:
+                        distribution.pop(isolate, None)
+                    distribution.update(
+                        (isolate, tuple(components)) for isolate, components
+                        in content['changed'].items())
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # Truncated or corrupted line: ignore it
+                _logger.warning("Invalid line in history file %s",
+                                self._filename)
+                continue
+
+            self.__record(timestamp, distribution)
+            while len(self._entries) > self._max_entries:
+                self.__pop_oldest()
+
+        if self._max_age > 0:
+            self.__trim(time.time() - self._max_age)
+
+    def __compact(self):
+        """
+        Rewrites the history file with the entries kept in memory
+        """
+        temp_name = self._filename + '.tmp'
+        with open(temp_name, 'w') as history_file:
+            for entry in self._entries:
+                history_file.write(entry.to_json())
+                history_file.write('\n')
+
+        if self._file is not None:
+            self._file.close()
+
+        if os.path.exists(self._filename):
+            # Python 2 can't rename over an existing file on Windows
+            os.remove(self._filename)
+        os.rename(temp_name, self._filename)
+
+        self._file = open(self._filename, 'a')
+        self._file_lines = len(self._entries)
+
+    def __write(self, entry):
+        """
+        Appends an entry to the history file
+        """
+        self._file.write(entry.to_json())
+        self._file.write('\n')
+        self._file.flush()
+        self._file_lines += 1
@@ -129,24 +129,32 @@ class NodeStatusStorage(object):
 
                 self._history.store(distribution)
 
-    def remove(self, names):
+    def remove(self, names, isolate=None):
         """
         Removes the given components from the storage
 
         :param names: A set of names of components
+        :param isolate: If given, only the components still associated to
+                        this isolate are removed
         """
         with self.__lock:
             for name in names:
+                if isolate is not None \
+                        and self._component_isolate.get(name) != isolate:
+                    # Moved to another isolate in the meantime
+                    continue
+
                 try:
                     # Remove from the component from the lists
-                    isolate = self._component_isolate.pop(name)
+                    isolate_name = self._component_isolate.pop(name)
                     component = self._components.pop(name)
 
-                    isolate_components = self._isolate_components[isolate]
+                    isolate_components = \
+                        self._isolate_components[isolate_name]
                     isolate_components.remove(component)
                     if not isolate_components:
                         # No more component on this isolate
-                        del self._isolate_components[isolate]
+                        del self._isolate_components[isolate_name]
                 except KeyError:
                     _logger.warning("Unknown component: %s", name)
 
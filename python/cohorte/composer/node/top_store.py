@@ -25,17 +25,24 @@ Top composer distribution storage, hosted by node composers
 """
 
 # Standard library
+import json
 import logging
+import os
+import threading
+import time
+import zlib
 
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Provides, Property, \
-    Instantiate
+    Instantiate, Validate, Invalidate
 
 # Pelix
 import pelix.remote
 
 # Cohorte
+import cohorte
 import cohorte.composer
+from cohorte.composer.beans import RawComponent
 
 # ------------------------------------------------------------------------------
 
@@ -47,6 +54,72 @@ __version__=cohorte.version.__version__
 
 _logger = logging.getLogger(__name__)
 
+JOURNAL_FILENAME = 'top_store.journal'
+""" Name of the journal file in the node data directory """
+
+# ------------------------------------------------------------------------------
+
+
+def _encode(value):
+    """
+    JSON encoder hook: converts the beans and sets of a stored distribution
+
+    :param value: A value the JSON module can't serialize
+    :return: A serializable value
+    :raise TypeError: Unhandled type
+    """
+    if isinstance(value, RawComponent):
+        return {'__component__': vars(value)}
+    elif isinstance(value, (set, frozenset)):
+        return {'__set__': list(value)}
+
+    raise TypeError("Can't store a {0}".format(type(value).__name__))
+
+
+def _decode(content):
+    """
+    JSON decoder hook: reverts what _encode() did
+
+    :param content: A parsed JSON object
+    :return: The original value
+    """
+    if '__component__' in content:
+        component = RawComponent()
+        component.__dict__.update(content['__component__'])
+        return component
+    elif '__set__' in content:
+        return set(content['__set__'])
+
+    return content
+
+
+def _make_record(record):
+    """
+    Converts a journal record to a checksummed line
+
+    :param record: A journal record dictionary
+    :return: The line to append to the journal (bytes)
+    """
+    data = json.dumps(record, sort_keys=True, default=_encode) \
+        .encode('utf-8')
+    return '{0:08x} '.format(zlib.crc32(data) & 0xffffffff).encode('ascii') \
+        + data + b'\n'
+
+
+def _parse_record(line):
+    """
+    Checks and parses a line of the journal
+
+    :param line: A line of the journal (bytes)
+    :return: The journal record dictionary
+    :raise ValueError: Truncated, corrupted or invalid line
+    """
+    checksum, _, data = line.rstrip(b'\n').partition(b' ')
+    if int(checksum, 16) != zlib.crc32(data) & 0xffffffff:
+        raise ValueError("Invalid checksum")
+
+    return json.loads(data.decode('utf-8'), object_hook=_decode)
+
 # ------------------------------------------------------------------------------
 
 
@@ -55,10 +128,19 @@ _logger = logging.getLogger(__name__)
 @Property('_export', pelix.remote.PROP_EXPORTED_INTERFACES, '*')
 @Property('_export_name', pelix.remote.PROP_ENDPOINT_NAME,
           'composer-top-storage')
+@Property('_filename', 'storage.file', None)
+@Property('_sync', 'storage.sync', True)
+@Property('_compact_min', 'storage.compact.min', 100)
 @Instantiate('cohorte-composer-top-storage')
 class TopStorage(object):
     """
-    Stores distributions computed by the top composer
+    Stores distributions computed by the top composer.
+
+    Stores and removals are appended to a journal file, one checksummed JSON
+    record per line, which is read back when the component is validated. The journal
+    is compacted when it holds more than twice as many records as stored
+    compositions. Without a journal file (no file property and no node data
+    directory), the content is only kept in memory.
     """
     def __init__(self):
         """
@@ -68,8 +150,46 @@ class TopStorage(object):
         self._export = None
         self._export_name = None
 
+        # Journal properties
+        self._filename = None
+        self._sync = True
+        self._compact_min = 100
+
         # UID -> content
         self.__content = {}
+        self.__lock = threading.Lock()
+
+        # Journal file and number of records it contains
+        self.__journal = None
+        self.__records = 0
+
+    @Validate
+    def validate(self, context):
+        """
+        Component validated
+        """
+        self._compact_min = max(1, int(self._compact_min))
+        if not self._filename:
+            data_dir = context.get_property(cohorte.PROP_NODE_DATA_DIR)
+            if data_dir:
+                self._filename = os.path.join(data_dir, JOURNAL_FILENAME)
+
+        if self._filename:
+            with self.__lock:
+                self.__load()
+
+    @Invalidate
+    def invalidate(self, context):
+        """
+        Component invalidated
+        """
+        with self.__lock:
+            if self.__journal is not None:
+                self.__journal.close()
+                self.__journal = None
+
+            self.__content.clear()
+            self.__records = 0
 
     def get_uids(self):
         """
@@ -77,7 +197,8 @@ class TopStorage(object):
 
         :return: A list of UIDs
         """
-        return list(self.__content.keys())
+        with self.__lock:
+            return list(self.__content.keys())
 
     def load(self, uid):
         """
@@ -87,7 +208,8 @@ class TopStorage(object):
         :return: The associated content or None
         """
         _logger.info("Retrieving top composition %s", uid)
-        return self.__content.get(uid)
+        with self.__lock:
+            return self.__content.get(uid)
 
     def remove(self, uid):
         """
@@ -96,12 +218,15 @@ class TopStorage(object):
         :param uid: A UID
         :return: True if the UID was known
         """
-        try:
+        with self.__lock:
+            try:
+                del self.__content[uid]
+            except KeyError:
+                return False
+
             _logger.info("Removing top composition %s", uid)
-            del self.__content[uid]
+            self.__append({'op': 'remove', 'uid': uid})
             return True
-        except KeyError:
-            return False
 
     def store(self, uid, content):
         """
@@ -109,4 +234,120 @@ class TopStorage(object):
         previous content, if any.
         """
         _logger.info("Storing top composition %s", uid)
-        self.__content[uid] = content
+        with self.__lock:
+            self.__content[uid] = content
+            self.__append({'op': 'store', 'uid': uid, 'content': content})
+
+    def __append(self, record):
+        """
+        Appends a record to the journal, if any (the lock must be held)
+
+        :param record: A journal record dictionary
+        """
+        if self.__journal is None:
+            return
+
+        self.__journal.write(_make_record(record))
+        self.__journal.flush()
+        if self._sync:
+            os.fsync(self.__journal.fileno())
+
+        self.__records += 1
+        if self.__records > max(self._compact_min, 2 * len(self.__content)):
+            self.__compact()
+
+    def __load(self):
+        """
+        Reads the journal in one pass, then opens it to append new records
+        """
+        start = time.time()
+        invalid = 0
+        self.__recover()
+        try:
+            with open(self._filename, 'rb') as journal:
+                for line in journal:
+                    self.__records += 1
+                    try:
+                        self.__replay(_parse_record(line))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        # Truncated or corrupted record: ignore it
+                        invalid += 1
+        except IOError:
+            # No journal yet
+            pass
+
+        if invalid:
+            _logger.warning("Ignored %d invalid record(s) in journal %s",
+                            invalid, self._filename)
+
+        if invalid or self.__records > max(self._compact_min,
+                                           2 * len(self.__content)):
+            self.__compact()
+        else:
+            self.__journal = open(self._filename, 'ab')
+
+        _logger.info("Loaded %d top composition(s) from %s in %.3fs",
+                     len(self.__content), self._filename, time.time() - start)
+
+    def __replay(self, record):
+        """
+        Applies a journal record to the in-memory storage
+
+        :param record: A journal record dictionary
+        :raise KeyError: Invalid record
+        """
+        operation = record['op']
+        uid = record['uid']
+        if operation == 'store':
+            self.__content[uid] = record['content']
+        elif operation == 'remove':
+            self.__content.pop(uid, None)
+        else:
+            raise KeyError(operation)
+
+    def __recover(self):
+        """
+        Handles the temporary file of an interrupted compaction: it is only
+        complete if the journal has already been removed
+        """
+        temp_name = self._filename + '.tmp'
+        if not os.path.exists(temp_name):
+            return
+
+        if os.path.exists(self._filename):
+            # Interrupted while writing the temporary file
+            os.remove(temp_name)
+        else:
+            _logger.warning("Recovering journal %s from %s",
+                            self._filename, temp_name)
+            os.rename(temp_name, self._filename)
+
+    def __compact(self):
+        """
+        Rewrites the journal with one record per stored composition
+        """
+        temp_name = self._filename + '.tmp'
+        with open(temp_name, 'wb') as journal:
+            for uid, content in self.__content.items():
+                journal.write(_make_record(
+                    {'op': 'store', 'uid': uid, 'content': content}))
+
+            journal.flush()
+            os.fsync(journal.fileno())
+
+        if self.__journal is not None:
+            self.__journal.close()
+
+        try:
+            # Atomic replacement (Python 3)
+            os.replace(temp_name, self._filename)
+        except AttributeError:
+            if os.name == 'nt' and os.path.exists(self._filename):
+                # Python 2 can't rename over an existing file on Windows:
+                # the complete temporary file is recovered at load if the
+                # process stops before the rename
+                os.remove(self._filename)
+            os.rename(temp_name, self._filename)
+
+        self.__journal = open(self._filename, 'ab')
+        self.__records = len(self.__content)
@@ -32,10 +32,12 @@ import threading
 
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Requires, Provides, \
-    Instantiate, BindField, UpdateField, UnbindField, Invalidate, Validate
+    Instantiate, BindField, UpdateField, UnbindField, Invalidate, Validate, \
+    Property
 
 # Composer
 import cohorte.composer
+from cohorte.composer.dispatch import Dispatcher
 
 # ------------------------------------------------------------------------------
 
@@ -52,6 +54,8 @@ _logger = logging.getLogger(__name__)
 
 @ComponentFactory()
 @Provides(cohorte.composer.SERVICE_COMMANDER_TOP)
+@Property('_timeout', 'commander.timeout', 30)
+@Property('_nb_threads', 'commander.threads', 10)
 @Requires('_status', cohorte.composer.SERVICE_STATUS_TOP)
 @Requires('_injected_composers', cohorte.composer.SERVICE_COMPOSER_NODE,
           aggregate=True, optional=True)
@@ -71,6 +75,13 @@ class TopCommander(object):
         # Node name -> NodeComposer[]
         self._node_composers = {}
 
+        # Maximum time to wait for the node composers (in seconds)
+        self._timeout = 30
+
+        # Concurrent calls to the node composers
+        self._nb_threads = 10
+        self._dispatcher = None
+
         # Validation flag
         self.__validated = False
 
@@ -146,11 +157,18 @@ class TopCommander(object):
         with self.__lock:
             self.__validated = False
 
+        self._dispatcher.stop()
+        self._dispatcher = None
+
     @Validate
     def validate(self, context):
         """
         Component validated
         """
+        self._dispatcher = Dispatcher(self._nb_threads,
+                                      "TopCommander-Dispatcher")
+        self._dispatcher.start()
+
         with self.__lock:
             self.__validated = True
 
@@ -159,16 +177,49 @@ class TopCommander(object):
                 for composer in composers:
                     self._late_composer(node, composer)
 
-    def __call_for_node(self, node_name, per_composer_method, components):
+    def __call_for_nodes(self, per_composer_method, distribution, action):
         """
-        Calls the given method for all composers of the given the node
+        Calls the given method for all composers of the nodes of the given
+        distribution, concurrently. Unknown nodes are ignored. Calls to a
+        composer still handling a late call are executed after it.
+
+        :param per_composer_method: Method to call for each composer
+        :param distribution: A Node -> RawComponent[] dictionary
+        :param action: Description of the calls, for logging
+        :return: A DispatchResult object, with (node, composer ID) keys
         """
-        for composer in self._node_composers[node_name]:
-            try:
-                per_composer_method(composer, components)
-            except Exception as ex:
-                _logger.exception("Error calling composer on node %s: %s",
-                                  node_name, ex)
+        calls = {}
+        with self.__lock:
+            for node, components in distribution.items():
+                for composer in self._node_composers.get(node, ()):
+                    calls[(node, id(composer))] = (per_composer_method,
+                                                   (composer, components))
+
+        result = self._dispatcher.dispatch(calls, self._timeout, True)
+        for (node, _), ex in result.errors.items():
+            _logger.error("Error calling composer on node %s (%s): %s",
+                          node, action, ex)
+
+        if result.late:
+            _logger.warning("No answer from nodes after %.1fs (%s): %s",
+                            self._timeout, action,
+                            ', '.join(sorted(set(
+                                node for node, _ in result.late))))
+
+        if result.cancelled:
+            _logger.warning("Nodes not called (%s): %s", action,
+                            ', '.join(sorted(set(
+                                node for node, _ in result.cancelled))))
+        return result
+
+    def get_dispatch_stats(self):
+        """
+        Returns the aggregated statistics of the calls to the node composers
+        (see Dispatcher.get_stats())
+
+        :return: A dictionary
+        """
+        return self._dispatcher.get_stats()
 
     @staticmethod
     def __start(composer, components):
@@ -211,12 +262,7 @@ class TopCommander(object):
 
         :param distribution: A Node -> RawComponent[] dictionary
         """
-        for node, components in distribution.items():
-            try:
-                self.__call_for_node(node, self.__start, components)
-            except KeyError:
-                # Unknown node
-                pass
+        self.__call_for_nodes(self.__start, distribution, "instantiate")
 
     def update(self, new, moved, stopped):
         """
@@ -231,13 +277,32 @@ class TopCommander(object):
         self.stop(stopped)
 
         # Move components
+        old_nodes = {}
+        new_nodes = {}
         for component, nodes in moved.items():
-            # 1. stop the old one
-            components = [component]
-            self.__call_for_node(nodes[0], self.__stop, components)
+            old_nodes.setdefault(nodes[0], []).append(component)
+            new_nodes.setdefault(nodes[1], []).append(component)
 
-            # 2. start the new one
-            self.__call_for_node(nodes[1], self.__start, components)
+        # 1. stop the old ones
+        result = self.__call_for_nodes(self.__stop, old_nodes, "kill")
+
+        # Give late nodes some more time: a component must not run on two
+        # nodes, so it isn't started if it might still run on its old node
+        not_stopped = set(node for node, _ in result.errors)
+        not_stopped.update(node for node, _ in self._dispatcher.wait_late(
+            result.late, self._timeout))
+
+        # 2. start the new ones
+        for component, nodes in moved.items():
+            if nodes[0] in not_stopped:
+                new_nodes[nodes[1]].remove(component)
+                _logger.error("Component %s not moved to node %s: not "
+                              "stopped on node %s", component.name,
+                              nodes[1], nodes[0])
+
+        self.__call_for_nodes(self.__start, dict(
+            (node, components) for node, components in new_nodes.items()
+            if components), "instantiate")
 
         # Start new components
         self.start(new)
@@ -248,9 +313,4 @@ class TopCommander(object):
 
         :param distribution: A Node -> RawComponent[] dictionary
         """
-        for node, components in distribution.items():
-            try:
-                self.__call_for_node(node, self.__stop, components)
-            except KeyError:
-                # Unknown node
-                pass
+        self.__call_for_nodes(self.__stop, distribution, "kill")
@@ -167,11 +167,15 @@ class TopStorageHandler(object):
 
     def store_all(self, store):
         """
-        Stores the content of the status to the given top storage
+        Stores the content of the status to the given top storage. The
+        distributions already known by the storage are not pushed again: a
+        distribution is never modified once stored in the status.
 
         :param store: A top storage service
         """
-        for uid in self._status.list():
+        uids = set(self._status.list())
+        uids.difference_update(store.get_uids())
+        for uid in uids:
             distribution = self._status.get(uid)
             name = self._status.get_name(uid)
 
@@ -31,6 +31,7 @@ import fnmatch
 import glob
 import logging
 import os
+import stat
 
 import cohorte.version
 from pelix.ipopo.decorators import ComponentFactory, Instantiate, Provides, \
@@ -49,6 +50,200 @@ _logger = logging.getLogger(__name__)
 
 
 # ------------------------------------------------------------------------------
+
+
+class _Directory(object):
+    """
+    Content of an indexed directory
+    """
+    __slots__ = ('stamp', 'names', 'name_set', 'subdirs')
+
+    def __init__(self, stamp, entries):
+        """
+        :param stamp: Modification stamp of the directory
+        :param entries: List of (name, is directory) tuples
+        """
+        self.stamp = stamp
+        self.names = [name for name, _ in entries]
+        self.name_set = frozenset(self.names)
+        self.subdirs = [name for name, is_dir in entries if is_dir]
+
+
+class _DirectoryIndex(object):
+    """
+    In-memory index of the content of the directories looked into by the
+    finder. The content of a directory is listed once, then only its
+    modification stamp is checked on each access.
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Path -> _Directory
+        self._directories = {}
+
+        # Path -> Real path, cleared when a directory changes
+        self._realpaths = {}
+
+        # Counters of the file system accesses
+        self._counters = {'stat': 0, 'listdir': 0,
+                          'listdir_saved': 0, 'realpath_saved': 0}
+
+    def clear(self):
+        """
+        Clears the index
+        """
+        self._directories.clear()
+        self._realpaths.clear()
+
+    def get_counters(self):
+        """
+        Returns a copy of the file system access counters
+
+        :return: A counter name -> value dictionary
+        """
+        return self._counters.copy()
+
+    def realpath(self, path):
+        """
+        Cached version of os.path.realpath()
+
+        :param path: A path
+        :return: The canonical path
+        """
+        try:
+            real_path = self._realpaths[path]
+            self._counters['realpath_saved'] += 1
+            return real_path
+        except KeyError:
+            real_path = self._realpaths[path] = os.path.realpath(path)
+            return real_path
+
+    def get(self, path, listing=True):
+        """
+        Returns the indexed content of the given directory, listing it if it
+        is unknown or if it has been modified since the last listing
+
+        :param path: Path of a directory
+        :param listing: True if the caller would have listed the directory
+                        without the index (counts the saved listings)
+        :return: A _Directory object or None if path is not a directory
+        """
+        self._counters['stat'] += 1
+        try:
+            path_stat = os.stat(path)
+        except OSError:
+            path_stat = None
+
+        if path_stat is None or not stat.S_ISDIR(path_stat.st_mode):
+            if self._directories.pop(path, None) is not None:
+                self._realpaths.clear()
+            return None
+
+        stamp = (path_stat.st_mtime, path_stat.st_ino)
+        directory = self._directories.get(path)
+        if directory is not None:
+            if directory.stamp == stamp:
+                if listing:
+                    self._counters['listdir_saved'] += 1
+                return directory
+
+            # The directory changed: symbolic links might have changed too
+            self._realpaths.clear()
+
+        self._counters['listdir'] += 1
+        try:
+            directory = _Directory(stamp, _list_directory(path))
+        except OSError:
+            return None
+
+        self._directories[path] = directory
+        return directory
+
+    def glob(self, pattern):
+        """
+        Generator equivalent to glob.iglob(), but based on the index
+
+        :param pattern: An absolute path pattern
+        :return: The matching paths
+        """
+        dirname, basename = os.path.split(pattern)
+        if glob.has_magic(dirname):
+            dirnames = self.glob(dirname)
+        else:
+            dirnames = (dirname,)
+
+        # Without magic in the base name, glob only checks if the file exists
+        listing = glob.has_magic(basename)
+        for dirname in dirnames:
+            directory = self.get(dirname, listing)
+            if directory is None:
+                continue
+
+            if not basename:
+                # Pattern ending with a separator
+                yield os.path.join(dirname, basename)
+            elif listing:
+                names = directory.names
+                if basename[0] != '.':
+                    # Same behaviour as glob: ignore hidden files
+                    names = [name for name in names if name[0] != '.']
+
+                for name in fnmatch.filter(names, basename):
+                    yield os.path.join(dirname, name)
+            elif basename in directory.name_set:
+                yield os.path.join(dirname, basename)
+
+    def walk(self, path):
+        """
+        Generator equivalent to os.walk(path, followlinks=True), but based on
+        the index
+
+        :param path: Path of the root directory
+        :return: (directory path, directories names, file names) tuples
+        """
+        directory = self.get(path)
+        if directory is None:
+            return
+
+        subdirs = set(directory.subdirs)
+        yield path, directory.subdirs, [name for name in directory.names
+                                        if name not in subdirs]
+
+        for name in directory.subdirs:
+            for item in self.walk(os.path.join(path, name)):
+                yield item
+
+
+def _list_directory(path):
+    """
+    Lists the content of the given directory
+
+    :param path: Path of a directory
+    :return: A list of (name, is directory) tuples
+    """
+    try:
+        # Python 3.5+
+        scandir = os.scandir
+    except AttributeError:
+        # Python 2
+        isdir = os.path.isdir
+        join = os.path.join
+        return [(name, isdir(join(path, name)))
+                for name in os.listdir(path)]
+
+    entries = []
+    for entry in scandir(path):
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        entries.append((entry.name, is_dir))
+    return entries
+
+# ------------------------------------------------------------------------------
+
+
 class FileFinderAbs(object):
     """
     Simple file finder : tries to find the given file in the platform main
@@ -64,6 +259,9 @@ class FileFinderAbs(object):
         self._roots = []
         self._custom_roots = set()
 
+        # Index of the content of the directories
+        self._index = _DirectoryIndex()
+
     def _get_context(self):
         """
         return the bundle context
@@ -94,7 +292,7 @@ class FileFinderAbs(object):
         Generator to have the Cohorte roots (base then home) and the custom
         roots.
         """
-        realpath = os.path.realpath
+        realpath = self._index.realpath
         for root_list in (self._roots, self._custom_roots):
             if root_list:
                 for root in root_list:
@@ -116,15 +314,13 @@ class FileFinderAbs(object):
         # Look into root directories
         for root_dir in self._gen_roots():
             _logger.debug("_internal_find : root_dir=[{0}]".format(root_dir))
-            path = os.path.realpath(os.path.join(root_dir, filename))
+            path = self._index.realpath(os.path.join(root_dir, filename))
             _logger.debug("_internal_find : path=[{0}]".format(path))
-            paths = glob.iglob(path)
-
-            for real_path in paths:
+            for real_path in self._index.glob(path):
                 yield real_path
 
         # Test the absolute file name
-        path = os.path.realpath(filename)
+        path = self._index.realpath(filename)
         if os.path.exists(path):
             yield path
 
@@ -175,40 +371,25 @@ class FileFinderAbs(object):
                 # Try the base directory directly (as a relative directory)
                 path = os.path.join(base_dir, filename)
 
-                for found_files in self._internal_find(path):
-                    for found_file in found_files:
-                        if found_file in handled:
-                            # Already known
-                            continue
-                        else:
-                            handled.add(found_file)
-
-                    yield found_files
+                for found_file in self._internal_find(path):
+                    if found_file not in handled:
+                        handled.add(found_file)
+                        yield found_file
 
                 # Try without the platform prefix, if any
                 platform_subdir = self._extract_platform_path(base_dir)
                 if platform_subdir:
                     path = os.path.join(platform_subdir, filename)
-                    for found_files in self._internal_find(path):
-                        for found_file in found_files:
-                            if found_file in handled:
-                                # Already known
-                                continue
-                            else:
-                                handled.add(found_file)
-
-                        yield found_files
+                    for found_file in self._internal_find(path):
+                        if found_file not in handled:
+                            handled.add(found_file)
+                            yield found_file
         else:
             # Find files, the standard way
-            for found_files in self._internal_find(filename):
-                for found_file in found_files:
-                    if found_file in handled:
-                        # Already known
-                        continue
-                    else:
-                        handled.add(found_file)
-
-                yield found_files
+            for found_file in self._internal_find(filename):
+                if found_file not in handled:
+                    handled.add(found_file)
+                    yield found_file
 
     def find_gen(self, pattern, base_dir=None, recursive=True):
         """
@@ -221,7 +402,7 @@ class FileFinderAbs(object):
         :param recursive: If True, searches recursively for the file
         :return: The matching files
         """
-        if base_dir[0] == os.path.sep:
+        if base_dir and base_dir[0] == os.path.sep:
             # os.path.join won't work if the name starts with a path separator
             base_dir = base_dir[len(os.path.sep):]
 
@@ -233,15 +414,57 @@ class FileFinderAbs(object):
                 base_path = root
 
             # Walk the directory
-            for sub_root, _, filenames in os.walk(base_path, followlinks=True):
+            for sub_root, _, filenames in self._index.walk(base_path):
                 for filename in fnmatch.filter(filenames, pattern):
                     # Return the real path of the matching file
-                    yield os.path.realpath(os.path.join(sub_root, filename))
+                    yield self._index.realpath(
+                        os.path.join(sub_root, filename))
 
                 if not recursive:
                     # Stop on first directory
                     return
 
+    def get_search_dirs(self, filenames):
+        """
+        Returns the directories where a file with the same relative path as
+        one of the given files would be found by find_rel(): the directory of
+        each file in each root.
+
+        :param filenames: Paths of files, absolute or relative to the roots
+        :return: A sorted list of directory paths (which may not exist)
+        """
+        roots = list(self._gen_roots())
+        directories = set()
+        for filename in filenames:
+            dirname = os.path.dirname(filename)
+            if os.path.isabs(dirname):
+                directories.add(dirname)
+                dirname = self._extract_platform_path(dirname)
+                if dirname is None:
+                    # Not in a root
+                    continue
+
+            for root in roots:
+                directories.add(os.path.normpath(os.path.join(root, dirname)))
+
+        return sorted(directories)
+
+    def get_index_counters(self):
+        """
+        Returns the counters of the file system accesses done and saved by
+        the directory index: "stat" and "listdir" are the accesses done,
+        "listdir_saved" and "realpath_saved" are the ones avoided.
+
+        :return: A counter name -> value dictionary
+        """
+        return self._index.get_counters()
+
+    def clear_index(self):
+        """
+        Forgets the indexed content of the directories
+        """
+        self._index.clear()
+
     def add_custom_root(self, root):
         """
         Adds a custom search root (not ordered)
@@ -292,6 +515,7 @@ class FileFinderAbs(object):
         # Store the framework access
         del self._roots[:]
         self._custom_roots.clear()
+        self._index.clear()
 
 
 @ComponentFactory('cohorte-file-finder-factory')
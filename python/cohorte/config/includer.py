@@ -32,16 +32,18 @@ import json
 import logging
 import os
 import re
+import time
 
 import cohorte
 from cohorte.config import common
 import cohorte.version
 from pelix.ipopo.decorators import ComponentFactory, Provides, Instantiate, \
     Validate, Invalidate, Requires
-try:    
+try:
     from simpleeval import simple_eval
-except :
-    pass
+except ImportError:
+    # conditions of includes are considered as true
+    simple_eval = None
 
 try:
     # Python 3
@@ -62,6 +64,37 @@ __version__ = cohorte.version.__version__
 
 _logger = logging.getLogger(__name__)
 
+# Lexer of the configuration files: JSON strings are kept as is, line and
+# block comments are dropped
+_LEXER = re.compile(r'("(?:[^"\\]|\\.)*")|(//[^\n]*)|(/\*.*?\*/)', re.DOTALL)
+
+# ------------------------------------------------------------------------------
+
+
+def _strip_comment(match):
+    """
+    Replacement function of the lexer: keeps strings and replaces comments by
+    the new lines they contained, to keep the line numbers of parsing errors
+
+    :param match: A match of the lexer
+    :return: The replacement string
+    """
+    string = match.group(1)
+    if string is not None:
+        return string
+    return "\n" * match.group(0).count("\n")
+
+
+def strip_comments(content):
+    """
+    Removes the // and /* */ comments of the given JSON content in a single
+    pass. Comment markers found in strings (e.g. "http://") are kept.
+
+    :param content: A JSON string with comments
+    :return: The JSON string without comments
+    """
+    return _LEXER.sub(_strip_comment, content)
+
 # ------------------------------------------------------------------------------
 
 # ------------------------------------------------------------------------------
@@ -102,86 +135,73 @@ class CResource(object):
 
     def readall(self):
         """
-        return the merge content of all files that correspond to the resource
-        """
-        join_list = []
-        if self.contents != None:
-            for content in self.contents:
-                if self.tag != None:
-                    tag_elem = None
-                    json_obj = json.loads(content);
-                    idx_obraces = self.tag.find("[")
-                    idx_cbraces = self.tag.find("]")
-                    tag_key = self.tag
-                    if idx_obraces != -1:
-                        tag_key = self.tag[:idx_obraces]
-                       
-                    if not tag_key in json_obj.keys():
-                        mess = "include property [{0}]  defined in file [{1}] doesn't exists in file [{2}]".format(
-                            tag_key, self.resource_parent.filename, self.filename);
-                        raise CBadResourceException(mess)
-                    else:
-                        arr_elem = json_obj[tag_key]
-                    # manage a tag can identified a array or a object and we want a elem of the array or all elemnet or the array
-                    if (idx_obraces != -1 and idx_cbraces != -1):
-                        if isinstance(arr_elem, list):
-                            # want something from the array and not all the array
-                            range_idx = self.tag[idx_obraces + 1:idx_cbraces]
-                            if range_idx == None:
-                                # nothin specify raise an error
-                                raise CBadResourceException("include : No index but array ask")
-
-                            elif range_idx.isdigit():
-                                # want a specific element
-                                idx = int(range_idx)
-                                if idx > len(arr_elem):
-                                    raise CBadResourceException(
-                                        "include : Bad index expect=[{0}] size=[{1}]".format(idx, len(arr_elem)))
-                                else:
-                                    tag_elem = json.dumps(arr_elem[idx])
-                            elif range_idx == "*":
-                                tag_elem = ",".join([json.dumps(elem) for elem in arr_elem])
-                            else:
-                                idxs = range_idx.split(":")
-                                first = None
-                                last = None
-                                if idx[0].isdigit():
-                                    first = int(idx[0])
-                                if idx[1].isdigit():
-                                    last = int(idx[1])
-                                if last != None and first != None:
-                                    tag_elem = ",".join([json.dumps(elem) for elem in arr_elem[first:last]])
-                                elif last != None:
-                                    tag_elem = ",".join([json.dumps(elem) for elem in arr_elem[:last]])
-                                else:
-                                    tag_elem = ",".join([json.dumps(elem) for elem in arr_elem[first:]])
-
-                                # want a specific range
-                                pass
-                        else:
-                            raise CBadResourceException(
-                                "include : expect for json array and get a json object urlinclude=[{0}]".format(
-                                    self.fullpath))
-                    else:
-                        tag_elem = json.dumps(json.loads(content)[self.tag])
-
-                    join_list.append(tag_elem)
+        return the list of the values of all files that correspond to the
+        resource, filtered by the tag if any
+        """
+        if self.contents is None:
+            return None
+
+        if self.tag is None:
+            return list(self.contents)
+
+        values = []
+        idx_obraces = self.tag.find("[")
+        idx_cbraces = self.tag.find("]")
+        tag_key = self.tag
+        if idx_obraces != -1:
+            tag_key = self.tag[:idx_obraces]
+
+        for json_obj in self.contents:
+            if not isinstance(json_obj, dict) or tag_key not in json_obj:
+                mess = "include property [{0}]  defined in file [{1}] doesn't exists in file [{2}]".format(
+                    tag_key, self.resource_parent.filename, self.filename)
+                raise CBadResourceException(mess)
+
+            arr_elem = json_obj[tag_key]
+            # manage a tag can identified a array or a object and we want a elem of the array or all elemnet or the array
+            if idx_obraces != -1 and idx_cbraces != -1:
+                if not isinstance(arr_elem, list):
+                    raise CBadResourceException(
+                        "include : expect for json array and get a json object urlinclude=[{0}]".format(
+                            self.fullpath))
+
+                # want something from the array and not all the array
+                range_idx = self.tag[idx_obraces + 1:idx_cbraces]
+                if range_idx.isdigit():
+                    # want a specific element
+                    idx = int(range_idx)
+                    if idx >= len(arr_elem):
+                        raise CBadResourceException(
+                            "include : Bad index expect=[{0}] size=[{1}]".format(idx, len(arr_elem)))
+                    values.append(arr_elem[idx])
+                elif range_idx == "*":
+                    values.extend(arr_elem)
+                elif ":" in range_idx:
+                    # want a specific range
+                    idxs = range_idx.split(":")
+                    first = int(idxs[0]) if idxs[0].isdigit() else None
+                    last = int(idxs[1]) if idxs[1].isdigit() else None
+                    values.extend(arr_elem[first:last])
                 else:
-                    join_list.append(content)
+                    # nothing specified: raise an error
+                    raise CBadResourceException("include : No index but array ask")
+            else:
+                values.append(arr_elem)
 
-            return ",".join(join_list)
-        return None
+        return values
 
     """
     describe a resource that can be file, a http or memory or any kind
     """
 
-    def __init__(self, filename, includer, finder, parent_resource=None):
+    def __init__(self, filename, includer, finder, parent_resource=None,
+                 read_files=None):
         """
         construct a resource from a string e.g file:///mypath/foo.txt?k1=v1&#mytag
         @param resource : parent resource , use if path is relative
         @param alternive_dirs : alternative dirs to locate  the file content to include
         @param path : path of the current resource to create
+        @param read_files : list the read files are appended to (given by the parent resource if None)
         """
         self.fullpath = filename
         self.protocol_idx = 0
@@ -197,6 +217,9 @@ class CResource(object):
         self.dirpath = None
         self.contents = None
         self.read_files_name = None  # list of file name read that correspond to the contents . use for error managment
+        if read_files is None and parent_resource is not None:
+            read_files = parent_resource.read_files
+        self.read_files = read_files  # list of all files read to resolve the root resource
 
         self.tag = None
         self.resource_parent = parent_resource;
@@ -285,54 +308,42 @@ class CResource(object):
         return filename
 
     def _read_contents_file(self, a_file):
-        contents = []
+        """
+        return the parsed content of the given file, with its variables
+        replaced by the parameters of the resource
+        """
         _logger.info("read file {0}".format(a_file))
-        lines = []
-        if a_file != None:
-            with open(a_file) as obj_file:
-                comment_line = False
-                self.read_files_name.append(a_file)
-                for line in obj_file:
-                    # remove /* */  comment, the // is manage by the regexp
-                    # TODO manage "http://" /*
-                    idx_last_str = line.rfind("\"")
-                    idx_start = line.find("/*")
-                    idx_end = line.find("*/")
-                    if idx_start != -1 and idx_end != -1:
-                        if not idx_start + 1 < idx_end:
-                            lines.append(line)
-                        else:
-                            lines.append(line[:idx_start] + line[idx_end + 2:])
-                    elif idx_start != -1 and idx_last_str < idx_start:
-                        comment_line = True
-                        lines.append(line[:idx_start])
-                    elif idx_end != -1 and comment_line:
-                        comment_line = False
-                        lines.append(line[idx_end + 2:])
-                    elif not comment_line:
-                        lines.append(line)
-                contents.append("\n".join(lines));
-            if len(contents) > 0:
-                return contents
-        return None
+        self.read_files_name.append(a_file)
+        if self.read_files is not None:
+            self.read_files.append(a_file)
+        content = self._include.load_source(a_file)
+        if self.params is not None and "${" in content:
+            content = common.replace_vars(self.params, content)[0]
+
+        try:
+            json_content = json.loads(content)
+        except ValueError as ex:
+            raise CBadResourceException(
+                "not valid json for file {0}, Error {1}".format(a_file, ex))
+
+        # check if we have import-file as a property
+        self._include._check_no_import_files(self.get_full_filename(), json_content)
+        return json_content
 
     def _read_contents_files(self):
         """
         if the path contain a wildChar we read o all files else only the first one (compatibilty with the current way to manage import)
         return the contents of the files identified by the path
-        @return : a list of String
+        @return : a list of parsed JSON values
         """
         contents = []
         path = self.filename
 
         self.read_files_name = []
-        w_readed_file = []
         for file in self._finder.find_rel(path, self.dirpath):
-            content = self._read_contents_file(file)
-            if content != None and not file in w_readed_file:
-                contents.append("\n".join(content));
-                w_readed_file.append(file)
-            
+            if file is not None and file not in self.read_files_name:
+                contents.append(self._read_contents_file(file))
+
         if len(contents) > 0:
             return contents
         # no content found in list of directory
@@ -341,16 +352,13 @@ class CResource(object):
     def _read_contents(self):
         """
         return the content of the url with the variable replace
-        @return : a  list of String
+        @return : a list of parsed JSON values
         """
         if self.type == "file":
             self.contents = self._read_contents_files()
         else:
             # not manager
-            self.content = None
-
-        if self.params != None:
-            self.contents = common.replace_vars(self.params, self.contents)
+            self.contents = None
 
         return self.contents
 
@@ -399,14 +407,12 @@ class FileIncluderAbs(object):
     """
 
     def __init__(self):
-        # regexp that manage multiline comment and // comment
-        self._check = re.compile("(.*//.*)", re.MULTILINE)
-        self._check_slash = re.compile("(\".*//.*\")", re.MULTILINE)
-        # _simple_include = "((\\n)*\\{(\\n)*\\s*\"\\$include\"\\s*:(\\s*\"[^\\}]*\"\\s*)\\})"
-        # _complex_include = "((\n)*\\{(\\s|\n|\t)*\"\$include\"(\\s|\n|\t)*:(\\s|\n|\t)*\\{((\\s|\n|\t)*\"[^\\}]*\"(\\s|\n|\t)*:(\\s|\n|\t)*.*(\\s|\n|\t)*,{0,1}(\\s|\n|\t)*)*\\}(\\s|\n|\t)*)\\}"
-        # self._include = re.compile("(" + _simple_include + ")|(" + _complex_include + ")", re.MULTILINE)
-        _simple_merge = "(,{0,1}(\n|\s|\t)*\"\$merge\"(\n|\s|\t)*:((\n|\s|\t)*\[(\n|\s|\t)*\"[^\}]*\"(\n|\s|\t)*\](\n|\s|\t)*,{0,1}))"
-        self._merge = re.compile(_simple_merge, re.MULTILINE)
+        # Comment-less content of the files read:
+        # real path -> (modification time, size, content)
+        self._sources = {}
+
+        # Last load time of each file: real path -> seconds
+        self._load_times = {}
 
         self._file_generator = {}  # list of generator by file
 
@@ -416,32 +422,82 @@ class FileIncluderAbs(object):
         """
         pass
 
-    def _get_content(self, filepath, parent_resource=None):
+    def load_source(self, filename):
         """
-        return a resolved content json string without commentary
+        return the content of the given file without its comments. The file is
+        lexed only once as long as its modification time and size don't change
+
+        :param filename: Path of the file to read
+        :return: The JSON content of the file, without comments
+        """
+        start = time.time()
+        real_path = os.path.realpath(filename)
+        stat = os.stat(real_path)
+        try:
+            mtime, size, content = self._sources[real_path]
+            if mtime == stat.st_mtime and size == stat.st_size:
+                self._load_times[real_path] = time.time() - start
+                return content
+        except KeyError:
+            pass
+
+        with open(real_path) as obj_file:
+            content = strip_comments(obj_file.read())
+
+        self._sources[real_path] = (stat.st_mtime, stat.st_size, content)
+        self._load_times[real_path] = duration = time.time() - start
+        _logger.debug("file %s loaded in %.3fms", real_path, duration * 1000)
+        return content
+
+    def get_load_times(self):
+        """
+        return the time spent loading each file during its last read
+
+        :return: A real path -> seconds dictionary
         """
+        return self._load_times.copy()
 
+    def clear_cache(self):
+        """
+        clear the content of the files read so far
+        """
+        self._sources.clear()
+        self._load_times.clear()
+
+    def _get_values(self, filepath, parent_resource=None, read_files=None):
+        """
+        return the list of resolved JSON values corresponding to the given
+        path, or None if no file matches it
+        """
         if filepath != None:
             _logger.info("_getContent {0}".format(filepath))
 
             # return a resolve content json
-            resource = CResource(filepath, self, self._get_finder(), parent_resource)
-
-            # remove comment and content of the resource
-            self._remove_comment(resource)
+            resource = CResource(filepath, self, self._get_finder(),
+                                 parent_resource, read_files)
 
             # resolve content
-            self._resolve_content(resource);
+            self._resolve_content(resource)
 
             return resource.readall()
 
         return None
 
+    def _get_content(self, filepath, parent_resource=None):
+        """
+        return a resolved content json string without commentary
+        """
+        values = self._get_values(filepath, parent_resource)
+        if values is None:
+            return None
+
+        return ",".join(json.dumps(value) for value in values)
+
     # for using it from jython without osgi and ipopo resolution
     def set_finder(self, finder):
         self._finder = finder
 
-    def get_content(self, filename, want_json=False):
+    def get_content(self, filename, want_json=False, read_files=None):
         """
         @param filename: path we want the content. the filename can be a absolute path, a path with key value params or tag to specify what content we want.
         e.g :
@@ -450,48 +506,52 @@ class FileIncluderAbs(object):
             -    file://mydir.myfile.js?k1=v1&k2=v2#myprop => this will get the only the property myprop of the content file myfile wth replace variable
 
         @param wantJson : boolean to defined if we want a json object as a result or a string
+        @param read_files : if given, list the path of all the files read to resolve the content is appended to
         return a resolved content json string without commentary
         """
+        start = time.time()
 
         # multi path asked if the filename contains ; separator
-        if filename.find(";") != -1:
-            content = ",".join([self._get_content(name) for name in filename.split(";")])
-        else:
-            content = self._get_content(filename)
+        json_contents = []
+        for name in filename.split(";"):
+            values = self._get_values(name, read_files=read_files)
+            if values is not None:
+                json_contents.extend(values)
+            else:
+                # the callers (e.g. the isolate configuration parser) expect
+                # a None content for a missing file
+                _logger.debug("no file found for %s", name)
 
         merge_content = None
-        if content == None:
-            raise IOError("file {0} doesn't exists".format(filename))
-        json_contents = json.loads("[" + content + "]")
-
         for json_content in json_contents:
             if isinstance(json_content, dict):
                 # must be always a dict to append all json dict
 
                 if merge_content == None:
-                    merge_content = json.loads("{}")
+                    merge_content = {}
                 merge_content = common.merge_object(merge_content, json_content)
 
             elif isinstance(json_content, list):
                 # must be always a list to append all json arrays
                 if merge_content == None:
-                    merge_content = json.loads("[]")
+                    merge_content = []
                     for arr in json_content:
                         merge_content.append(arr)
 
                 if merge_content == None:
                     raise IOError("{0} doesn't exists ".format(filename))
 
+        _logger.debug("%s resolved in %.3fms", filename,
+                      (time.time() - start) * 1000)
         if not want_json:
             return json.dumps(merge_content)
-        _logger.debug("content=[{}]".format(json.dumps(merge_content)))
         return merge_content
 
     def _get_include_path(self, json_match):
         """ return the list of path to include """
         if isinstance(json_match, dict):
             paths = json_match["path"]
-            if isinstance(paths, str):
+            if not isinstance(paths, list):
                 paths = paths.split(";")
                 # TODO property to manage
 
@@ -512,111 +572,77 @@ class FileIncluderAbs(object):
 
         return True  
 
-    def _get_include_match(self, matches):
-        found_match = None
-        for match in matches:
-            if match != "":
-                found_match = match
-                break
-        return found_match
-
-    def _find_match_include(self, a_json):
-        w_res = []
+    def _get_include_values(self, json_match, resource):
+        """
+        return the list of values to put in place of the given $include
+        """
+        values = []
+        if self._is_condition_include(json_match):
+            for path in self._get_include_path(json_match):
+                _logger.debug("_revolveContent: $include - subContentPath {0}".format(path))
+                sub_values = self._get_values(path, resource)
+                if sub_values:
+                    values.extend(sub_values)
+
+        if not values:
+            # nothing to include: replace by an empty object
+            values.append({})
+        return values
+
+    def _resolve_value(self, value, resource):
+        """
+        resolve the $include and $merge entries of the given JSON value, which
+        is updated in place.
 
-        if isinstance(a_json, dict) :
-            if "$include" in a_json.keys():
-                return [a_json]
-            else:
-                for a_sub_json in a_json.values():
-                    w_sub_res = self._find_match_include(a_sub_json)
-                    if w_sub_res:
-                        w_res.extend(w_sub_res)
-        elif isinstance(a_json, list):
-            for a_elem in a_json:
-                w_sub_res = self._find_match_include(a_elem)
-                if w_sub_res:
-                    w_res.extend(w_sub_res)
-          
-        return w_res
+        :param value: A parsed JSON value
+        :param resource: The resource the value comes from
+        :return: The list of values replacing the given one
+        """
+        if isinstance(value, dict):
+            if "$include" in value:
+                _logger.debug("_revolveContent: match found {0}".format(value))
+                return self._get_include_values(value["$include"], resource)
+
+            merge = value.pop("$merge", None)
+            for key, sub_value in value.items():
+                sub_values = self._resolve_value(sub_value, resource)
+                if len(sub_values) != 1:
+                    raise CBadResourceException(
+                        "include of {0} values in property [{1}] of file [{2}]"
+                        .format(len(sub_values), key, resource.fullpath))
+                value[key] = sub_values[0]
+
+            if isinstance(merge, list):
+                for path in merge:
+                    _logger.debug("_revolveContent: $merge - subContentPath {0}".format(path))
+                    # merge this json with the current one
+                    for to_merge in self._get_values(path, resource) or ():
+                        value = common.merge_object(value, to_merge)
+            elif merge is not None:
+                value["$merge"] = merge
+
+        elif isinstance(value, list):
+            resolved = []
+            for sub_value in value:
+                resolved.extend(self._resolve_value(sub_value, resource))
+            value[:] = resolved
+
+        return [value]
 
     def _resolve_content(self, resource):
         """
-        return a resolve content with all include file content
+        resolve the $include and $merge entries of the contents of the given
+        resource. The included values are spliced in the parsed contents:
+        the files are never serialized nor parsed again.
         """
         _logger.debug("_revolveContent")
 
-        contents = resource.get_contents();
+        contents = resource.get_contents()
         if contents != None:
             resolved_contents = []
             for content in contents:
-                resolved_content = content
-                # apply regexp to remove content
-                # load str as json and find all $include match 
-                resolved_json = json.loads(resolved_content)
-                for found_match in self._find_match_include(resolved_json):
-                    # found_match = self._get_include_match(matches)
-
-                    _logger.debug("_revolveContent: match found {0}".format(found_match))
-                    sub_contents = []
-                    # match_json = json.loads(found_match)
-                    match_json = found_match
-                    found_match = json.dumps(found_match)
-                    if match_json != None:
-                        if "$include" in match_json.keys():
-                            # match is { $include: "file:///path of a file"}
-                            # check condition property if it exists 
-                            include_matched = match_json["$include"]
-                            if(self._is_condition_include(include_matched)):
-                                for path in self._get_include_path(include_matched):
-                                    _logger.debug("_revolveContent: $include - subContentPath {0}".format(path))
-    
-                                    sub_content = self._get_content(path, resource)
-                                    if sub_content != None and sub_content != "":
-                                        sub_contents.append(sub_content)
-                                if len(sub_contents) > 0 :
-                                    resolved_content = resolved_content.replace(found_match, str.join(",", sub_contents))
-                                else:
-                                    resolved_content = resolved_content.replace(found_match, "{}")
-                            else:
-                                resolved_content = resolved_content.replace(found_match, "{}")
-
-                # apply regexp to remove content
-                for matches in self._merge.findall(resolved_content):
-                    found_match = self._get_include_match(matches)
-
-                    _logger.debug("_revolveContent: match found {0}".format(found_match))
-                    sub_contents = []
-                    # load json to get the path and resolve it
-                    idx_sep = found_match.find(":")
-                    end_coma = found_match.endswith(",")
-                    start_coma = found_match.startswith(",")
-
-                    if end_coma:
-                        match_json = json.loads(found_match[idx_sep + 1:-1])
-                    else:
-                        match_json = json.loads(found_match[idx_sep + 1:])
-
-                    if match_json != None:
-                        resolved_content = json.loads(
-                            resolved_content.replace(found_match, "," if end_coma and start_coma else ""))
-                        for path in match_json:
-                            _logger.debug("_revolveContent: $merge - subContentPath {0}".format(path))
-                            # merge this json with the current one
-                            w_content = self._get_content(path, resource)
-                            if w_content != None:
-                                _logger.debug("_revolveContent: $merge - subContentPath not null {0}, content={1}".format(path, w_content))
-                                to_merges = json.loads("[" + w_content + "]")
-                                for to_merge in to_merges:
-                                    resolved_content = common.merge_object(resolved_content, to_merge)
-                            else:
-                                _logger.debug("_revolveContent: $merge - subContentPath not null {0}".format(path))
-
-                        resolved_content = json.dumps(resolved_content)
-
-                        # replace match by list of subcontent
-                resolved_contents.append(resolved_content);
-
-            # check if the json is ok and reformat it for the correct application of the regexp
+                resolved_contents.extend(self._resolve_value(content, resource))
+
             resource.set_contents(resolved_contents)
 
     def _check_no_import_files(self, a_filename, a_json):
@@ -624,38 +650,6 @@ class FileIncluderAbs(object):
         if "import-files" in a_json:
             raise CBadResourceException("file=[{}] has 'import-files' property, please check your composition file in conf".format(a_filename))
 
-    def _remove_comment(self, resource):
-        """
-        change the content to remove all possible comment // or /* ...*/
-        """
-        _logger.debug("_removeComment")
-
-        contents = resource.get_contents()
-        if contents != None:
-            # apply regexp to remove content
-            contents_no_comment = []
-            for idx, content in enumerate(contents):
-                content_no_comment = content
-                for match in self._check.findall(content):
-                    if match != None and match.find("/") != -1 and len(match) > 1:
-                        _logger.debug("match comment {0}".format(match))
-
-                        if self._check_slash.search(match) == None:
-                            _logger.debug("_removeComment: match found {0}".format(match))
-                            idx = match.find("/")
-                            content_no_comment = content_no_comment.replace(match[idx:], "")
-                try:
-                    w_json_loaded = json.loads(content_no_comment)
-                    self._check_no_import_files(resource.get_full_filename(), w_json_loaded)
-                    # check if we have import-file as a property
-                    content_no_comment = json.dumps(w_json_loaded)
-                except Exception as e:
-                    raise CBadResourceException(
-                        "not valid json for file {0}, Error {1}".format(resource.read_files_name[idx], e.__str__()))
-                contents_no_comment.append(content_no_comment)
-
-            resource.set_contents(contents_no_comment)
-
 
 @ComponentFactory('cohorte-file-includer-factory')
 @Provides(cohorte.SERVICE_FILE_INCLUDER)
@@ -26,7 +26,9 @@ beans
 
 # Python standard library
 import collections
+import json
 import logging
+import os
 import uuid
 
 import cohorte
@@ -65,6 +67,48 @@ Isolate = collections.namedtuple(
     'Isolate', BootConfiguration._fields + ('name', 'kind', 'node',
                                             'level', 'sublevel'))
 
+# Merged configuration of a kind of isolate: the configuration and its boot
+# part are stored as JSON strings, to get a fresh copy cheaply.
+# The template is valid while the files it has been read from, the
+# directories where they have been looked for and the environment used to
+# replace the variables of the files don't change.
+_Template = collections.namedtuple(
+    '_Template', ('files', 'directories', 'environment',
+                  'configuration', 'boot'))
+
+
+def _get_files_stamps(filenames):
+    """
+    Returns the modification stamps of the given files
+
+    :param filenames: A list of file paths
+    :return: A tuple of (path, modification time, size) tuples
+    :raise OSError: A file is missing
+    """
+    stamps = []
+    for filename in sorted(set(filenames)):
+        file_stat = os.stat(filename)
+        stamps.append((filename, file_stat.st_mtime, file_stat.st_size))
+    return tuple(stamps)
+
+
+def _get_dirs_stamps(dirnames):
+    """
+    Returns the modification stamps of the given directories: adding or
+    removing a file in a directory changes its stamp
+
+    :param dirnames: A list of directory paths
+    :return: A tuple of (path, modification time) tuples, the time being None
+             for a missing directory
+    """
+    stamps = []
+    for dirname in dirnames:
+        try:
+            stamps.append((dirname, os.stat(dirname).st_mtime))
+        except OSError:
+            stamps.append((dirname, None))
+    return tuple(stamps)
+
 
 def _recursive_namedtuple_convert(data):
     """
@@ -92,6 +136,7 @@ def _recursive_namedtuple_convert(data):
 @ComponentFactory('cohorte-config-parser-factory')
 @Provides(cohorte.SERVICE_CONFIGURATION_READER)
 @Requires('_reader', cohorte.SERVICE_FILE_READER)
+@Requires('_finder', cohorte.SERVICE_FILE_FINDER)
 @Instantiate('cohorte-config-parser')
 class BootConfigParser(object):
     """
@@ -105,9 +150,15 @@ class BootConfigParser(object):
         # File reader
         self._reader = None
 
+        # File finder
+        self._finder = None
+
         # Loaded isolates configurations
         self._isolates = None
 
+        # Isolates configuration templates: (kind, level, sublevel) -> _Template
+        self._templates = {}
+
     @staticmethod
     def _parse_bundle(json_object):
         """
@@ -199,7 +250,7 @@ class BootConfigParser(object):
 
     def _prepare_configuration(self, uid, name, kind,
                                bundles=None, composition=None,
-                               base_configuration=None):
+                               base_configuration=None, boot=None):
         """
         Prepares and returns a configuration dictionary to be stored in the
         configuration broker, to start an isolate of the given kind.
@@ -210,6 +261,8 @@ class BootConfigParser(object):
         :param bundles: Extra bundles to install
         :param composition: Extra components to instantiate
         :param base_configuration: Base configuration (to override)
+        :param boot: Boot configuration dictionary of this kind of isolate
+                     (loaded if None)
         :return: A configuration dictionary
                  (updated base_configuration if given)
         :raise IOError: Unknown/unaccessible kind of isolate
@@ -228,8 +281,10 @@ class BootConfigParser(object):
         configuration['kind'] = kind
 
         # Boot configuration for this kind
+        if boot is None:
+            boot = _recursive_namedtuple_convert(self.load_boot(kind))
         new_boot = configuration.setdefault('boot', {})
-        new_boot.update(_recursive_namedtuple_convert(self.load_boot(kind)))
+        new_boot.update(boot)
 
         # Add bundles (or an empty list)
         if bundles:
@@ -286,34 +341,40 @@ class BootConfigParser(object):
         return Bundle(name, filename, properties, version,
                       getattr(bundle, 'optional', False))
 
-    def load_boot(self, kind):
+    def load_boot(self, kind, read_files=None):
         """
         Loads the boot configuration for the given kind of isolate, or returns
         the one in the cache.
 
         :param kind: The kind of isolate to boot
+        :param read_files: If given, the paths of the files read are appended
+                           to this list
         :return: The loaded BootConfiguration object
         :raise IOError: Unknown/unaccessible kind of isolate
         :raise KeyError: A parameter is missing in the configuration files
         :raise ValueError: Error reading the configuration
         """
         # Prepare & store the bean representation
-        return self.load_boot_dict(self.load_conf_raw('boot', kind))
+        return self.load_boot_dict(
+            self.load_conf_raw('boot', kind, read_files))
 
-    def load_conf_raw(self, level, kind):
+    def load_conf_raw(self, level, kind, read_files=None):
         """
         Loads the boot configuration for the given kind of isolate, or returns
         the one in the cache.
 
         :param level: The level of configuration (boot, java, python)
         :param kind: The kind of isolate to boot
+        :param read_files: If given, the paths of the files read are appended
+                           to this list
         :return: The loaded BootConfiguration object
         :raise IOError: Unknown/unaccessible kind of isolate
         :raise KeyError: A parameter is missing in the configuration files
         :raise ValueError: Error reading the configuration
         """
         # Load the boot file
-        return self.read('{0}-{1}.js'.format(level, kind))
+        return self.read('{0}-{1}.js'.format(level, kind),
+                         read_files=read_files)
 
     def load_boot_dict(self, dict_config):
         """
@@ -345,6 +406,64 @@ class BootConfigParser(object):
                                  environment=environment,
                                  properties=properties)
 
+    def _get_template(self, kind, level, sublevel):
+        """
+        Returns the merged configuration template of the given kind of
+        isolate. The template is computed on first call, and again only if
+        one of the files it has been read from has been modified, if a file
+        has been added or removed in a directory where configuration files
+        are looked for, or if the environment changed.
+
+        :param kind: The kind of isolate to boot (pelix, osgi, ...)
+        :param level: The level of configuration (boot, java, python, ...)
+        :param sublevel: Category of configuration (monitor, isolate, ...)
+        :return: A _Template object
+        :raise IOError: Unknown/unaccessible kind of isolate
+        :raise KeyError: A parameter is missing in the configuration files
+        :raise ValueError: Error reading the configuration
+        """
+        # Files are looked for in the "conf" directory of each root, even if
+        # they didn't exist when the template was computed
+        requested = [
+            os.path.join('conf', '{0}-{1}.js'.format(level, sublevel)),
+            os.path.join('conf', 'boot-{0}.js'.format(kind))]
+
+        # Variables of the files are replaced by environment ones
+        environment = dict(os.environ)
+
+        key = (kind, level, sublevel)
+        template = self._templates.get(key)
+        if template is not None and template.environment == environment:
+            files = [stamp[0] for stamp in template.files]
+            try:
+                if _get_files_stamps(files) == template.files \
+                        and _get_dirs_stamps(self._finder.get_search_dirs(
+                            files + requested)) == template.directories:
+                    return template
+            except OSError:
+                # A file has been removed
+                pass
+
+        # Load the isolate model and boot files
+        read_files = []
+        configuration = self.load_conf_raw(level, sublevel, read_files)
+        boot = _recursive_namedtuple_convert(self.load_boot(kind, read_files))
+
+        files = _get_files_stamps(read_files)
+        template = self._templates[key] = _Template(
+            files, _get_dirs_stamps(self._finder.get_search_dirs(
+                [stamp[0] for stamp in files] + requested)),
+            environment, json.dumps(configuration), json.dumps(boot))
+        _logger.debug("Configuration template of %s computed from %d files",
+                      key, len(template.files))
+        return template
+
+    def clear_templates(self):
+        """
+        Forgets the isolates configuration templates
+        """
+        self._templates.clear()
+
     def prepare_isolate(self, uid, name, kind, level, sublevel,
                         bundles=None, composition=None):
         """
@@ -363,8 +482,9 @@ class BootConfigParser(object):
         :raise KeyError: A parameter is missing in the configuration files
         :raise ValueError: Error reading the configuration
         """
-        # Load the isolate model file
-        configuration = self.load_conf_raw(level, sublevel)
+        # Get a copy of the isolate model
+        template = self._get_template(kind, level, sublevel)
+        configuration = json.loads(template.configuration)
         _logger.info("load isolate conf file {}.js".format(name))
         try:
             # Try to load the isolate-specific configuration
@@ -389,15 +509,19 @@ class BootConfigParser(object):
         _logger.debug("isolate configuration = {}".format(configuration))   
         # Extend with the boot configuration
         return self._prepare_configuration(uid, name, kind,
-                                           bundles, composition, configuration)
+                                           bundles, composition, configuration,
+                                           json.loads(template.boot))
 
-    def read(self, filename, reader_log_error=True):
+    def read(self, filename, reader_log_error=True, read_files=None):
         """
         Reads the content of the given file, without parsing it.
 
         :param filename: A configuration file name
         :param reader_log_error: If True, the reader will log I/O errors
+        :param read_files: If given, the paths of the files read are appended
+                           to this list
         :return: The dictionary read from the file
         """
         return self._reader.load_file(filename, 'conf',
-                                      log_error=reader_log_error)
+                                      log_error=reader_log_error,
+                                      read_files=read_files)
@@ -239,7 +239,8 @@ class ConfigurationFileReader(object):
         # Nothing to do
         return json_data
  
-    def _load_file(self, filename, base_file, overridden_props, include_stack):
+    def _load_file(self, filename, base_file, overridden_props, include_stack,
+                   read_files=None):
         """
         Parses a configuration file.
         This method shall not be called directly, as it doesn't performs clean
@@ -248,6 +249,8 @@ class ConfigurationFileReader(object):
         :param filename: Base name or relative name of the file to load
         :param base_file: If given, search the file near the base file first
         :param overridden_props: Properties to override in imported files
+        :param read_files: If given, the paths of the files read are appended
+                           to this list
         :return: The parsed JSON content.
         :raise ValueError: Error parsing a JSON file
         :raise IOError: Error reading the configuration file
@@ -257,7 +260,7 @@ class ConfigurationFileReader(object):
         dirpath = os.sep.join(base_file.split(os.sep)[:-1]) + os.sep if base_file != None and base_file.find(os.sep) != -1 else ""
         fullfilename = dirpath + filename 
 
-        json_data = self._includer.get_content(fullfilename, True)
+        json_data = self._includer.get_content(fullfilename, True, read_files)
         # Parse the file and resolve inclusions
         # self._do_recursive_imports(fullfilename, json_data,
         #                                  overridden_props, include_stack)  
@@ -267,7 +270,7 @@ class ConfigurationFileReader(object):
         return json_data
 
     def load_file(self, filename, base_file=None, overridden_props=None,
-                  log_error=True):
+                  log_error=True, read_files=None):
         """
         Parses a configuration file.
         If a configuration entry has a "from" key, then this entry is replaced
@@ -277,6 +280,8 @@ class ConfigurationFileReader(object):
         :param base_file: If given, search the file near the base file first
         :param overridden_props: Properties to override in imported files
         :param log_error: If True, log the encountered I/O error (if any)
+        :param read_files: If given, the paths of the files read are appended
+                           to this list
         :return: The parsed JSON content.
         :raise ValueError: Error parsing a JSON file
         :raise IOError: Error reading the configuration file
@@ -286,7 +291,7 @@ class ConfigurationFileReader(object):
         try:
             # Load the file
             return self._load_file("conf" + os.sep + filename, base_file, overridden_props,
-                                   include_stack)
+                                   include_stack, read_files)
         except ValueError as ex:
             # Log parsing errors
             _logger.error("Error parsing file '%s': %s", include_stack[-1], ex)
@@ -39,3 +39,9 @@ PROP_REPOSITORY_LANGUAGE = "cohorte.repository.language"
 
 PROP_FACTORY_MODEL = "cohorte.repository.factory.model"
 """ Name of the component model handling the factories """
+
+PROP_SCAN_WORKERS = "cohorte.repository.scan.workers"
+"""
+Number of processes used to parse the artifacts of a repository (0 or None
+for one per CPU, 1 to work in the current process)
+"""
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+COHORTE Repositories: index of component factories
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import logging
+import operator
+
+# Repository beans
+from cohorte.repositories.beans import Factory, Version
+
+# ------------------------------------------------------------------------------
+
+# Bundle version
+import cohorte.version
+__version__=cohorte.version.__version__
+
+# ------------------------------------------------------------------------------
+
+_logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+
+
+class FactoryIndex(object):
+    """
+    Associates component factories to the artifacts providing them.
+
+    For each factory, artifacts are kept sorted from the best one (by name,
+    then highest version) to the worst one. The index is updated artifact by
+    artifact: it is not thread-safe, the repositories using it must protect
+    it.
+    """
+    def __init__(self, language, model):
+        """
+        Sets up the index
+
+        :param language: Language of implementation of the factories
+        :param model: The component model handling the factories
+        """
+        self.language = language
+        self.model = model
+
+        # Name -> [Factories], best artifact first
+        self._factories = {}
+
+        # Artifact -> [Factories] (can be empty)
+        self._artifacts = {}
+
+    def __contains__(self, name):
+        """
+        Tests if the given factory name is known
+        """
+        return name in self._factories
+
+    def __len__(self):
+        """
+        Number of individual factories
+        """
+        return sum(len(factories) for factories in self._factories.values())
+
+    def add(self, artifact, names):
+        """
+        Sets the factories provided by an artifact, replacing the previous
+        ones if the artifact was already known
+
+        :param artifact: An Artifact bean
+        :param names: Names of the factories it provides (can be empty)
+        """
+        if artifact in self._artifacts:
+            self.remove(artifact)
+
+        artifact_list = self._artifacts[artifact] = []
+        for name in set(names or ()):
+            # Make the bean
+            factory = Factory(name, self.language, self.model, artifact)
+            artifact_list.append(factory)
+
+            # Keep the best artifact first
+            factory_list = self._factories.setdefault(name, [])
+            factory_list.append(factory)
+            factory_list.sort(key=operator.attrgetter('artifact'),
+                              reverse=True)
+
+    def remove(self, artifact):
+        """
+        Removes the factories provided by an artifact
+
+        :param artifact: An Artifact bean
+        """
+        for factory in self._artifacts.pop(artifact, ()):
+            factory_list = self._factories[factory.name]
+            factory_list.remove(factory)
+            if not factory_list:
+                del self._factories[factory.name]
+
+    def artifacts(self):
+        """
+        Returns the list of indexed artifacts
+        """
+        return list(self._artifacts)
+
+    def clear(self):
+        """
+        Clears the index
+        """
+        self._factories.clear()
+        self._artifacts.clear()
+
+    def find(self, name, artifact_name=None, artifact_version=None):
+        """
+        Finds the artifacts providing the given factory, filtered by name and
+        version
+
+        :param name: A factory name
+        :param artifact_name: Name of the artifact (optional)
+        :param artifact_version: Version of the artifact (optional)
+        :return: The list of artifacts, best one first
+        :raise KeyError: Unknown factory or no matching artifact
+        """
+        artifacts = [factory.artifact for factory in self._factories[name]]
+        if artifact_name is not None:
+            # Filter results
+            version = Version(artifact_version)
+            artifacts = [artifact for artifact in artifacts
+                         if artifact.name == artifact_name and
+                         version.matches(artifact.version)]
+
+            if not artifacts:
+                # No match found
+                raise KeyError("No matching artifact for {0} -> {1} {2}"
+                               .format(name, artifact_name, version))
+
+        return artifacts
+
+    def find_all(self, names):
+        """
+        Returns the artifacts providing the given factories
+
+        :param names: A list of factory names
+        :return: A tuple ({Name -> [Artifacts]}, {Not found factories})
+        """
+        resolution = {}
+        unresolved = set()
+        for name in set(names):
+            try:
+                resolution[name] = [factory.artifact
+                                    for factory in self._factories[name]]
+            except KeyError:
+                # Factory name not found
+                unresolved.add(name)
+
+        return resolution, unresolved
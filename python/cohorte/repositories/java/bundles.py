@@ -27,6 +27,7 @@ Java JARs repository utility module
 """
 
 # Standard library
+import bisect
 import contextlib
 import logging
 import operator
@@ -34,13 +35,14 @@ import os
 import zipfile
 
 # Pelix
-from pelix.utilities import to_str
+from pelix.utilities import is_string, to_str
 from pelix.ipopo.decorators import ComponentFactory, Provides, Property, \
     Invalidate, Validate
 
 # Cohorte
 import cohorte
 import cohorte.repositories
+import cohorte.repositories.parallel
 from cohorte.repositories.beans import Artifact, Version
 from cohorte.repositories.java.manifest import Manifest
 
@@ -64,11 +66,182 @@ BUNDLE_SERVICES_FOLDER = 'META-INF/services'
 # FrameworkFactory service descriptor in the framework JAR file
 FRAMEWORK_SERVICE = 'org.osgi.framework.launch.FrameworkFactory'
 
+# Maximum number of resolutions kept in cache
+MAX_RESOLUTIONS = 128
+
 _logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------------------------
 
 
+def _version_key(version):
+    """
+    Computes a sort key which orders like Version objects: trailing zeros are
+    ignored, then qualifiers are compared
+
+    :param version: A Version object
+    :return: A (numbers tuple, qualifier) tuple
+    """
+    numbers = list(version.version or ())
+    while numbers and not numbers[-1]:
+        numbers.pop()
+
+    return tuple(numbers), version.qualifier
+
+# Sort key of an unversioned element (matches any requirement)
+_ANY_VERSION_KEY = _version_key(Version(None))
+
+
+class _VersionRange(object):
+    """
+    A parsed version requirement, with the same semantics as Version.matches()
+    """
+    __slots__ = ('minimum', 'maximum', 'inclusive')
+
+    def __init__(self, requirement=None):
+        """
+        Parses the given requirement
+
+        :param requirement: A version, a version range string or None
+        """
+        # Sort keys of the boundaries (None: no boundary)
+        self.minimum = None
+        self.maximum = None
+        self.inclusive = True
+
+        if is_string(requirement):
+            requirement = requirement.strip()
+            if requirement[0] == '[':
+                # Range
+                self.inclusive = (requirement[-1] == ']')
+                versions = requirement[1:-1].split(',')
+                self.minimum = _version_key(Version(versions[0]))
+                self.maximum = _version_key(Version(versions[1]))
+                return
+
+            requirement = Version(requirement)
+
+        if isinstance(requirement, Version) and requirement.version is not None:
+            # Allow binding up to the next major version (excluded)
+            self.minimum = _version_key(requirement)
+            self.maximum = _version_key(requirement + (1,))
+            self.inclusive = False
+
+    def matches(self, version):
+        """
+        Tests if the given version matches this requirement
+
+        :param version: A Version object
+        :return: True if the version matches
+        """
+        if version.version is None:
+            # No version matches any version
+            return True
+
+        key = _version_key(version)
+        if self.minimum is not None and key < self.minimum:
+            return False
+        elif self.maximum is not None:
+            if self.inclusive:
+                return key <= self.maximum
+            return key < self.maximum
+
+        return True
+
+
+class _VersionIndex(object):
+    """
+    Associates names to versioned elements, sorted by version to find the
+    best match of a requirement with a binary search
+    """
+    __slots__ = ('_entries',)
+
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Name -> ([sort keys], [elements]), in ascending version order
+        self._entries = {}
+
+    def add(self, name, version, element):
+        """
+        Adds an element to the index
+
+        :param name: Name of the element
+        :param version: Version of the element
+        :param element: The indexed element
+        """
+        keys, elements = self._entries.setdefault(name, ([], []))
+        key = _version_key(version)
+
+        # Insert before elements with the same version: in case of equality,
+        # the first one added is the best match
+        index = bisect.bisect_left(keys, key)
+        keys.insert(index, key)
+        elements.insert(index, element)
+
+    def find(self, name, version_range):
+        """
+        Finds the element with the highest version matching the requirement
+
+        :param name: Name of the element
+        :param version_range: A _VersionRange object
+        :return: The best matching element, or None
+        """
+        try:
+            keys, elements = self._entries[name]
+        except KeyError:
+            return None
+
+        maximum = version_range.maximum
+        if maximum is None:
+            index = len(keys)
+        elif version_range.inclusive:
+            index = bisect.bisect_right(keys, maximum)
+        else:
+            index = bisect.bisect_left(keys, maximum)
+
+        if index and (version_range.minimum is None
+                      or keys[index - 1] >= version_range.minimum):
+            # Highest version in range
+            return elements[index - 1]
+
+        if keys[0] == _ANY_VERSION_KEY:
+            # Unversioned elements match any requirement
+            return elements[bisect.bisect_right(keys, _ANY_VERSION_KEY) - 1]
+
+        return None
+
+    def clear(self):
+        """
+        Clears the index
+        """
+        self._entries.clear()
+
+# ------------------------------------------------------------------------------
+
+
+def _read_manifest(filename):
+    """
+    Reads and parses the manifest of a JAR file. Can be executed in a pool of
+    processes.
+
+    :param filename: Path to the JAR file
+    :return: A (file name, manifest entries, error) tuple, where the entries
+             are None in case of error
+    """
+    manifest = Manifest()
+    try:
+        with contextlib.closing(zipfile.ZipFile(filename)) as jar:
+            manifest.parse(jar.read(MANIFEST_FILE))
+    except (IOError, OSError, KeyError, ValueError, zipfile.BadZipfile) as ex:
+        return filename, None, "Error reading {0}: {1}".format(filename, ex)
+
+    return filename, manifest.entries, None
+
+# ------------------------------------------------------------------------------
+
+
 class Bundle(Artifact):
     """
     Represents an OSGi bundle
@@ -101,6 +274,11 @@ class Bundle(Artifact):
         self.all_require = \
             self._manifest.extract_packages_list('Require-Bundle')
 
+        # Exported package name -> Version
+        self.exported_versions = {
+            name: Version(attributes.get('version'))
+            for name, attributes in self.all_exports.items()}
+
     def exports(self, package_name, required_version=None):
         """
         Tests if the given package is exported by this bundle
@@ -109,10 +287,11 @@ class Bundle(Artifact):
         :param required_version: The required version/range of this package
         :return: True if the package is exported by this bundle
         """
-        if package_name not in self.all_exports:
+        try:
+            version = self.exported_versions[package_name]
+        except KeyError:
             return False
 
-        version = Version(self.all_exports[package_name].get('version'))
         return version.matches(required_version)
 
     def imports(self, other_bundle):
@@ -156,8 +335,7 @@ class Bundle(Artifact):
 
         :return: A Name -> Version dictionary
         """
-        return ((name, Version(attributes.get('version')))
-                for name, attributes in self.all_exports.items())
+        return iter(self.exported_versions.items())
 
     def get_manifest(self):
         """
@@ -194,6 +372,7 @@ class Bundle(Artifact):
 @ComponentFactory("cohorte-repository-artifacts-java-factory")
 @Provides(cohorte.repositories.SERVICE_REPOSITORY_ARTIFACTS)
 @Property('_language', cohorte.repositories.PROP_REPOSITORY_LANGUAGE, "java")
+@Property('_scan_workers', cohorte.repositories.PROP_SCAN_WORKERS, 0)
 class OSGiBundleRepository(object):
     """
     Represents a repository
@@ -205,6 +384,9 @@ class OSGiBundleRepository(object):
         # Language (property)
         self._language = None
 
+        # Number of parsing processes (property)
+        self._scan_workers = 0
+
         # Name -> [Bundle]
         self._bundles = {}
 
@@ -214,6 +396,16 @@ class OSGiBundleRepository(object):
         # Name -> [(Package Version, Bundle)]
         self._packages = {}
 
+        # Version-sorted indexes of bundles and packages
+        self._bundles_index = _VersionIndex()
+        self._packages_index = _VersionIndex()
+
+        # Requirement string -> _VersionRange
+        self._ranges = {}
+
+        # Resolution key -> Result of resolve_installation()
+        self._resolutions = {}
+
     def __contains__(self, item):
         """
         Tests if the given item is in the repository
@@ -254,6 +446,10 @@ class OSGiBundleRepository(object):
         """
         if bundle_registry is None:
             bundle_registry = self._bundles
+            self._bundles_index.add(bundle.name, bundle.version, bundle)
+
+            # The content of the repository changed
+            self._resolutions.clear()
 
         # Add the bundle to the dictionary
         bundle_list = bundle_registry.setdefault(bundle.name, [])
@@ -278,6 +474,7 @@ class OSGiBundleRepository(object):
         """
         if registry is None:
             registry = self._packages
+            self._packages_index.add(name, version, bundle)
 
         package_list = registry.setdefault(name, [])
         package_list.append((version, bundle))
@@ -303,19 +500,32 @@ class OSGiBundleRepository(object):
     def add_directory(self, dirname):
         """
         Recursively adds all .jar bundles found in the given directory into the
-        repository
+        repository.
+
+        Manifests are read by a pool of processes.
 
         :param dirname: A path to a directory
         """
-        for root, _, filenames in os.walk(dirname, followlinks=True):
-            for filename in filenames:
+        filenames = []
+        for root, _, names in os.walk(dirname, followlinks=True):
+            for filename in names:
                 if os.path.splitext(filename)[1] == '.jar':
-                    fullname = os.path.join(root, filename)
-                    try:
-                        self.add_file(fullname)
+                    filenames.append(
+                        os.path.realpath(os.path.join(root, filename)))
+
+        # Store bundles as they come
+        for filename, entries, error in cohorte.repositories.parallel.imap(
+                _read_manifest, filenames, self._scan_workers):
+            if error:
+                _logger.warning(error)
+                continue
 
-                    except ValueError as ex:
-                        _logger.warning(ex)
+            manifest = Manifest()
+            manifest.entries.update(entries)
+            try:
+                self.__add_bundle(Bundle(filename, manifest))
+            except ValueError as ex:
+                _logger.warning(ex)
 
     def clear(self):
         """
@@ -324,6 +534,9 @@ class OSGiBundleRepository(object):
         self._files.clear()
         self._bundles.clear()
         self._packages.clear()
+        self._bundles_index.clear()
+        self._packages_index.clear()
+        self._resolutions.clear()
 
     def filter_services(self, service):
         """
@@ -387,13 +600,37 @@ class OSGiBundleRepository(object):
         if not matching:
             raise ValueError('Bundle {0} not found.'.format(name))
 
-        for bundle in matching:
-            if bundle.version.matches(version):
+        if registry is self._bundles:
+            # Use the index
+            bundle = self._bundles_index.find(name, self.__get_range(version))
+            if bundle is not None:
                 return bundle
+        else:
+            for bundle in matching:
+                if bundle.version.matches(version):
+                    return bundle
 
         raise ValueError('Bundle {0} not found for version {1}'
                          .format(name, version))
 
+    def __get_range(self, requirement):
+        """
+        Returns the parsed form of a version requirement
+
+        :param requirement: A version, a version range string or None
+        :return: A _VersionRange object
+        """
+        if requirement is not None and not is_string(requirement):
+            # Version objects aren't hashable
+            return _VersionRange(requirement)
+
+        try:
+            return self._ranges[requirement]
+        except KeyError:
+            version_range = self._ranges[requirement] = \
+                _VersionRange(requirement)
+            return version_range
+
     def get_language(self):
         """
         Retrieves the language of the artifacts stored in this repository
@@ -415,6 +652,10 @@ class OSGiBundleRepository(object):
         if package_registry is None:
             package_registry = self._packages
 
+        if package_registry is self._packages:
+            # Use the index
+            return self._packages_index.find(name, self.__get_range(version))
+
         matching = package_registry.get(name, None)
         if not matching:
             return None
@@ -434,16 +675,65 @@ class OSGiBundleRepository(object):
         To simplify the work, the OSGi framework should be the first one in
         the list.
 
+        Results are kept in cache until the content of the repository
+        changes.
+
         :param bundles: A list of bundles to be resolved
         :param system_packages: Packages considered available by the framework
         :return: A tuple: (bundles, dependencies, missing artifacts,
                  missing packages)
         :raise ValueError: One of the given bundles is unknown
         """
-        # Name -> Bundle for this resolution
-        local_bundles = {}
-        # Name -> (Version, Bundle)
-        local_packages = {}
+        key = (self.__resolution_key(bundles),
+               self.__resolution_key(system_artifacts),
+               frozenset(system_packages or ()))
+        try:
+            resolution = self._resolutions[key]
+        except KeyError:
+            resolution = self.__resolve(bundles, system_artifacts,
+                                        system_packages)
+            if len(self._resolutions) >= MAX_RESOLUTIONS:
+                self._resolutions.clear()
+            self._resolutions[key] = resolution
+
+        # Return copies, as the caller might modify them
+        to_install, dependencies, missing_bundles, missing_packages = \
+            resolution
+        return list(to_install), \
+            dict((bundle, list(bundle_deps))
+                 for bundle, bundle_deps in dependencies.items()), \
+            set(missing_bundles), set(missing_packages)
+
+    @staticmethod
+    def __resolution_key(artifacts):
+        """
+        Computes the part of a resolution cache key for the given artifacts
+
+        :param artifacts: A list of artifacts or artifacts names
+        :return: A hashable tuple
+        """
+        if not artifacts:
+            return ()
+
+        return tuple(repr(artifact) if isinstance(artifact, Artifact)
+                     else artifact for artifact in artifacts)
+
+    def __resolve(self, bundles, system_artifacts, system_packages):
+        """
+        Computes the bundles that must be installed in order to have the given
+        bundles resolved (see resolve_installation())
+        """
+        # Resolved bundles and packages for this resolution
+        local_bundles = _VersionIndex()
+        local_packages = _VersionIndex()
+
+        def add_local(bundle):
+            """
+            Adds a bundle and its packages to the resolution
+            """
+            local_bundles.add(bundle.name, bundle.version, bundle)
+            for name, version in bundle.get_exported_packages():
+                local_packages.add(name, version, bundle)
 
         # Bundle -> [Bundles]
         dependencies = {}
@@ -454,23 +744,22 @@ class OSGiBundleRepository(object):
 
         # Consider system packages already installed
         if system_packages:
+            any_version = Version(None)
             for name in system_packages:
-                self.__add_package(local_packages, name, Version(None),
-                                   SYSTEM_BUNDLE)
+                local_packages.add(name, any_version, SYSTEM_BUNDLE)
 
         # Consider system bundles already installed
         if system_artifacts:
             for artifact in system_artifacts:
                 if isinstance(artifact, Bundle):
                     # Got a bundle
-                    self.__add_bundle(artifact, local_bundles, local_packages)
+                    add_local(artifact)
                 elif isinstance(artifact, Artifact):
                     # Got an artifact
                     bundle = self.get_artifact(artifact.name, artifact.version,
                                                artifact.file)
                     if bundle:
-                        self.__add_bundle(bundle, local_bundles,
-                                          local_packages)
+                        add_local(bundle)
                     else:
                         _logger.warning("Unknown system bundle: %s", artifact)
                 else:
@@ -478,6 +767,10 @@ class OSGiBundleRepository(object):
 
         # Resolution loop
         to_install = [self.get_artifact(name) for name in bundles]
+
+        # Bundles with the same name and version are considered equal
+        queued = set((bundle.name, _version_key(bundle.version))
+                     for bundle in to_install)
         i = 0
         while i < len(to_install):
             # Loop control
@@ -488,83 +781,76 @@ class OSGiBundleRepository(object):
                 continue
 
             # Add the current bundle
-            self.__add_bundle(bundle, local_bundles, local_packages)
-            dependencies[bundle] = []
+            add_local(bundle)
+            bundle_deps = dependencies[bundle] = []
 
             # Resolve Require-Bundle
-            for required in bundle.all_require:
+            for required, attributes in bundle.all_require.items():
                 # Get the required version
-                required_version = bundle.all_require[required].get('version')
+                required_range = self.__get_range(attributes.get('version'))
 
                 # Find the bundle
-                registry = None
-                provider = None
-                for registry in (local_bundles, self._bundles):
-                    try:
-                        provider = self.get_artifact(required,
-                                                     required_version,
-                                                     None, registry)
-                        # Found one
-                        break
-                    except ValueError:
-                        # Try next
-                        pass
-                else:
-                    # No provider found
-                    missing_bundles.add(required)
-                    continue
-
-                if provider is SYSTEM_BUNDLE:
-                    # Nothing to do with system bundles
-                    continue
-
-                # Store the bundle we found
-                dependencies[bundle].append(provider)
-
-                if registry is self._bundles:
-                    # The provider was found in the global registry, store it
-                    self.__add_bundle(provider,
-                                      local_bundles, local_packages)
+                provider = local_bundles.find(required, required_range)
+                if provider is None:
+                    provider = self._bundles_index.find(required,
+                                                        required_range)
+                    if provider is None:
+                        # No provider found
+                        missing_bundles.add(required)
+                        continue
+
+                    # The provider was found in the repository, store it
+                    add_local(provider)
 
                     # The new bundle will be resolved later
-                    if provider not in to_install:
-                        # We'll have to resolve it
+                    provider_key = (provider.name,
+                                    _version_key(provider.version))
+                    if provider_key not in queued:
+                        queued.add(provider_key)
                         to_install.append(provider)
 
+                # Store the bundle we found
+                bundle_deps.append(provider)
+
             # Resolve Import-Package
-            for imported in bundle.all_imports:
+            for imported, attributes in bundle.all_imports.items():
                 # Get the required version
-                pkg_version = bundle.all_imports[imported].get('version')
+                pkg_version = attributes.get('version')
+                pkg_range = self.__get_range(pkg_version)
 
                 # Self-import ?
-                if bundle.exports(imported, pkg_version):
-                    # Nothing to do for this package
-                    continue
+                try:
+                    if pkg_range.matches(
+                            bundle.exported_versions[imported]):
+                        # Nothing to do for this package
+                        continue
+                except KeyError:
+                    # Not exported by the bundle
+                    pass
 
                 # Work only if necessary
-                provider = self.get_package(imported, pkg_version,
-                                            local_bundles, local_packages)
-
-                if provider:
+                provider = local_packages.find(imported, pkg_range)
+                if provider is not None:
                     # Found the package in the resolved bundles
                     if provider is not SYSTEM_BUNDLE:
-                        dependencies[bundle].append(provider)
+                        bundle_deps.append(provider)
                 else:
                     # Find it
-                    provider = self.get_package(imported, pkg_version,
-                                                self._bundles, self._packages)
-                    if not provider:
+                    provider = self._packages_index.find(imported, pkg_range)
+                    if provider is None:
                         # Missing
                         missing_packages.add(imported)
-                    elif provider is not SYSTEM_BUNDLE:
+                    else:
                         # Store the bundle
-                        self.__add_bundle(provider,
-                                          local_bundles, local_packages)
+                        add_local(provider)
 
                         # Store the dependency
-                        dependencies[bundle].append(provider)
-                        if provider not in to_install:
+                        bundle_deps.append(provider)
+                        provider_key = (provider.name,
+                                        _version_key(provider.version))
+                        if provider_key not in queued:
                             # We'll have to resolve it
+                            queued.add(provider_key)
                             to_install.append(provider)
 
         return to_install, dependencies, missing_bundles, missing_packages
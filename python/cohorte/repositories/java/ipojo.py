@@ -29,11 +29,12 @@ import threading
 
 # Pelix
 from pelix.ipopo.decorators import ComponentFactory, Provides, Invalidate, \
-    Property, Requires, Validate
+    Property, Requires, Validate, BindField, UnbindField
 
 # Repository beans
 import cohorte.repositories
 from cohorte.repositories.beans import Factory
+from cohorte.repositories.factories import FactoryIndex
 
 # ------------------------------------------------------------------------------
 
@@ -325,11 +326,8 @@ class IPojoRepository(object):
         # Injected service
         self._repositories = []
 
-        # Name -> [Factories]
-        self._factories = {}
-
-        # Artifact -> [Factories]
-        self._artifacts = {}
+        # Factory name -> Artifacts
+        self._index = FactoryIndex(self._language, self._model)
 
         # Thread safety
         self.__lock = threading.RLock()
@@ -347,8 +345,8 @@ class IPojoRepository(object):
                 return False
 
             # Test if the name is in the factories
-            return item.name in self._factories
-        elif item in self._factories:
+            return item.name in self._index
+        elif item in self._index:
             # Item matches a factory name
             return True
 
@@ -359,7 +357,7 @@ class IPojoRepository(object):
         """
         Length of a repository <=> number of individual factories
         """
-        return sum((len(factories) for factories in self._factories.values()))
+        return len(self._index)
 
     @staticmethod
     def _extract_bundle_factories(artifact):
@@ -411,32 +409,14 @@ class IPojoRepository(object):
         """
         with self.__lock:
             # Extract factories
-            names = self._extract_bundle_factories(artifact)
-            if not names:
-                # No factory in this artifact
-                return
-
-            artifact_list = self._artifacts.setdefault(artifact, [])
-            for name in names:
-                # Make the bean
-                factory = Factory(name, self._language, self._model, artifact)
-
-                # Factory
-                factory_list = self._factories.setdefault(name, [])
-                if factory not in factory_list:
-                    factory_list.append(factory)
-
-                # Artifact
-                if factory not in artifact_list:
-                    artifact_list.append(factory)
+            self._index.add(artifact, self._extract_bundle_factories(artifact))
 
     def clear(self):
         """
         Clears the repository content
         """
         with self.__lock:
-            self._artifacts.clear()
-            self._factories.clear()
+            self._index.clear()
 
     def find_factories(self, factories):
         """
@@ -446,29 +426,11 @@ class IPojoRepository(object):
         :return: A tuple ({Name -> [Artifacts]}, [Not found factories])
         """
         with self.__lock:
-            factories_set = set(factories)
-            resolution = {}
-            unresolved = set()
-
             if not factories:
                 # Nothing to do...
-                return resolution, factories_set
+                return {}, set(factories)
 
-            for name in factories_set:
-                try:
-                    # Get the list of factories for this name
-                    factories = self._factories[name]
-                    providers = resolution.setdefault(name, [])
-                    providers.extend(factory.artifact for factory in factories)
-                except KeyError:
-                    # Factory name not found
-                    unresolved.add(name)
-
-            # Sort the artifacts
-            for artifacts in resolution.values():
-                artifacts.sort(reverse=True)
-
-            return resolution, unresolved
+            return self._index.find_all(factories)
 
     def find_factory(self, factory, artifact_name=None, artifact_version=None):
         """
@@ -480,27 +442,7 @@ class IPojoRepository(object):
         :raise KeyError: Unknown factory
         """
         with self.__lock:
-            # Copy the list of artifacts for this factory
-            artifacts = [factory.artifact
-                         for factory in self._factories[factory]]
-            if artifact_name is not None:
-                # Artifact must be selected
-                # Prepare the version bean
-                version = cohorte.repositories.beans.Version(artifact_version)
-
-                # Filter results
-                artifacts = [artifact for artifact in artifacts
-                             if artifact.name == artifact_name and
-                             version.matches(artifact.version)]
-
-                if not artifacts:
-                    # No match found
-                    raise KeyError("No matching artifact for {0} -> {1} {2}"
-                                   .format(factory, artifact_name, version))
-
-            # Sort results
-            artifacts.sort(reverse=True)
-            return artifacts
+            return self._index.find(factory, artifact_name, artifact_version)
 
     def get_language(self):
         """
@@ -515,19 +457,32 @@ class IPojoRepository(object):
         """
         return self._model
 
-    def load_repositories(self):
+    def load_repositories(self, ignored=None):
         """
-        Loads the factories according to the repositories
+        Loads the factories according to the repositories. Only the new
+        artifacts are read, and the factories of the artifacts which are not
+        in the repositories anymore are removed.
+
+        :param ignored: A repository whose artifacts must be forgotten (being
+                        unbound)
         """
         with self.__lock:
-            if not self._repositories:
-                # No repository
-                return
+            known = set(self._index.artifacts())
+            seen = set()
 
             # Walk through artifacts
             for repository in self._repositories:
+                if repository is ignored:
+                    continue
+
                 for artifact in repository.walk():
-                    self.add_artifact(artifact)
+                    seen.add(artifact)
+                    if artifact not in known:
+                        self.add_artifact(artifact)
+
+            # Forget removed artifacts
+            for artifact in known.difference(seen):
+                self._index.remove(artifact)
 
     def __initial_loading(self):
         """
@@ -536,12 +491,28 @@ class IPojoRepository(object):
         self.load_repositories()
         self._controller = True
 
+    @BindField('_repositories', if_valid=True)
+    def _bind_repository(self, field, svc, svc_ref):
+        """
+        An artifacts repository has been bound: reads its new artifacts
+        """
+        self.load_repositories()
+
+    @UnbindField('_repositories', if_valid=True)
+    def _unbind_repository(self, field, svc, svc_ref):
+        """
+        An artifacts repository has been unbound: forgets the factories of
+        the artifacts it was the only one to provide
+        """
+        self.load_repositories(svc)
+
     @Validate
     def validate(self, context):
         """
         Component validated
         """
         self._controller = False
+        self._index = FactoryIndex(self._language, self._model)
 
         # Load repositories in another thread
         threading.Thread(target=self.__initial_loading,
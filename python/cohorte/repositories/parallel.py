@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+COHORTE Repositories: parallel parsing of artifact files
+
+Parsing artifacts (AST of Python modules, manifests of JAR files) is CPU
+bound: when a repository loads many files, they are parsed by a pool of
+processes and the results are streamed back as they come.
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import logging
+import multiprocessing
+
+# ------------------------------------------------------------------------------
+
+# Bundle version
+import cohorte.version
+__version__=cohorte.version.__version__
+
+# ------------------------------------------------------------------------------
+
+MIN_PARALLEL_ITEMS = 1024
+"""
+Under this number of items, they are parsed in the current process.
+
+Starting a pool of processes from a forkserver costs about 0.5s, when
+parsing a typical Python module (10 kB) costs 1 to 2ms: a pool of 2
+processes only pays off from 600 to 900 modules.
+See tests/benchmarks/bench_modules.py to measure both on a host.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------
+
+
+def _make_pool(workers):
+    """
+    Creates a pool of processes.
+
+    Worker processes are forked from a server process when possible, as the
+    caller usually has many threads running, which shouldn't be forked.
+
+    :param workers: Number of processes
+    :return: A multiprocessing Pool
+    """
+    try:
+        # Python 3
+        context = multiprocessing.get_context('forkserver')
+    except (AttributeError, ValueError):
+        # Python 2 or forkserver not available
+        context = multiprocessing
+
+    return context.Pool(workers)
+
+
+def imap(function, items, workers=None):
+    """
+    Applies the given function to all items, in a pool of processes if there
+    are enough items. Results are yielded in the order of the items, as soon
+    as they are available.
+
+    The function must be defined at module level and should return errors as
+    values instead of raising exceptions, as an exception stops the whole
+    iteration.
+
+    :param function: A module-level function accepting an item
+    :param items: A list of picklable items
+    :param workers: Number of processes (0 or None for one per CPU, 1 to work
+                    in the current process)
+    :return: A generator of the results of the function
+    """
+    if not workers:
+        try:
+            workers = multiprocessing.cpu_count()
+        except NotImplementedError:
+            workers = 1
+
+    if len(items) < MIN_PARALLEL_ITEMS:
+        workers = 1
+
+    pool = None
+    if workers > 1:
+        try:
+            pool = _make_pool(workers)
+        except (OSError, ImportError, ValueError) as ex:
+            # Semaphores or processes not available
+            _logger.warning("Can't create a pool of processes: %s", ex)
+
+    if pool is None:
+        # Work in this process
+        for item in items:
+            yield function(item)
+        return
+
+    try:
+        chunk_size = max(1, len(items) // (workers * 4))
+        for result in pool.imap(function, items, chunk_size):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
@@ -30,9 +30,10 @@ import threading
 
 import cohorte.repositories
 from cohorte.repositories.beans import Factory
+from cohorte.repositories.factories import FactoryIndex
 import cohorte.version
 from pelix.ipopo.decorators import ComponentFactory, Provides, Invalidate, \
-    Property, Requires, Validate
+    Property, Requires, Validate, BindField, UnbindField
 from pelix.utilities import is_string
 
 
@@ -202,11 +203,8 @@ class IPopoRepository(object):
         # Injected service
         self._repositories = []
 
-        # Name -> [Factories]
-        self._factories = {}
-
-        # Artifact -> [Factories]
-        self._artifacts = {}
+        # Factory name -> Artifacts
+        self._index = FactoryIndex(self._language, self._model)
 
         # Some locking
         self.__lock = threading.RLock()
@@ -224,9 +222,9 @@ class IPopoRepository(object):
                 return False
 
             # Test if the name is in the factories
-            return item.name in self._factories
+            return item.name in self._index
 
-        elif item in self._factories:
+        elif item in self._index:
             # Item matches a factory name
             return True
 
@@ -237,7 +235,7 @@ class IPopoRepository(object):
         """
         Length of a repository <=> number of individual factories
         """
-        return sum((len(factories) for factories in self._factories.values()))
+        return len(self._index)
 
     def add_artifact(self, artifact):
         """
@@ -247,29 +245,20 @@ class IPopoRepository(object):
         :raise ValueError: Unreadable file
         """
         with self.__lock:
-            # Extract factories
-            names = _extract_module_factories(artifact.file)
-            artifact_list = self._artifacts.setdefault(artifact, [])
-            for name in names:
-                # Make the bean
-                factory = Factory(name, self._language, self._model, artifact)
-
-                # Factory
-                factory_list = self._factories.setdefault(name, [])
-                if factory not in factory_list:
-                    factory_list.append(factory)
-
-                # Artifact
-                if factory not in artifact_list:
-                    artifact_list.append(factory)
+            # Use the factories found while parsing the module, if any
+            names = getattr(artifact, 'factories', None)
+            if names is None:
+                # Extract factories
+                names = _extract_module_factories(artifact.file)
+
+            self._index.add(artifact, names)
 
     def clear(self):
         """
         Clears the repository content
         """
         with self.__lock:
-            self._artifacts.clear()
-            self._factories.clear()
+            self._index.clear()
 
     def find_factories(self, factories):
         """
@@ -279,29 +268,11 @@ class IPopoRepository(object):
         :return: A tuple ({Name -> [Artifacts]}, [Not found factories])
         """
         with self.__lock:
-            factories_set = set(factories)
-            resolution = {}
-            unresolved = set()
-
             if not factories:
                 # Nothing to do...
-                return resolution, factories_set
+                return {}, set(factories)
 
-            for name in factories_set:
-                try:
-                    # Get the list of factories for this name
-                    factories = self._factories[name]
-                    providers = resolution.setdefault(name, [])
-                    providers.extend(factory.artifact for factory in factories)
-                except KeyError:
-                    # Factory name not found
-                    unresolved.add(name)
-
-            # Sort the artifacts
-            for artifacts in resolution.values():
-                artifacts.sort(reverse=True)
-
-            return resolution, unresolved
+            return self._index.find_all(factories)
 
     def find_factory(self, factory, artifact_name=None, artifact_version=None):
         """
@@ -313,28 +284,7 @@ class IPopoRepository(object):
         :raise KeyError: Unknown factory
         """
         with self.__lock:
-            # Copy the list of artifacts for this factory
-            artifacts = [factory.artifact
-                         for factory in self._factories[factory]]
-
-            if artifact_name is not None:
-                # Artifact must be selected
-                # Prepare the version bean
-                version = cohorte.repositories.beans.Version(artifact_version)
-
-                # Filter results
-                artifacts = [artifact for artifact in artifacts
-                             if artifact.name == artifact_name and
-                             version.matches(artifact.version)]
-
-                if not artifacts:
-                    # No match found
-                    raise KeyError("No matching artifact for {0} -> {1} {2}"
-                                   .format(factory, artifact_name, version))
-
-            # Sort results
-            artifacts.sort(reverse=True)
-            return artifacts
+            return self._index.find(factory, artifact_name, artifact_version)
 
     def get_language(self):
         """
@@ -349,24 +299,37 @@ class IPopoRepository(object):
         """
         return self._model
 
-    def load_repositories(self):
+    def load_repositories(self, ignored=None):
         """
-        Loads the factories according to the repositories
+        Loads the factories according to the repositories. Only the new
+        artifacts are read, and the factories of the artifacts which are not
+        in the repositories anymore are removed.
+
+        :param ignored: A repository whose artifacts must be forgotten (being
+                        unbound)
         """
         with self.__lock:
-            if not self._repositories:
-                # No repository
-                return
+            known = set(self._index.artifacts())
+            seen = set()
 
             # Walk through artifacts
             for repository in self._repositories:
+                if repository is ignored:
+                    continue
+
                 for artifact in repository.walk():
-                    try:
-                        self.add_artifact(artifact)
-                    except ValueError as ex:
-                        # Log the exception instead of stopping here
-                        _logger.warning("Error reading artifact: %s",
-                                        ex, exc_info=True)
+                    seen.add(artifact)
+                    if artifact not in known:
+                        try:
+                            self.add_artifact(artifact)
+                        except ValueError as ex:
+                            # Log the exception instead of stopping here
+                            _logger.warning("Error reading artifact: %s",
+                                            ex, exc_info=True)
+
+            # Forget removed artifacts
+            for artifact in known.difference(seen):
+                self._index.remove(artifact)
 
     def __initial_loading(self):
         """
@@ -375,12 +338,28 @@ class IPopoRepository(object):
         self.load_repositories()
         self._controller = True
 
+    @BindField('_repositories', if_valid=True)
+    def _bind_repository(self, field, svc, svc_ref):
+        """
+        An artifacts repository has been bound: reads its new artifacts
+        """
+        self.load_repositories()
+
+    @UnbindField('_repositories', if_valid=True)
+    def _unbind_repository(self, field, svc, svc_ref):
+        """
+        An artifacts repository has been unbound: forgets the factories of
+        the artifacts it was the only one to provide
+        """
+        self.load_repositories(svc)
+
     @Validate
     def validate(self, context):
         """
         Component validated
         """
         self._controller = False
+        self._index = FactoryIndex(self._language, self._model)
 
         # Load repositories in another thread
         threading.Thread(target=self.__initial_loading,
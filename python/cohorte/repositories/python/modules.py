@@ -25,6 +25,7 @@ Python modules repository
 
 # Standard library
 import ast
+import hashlib
 import imp
 import json
 import logging
@@ -32,7 +33,9 @@ import os
 
 import cohorte
 import cohorte.repositories
-from cohorte.repositories.beans import Artifact, Version
+import cohorte.repositories.parallel
+from cohorte.repositories.beans import Artifact
+from cohorte.repositories.python.ipopo import ComponentFactoryVisitor
 import cohorte.version
 from pelix.ipopo.decorators import ComponentFactory, Provides, Property, \
     Invalidate, Validate
@@ -51,6 +54,12 @@ __version__ = cohorte.version.__version__
 
 _logger = logging.getLogger(__name__)
 
+CACHE_FILENAME = 'python-modules-cache.json'
+""" Name of the modules cache file, in the node data directory """
+
+CACHE_FORMAT = 2
+""" Version of the format of the cache file """
+
 # ------------------------------------------------------------------------------
 
 
@@ -59,7 +68,7 @@ class Module(Artifact):
     Represents a bundle
     """
 
-    def __init__(self, name, version, imports, filename):
+    def __init__(self, name, version, imports, filename, factories=None):
         """
         Sets up the bundle details
 
@@ -67,12 +76,15 @@ class Module(Artifact):
         :param version: Version of the module (as a string)
         :param imports: List of names of imported modules
         :param filename: Path to the .py file
+        :param factories: Names of the iPOPO factories defined in the module
+                          (None if unknown)
         :raise ValueError: Invalid argument
         """
         Artifact.__init__(self, "python", name, version, filename)
 
         # Store information
         self.all_imports = imports
+        self.factories = factories
 
     def imports(self, artifact):
         """
@@ -174,38 +186,214 @@ class AstVisitor(ast.NodeVisitor):
                 pass
 
 
-def _extract_module_info(filename, module_name, is_package):
+def _scan_module(task):
+    """
+    Parses a Python file once to extract its version, its imports and the
+    iPOPO factories it defines. Can be executed in a pool of processes.
+
+    :param task: A (file path, module name, is package) tuple
+    :return: A (task, (version, imports, factories, hash), error) tuple, where
+             the result is None in case of error
     """
-    Extract the version and the imports from the given Python file
+    filename, module_name, is_package = task
+    try:
+        with open(filename, 'rb') as filep:
+            content = filep.read()
+    except (OSError, IOError) as ex:
+        return task, None, "Error reading {0}: {1}".format(filename, ex)
+
+    file_hash = hashlib.sha1(content).hexdigest()
+    try:
+        module = ast.parse(content, filename, 'exec')
+    except (ValueError, SyntaxError, TypeError) as ex:
+        return task, None, "Error parsing {0}: {1}".format(filename, ex)
+
+    visitor = AstVisitor(module_name, is_package)
+    visitor.visit(module)
+
+    factories_visitor = ComponentFactoryVisitor()
+    try:
+        factories_visitor.visit(module)
+        factories = factories_visitor.factories
+    except Exception:
+        # Let the iPOPO repository extract them and report the error
+        factories = None
+
+    return task, (visitor.version, visitor.imports, factories, file_hash), None
 
-    :param filename: Path to the file to parse
-    :param module_name: The fully-qualified module name
-    :param is_package: Whether the name is a package name
-    :return: A (version, [imports]) tuple
+
+def _hash_file(filename):
+    """
+    Computes the SHA-1 hash of the content of the given file
+
+    :param filename: Path to the file
+    :return: The hexadecimal hash of the file
     :raise ValueError: Unreadable file
     """
     try:
-        with open(filename,encoding="utf8") as filep:
-            source = filep.read()
-    except (OSError, IOError,TypeError) as ex:
+        with open(filename, 'rb') as filep:
+            return hashlib.sha1(filep.read()).hexdigest()
+    except (OSError, IOError) as ex:
+        raise ValueError("Error reading {0}: {1}".format(filename, ex))
+
+
+class _ModulesCache(object):
+    """
+    Persistent index of the parsed Python files, associating their real path
+    to their modification time, size, hash, version and imports.
+
+    The cache file can be shared by all the isolates of a node: entries of
+    files not visited by this isolate are kept when saving it.
+    """
+    def __init__(self, filename):
+        """
+        Sets up members
+
+        :param filename: Path to the cache file
+        """
+        self.filename = filename
+
+        # Real path -> Entry
+        self._entries = {}
+
+        # Files read during this run
+        self._visited = set()
+
+        # Number of parsed files during this run
+        self.parsed = 0
+
+        # Modification flag
+        self._dirty = False
+
+    def __read(self):
+        """
+        Reads the content of the cache file
+
+        :return: The entries stored in the file (empty on error)
+        """
         try:
-            import io
-            with io.open(filename,encoding="utf8") as filep:
-                source = filep.read()
-        except (OSError, IOError) as ex2:
-            _logger.exception(ex2)
+            with open(self.filename) as filep:
+                content = json.load(filep)
+        except (IOError, OSError, ValueError):
+            # No or invalid cache file
+            return {}
+
+        if not isinstance(content, dict) \
+                or content.get('format') != CACHE_FORMAT:
+            # Unknown format
+            return {}
+
+        return content.get('files') or {}
+
+    def load(self):
+        """
+        Loads the cache file
+        """
+        self._entries = self.__read()
+        self._visited.clear()
+        self.parsed = 0
+        self._dirty = False
+
+    def get_info(self, filename, module_name, is_package):
+        """
+        Returns the information stored about the given file, if it didn't
+        change since it was stored in cache
+
+        :param filename: Real path of the file
+        :param module_name: The fully-qualified module name
+        :param is_package: Whether the name is a package name
+        :return: A (version, imports, factories) tuple, or None
+        :raise ValueError: Unreadable file
+        """
+        try:
+            stat = os.stat(filename)
+        except OSError as ex:
             raise ValueError("Error reading {0}: {1}".format(filename, ex))
 
+        self._visited.add(filename)
+        entry = self._entries.get(filename)
+        if entry is None or entry['name'] != module_name \
+                or entry['package'] != is_package \
+                or entry['size'] != stat.st_size:
+            return None
 
-    visitor = AstVisitor(module_name, is_package)
-    try:
-        module = ast.parse(source, filename, 'exec')
-    except (ValueError, SyntaxError, TypeError) as ex:
-        raise ValueError("Error parsing {0}: {1}".format(filename, ex))
+        if entry['mtime'] != stat.st_mtime:
+            # Check the content
+            if entry['hash'] != _hash_file(filename):
+                return None
 
-    visitor.visit(module)
-    return visitor.version, visitor.imports
+            # Touched, but not modified
+            entry['mtime'] = stat.st_mtime
+            self._dirty = True
+
+        factories = entry['factories']
+        if factories is not None:
+            factories = set(factories)
+
+        return entry['version'], set(entry['imports']), factories
+
+    def store(self, filename, module_name, is_package, version, imports,
+              factories, file_hash):
+        """
+        Stores the information about a parsed file
+
+        :param filename: Real path of the file
+        :param module_name: The fully-qualified module name
+        :param is_package: Whether the name is a package name
+        :param version: Version of the module
+        :param imports: Names of the imported modules
+        :param factories: Names of the iPOPO factories (None if unknown)
+        :param file_hash: Hash of the parsed content
+        """
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            # File removed in the meantime
+            return
+
+        if factories is not None:
+            factories = sorted(factories)
+
+        self._visited.add(filename)
+        self._entries[filename] = {
+            'name': module_name, 'package': is_package,
+            'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': file_hash,
+            'version': version, 'imports': sorted(imports),
+            'factories': factories}
+        self.parsed += 1
+        self._dirty = True
+
+    def save(self):
+        """
+        Writes the cache file, if it has been modified
+        """
+        if not self._dirty:
+            return
 
+        # Reload the file, as another isolate might have updated it
+        entries = dict((path, entry) for path, entry in self.__read().items()
+                       if path not in self._visited and os.path.exists(path))
+        entries.update((path, self._entries[path])
+                       for path in self._visited if path in self._entries)
+
+        # Write a new file then replace the previous one, so that readers
+        # never see a partial file
+        temp_name = '{0}.{1}.tmp'.format(self.filename, os.getpid())
+        try:
+            with open(temp_name, 'w') as filep:
+                json.dump({'format': CACHE_FORMAT, 'files': entries}, filep)
+
+            try:
+                os.rename(temp_name, self.filename)
+            except OSError:
+                # Windows doesn't rename over an existing file
+                os.remove(self.filename)
+                os.rename(temp_name, self.filename)
+        except (IOError, OSError) as ex:
+            _logger.warning("Error writing the modules cache %s: %s",
+                            self.filename, ex)
+        else:
+            self._dirty = False
 
 # ------------------------------------------------------------------------------
 
@@ -213,6 +401,7 @@ def _extract_module_info(filename, module_name, is_package):
 @ComponentFactory("cohorte-repository-artifacts-python-factory")
 @Provides(cohorte.repositories.SERVICE_REPOSITORY_ARTIFACTS)
 @Property('_language', cohorte.repositories.PROP_REPOSITORY_LANGUAGE, "python")
+@Property('_scan_workers', cohorte.repositories.PROP_SCAN_WORKERS, 0)
 class PythonModuleRepository(object):
     """
     Represents a repository
@@ -224,6 +413,9 @@ class PythonModuleRepository(object):
         """
         self._language = "python"
 
+        # Number of parsing processes
+        self._scan_workers = 0
+
         # Name -> [Modules]
         self._modules = {}
 
@@ -233,6 +425,9 @@ class PythonModuleRepository(object):
         # File -> Module
         self._files = {}
 
+        # Persistent cache of the parsed files
+        self._cache = None
+
     def __contains__(self, item):
         """
         Tests if the given item is in the repository
@@ -327,32 +522,70 @@ class PythonModuleRepository(object):
 
             return True
 
-    def add_file(self, root, filename):
+    def __prepare_file(self, root, filename):
         """
-        Adds a Python file to the repository
+        Computes the parsing task of the given file
 
-        :param root: Path to the python package base of the added file
+        :param root: Path to the python package base of the file
         :param filename: A Python full-path file name
-        :raise ValueError: Unreadable file
+        :return: A (real path, module name, is package) tuple, or None if the
+                 file must be ignored
         """
         # Compute the real name of the Python file
         realfile = os.path.realpath(filename)
         if realfile in self._files:
             # Already read it: ignore
-            return
+            return None
 
         if os.path.basename(filename).startswith('.'):
             # Hidden file: ignore
-            return
+            return None
 
         # Compute the complete module name
         name, is_package = self.__compute_name(root, filename)
+        return realfile, name, is_package
+
+    def __store_parsed(self, task, result):
+        """
+        Stores a module parsed by _scan_module()
+
+        :param task: The parsing task
+        :param result: The parsing result
+        """
+        realfile, name, is_package = task
+        version, imports, factories, file_hash = result
+        if self._cache is not None:
+            self._cache.store(realfile, name, is_package, version, imports,
+                              factories, file_hash)
+
+        self.__add_module(Module(name, version, imports, realfile, factories))
+
+    def add_file(self, root, filename):
+        """
+        Adds a Python file to the repository
+
+        :param root: Path to the python package base of the added file
+        :param filename: A Python full-path file name
+        :raise ValueError: Unreadable file
+        """
+        task = self.__prepare_file(root, filename)
+        if task is None:
+            return
+
+        realfile, name, is_package = task
+        if self._cache is not None:
+            info = self._cache.get_info(realfile, name, is_package)
+            if info is not None:
+                self.__add_module(Module(name, info[0], info[1], realfile,
+                                         info[2]))
+                return
 
         # Parse the file
-        version, imports = _extract_module_info(realfile, name, is_package)
+        _, result, error = _scan_module(task)
+        if error:
+            raise ValueError(error)
 
-        # Store the module
-        self.__add_module(Module(name, version, imports, realfile))
+        self.__store_parsed(task, result)
 
     @staticmethod
     def __is_module(dirname):
@@ -369,10 +602,16 @@ class PythonModuleRepository(object):
     def add_directory(self, dirname):
         """
         Recursively adds all .py modules found in the given directory into the
-        repository
+        repository.
+
+        Files which are not in cache are parsed by a pool of processes.
 
         :param dirname: A path to a directory
         """
+        # Files to parse
+        tasks = []
+        queued = set()
+
         for root, dirnames, filenames in os.walk(dirname, followlinks=True):
             # Check if the current directory, ie. root, is either the base
             # directory or a valid python package.
@@ -383,10 +622,35 @@ class PythonModuleRepository(object):
             for filename in filenames:
                 if os.path.splitext(filename)[1] == '.py':
                     fullname = os.path.join(root, filename)
-                    try:
-                        self.add_file(dirname, fullname)
-                    except ValueError as ex:
-                        _logger.warning("Error analyzing %s: %s", fullname, ex)
+                    task = self.__prepare_file(dirname, fullname)
+                    if task is None or task[0] in queued:
+                        continue
+
+                    realfile, name, is_package = task
+                    if self._cache is not None:
+                        try:
+                            info = self._cache.get_info(realfile, name,
+                                                        is_package)
+                        except ValueError as ex:
+                            _logger.warning("Error analyzing %s: %s",
+                                            fullname, ex)
+                            continue
+
+                        if info is not None:
+                            self.__add_module(Module(
+                                name, info[0], info[1], realfile, info[2]))
+                            continue
+
+                    tasks.append(task)
+                    queued.add(realfile)
+
+        # Parse files, storing modules as they come
+        for task, result, error in cohorte.repositories.parallel.imap(
+                _scan_module, tasks, self._scan_workers):
+            if error:
+                _logger.warning("Error analyzing %s: %s", task[0], error)
+            else:
+                self.__store_parsed(task, result)
 
     def clear(self):
         """
@@ -546,98 +810,58 @@ class PythonModuleRepository(object):
             for module in modules:
                 yield module
 
-    # ######### added by: Bassem D.
-    def load_cache(self):
+    def load_cache(self, data_dir):
         """
-        Loads the cache from system file to memory
+        Loads the cache of the parsed files, stored in the node data directory.
+        The cache can be disabled by setting the COHORTE_USE_CACHE environment
+        variable to "false".
+
+        :param data_dir: The node data directory
+        :return: True if the cache is used
         """
+        self._cache = None
+
         use_cache = os.environ.get('COHORTE_USE_CACHE')
-        if use_cache and use_cache.lower() == "true":
-            try:
-                with open('cache.js') as input_file:
-                    cache = json.load(input_file)
-                    if cache:
-                        _logger.info("loading repository from cache...")
-                        # load modules
-                        for module in cache["modules"]:
-                            name = module["name"]
-                            version = Version(module["version"])
-                            filename = module["filename"]
-
-                            module_bean = Module(name, version, [], filename)
-                            self.__add_module(module_bean, self._modules)
-
-                        for directory in cache["directories"]:
-                            self._directory_package[directory["dir_name"]] \
- = directory["pkg_name"]
-
-                        return True
-            except (IOError, ValueError):
-                # Error reading/parsing cache file
-                return False
-        # No cache
-        return False
+        if not data_dir or (use_cache and use_cache.lower() == "false"):
+            # No cache
+            return False
+
+        self._cache = _ModulesCache(os.path.join(data_dir, CACHE_FILENAME))
+        self._cache.load()
+        return True
 
     def save_cache(self):
         """
-        Saves the cache from memory to system file
+        Saves the cache of the parsed files, if any
         """
-        use_cache = os.environ.get('COHORTE_USE_CACHE')
-        if use_cache and use_cache.lower() == "true":
-            # dump modules
-            _logger.info("Dumping cache info...")
-
-            # Name -> [Modules]
-            cache_modules = [
-                {"name": module.name, "version": str(module.version),
-                 "language": module.language, "filename": module.file}
-                for name, modules in self._modules.items()
-                for module in modules]
-
-            # Directory name -> Package name
-            cache_directories = [
-                {"dir_name": dir_name,
-                 "pkg_name": self._directory_package[dir_name]}
-                for dir_name in self._directory_package]
-
-            # Write cache
-            cache = {"modules": cache_modules,
-                     "directories": cache_directories}
-            with open('cache.js', 'w') as outfile:
-                json.dump(cache, outfile, indent=4)
-
-    # #########
+        if self._cache is not None:
+            self._cache.save()
+            _logger.debug("Python repository: %d file(s) parsed, others "
+                          "read from %s", self._cache.parsed,
+                          self._cache.filename)
 
     @Validate
     def validate(self, context):
         """
         Component validated
         """
-        # ######### added by: Bassem D.
-        # check if there is a cache file, load it if so
-        # visit repo files and check if the modification date is changed
-        # if so, load the file and update the cached entry
-        # if there were no cache file, we create it at the end of the parsing
-        status = self.load_cache()
-        if not status:
-            _logger.info("Loading repository from file system...")
-            # #########
-
-            # Load repositories in another thread
-            # Home/Base repository
-            for key in (cohorte.PROP_BASE, cohorte.PROP_HOME):
-                repository = os.path.join(context.get_property(key), "repo")
-                self.add_directory(repository)
-
-            # Python path directories
-            python_path = os.getenv("PYTHONPATH", None)
-            if python_path:
-                for path in python_path.split(os.pathsep):
-                    self.add_directory(path)
-
-            # ######### added by: Bassem D.
-            self.save_cache()
-            # #########
+        # Files which didn't change since the previous run are read from the
+        # cache instead of being parsed
+        self.load_cache(context.get_property(cohorte.PROP_NODE_DATA_DIR))
+        _logger.info("Loading repository from file system...")
+
+        # Home/Base repository
+        for key in (cohorte.PROP_BASE, cohorte.PROP_HOME):
+            repository = os.path.join(context.get_property(key), "repo")
+            self.add_directory(repository)
+
+        # Python path directories
+        python_path = os.getenv("PYTHONPATH", None)
+        if python_path:
+            for path in python_path.split(os.pathsep):
+                self.add_directory(path)
+
+        self.save_cache()
 
     @Invalidate
     def invalidate(self, context):
@@ -645,3 +869,4 @@ class PythonModuleRepository(object):
         Component invalidated
         """
         self.clear()
+        self._cache = None
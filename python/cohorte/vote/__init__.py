@@ -40,6 +40,12 @@ Specification of the core election service, providing:
 * vote(candidates: [object], kind: str, params: dict)
 
   Runs an election of the given kind, with given parameters
+
+* vote_batch(electors, candidates, subjects, name, kind, params) -> list
+
+  Runs one election per subject, with the same candidates, in a single pass.
+  Electors can provide a vote_batch(candidates, subjects, BatchBallot)
+  method to score all subjects at once.
 """
 
 SERVICE_VOTE_ENGINE = 'cohorte.vote.engine'
@@ -60,6 +66,11 @@ Specification of a vote engine, providing:
 
   Analyzes the ballots of a vote and returns a kind- and parameters-dependent
   result. Raises a NextTurn exception if it requires a new turn.
+
+* analyze_batch(ballots: tuple(BatchBallot), candidates, nb_subjects: int,
+  params: dict) -> list (optional)
+
+  Analyzes a batch of single-round votes and returns the result of each one
 """
 
 SERVICE_VOTE_CARTOONIST = 'cohorte.vote.cartoonist'
@@ -29,6 +29,12 @@ The candidate with the most votes is elected
 # Standard library
 import logging
 
+try:
+    # Optional: vectorized batch votes
+    import numpy
+except ImportError:
+    numpy = None
+
 # iPOPO Decorators
 from pelix.ipopo.decorators import ComponentFactory, Provides, Instantiate, \
     Property
@@ -147,3 +153,133 @@ class ApprobationEngine(object):
         else:
             # Return the candidates with the most votes
             return tuple(result[1] for result in results[:nb_elected])
+
+    @staticmethod
+    def analyze_batch(ballots, candidates, nb_subjects, parameters):
+        """
+        Analyzes the results of a batch of votes, with the same rules as
+        analyze(). Ties are resolved in the order of the candidates.
+
+        :param ballots: BatchBallot beans, one per elector
+        :param candidates: List of all candidates
+        :param nb_subjects: Number of subjects (votes) in the batch
+        :param parameters: Parameters for the vote engine
+        :return: The elected candidate(s) of each vote (None if no candidate
+                 received a vote)
+        """
+        # Get the number of votes to take into account
+        nb_votes = parameters.get("votes_per_elector", 1)
+        nb_elected = parameters.get("nb_elected", 1)
+        penalty = parameters.get("penalty", 0)
+        penalty_exclusion = parameters.get("exclusion", 0)
+        exclusion_value = penalty * (penalty_exclusion + 1)
+
+        if numpy is not None:
+            method = _analyze_numpy
+        else:
+            method = _analyze_rows
+
+        elected = method([ballot.scores for ballot in ballots],
+                         len(candidates), nb_subjects, nb_votes, nb_elected,
+                         penalty, penalty_exclusion, exclusion_value)
+
+        if nb_elected == 1:
+            return [candidates[idx[0]] if idx else None for idx in elected]
+        else:
+            return [tuple(candidates[i] for i in idx) for idx in elected]
+
+# ------------------------------------------------------------------------------
+
+
+def _analyze_rows(matrices, nb_candidates, nb_subjects, nb_votes, nb_elected,
+                  penalty, penalty_exclusion, exclusion_value):
+    """
+    Pure Python implementation of the batch analysis
+
+    :return: The list of the indexes of the elected candidates, per subject
+    """
+    elected = []
+    for row in range(nb_subjects):
+        results = [0] * nb_candidates
+        participated = [False] * nb_candidates
+
+        # Count supported candidates
+        for matrix in matrices:
+            scores = matrix[row]
+            voted_for = sorted((idx for idx in range(nb_candidates)
+                                if scores[idx] > 0),
+                               key=lambda idx: -scores[idx])
+            for idx in voted_for[:nb_votes]:
+                results[idx] += 1
+                participated[idx] = True
+
+        if penalty > 0 or penalty_exclusion > 0:
+            # Exclusion loop
+            excluded = [False] * nb_candidates
+            for matrix in matrices:
+                scores = matrix[row]
+                for idx in range(nb_candidates):
+                    if scores[idx] >= 0 or excluded[idx]:
+                        continue
+
+                    participated[idx] = True
+                    if results[idx] + 1 > penalty_exclusion > 0:
+                        # Candidate is excluded !
+                        excluded[idx] = True
+                        results[idx] = exclusion_value
+
+                    # Add the penalty to the votes
+                    if penalty > 0:
+                        results[idx] -= penalty
+
+        # Candidates with the most votes
+        ranking = sorted((idx for idx in range(nb_candidates)
+                          if participated[idx]),
+                         key=lambda idx: -results[idx])
+        elected.append(ranking[:nb_elected])
+
+    return elected
+
+
+def _analyze_numpy(matrices, nb_candidates, nb_subjects, nb_votes,
+                   nb_elected, penalty, penalty_exclusion, exclusion_value):
+    """
+    NumPy implementation of the batch analysis
+
+    :return: The list of the indexes of the elected candidates, per subject
+    """
+    results = numpy.zeros((nb_subjects, nb_candidates))
+    participated = numpy.zeros((nb_subjects, nb_candidates), dtype=bool)
+    rows = numpy.arange(nb_subjects)[:, numpy.newaxis]
+
+    # Count supported candidates: the preferred ones of each elector
+    matrices = [numpy.asarray(matrix, dtype=float) for matrix in matrices]
+    for scores in matrices:
+        preferred = numpy.argsort(-scores, axis=1,
+                                  kind='mergesort')[:, :nb_votes]
+        voted = scores[rows, preferred] > 0
+        results[rows, preferred] += voted
+        participated[rows, preferred] |= voted
+
+    if penalty > 0 or penalty_exclusion > 0:
+        # Exclusion loop: a candidate appears once per ballot
+        excluded = numpy.zeros((nb_subjects, nb_candidates), dtype=bool)
+        for scores in matrices:
+            refused = (scores < 0) & ~excluded
+            participated |= refused
+
+            if penalty_exclusion > 0:
+                # Candidates are excluded !
+                newly_excluded = refused & (results + 1 > penalty_exclusion)
+                excluded |= newly_excluded
+                results[newly_excluded] = exclusion_value
+
+            # Add the penalty to the votes
+            if penalty > 0:
+                results -= penalty * refused
+
+    # Candidates with the most votes
+    results[~participated] = -numpy.inf
+    ranking = numpy.argsort(-results, axis=1, kind='mergesort')[:, :nb_elected]
+    return [[idx for idx in ranking[row] if participated[row, idx]]
+            for row in range(nb_subjects)]
@@ -27,6 +27,12 @@ Voting system beans
 # Standard library
 import operator
 
+try:
+    # Optional: vectorized batch votes
+    import numpy
+except ImportError:
+    numpy = None
+
 # ------------------------------------------------------------------------------
 
 # Bundle version
@@ -169,6 +175,137 @@ class SecretBallot(Ballot):
         """
         super(SecretBallot, self).__init__(None)
 
+
+class BatchBallot(object):
+    """
+    Ballot of an elector for a batch of votes sharing the same candidates.
+
+    The elector fills a subjects x candidates matrix of scores: a positive
+    score is a vote for the candidate (the greater, the preferred), a negative
+    one is a vote against it and zero is a blank vote.
+    The matrix is a NumPy array if NumPy is available, else a list of lists.
+    """
+    def __init__(self, elector, subjects, candidates):
+        """
+        Sets up members
+
+        :param elector: The elector that filled this ballot
+        :param subjects: Subjects of the votes (one row each)
+        :param candidates: Candidates of the votes (one column each)
+        """
+        self.__elector = elector
+        self.__candidates = tuple(candidates)
+        self.__indexes = {candidate: idx
+                          for idx, candidate in enumerate(self.__candidates)}
+        self.__forced = {}
+
+        nb_candidates = len(self.__candidates)
+        if numpy is not None:
+            self.__scores = numpy.zeros((len(subjects), nb_candidates))
+        else:
+            self.__scores = [[0] * nb_candidates for _ in subjects]
+
+    def get_elector(self):
+        """
+        Returns the elector associated to this vote
+
+        :return: The elector (name or instance)
+        """
+        return self.__elector
+
+    def __get_candidates(self, test):
+        """
+        Returns the candidates which have at least one score matching the test
+
+        :param test: A score -> bool method
+        :return: A tuple of candidates
+        """
+        if numpy is not None:
+            columns = test(self.__scores).any(axis=0)
+            return tuple(candidate for candidate, voted
+                         in zip(self.__candidates, columns) if voted)
+
+        return tuple(candidate
+                     for idx, candidate in enumerate(self.__candidates)
+                     if any(test(row[idx]) for row in self.__scores))
+
+    def get_for(self):
+        """
+        Returns the candidates the elector voted for, in at least one vote
+        """
+        return self.__get_candidates(lambda score: score > 0)
+
+    def get_against(self):
+        """
+        Returns the candidates the elector voted against, in at least one vote
+        """
+        return self.__get_candidates(lambda score: score < 0)
+
+    def get_forced(self):
+        """
+        Returns the results forced by the elector
+
+        :return: A subject index -> candidate dictionary
+        """
+        return self.__forced
+
+    @property
+    def scores(self):
+        """
+        The scores matrix, which can be modified in place
+        """
+        return self.__scores
+
+    def set_scores(self, row, scores):
+        """
+        Sets the scores of the candidates for a subject
+
+        :param row: Index of the subject
+        :param scores: The score of each candidate
+        """
+        self.__scores[row] = list(scores)
+
+    def set_ballot(self, row, ballot):
+        """
+        Converts the ballot of a single vote to the scores of a subject
+
+        :param row: Index of the subject
+        :param ballot: A locked Ballot bean
+        """
+        self.set_votes(row, ballot.get_for(), ballot.get_against())
+
+    def set_votes(self, row, votes_for, votes_against=None):
+        """
+        Sets the votes of the elector for a subject
+
+        :param row: Index of the subject
+        :param votes_for: Candidates voted for, by order of preference
+        :param votes_against: Candidates voted against
+        """
+        scores = [0] * len(self.__candidates)
+        indexes = self.__indexes
+
+        # Keep the order of preference (ignore unknown candidates)
+        votes_for = tuple(votes_for)
+        for rank, candidate in enumerate(votes_for):
+            if candidate in indexes:
+                scores[indexes[candidate]] = len(votes_for) - rank
+
+        for candidate in votes_against or ():
+            if candidate in indexes:
+                scores[indexes[candidate]] = -1
+
+        self.__scores[row] = scores
+
+    def force(self, row, claimant):
+        """
+        Forces the result of the vote about a subject (coup d'État)
+
+        :param row: Index of the subject
+        :param claimant: The candidate that claims to be elected
+        """
+        self.__forced.setdefault(row, claimant)
+
 # ------------------------------------------------------------------------------
 
 
@@ -77,21 +77,14 @@ class VoteCore(object):
         """
         return [engine.get_kind() for engine in self._engines]
 
-    def vote(self, electors, candidates, subject=None, name=None,
-             kind=None, parameters=None):
+    def __get_engine(self, kind):
         """
-        Runs a vote for the given
+        Selects the engine for the given kind of vote
 
-        :param electors: List of electors
-        :param candidates: List of candidates
-        :param subject: Subject of the vote (optional)
-        :param name: Name of the vote
-        :param kind: Kind of vote
-        :param parameters: Parameters for the vote engine
-        :return: The result of the election (kind-dependent)
+        :param kind: Kind of vote (None for the first engine)
+        :return: A (engine, kind) tuple
         :raise NameError: Unknown kind of vote
         """
-        # 1. Select the engine
         if kind is None:
             if not self._engines:
                 # No engine available
@@ -99,16 +92,24 @@ class VoteCore(object):
 
             # Use the first engine
             engine = self._engines[0]
-            kind = engine.get_kind()
-        else:
-            # Engine given
-            for engine in self._engines:
-                if engine.get_kind() == kind:
-                    break
-            else:
-                raise NameError("Unknown kind of vote: {0}".format(kind))
+            return engine, engine.get_kind()
 
-        # 2. Normalize parameters
+        # Engine given
+        for engine in self._engines:
+            if engine.get_kind() == kind:
+                return engine, kind
+
+        raise NameError("Unknown kind of vote: {0}".format(kind))
+
+    def __normalize(self, kind, parameters, name):
+        """
+        Normalizes the parameters and the name of a vote
+
+        :param kind: Kind of vote
+        :param parameters: Parameters for the vote engine
+        :param name: Name of the vote
+        :return: A (parameters, name) tuple
+        """
         if not isinstance(parameters, dict):
             # No valid parameters given
             parameters = {}
@@ -120,6 +121,28 @@ class VoteCore(object):
             self._nb_votes += 1
             name = "Vote {0} ({1})".format(self._nb_votes, kind)
 
+        return parameters, name
+
+    def vote(self, electors, candidates, subject=None, name=None,
+             kind=None, parameters=None):
+        """
+        Runs a vote for the given
+
+        :param electors: List of electors
+        :param candidates: List of candidates
+        :param subject: Subject of the vote (optional)
+        :param name: Name of the vote
+        :param kind: Kind of vote
+        :param parameters: Parameters for the vote engine
+        :return: The result of the election (kind-dependent)
+        :raise NameError: Unknown kind of vote
+        """
+        # 1. Select the engine
+        engine, kind = self.__get_engine(kind)
+
+        # 2. Normalize parameters
+        parameters, name = self.__normalize(kind, parameters, name)
+
         # Do not try to shortcut the vote if there is only one candidate:
         # it is possible that an elector has to be notified of the votes
 
@@ -173,3 +196,89 @@ class VoteCore(object):
         vote_bean.set_vote_results(result)
         self._store.store_vote(vote_bean)
         return result
+
+    def vote_batch(self, electors, candidates, subjects, name=None,
+                   kind=None, parameters=None):
+        """
+        Runs one vote per subject, all with the same candidates, in a single
+        pass: each elector fills a subjects x candidates matrix of scores,
+        using its ``vote_batch(candidates, subjects, batch_ballot)`` method if
+        it has one, else its ``vote()`` method for each subject.
+        Only a summary of the votes is stored.
+
+        If the engine doesn't support batches, falls back to one vote per
+        subject.
+
+        :param electors: List of electors
+        :param candidates: List of candidates
+        :param subjects: Subjects of the votes
+        :param name: Name of the batch of votes
+        :param kind: Kind of vote
+        :param parameters: Parameters for the vote engine
+        :return: The list of the results of the votes, in subjects order
+        :raise NameError: Unknown kind of vote
+        """
+        # 1. Select the engine
+        engine, kind = self.__get_engine(kind)
+        subjects = tuple(subjects)
+        candidates = tuple(candidates)
+
+        # 2. Normalize parameters
+        parameters, name = self.__normalize(kind, parameters, name)
+
+        if not hasattr(engine, "analyze_batch"):
+            # Engine doesn't support batches
+            return [self.vote(electors, candidates, subject,
+                              "{0} - {1}".format(name, subject),
+                              kind, parameters)
+                    for subject in subjects]
+
+        # 3. Vote
+        ballots = []
+        for elector in electors:
+            ballot = beans.BatchBallot(elector, subjects, candidates)
+            try:
+                vote_batch = elector.vote_batch
+            except AttributeError:
+                # Elector votes for each subject
+                for row, subject in enumerate(subjects):
+                    single_ballot = beans.Ballot(elector)
+                    try:
+                        elector.vote(candidates, subject, single_ballot)
+                    except beans.CoupdEtat as ex:
+                        ballot.force(row, ex.claimant)
+                    else:
+                        single_ballot.lock()
+                        ballot.set_ballot(row, single_ballot)
+            else:
+                vote_batch(candidates, subjects, ballot)
+
+            ballots.append(ballot)
+
+        # 4. Analyze votes
+        results = engine.analyze_batch(ballots, candidates, len(subjects),
+                                       parameters)
+
+        # Apply coups d'État, the first elector having priority
+        for ballot in reversed(ballots):
+            for row, claimant in ballot.get_forced().items():
+                results[row] = claimant
+
+        # Store a summary of the votes: number of votes won by candidate
+        vote_bean = beans.VoteResults(
+            name, kind, candidates, electors,
+            "{0} subjects".format(len(subjects)), parameters)
+        vote_bean.set_ballots(ballots)
+
+        elected = {}
+        for result in results:
+            if not isinstance(result, tuple):
+                result = (result,)
+
+            for candidate in result:
+                elected[candidate] = elected.get(candidate, 0) + 1
+
+        vote_bean.set_vote_results([candidate for _, candidate
+                                    in vote_bean.set_results(elected)])
+        self._store.store_vote(vote_bean)
+        return results
@@ -94,6 +94,15 @@ It can be generated or be forced using the framework initialization properties.
 This property is constant during the life of a framework instance.
 """
 
+REGISTRY_INDEXED_PROPERTIES = "pelix.registry.indexed_properties"
+"""
+Framework property listing the service properties to index in the service
+registry, in addition to objectClass and service.id.
+It can be a list of property names or a comma-separated string.
+Equality criteria on indexed properties are resolved without evaluating the
+filter against every registered service.
+"""
+
 # ------------------------------------------------------------------------------
 
 
@@ -39,7 +39,7 @@ __docformat__ = "restructuredtext en"
 
 # Pelix beans and constants
 from pelix.constants import ACTIVATOR, ACTIVATOR_LEGACY, FRAMEWORK_UID, \
-    BundleException, FrameworkException
+    REGISTRY_INDEXED_PROPERTIES, BundleException, FrameworkException
 from pelix.internals.events import BundleEvent, ServiceEvent
 from pelix.internals.registry import EventDispatcher, ServiceRegistry, \
     ServiceReference, ServiceRegistration
@@ -547,7 +547,9 @@ class Framework(Bundle):
         self._dispatcher = EventDispatcher()
 
         # Service registry
-        self._registry = ServiceRegistry(self)
+        self._registry = ServiceRegistry(
+            self, indexed_properties=self.__properties.get(
+                REGISTRY_INDEXED_PROPERTIES))
         self.__unregistering_services = {}
 
         # The wait_for_stop event (initially stopped)
@@ -67,6 +67,9 @@ HTTP_SERVLET_PATH = "pelix.http.path"
 FACTORY_HTTP_BASIC = "pelix.http.service.basic.factory"
 """ Name of the HTTP service component factory """
 
+FACTORY_HTTP_ASYNCIO = "pelix.http.service.asyncio.factory"
+""" Name of the asyncio-based HTTP service component factory """
+
 # ------------------------------------------------------------------------------
 
 PARAM_NAME = "http.name"
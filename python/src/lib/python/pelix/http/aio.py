@@ -0,0 +1,625 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Pelix asyncio HTTP service bundle.
+
+Provides an implementation of the Pelix HTTP service based on an asyncio
+event loop: all connections are handled by a single selector loop, servlets
+are called in an executor, except the coroutine ones which are called in the
+loop itself.
+
+Requires Python 3.5 or newer.
+
+:author: agent
+:copyright: Copyright 2026, agent
+:license: Apache License 2.0
+:version: 0.5.7
+:status: Beta
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Module version
+__version_info__ = (0, 5, 7)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+# ------------------------------------------------------------------------------
+
+# iPOPO
+from pelix.ipopo.decorators import ComponentFactory
+
+import pelix.http.basic as basic
+import pelix.ipv6utils
+
+# Standard library
+import asyncio
+import concurrent.futures
+import email.parser
+import email.utils
+import io
+import logging
+import socket
+import threading
+import traceback
+import urllib.parse as urlparse
+from http.client import HTTPMessage, responses
+
+# ------------------------------------------------------------------------------
+
+# HTTP service constants
+import pelix.http as http
+
+MAX_HEADERS = 100
+""" Maximum number of headers in a request """
+
+MAX_LINE_SIZE = 8192
+""" Maximum size of the request line and of each header line (bytes) """
+
+MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+"""
+Maximum size of a request content (bytes).
+Larger requests are refused with a 413 error.
+"""
+
+ERROR_PAGE = """<html>
+<head>
+<title>{0} - {1}</title>
+</head>
+<body>
+<h1>{0} - {1}</h1>
+<p>{2}</p>
+</body>
+</html>"""
+""" Page sent when a request can't be read """
+
+# ------------------------------------------------------------------------------
+
+
+class _HTTPError(ValueError):
+    """
+    Error reading a request, to be answered with the given HTTP code
+    """
+    def __init__(self, code, message):
+        """
+        :param code: HTTP result code
+        :param message: Description of the error
+        """
+        super(_HTTPError, self).__init__(message)
+        self.code = code
+
+
+async def _read_line(reader, code):
+    """
+    Reads a line, limited to MAX_LINE_SIZE bytes
+
+    :param reader: The connection stream reader
+    :param code: HTTP result code to use if the line is too long
+    :return: The read line (bytes)
+    :raise _HTTPError: Line too long
+    """
+    try:
+        return await reader.readline()
+    except ValueError:
+        # Limit of the stream reader overrun
+        raise _HTTPError(code, "Line too long")
+
+# ------------------------------------------------------------------------------
+
+
+class _HTTPServletRequest(http.AbstractHTTPServletRequest):
+    """
+    HTTP Servlet request helper, with a request already read by the loop
+    """
+    def __init__(self, client_address, path, headers, body):
+        """
+        Sets up the request helper
+
+        :param client_address: The address of the client
+        :param path: The request full path
+        :param headers: The request headers (HTTPMessage)
+        :param body: The request content (bytes)
+        """
+        self._client_address = client_address
+        self._path = path
+        self._headers = headers
+        self._rfile = io.BytesIO(body)
+
+    def get_client_address(self):
+        """
+        Retrieves the address of the client
+
+        :return: A (host, port) tuple
+        """
+        return self._client_address
+
+    def get_header(self, name, default=None):
+        """
+        Retrieves the value of a header
+        """
+        return self._headers.get(name, default)
+
+    def get_headers(self):
+        """
+        Retrieves all headers
+        """
+        return self._headers
+
+    def get_path(self):
+        """
+        Retrieves the request full path
+        """
+        return self._path
+
+    def get_rfile(self):
+        """
+        Retrieves the input as a file stream
+        """
+        return self._rfile
+
+
+class _HTTPServletResponse(http.AbstractHTTPServletResponse):
+    """
+    HTTP Servlet response helper, buffering the response until the servlet
+    returns
+    """
+    def __init__(self):
+        """
+        Sets up the response helper
+        """
+        self.code = None
+        self.message = None
+        self.headers = []
+        self.body = io.BytesIO()
+
+    def reset(self):
+        """
+        Forgets the current content of the response
+        """
+        self.__init__()
+
+    def set_response(self, code, message=None):
+        """
+        Sets the response line.
+        This method should be the first called when sending an answer.
+
+        :param code: HTTP result code
+        :param message: Associated message
+        """
+        self.code = code
+        self.message = message
+
+    def set_header(self, name, value):
+        """
+        Sets the value of a header.
+        This method should not be called after ``end_headers()``.
+
+        :param name: Header name
+        :param value: Header value
+        """
+        self.headers.append((name, str(value)))
+
+    def end_headers(self):
+        """
+        Ends the headers part
+        """
+        pass
+
+    def get_wfile(self):
+        """
+        Retrieves the output as a file stream.
+        ``end_headers()`` should have been called before, except if you want
+        to write your own headers.
+
+        :return: The output file-like object
+        """
+        return self.body
+
+    def write(self, data):
+        """
+        Writes the given data.
+        ``end_headers()`` should have been called before, except if you want
+        to write your own headers.
+
+        :param data: Data to be written
+        """
+        self.body.write(data)
+
+    def to_bytes(self, version, keep_alive):
+        """
+        Converts the response to the bytes to send to the client
+
+        :param version: HTTP version of the response
+        :param keep_alive: If True, the connection can be kept alive
+        :return: A (data, keep alive) tuple
+        """
+        body = self.body.getvalue()
+        if self.code is None:
+            # The servlet wrote its own response line and headers
+            return body, False
+
+        names = set()
+        lines = ["{0} {1} {2}".format(
+            version, self.code, self.message or responses.get(self.code, ""))]
+        for name, value in self.headers:
+            names.add(name.lower())
+            lines.append("{0}: {1}".format(name, value))
+            if name.lower() == "connection" and value.lower() == "close":
+                keep_alive = False
+
+        if "date" not in names:
+            lines.append("Date: {0}".format(
+                email.utils.formatdate(usegmt=True)))
+
+        if "content-length" not in names:
+            # The whole body is known
+            lines.append("Content-Length: {0}".format(len(body)))
+
+        if not keep_alive and "connection" not in names:
+            lines.append("Connection: close")
+
+        lines.append("\r\n")
+        return "\r\n".join(lines).encode("latin-1") + body, keep_alive
+
+# ------------------------------------------------------------------------------
+
+
+@ComponentFactory(http.FACTORY_HTTP_ASYNCIO)
+class AsyncioHttpService(basic.HttpService):
+    """
+    HTTP service component based on asyncio.
+
+    Shares the servlets registration and component properties of the basic
+    HTTP service: the thread pool size property gives the number of threads
+    of the executor calling the servlets (0 for the executor default), the
+    keep-alive property allows HTTP/1.1 persistent connections.
+    """
+    def __init__(self):
+        """
+        Constructor
+        """
+        super(AsyncioHttpService, self).__init__()
+
+        # Event loop, listening socket and servlets executor
+        self._loop = None
+        self._socket = None
+        self._executor = None
+
+        # Connections handling tasks
+        self._connections = set()
+
+    def __str__(self):
+        """
+        String representation of the instance
+        """
+        return "AsyncioHttpService({0}, {1:d})".format(self._address,
+                                                       self._port)
+
+    def get_access(self):
+        """
+        Retrieves the (address, port) tuple to access the server
+        """
+        sock_info = self._socket.getsockname()
+
+        # Only keep the address and the port information
+        return sock_info[0], sock_info[1]
+
+    def __make_socket(self):
+        """
+        Creates the listening socket, like the basic HTTP server
+
+        :return: A bound and listening socket
+        """
+        # Determine the address family
+        addr_info = socket.getaddrinfo(self._address, self._port,
+                                       0, 0, socket.SOL_TCP)
+        family = addr_info[0][0]
+
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        if family == socket.AF_INET6:
+            # Explicitly ask to be accessible both by IPv4 and IPv6
+            try:
+                pelix.ipv6utils.set_double_stack(sock)
+            except AttributeError as ex:
+                self.log_exception("System misses IPv6 constant: %s", ex)
+            except socket.error as ex:
+                self.log_exception("Error setting up IPv6 double stack: %s",
+                                   ex)
+
+        sock.bind((self._address, self._port))
+        sock.listen(socket.SOMAXCONN)
+        sock.setblocking(False)
+        return sock
+
+    def _start_server(self):
+        """
+        Creates the event loop and starts it in a new thread
+        """
+        self._socket = self.__make_socket()
+
+        # Property update (if port was 0)
+        self._port = self._socket.getsockname()[1]
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            self._pool_size or None)
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+
+        # Create the server before starting the loop
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self.__on_connection, sock=self._socket,
+                                 limit=MAX_LINE_SIZE))
+
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="HttpService-{0}-Loop"
+                                        .format(self._port))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _stop_server(self):
+        """
+        Stops the event loop and waits for its thread to stop
+        """
+        future = asyncio.run_coroutine_threadsafe(self.__close(), self._loop)
+        try:
+            future.result(2)
+        except concurrent.futures.TimeoutError:
+            self.log(logging.WARNING, "Timeout closing connections")
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+        # Wait for the thread to stop...
+        self.log(logging.INFO,
+                 "Waiting HTTP server ([%s]:%d) thread to stop...",
+                 self._address, self._port)
+        self._thread.join(2)
+
+        self._loop.close()
+        self._executor.shutdown(False)
+        self._loop = None
+        self._executor = None
+        self._socket = None
+
+    async def __close(self):
+        """
+        Closes the server and the open connections
+        """
+        self._server.close()
+
+        # Cancel the connections handlers and let them end
+        connections = list(self._connections)
+        for task in connections:
+            task.cancel()
+
+        if connections:
+            await asyncio.wait(connections, timeout=1)
+
+    def __on_connection(self, reader, writer):
+        """
+        Starts the task handling a new connection
+
+        :param reader: The connection stream reader
+        :param writer: The connection stream writer
+        """
+        task = self._loop.create_task(
+            self.__handle_connection(reader, writer))
+        self._connections.add(task)
+        task.add_done_callback(self._connections.discard)
+
+    async def __handle_connection(self, reader, writer):
+        """
+        Handles the requests of a connection
+
+        :param reader: The connection stream reader
+        :param writer: The connection stream writer
+        """
+        client_address = writer.get_extra_info("peername")
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request_line = await asyncio.wait_for(
+                        _read_line(reader, 414), basic.KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    # Idle connection
+                    break
+
+                if not request_line:
+                    # Connection closed by the client
+                    break
+
+                keep_alive = await self.__handle_request(
+                    client_address, request_line, reader, writer)
+                await writer.drain()
+
+        except (ConnectionError, asyncio.IncompleteReadError) as ex:
+            self.log(logging.DEBUG, "Connection with %s lost: %s",
+                     client_address, ex)
+
+        except ValueError as ex:
+            # Answer before closing the connection: the stream can't be read
+            # any further
+            code = getattr(ex, "code", 400)
+            self.log(logging.ERROR, "Bad request from %s (%d): %s",
+                     client_address, code, ex)
+
+            response = _HTTPServletResponse()
+            response.send_content(code, ERROR_PAGE.format(
+                code, responses.get(code, ""), ex))
+            writer.write(response.to_bytes("HTTP/1.0", False)[0])
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+        finally:
+            writer.close()
+
+    async def __handle_request(self, client_address, request_line,
+                               reader, writer):
+        """
+        Reads and handles a request
+
+        :param client_address: Address of the client
+        :param request_line: The first line of the request
+        :param reader: The connection stream reader
+        :param writer: The connection stream writer
+        :return: True if the connection can be kept alive
+        :raise ValueError: Invalid request
+        """
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise _HTTPError(400, "Invalid request line: {0!r}"
+                             .format(request_line))
+        command, path, version = parts
+
+        # Read headers
+        lines = []
+        while True:
+            line = await _read_line(reader, 431)
+            if line in (b"\r\n", b"\n", b""):
+                break
+
+            if b":" not in line and line[:1] not in (b" ", b"\t"):
+                raise _HTTPError(400, "Invalid header line: {0!r}"
+                                 .format(line))
+
+            lines.append(line)
+            if len(lines) > MAX_HEADERS:
+                raise _HTTPError(431, "Too many headers")
+
+        headers = email.parser.Parser(_class=HTTPMessage).parsestr(
+            b"".join(lines).decode("latin-1"))
+
+        # Read content
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = await self.__read_chunks(reader)
+        else:
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+
+            if length < 0:
+                raise _HTTPError(400, "Invalid content length: {0!r}"
+                                 .format(headers.get("content-length")))
+            elif length > MAX_CONTENT_LENGTH:
+                raise _HTTPError(413, "Content too large: {0} bytes"
+                                 .format(length))
+
+            body = await reader.readexactly(length)
+
+        # Use the same protocol version as the basic HTTP service
+        keep_alive = self._keep_alive and version == "HTTP/1.1" \
+            and headers.get("connection", "").lower() != "close"
+        response_version = "HTTP/1.1" if self._keep_alive else "HTTP/1.0"
+
+        request = _HTTPServletRequest(client_address, path, headers, body)
+        response = _HTTPServletResponse()
+        await self.__call_servlet(command, request, response)
+
+        data, keep_alive = response.to_bytes(response_version, keep_alive)
+        writer.write(data)
+
+        self.log(logging.DEBUG, '"%s" %s', request_line.strip(),
+                 response.code)
+        return keep_alive
+
+    async def __read_chunks(self, reader):
+        """
+        Reads a content sent with the chunked transfer encoding
+
+        :param reader: The connection stream reader
+        :return: The content (bytes)
+        :raise _HTTPError: Invalid or too large content
+        """
+        chunks = []
+        total = 0
+        while True:
+            line = await _read_line(reader, 400)
+            try:
+                size = int(line.split(b";")[0], 16)
+            except ValueError:
+                size = -1
+
+            if size < 0:
+                raise _HTTPError(400, "Invalid chunk size: {0!r}"
+                                 .format(line))
+            elif not size:
+                break
+
+            total += size
+            if total > MAX_CONTENT_LENGTH:
+                raise _HTTPError(413, "Content too large: more than {0} "
+                                 "bytes".format(MAX_CONTENT_LENGTH))
+
+            chunks.append(await reader.readexactly(size))
+            await _read_line(reader, 400)
+
+        # Skip trailers
+        lines = 0
+        while (await _read_line(reader, 431)) not in (b"\r\n", b"\n", b""):
+            lines += 1
+            if lines > MAX_HEADERS:
+                raise _HTTPError(431, "Too many trailers")
+
+        return b"".join(chunks)
+
+    async def __call_servlet(self, command, request, response):
+        """
+        Calls the servlet handling the given request
+
+        :param command: The HTTP command (GET, POST, ...)
+        :param request: The request helper
+        :param response: The response helper
+        """
+        path = request.get_path()
+
+        # Remove double-slashes in path, then parse the URL
+        parsed_path = urlparse.urlparse(path.replace('//', '/')).path
+
+        # Get the corresponding servlet
+        servlet_info = self.get_servlet(parsed_path)
+        method = None
+        if servlet_info is not None:
+            method = getattr(servlet_info[0], "do_" + command, None)
+
+        if method is None:
+            response.send_content(404, basic.NO_SERVLET_PAGE.format(path))
+            return
+
+        try:
+            if asyncio.iscoroutinefunction(method):
+                # Coroutine handlers are called in the loop
+                await method(request, response)
+            else:
+                await self._loop.run_in_executor(None, method,
+                                                 request, response)
+
+        except Exception:
+            # Send a 500 error page on error
+            stack = traceback.format_exc()
+            self.log(logging.ERROR, "Error handling request upon: %s\n%s\n",
+                     path, stack)
+
+            response.reset()
+            response.send_content(500, basic.EXCEPTION_PAGE.format(path,
+                                                                   stack))
@@ -44,6 +44,7 @@ from pelix.ipopo.decorators import ComponentFactory, Provides, Validate, \
 
 import pelix.ipopo.constants as constants
 import pelix.ipv6utils
+import pelix.threadpool
 import pelix.utilities as utilities
 
 # Standard library
@@ -77,6 +78,67 @@ import pelix.http as http
 HTTP_SERVICE_EXTRA = "http.extra"
 """ HTTP service extra properties (dictionary) """
 
+HTTP_SERVICE_POOL_SIZE = "pelix.http.pool.size"
+"""
+Number of threads handling the connections (int).
+If 0 (default), a new thread is started for each connection.
+"""
+
+HTTP_SERVICE_POOL_QUEUE = "pelix.http.pool.queue"
+"""
+Maximum number of connections waiting for a thread of the pool (int).
+Connections are refused with a 503 error beyond this limit.
+If 0 (default), the waiting queue is not bounded.
+"""
+
+HTTP_SERVICE_KEEP_ALIVE = "pelix.http.keep_alive"
+"""
+If True, the server talks HTTP/1.1 and keeps connections alive between
+requests (boolean, False by default).
+A kept-alive connection holds its thread until it is closed or idle for
+KEEP_ALIVE_TIMEOUT seconds: the pool size must be chosen accordingly.
+Connections are closed after the responses without content length.
+"""
+
+KEEP_ALIVE_TIMEOUT = 10
+""" Time (in seconds) after which an idle kept-alive connection is closed """
+
+MAX_SKIPPED_BODY = 65536
+"""
+Maximum size of the part of a request body not read by its servlet which is
+skipped to keep the connection alive: the connection is closed beyond it
+"""
+
+NO_SERVLET_PAGE = """<html>
+<head>
+<title>404 - Page not found</title>
+</head>
+<body>
+<h1>Page not found</h1>
+<p>No servlet is associated to this path: <pre>{0}</pre></p>
+</body>
+</html>"""
+""" Page sent when no servlet is found for a path (format: path) """
+
+EXCEPTION_PAGE = """<html>
+<head>
+<title>500 - Internal Server Error</title>
+</head>
+<body>
+<h1>Internal Server Error</h1>
+<p>Error handling request upon: {0}</p>
+<pre>
+{1}
+</pre>
+</body>
+</html>"""
+""" Page sent when a servlet raises an error (format: path, stack trace) """
+
+_REJECTED_RESPONSE = b"HTTP/1.0 503 Service Unavailable\r\n" \
+    b"Content-Type: text/plain\r\nContent-Length: 0\r\n" \
+    b"Connection: close\r\n\r\n"
+""" Response sent to the connections refused by the threads pool """
+
 # ------------------------------------------------------------------------------
 
 
@@ -125,6 +187,75 @@ class _HTTPServletRequest(http.AbstractHTTPServletRequest):
         return self._handler.rfile
 
 
+class _RequestBody(object):
+    """
+    Input stream of a request on a kept-alive connection: stops at the end of
+    the request body, and counts the bytes which haven't been read
+    """
+    def __init__(self, rfile, length):
+        """
+        Sets up members
+
+        :param rfile: Input stream of the connection
+        :param length: Length of the request body
+        """
+        self._rfile = rfile
+        self.remaining = length
+
+    def __getattr__(self, name):
+        """
+        Other members are read from the connection stream
+        """
+        return getattr(self._rfile, name)
+
+    def __iter__(self):
+        """
+        Iterates over the lines of the body
+        """
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            yield line
+
+    def __limit(self, size):
+        """
+        Computes the number of bytes which can be read from the body
+        """
+        if size is None or size < 0 or size > self.remaining:
+            return self.remaining
+        return size
+
+    def read(self, size=-1):
+        """
+        Reads at most size bytes from the body
+        """
+        data = self._rfile.read(self.__limit(size))
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        """
+        Reads a line from the body
+        """
+        data = self._rfile.readline(self.__limit(size))
+        self.remaining -= len(data)
+        return data
+
+    def readlines(self, hint=-1):
+        """
+        Reads the lines of the body
+        """
+        lines = []
+        size = 0
+        for line in self:
+            lines.append(line)
+            size += len(line)
+            if 0 < hint <= size:
+                break
+        return lines
+
+
 class _HTTPServletResponse(http.AbstractHTTPServletResponse):
     """
     HTTP Servlet response helper
@@ -193,13 +324,27 @@ class _RequestHandler(BaseHTTPRequestHandler, object):
     # Override the default HTTP version
     default_request_version = "HTTP/1.0"
 
-    def __init__(self, http_svc, *args, **kwargs):
+    def __init__(self, http_svc, keep_alive, *args, **kwargs):
         """
-        Sets up the request handler (called for each request)
+        Sets up the request handler (called for each connection)
 
         :param http_svc: The associated HTTP service
+        :param keep_alive: If True, keep the connection alive between requests
         """
         self._service = http_svc
+        self._keep_alive = keep_alive
+
+        # Content length header sent in the current response
+        self._content_length_sent = False
+
+        if keep_alive:
+            # Enable the keep-alive support of BaseHTTPRequestHandler
+            self.protocol_version = "HTTP/1.1"
+            self.timeout = KEEP_ALIVE_TIMEOUT
+
+            # Headers and content are written separately: avoid waiting for
+            # the acknowledgement of the headers before sending the content
+            self.disable_nagle_algorithm = True
 
         # This calls the do_* methods
         BaseHTTPRequestHandler.__init__(self, *args, **kwargs)
@@ -244,18 +389,104 @@ class _RequestHandler(BaseHTTPRequestHandler, object):
                     except:
                         # Send a 500 error page on error
                         return self.send_exception(response)
+                    finally:
+                        if not self._content_length_sent:
+                            # The client reads the response until the
+                            # connection is closed
+                            self.close_connection = True
 
-                # Return it
-                return wrapper
+                return self.__handler(wrapper)
 
         # Return the super implementation if needed
-        return self.send_no_servlet_response
+        return self.__handler(self.send_no_servlet_response)
+
+    def __handler(self, handler):
+        """
+        Wraps a request handler to find the next request of a kept-alive
+        connection
+
+        :param handler: The request handler
+        :return: The handler to call
+        """
+        if not self._keep_alive:
+            # The connection is closed after the response
+            return handler
+
+        def body_wrapper():
+            """
+            Calls the request handler, then skips the part of the request
+            body it didn't read, so that it isn't parsed as the next request
+            """
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+
+            encoding = self.headers.get('Transfer-Encoding', 'identity')
+            if length < 0 or encoding.lower() != 'identity':
+                # Can't find the end of the body
+                self.close_connection = True
+                return handler()
+
+            rfile = self.rfile
+            body = self.rfile = _RequestBody(rfile, length)
+            try:
+                return handler()
+            finally:
+                self.rfile = rfile
+                self.__skip_body(body)
+
+        return body_wrapper
+
+    def __skip_body(self, body):
+        """
+        Reads the end of a request body, or closes the connection if it is
+        too large
+
+        :param body: The _RequestBody of the request
+        """
+        if not body.remaining or self.close_connection:
+            return
+
+        if body.remaining > MAX_SKIPPED_BODY:
+            self.close_connection = True
+            return
+
+        try:
+            while body.remaining:
+                if not body.read(body.remaining):
+                    # Connection closed by the client
+                    self.close_connection = True
+                    break
+        except (socket.error, ValueError):
+            # Timeout or closed connection
+            self.close_connection = True
+
+    def send_response(self, code, message=None):
+        """
+        Starts a new response
+        """
+        self._content_length_sent = False
+        super(_RequestHandler, self).send_response(code, message)
+
+    def send_header(self, keyword, value):
+        """
+        Sends a header, keeping track of the content length
+        """
+        if keyword.lower() == 'content-length':
+            self._content_length_sent = True
+
+        super(_RequestHandler, self).send_header(keyword, value)
 
     def log_error(self, message, *args, **kwargs):
         """
         Log server error
         """
-        self._service.log(logging.ERROR, message, *args, **kwargs)
+        if message.startswith("Request timed out"):
+            # Idle kept-alive connection closed
+            self._service.log(logging.DEBUG, message, *args, **kwargs)
+        else:
+            self._service.log(logging.ERROR, message, *args, **kwargs)
 
     def log_request(self, code='-', size='-'):
         """
@@ -267,15 +498,7 @@ class _RequestHandler(BaseHTTPRequestHandler, object):
         """
         Default response sent when no servlet is found for the requested path
         """
-        page = """<html>
-<head>
-<title>404 - Page not found</title>
-</head>
-<body>
-<h1>Page not found</h1>
-<p>No servlet is associated to this path: <pre>{0}</pre></p>
-</body>
-</html>""".format(self.path)
+        page = NO_SERVLET_PAGE.format(self.path)
 
         # Use the helper to send the error page
         response = _HTTPServletResponse(self)
@@ -296,18 +519,7 @@ class _RequestHandler(BaseHTTPRequestHandler, object):
                        self.path, stack)
 
         # Prepare the page content
-        page = """<html>
-<head>
-<title>500 - Internal Server Error</title>
-</head>
-<body>
-<h1>Internal Server Error</h1>
-<p>Error handling request upon: {0}</p>
-<pre>
-{1}
-</pre>
-</body>
-</html>""".format(self.path, stack)
+        page = EXCEPTION_PAGE.format(self.path, stack)
 
         # Send the page
         response.send_content(500, page)
@@ -323,14 +535,27 @@ class _HttpServerFamily(ThreadingMixIn, HTTPServer):
     Inspired from:
     http://www.arcfn.com/2011/02/ipv6-web-serving-with-arc-or-python.html
     """
-    def __init__(self, server_address, request_handler_class, logger=None):
+    def __init__(self, server_address, request_handler_class, logger=None,
+                 pool=None, max_pending=0):
         """
         Proxy constructor
 
         :param server_address: The server address
         :param request_handler_class: The request handler class
         :param logger: An optional logger, in case of ignored error
+        :param pool: An optional started thread pool handling the connections
+        :param max_pending: Maximum number of connections handled or waiting
+                            for a thread of the pool (0 for infinite)
         """
+        # Thread pool mode
+        self._pool = pool
+        self._max_pending = max_pending
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+        # Connections handled or waiting for a thread
+        self._connections = set()
+
         # Determine the address family
         addr_info = socket.getaddrinfo(server_address[0], server_address[1],
                                        0, 0, socket.SOL_TCP)
@@ -361,8 +586,15 @@ class _HttpServerFamily(ThreadingMixIn, HTTPServer):
     def process_request(self, request, client_address):
         """
         Starts a new thread to process the request, adding the client address
-        in its name.
+        in its name, or gives it to the thread pool.
         """
+        with self._pending_lock:
+            self._connections.add(request)
+
+        if self._pool is not None:
+            self.__enqueue_request(request, client_address)
+            return
+
         thread = threading.Thread(name="HttpService-{0}-Client-{1}"
                                   .format(self.server_port, client_address),
                                   target=self.process_request_thread,
@@ -370,6 +602,217 @@ class _HttpServerFamily(ThreadingMixIn, HTTPServer):
         thread.daemon = self.daemon_threads
         thread.start()
 
+    def __enqueue_request(self, request, client_address):
+        """
+        Enqueues the request in the thread pool, or refuses it if too many
+        connections are waiting
+        """
+        with self._pending_lock:
+            if self._max_pending and self._pending >= self._max_pending:
+                accepted = False
+            else:
+                accepted = True
+                self._pending += 1
+
+        if not accepted:
+            # Too many connections: refuse this one
+            try:
+                request.sendall(_REJECTED_RESPONSE)
+            except socket.error:
+                # Client is already gone
+                pass
+            self.shutdown_request(request)
+            return
+
+        self._pool.enqueue(self.__process_pooled_request,
+                           request, client_address)
+
+    def __process_pooled_request(self, request, client_address):
+        """
+        Processes a request in a thread of the pool
+        """
+        try:
+            self.process_request_thread(request, client_address)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+
+    def shutdown_request(self, request):
+        """
+        Closes a connection
+        """
+        with self._pending_lock:
+            self._connections.discard(request)
+
+        HTTPServer.shutdown_request(self, request)
+
+    def shutdown_connections(self):
+        """
+        Stops reading from the open connections: the kept-alive ones which
+        are waiting for a request are closed, the others after their current
+        response
+        """
+        with self._pending_lock:
+            connections = list(self._connections)
+
+        for request in connections:
+            try:
+                request.shutdown(socket.SHUT_RD)
+            except socket.error:
+                # Already closed
+                pass
+
+    def close_connections(self):
+        """
+        Closes the connections which haven't been handled
+        """
+        with self._pending_lock:
+            connections = list(self._connections)
+
+        for request in connections:
+            self.shutdown_request(request)
+
+# ------------------------------------------------------------------------------
+
+
+def _split_path(path):
+    """
+    Splits a lower-case path into its segments. A trailing slash is added to
+    the path if necessary, so that a path is a string prefix of another path
+    if and only if its segments are a prefix of the segments of the other.
+
+    :param path: A path starting with a slash
+    :return: The list of segments
+    """
+    if path[-1] != '/':
+        # Add a trailing slash
+        path += '/'
+
+    if path == '/':
+        # Root path
+        return []
+
+    return path[1:-1].split('/')
+
+
+class _PathNode(object):
+    """
+    A node of the servlets router tree
+    """
+    # Try to reduce memory footprint (stored instances)
+    __slots__ = ('children', 'paths', 'servlet_info')
+
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Segment -> _PathNode
+        self.children = {}
+
+        # Servlet path -> (servlet, parameters), for paths ending on this node
+        # (e.g. "/path" and "/path/")
+        self.paths = {}
+
+        # Information of the longest servlet path ending on this node
+        self.servlet_info = None
+
+    def update_servlet(self):
+        """
+        Updates the servlet information of this node
+        """
+        if self.paths:
+            self.servlet_info = self.paths[max(self.paths, key=len)]
+        else:
+            self.servlet_info = None
+
+
+class _ServletsRouter(object):
+    """
+    Prefix tree associating path segments to servlets.
+
+    Modifications must be protected by a lock, but the tree can be read
+    without lock: each modification of the tree is an atomic operation.
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self.__root = _PathNode()
+
+    def clear(self):
+        """
+        Removes all the servlets
+        """
+        self.__root = _PathNode()
+
+    def add(self, path, servlet_info):
+        """
+        Associates a servlet to a path
+
+        :param path: A lower-case path
+        :param servlet_info: A (servlet, parameters) tuple
+        """
+        node = self.__root
+        for segment in _split_path(path):
+            child = node.children.get(segment)
+            if child is None:
+                # Prepare the child before making it visible
+                child = _PathNode()
+                node.children[segment] = child
+            node = child
+
+        node.paths[path] = servlet_info
+        node.update_servlet()
+
+    def remove(self, path):
+        """
+        Removes the servlet associated to a path
+
+        :param path: A lower-case path
+        """
+        node = self.__root
+        visited = []
+        for segment in _split_path(path):
+            visited.append((node, segment))
+            node = node.children.get(segment)
+            if node is None:
+                # Unknown path
+                return
+
+        node.paths.pop(path, None)
+        node.update_servlet()
+
+        # Remove empty nodes
+        for parent, segment in reversed(visited):
+            if node.paths or node.children:
+                break
+
+            del parent.children[segment]
+            node = parent
+
+    def lookup(self, path):
+        """
+        Retrieves the servlet associated to the longest path prefixing the
+        given one
+
+        :param path: A lower-case request path
+        :return: A (servlet, parameters) tuple or None
+        """
+        node = self.__root
+        servlet_info = node.servlet_info
+        for segment in _split_path(path):
+            node = node.children.get(segment)
+            if node is None:
+                break
+
+            # Read the node information once: it can be reset concurrently
+            node_info = node.servlet_info
+            if node_info is not None:
+                # Deeper match
+                servlet_info = node_info
+
+        return servlet_info
+
 # ------------------------------------------------------------------------------
 
 
@@ -379,6 +822,9 @@ class _HttpServerFamily(ThreadingMixIn, HTTPServer):
 @Property("_address", http.HTTP_SERVICE_ADDRESS, "0.0.0.0")
 @Property("_port", http.HTTP_SERVICE_PORT, 8080)
 @Property('_extra', HTTP_SERVICE_EXTRA, None)
+@Property("_pool_size", HTTP_SERVICE_POOL_SIZE, 0)
+@Property("_pool_queue", HTTP_SERVICE_POOL_QUEUE, 0)
+@Property("_keep_alive", HTTP_SERVICE_KEEP_ALIVE, False)
 @Property("_instance_name", constants.IPOPO_INSTANCE_NAME)
 @Property("_logger_name", "pelix.http.logger.name", "")
 @Property("_logger_level", "pelix.http.logger.level", None)
@@ -394,6 +840,9 @@ class HttpService(object):
         self._address = "0.0.0.0"
         self._port = 8080
         self._extra = None
+        self._pool_size = 0
+        self._pool_queue = 0
+        self._keep_alive = False
         self._instance_name = None
         self._logger_name = None
         self._logger_level = None
@@ -410,6 +859,9 @@ class HttpService(object):
         # Path -> (servlet, parameters)
         self._servlets = {}
 
+        # Path prefix tree, read without lock
+        self._router = _ServletsRouter()
+
         # Field injected by iPOPO
         self._servlets_services = None
 
@@ -420,6 +872,7 @@ class HttpService(object):
         # Server control
         self._server = None
         self._thread = None
+        self._pool = None
 
     def __str__(self):
         """
@@ -553,34 +1006,7 @@ class HttpService(object):
             return None
 
         # Use lower case for comparison
-        path = path.lower()
-
-        if path[-1] != '/':
-            # Add a trailing slash
-            path += '/'
-
-        with self._lock:
-            longest_match = ""
-            for servlet_path in self._servlets.keys():
-                tested_path = servlet_path
-                if tested_path[-1] != '/':
-                    # Add a trailing slash
-                    tested_path += '/'
-
-                if path.startswith(tested_path):
-                    # Found a corresponding servlet
-                    if len(servlet_path) > len(longest_match):
-                        # And its deeper than the previous one
-                        longest_match = servlet_path
-
-            # Return the found servlet
-            if not longest_match:
-                # No match found
-                return None
-
-            else:
-                # Retrieve the stored information
-                return self._servlets[longest_match]
+        return self._router.lookup(path.lower())
 
     def register_servlet(self, path, servlet, parameters=None):
         """
@@ -644,6 +1070,7 @@ class HttpService(object):
             if self.__safe_callback(servlet, "bound_to", path, parameters):
                 # Store the servlet
                 self._servlets[path] = (servlet, parameters)
+                self._router.add(path, self._servlets[path])
                 return True
 
             # The servlet refused the binding
@@ -693,6 +1120,7 @@ class HttpService(object):
 
                 # Remove the servlet
                 del self._servlets[path]
+                self._router.remove(path)
                 return True
 
     def log(self, level, message, *args, **kwargs):
@@ -736,6 +1164,16 @@ class HttpService(object):
         if not isinstance(self._extra, dict):
             self._extra = {}
 
+        # Normalize the execution mode properties
+        try:
+            self._pool_size = max(0, int(self._pool_size or 0))
+            self._pool_queue = max(0, int(self._pool_queue or 0))
+        except (TypeError, ValueError):
+            # Thread per connection
+            self._pool_size = self._pool_queue = 0
+
+        self._keep_alive = bool(self._keep_alive)
+
         # Set up the logger
         if self._logger_name is not None:
             if not self._logger:
@@ -753,20 +1191,8 @@ class HttpService(object):
         self.log(logging.INFO, "Starting HTTP server: [%s]:%d ...",
                  self._address, self._port)
 
-        # Create the server
-        self._server = _HttpServerFamily((self._address, self._port),
-                                         lambda *x: _RequestHandler(self, *x),
-                                         self._logger)
-
-        # Property update (if port was 0)
-        self._port = self._server.server_port
-
-        # Run it in a separate thread
-        self._thread = threading.Thread(target=self._server.serve_forever,
-                                        name="HttpService-{0}-Server"
-                                        .format(self._port))
-        self._thread.daemon = True
-        self._thread.start()
+        # Start the server (updates the port if it was 0)
+        self._start_server()
 
         with self._binding_lock:
             # Set the validation flag up, once the server is ready
@@ -779,6 +1205,37 @@ class HttpService(object):
         self.log(logging.INFO, "HTTP server started: [%s]:%d",
                  self._address, self._port)
 
+    def _start_server(self):
+        """
+        Creates and starts the HTTP server, according to the validated
+        component properties. Updates the port property.
+        """
+        if self._pool_size:
+            # Create the thread pool
+            self._pool = pelix.threadpool.ThreadPool(
+                self._pool_size,
+                logname="HttpService-{0}-Pool".format(self._instance_name))
+            self._pool.start()
+
+        # Create the server
+        keep_alive = self._keep_alive
+        max_pending = self._pool_size + self._pool_queue \
+            if self._pool_queue else 0
+        self._server = _HttpServerFamily(
+            (self._address, self._port),
+            lambda *x: _RequestHandler(self, keep_alive, *x),
+            self._logger, self._pool, max_pending)
+
+        # Property update (if port was 0)
+        self._port = self._server.server_port
+
+        # Run it in a separate thread
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="HttpService-{0}-Server"
+                                        .format(self._port))
+        self._thread.daemon = True
+        self._thread.start()
+
     @Invalidate
     def invalidate(self, context):
         """
@@ -795,6 +1252,23 @@ class HttpService(object):
         self.log(logging.INFO, "Shutting down HTTP server: [%s]:%d ...",
                  self._address, self._port)
 
+        # Stop the server
+        self._stop_server()
+
+        self.log(logging.INFO, "HTTP server down: [%s]:%d ...",
+                 self._address, self._port)
+
+        # Clean up
+        self._servlets.clear()
+        self._router.clear()
+        self._thread = None
+        self._server = None
+        self._logger = None
+
+    def _stop_server(self):
+        """
+        Stops the HTTP server and waits for its thread to stop
+        """
         # Shutdown server
         self._server.shutdown()
 
@@ -804,14 +1278,17 @@ class HttpService(object):
                  self._address, self._port)
         self._thread.join(2)
 
+        # Release the threads waiting for the next request of a kept-alive
+        # connection
+        self._server.shutdown_connections()
+
         # Close the server
         self._server.server_close()
 
-        self.log(logging.INFO, "HTTP server down: [%s]:%d ...",
-                 self._address, self._port)
+        if self._pool is not None:
+            # Stop the thread pool
+            self._pool.stop()
+            self._pool = None
 
-        # Clean up
-        self._servlets.clear()
-        self._thread = None
-        self._server = None
-        self._logger = None
+        # Close the connections which were waiting for a thread
+        self._server.close_connections()
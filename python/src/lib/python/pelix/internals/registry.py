@@ -341,6 +341,9 @@ class ServiceRegistration(object):
                 # Sort key updated
                 self.__reference.update_sort_key()
 
+            # Update the registry properties index
+            self.__framework._registry.update_index(self.__reference)
+
             # Trigger a new computation in the framework
             event = ServiceEvent(ServiceEvent.MODIFIED, self.__reference,
                                  previous)
@@ -356,12 +359,32 @@ class ServiceRegistration(object):
 # ------------------------------------------------------------------------------
 
 
+def _index_keys(value):
+    """
+    Computes the keys under which a property value is indexed, i.e. the
+    filter values for which an equality criterion matches this value
+
+    :param value: A service property value
+    :return: A frozen set of strings
+    """
+    if isinstance(value, ldapfilter.ITERABLES):
+        # Same conversion as the equality comparator
+        return frozenset(item if is_string(item) else repr(item)
+                         for item in value)
+
+    elif is_string(value):
+        return frozenset((value,))
+
+    # String vs string representation
+    return frozenset((repr(value),))
+
+
 class _Listener(object):
     """
     Keeps information about a listener
     """
     # Try to reduce memory footprint (stored instances)
-    __slots__ = ('listener', 'specification', 'ldap_filter')
+    __slots__ = ('listener', 'specification', 'ldap_filter', 'route')
 
     def __init__(self, listener, specification, ldap_filter):
         """
@@ -374,6 +397,129 @@ class _Listener(object):
         self.listener = listener
         self.specification = specification
         self.ldap_filter = ldap_filter
+        self.route = _compute_route(ldap_filter)
+
+
+def _compute_route(ldap_filter):
+    """
+    Computes the term of the given filter used to route service events: a
+    property (name, value) tuple for an equality criterion, a (name, None)
+    tuple for a presence criterion.
+    Criteria on other properties than objectClass are preferred, as the
+    specification is already used to route events.
+
+    :param ldap_filter: A parsed LDAP filter (can be None)
+    :return: The route tuple, or None if events can't be routed
+    """
+    if ldap_filter is None:
+        return None
+
+    routes = ldapfilter.get_equality_criteria(ldap_filter)
+    routes.extend((name, None)
+                  for name in ldapfilter.get_presence_criteria(ldap_filter))
+    for route in routes:
+        if route[0] != OBJECTCLASS:
+            return route
+
+    # Use objectClass as last resort
+    return routes[0] if routes else None
+
+
+class _ListenerRoutes(object):
+    """
+    Routes the service events of a specification to the listeners whose
+    filter can match the service properties
+    """
+    # Try to reduce memory footprint (stored instances)
+    __slots__ = ('unrouted', 'values', 'presence')
+
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Listeners without route
+        self.unrouted = []
+
+        # Property name -> {Index key -> [Listeners]}
+        self.values = {}
+
+        # Property name -> [Listeners]
+        self.presence = {}
+
+    def add(self, data):
+        """
+        Adds a listener bean
+
+        :param data: A _Listener bean
+        """
+        if data.route is None:
+            self.unrouted.append(data)
+            return
+
+        name, value = data.route
+        if value is None:
+            self.presence.setdefault(name, []).append(data)
+        else:
+            self.values.setdefault(name, {}) \
+                .setdefault(value, []).append(data)
+
+    def remove(self, data):
+        """
+        Removes a listener bean
+
+        :param data: A _Listener bean
+        :return: True if there is no more listener in these routes
+        :raise ValueError: Unknown listener
+        """
+        if data.route is None:
+            self.unrouted.remove(data)
+
+        else:
+            name, value = data.route
+            if value is None:
+                listeners = self.presence[name]
+                listeners.remove(data)
+                if not listeners:
+                    del self.presence[name]
+
+            else:
+                values = self.values[name]
+                listeners = values[value]
+                listeners.remove(data)
+                if not listeners:
+                    del values[value]
+                    if not values:
+                        del self.values[name]
+
+        return not (self.unrouted or self.values or self.presence)
+
+    def collect(self, properties, listeners):
+        """
+        Adds the listeners which can be interested in a service with the
+        given properties to the given set
+
+        :param properties: Service properties
+        :param listeners: The set of listener beans to update
+        """
+        listeners.update(self.unrouted)
+
+        for name, values in self.values.items():
+            try:
+                keys = _index_keys(properties[name])
+            except KeyError:
+                # Property not set
+                continue
+
+            for key in keys:
+                try:
+                    listeners.update(values[key])
+                except KeyError:
+                    # No listener for this value
+                    pass
+
+        for name, presence_listeners in self.presence.items():
+            if name in properties:
+                listeners.update(presence_listeners)
 
 
 class EventDispatcher(object):
@@ -393,7 +539,7 @@ class EventDispatcher(object):
         self.__bnd_listeners = []
         self.__bnd_lock = threading.Lock()
 
-        # Service listeners (specification -> listener bean)
+        # Service listeners (specification -> listener routes)
         self.__svc_listeners = {}
         # listener instance -> listener bean
         self.__listeners_data = {}
@@ -403,6 +549,12 @@ class EventDispatcher(object):
         self.__fw_listeners = []
         self.__fw_lock = threading.Lock()
 
+        # Service events statistics
+        self.__svc_events = 0
+        self.__svc_candidates = 0
+        self.__svc_evaluations = 0
+        self.__stats_lock = threading.Lock()
+
     def clear(self):
         """
         Clears the event dispatcher
@@ -491,7 +643,8 @@ class EventDispatcher(object):
 
             stored = _Listener(listener, specification, ldap_filter)
             self.__listeners_data[listener] = stored
-            self.__svc_listeners.setdefault(specification, []).append(stored)
+            self.__svc_listeners.setdefault(specification, _ListenerRoutes()) \
+                .add(stored)
             return True
 
     def remove_bundle_listener(self, listener):
@@ -532,13 +685,12 @@ class EventDispatcher(object):
         with self.__svc_lock:
             try:
                 data = self.__listeners_data.pop(listener)
-                spec_listeners = self.__svc_listeners[data.specification]
-                spec_listeners.remove(data)
-                if len(spec_listeners) == 0:
+                if self.__svc_listeners[data.specification].remove(data):
+                    # No more listener for this specification
                     del self.__svc_listeners[data.specification]
                 return True
 
-            except KeyError:
+            except (KeyError, ValueError):
                 return False
 
     def fire_bundle_event(self, event):
@@ -596,37 +748,43 @@ class EventDispatcher(object):
                                           previous)
 
         with self.__svc_lock:
-            # Get the listeners for this specification
+            # Get the listeners for this specification and those which listen
+            # to any specification, if their filter can match the properties
             listeners = set()
-            for spec in svc_specs:
+            for spec in tuple(svc_specs) + (None,):
                 try:
-                    listeners.update(self.__svc_listeners[spec])
+                    routes = self.__svc_listeners[spec]
                 except KeyError:
-                    pass
+                    continue
 
-            # Add those which listen to any specification
-            try:
-                listeners.update(self.__svc_listeners[None])
-            except KeyError:
-                pass
+                routes.collect(properties, listeners)
+                if previous is not None:
+                    # Listeners which might have to be notified of an end match
+                    routes.collect(previous, listeners)
 
         # Get the listeners for this specification
+        evaluations = 0
         for data in listeners:
             # Default event to send : the one we received
             sent_event = event
 
             # Test if the service properties matches the filter
             ldap_filter = data.ldap_filter
-            if ldap_filter is not None \
-                    and not ldap_filter.matches(properties):
-                # Event doesn't match listener filter...
-                if svc_modified and previous is not None \
-                        and ldap_filter.matches(previous):
-                    # ... but previous properties did match
-                    sent_event = endmatch_event
-                else:
-                    # Didn't match before either, ignore it
-                    continue
+            if ldap_filter is not None:
+                evaluations += 1
+                if not ldap_filter.matches(properties):
+                    # Event doesn't match listener filter...
+                    if svc_modified and previous is not None:
+                        evaluations += 1
+                        if ldap_filter.matches(previous):
+                            # ... but previous properties did match
+                            sent_event = endmatch_event
+                        else:
+                            # Didn't match before either, ignore it
+                            continue
+                    else:
+                        # Didn't match, ignore it
+                        continue
 
             # Call'em
             try:
@@ -635,6 +793,164 @@ class EventDispatcher(object):
             except:
                 self._logger.exception("Error calling a service listener")
 
+        with self.__stats_lock:
+            self.__svc_events += 1
+            self.__svc_candidates += len(listeners)
+            self.__svc_evaluations += evaluations
+
+    def get_service_events_stats(self):
+        """
+        Returns the statistics about the service events dispatched since the
+        creation of the dispatcher, with the following entries:
+
+        * events: number of service events fired
+        * candidates: number of listeners selected to receive those events
+        * evaluations: number of listener filters evaluations
+
+        :return: A dictionary
+        """
+        with self.__stats_lock:
+            return {'events': self.__svc_events,
+                    'candidates': self.__svc_candidates,
+                    'evaluations': self.__svc_evaluations}
+
+# ------------------------------------------------------------------------------
+
+
+class _PropertiesIndex(object):
+    """
+    Index of service references according to the values of some of their
+    properties
+    """
+    def __init__(self, names):
+        """
+        Sets up the index
+
+        :param names: Names of the indexed properties
+        """
+        # Property name -> {Index key -> set(Service references)}
+        self.__index = dict((name, {}) for name in names)
+
+        # Service reference -> {Property name -> Index keys}
+        self.__refs_keys = {}
+
+        # The index lock is never held while acquiring another lock
+        self.__lock = threading.Lock()
+
+    def clear(self):
+        """
+        Clears the index
+        """
+        with self.__lock:
+            for keys_refs in self.__index.values():
+                keys_refs.clear()
+            self.__refs_keys.clear()
+
+    def add(self, svc_ref, properties):
+        """
+        Indexes a service reference
+
+        :param svc_ref: A service reference
+        :param properties: The service properties
+        """
+        with self.__lock:
+            self.__refs_keys[svc_ref] = ref_keys = {}
+            self.__store(svc_ref, properties, ref_keys)
+
+    def remove(self, svc_ref):
+        """
+        Removes a service reference from the index
+
+        :param svc_ref: A service reference
+        """
+        with self.__lock:
+            try:
+                ref_keys = self.__refs_keys.pop(svc_ref)
+            except KeyError:
+                # Unknown reference
+                return
+
+            self.__forget(svc_ref, ref_keys)
+
+    def update(self, svc_ref, properties):
+        """
+        Updates the index entries of a service reference. Does nothing if the
+        reference is not indexed, i.e. if it has been unregistered.
+
+        :param svc_ref: A service reference
+        :param properties: The new service properties
+        """
+        with self.__lock:
+            try:
+                ref_keys = self.__refs_keys[svc_ref]
+            except KeyError:
+                # Unknown reference
+                return
+
+            self.__forget(svc_ref, ref_keys)
+            ref_keys.clear()
+            self.__store(svc_ref, properties, ref_keys)
+
+    def candidates(self, ldap_filter):
+        """
+        Retrieves the smallest set of service references which can match the
+        given filter, according to its indexed equality criteria
+
+        :param ldap_filter: A parsed LDAP filter
+        :return: A set of service references, or None if the filter can't
+                 be resolved using the index
+        """
+        with self.__lock:
+            best = None
+            for name, value in ldapfilter.get_equality_criteria(ldap_filter):
+                try:
+                    refs = self.__index[name].get(value, ())
+                except KeyError:
+                    # Property not indexed
+                    continue
+
+                if best is None or len(refs) < len(best):
+                    best = refs
+                    if not best:
+                        # Can't be better
+                        break
+
+            if best is None:
+                # No indexed criterion
+                return None
+
+            # Return a copy, as the index can be modified after the call
+            return set(best)
+
+    def __forget(self, svc_ref, ref_keys):
+        """
+        Removes the given reference from the index entries in ref_keys
+        """
+        for name, keys in ref_keys.items():
+            keys_refs = self.__index[name]
+            for key in keys:
+                refs = keys_refs[key]
+                refs.discard(svc_ref)
+                if not refs:
+                    # Don't keep empty sets
+                    del keys_refs[key]
+
+    def __store(self, svc_ref, properties, ref_keys):
+        """
+        Stores the reference according to the given properties, and keeps
+        track of its keys in ref_keys
+        """
+        for name, keys_refs in self.__index.items():
+            try:
+                keys = _index_keys(properties[name])
+            except KeyError:
+                # Property not set
+                continue
+
+            ref_keys[name] = keys
+            for key in keys:
+                keys_refs.setdefault(key, set()).add(svc_ref)
+
 # ------------------------------------------------------------------------------
 
 
@@ -644,12 +960,15 @@ class ServiceRegistry(object):
 
     Associates service references to instances and bundles.
     """
-    def __init__(self, framework, logger=None):
+    def __init__(self, framework, logger=None, indexed_properties=None):
         """
         Sets up the registry
 
         :param framework: Associated framework
         :param logger: Logger to use
+        :param indexed_properties: Names of the service properties to index,
+                                   in addition to objectClass and service.id
+                                   (list or comma-separated string)
         """
         # Associated framework
         self.__framework = framework
@@ -675,6 +994,15 @@ class ServiceRegistry(object):
         # Bundle -> Service references[]
         self.__bundle_imports = {}
 
+        # Service properties index
+        if is_string(indexed_properties):
+            indexed_properties = indexed_properties.split(',')
+
+        names = set((OBJECTCLASS, SERVICE_ID))
+        names.update(name.strip() for name in indexed_properties or ()
+                     if name and name.strip())
+        self.__index = _PropertiesIndex(names)
+
         # Locks
         self.__svc_lock = threading.Lock()
 
@@ -688,6 +1016,7 @@ class ServiceRegistry(object):
             self.__svc_bundle.clear()
             self.__bundle_svc.clear()
             self.__bundle_imports.clear()
+            self.__index.clear()
 
     def register(self, bundle, classes, properties, svc_instance):
         """
@@ -725,6 +1054,9 @@ class ServiceRegistry(object):
             bundle_services = self.__bundle_svc.setdefault(bundle, [])
             bisect.insort_left(bundle_services, svc_ref)
 
+            # Index the service properties
+            self.__index.add(svc_ref, properties)
+
             return svc_registration
 
     def unregister(self, svc_ref):
@@ -761,8 +1093,21 @@ class ServiceRegistry(object):
                 # Don't keep empty lists
                 del self.__bundle_svc[bundle]
 
+            # Remove the service from the index
+            self.__index.remove(svc_ref)
+
             return service
 
+    def update_index(self, svc_ref):
+        """
+        Updates the properties index after a modification of the properties
+        of the given service.
+        This method should only be used by the ServiceRegistration object.
+
+        :param svc_ref: The reference of the modified service
+        """
+        self.__index.update(svc_ref, svc_ref.get_properties())
+
     def find_service_references(self, clazz=None, ldap_filter=None,
                                 only_one=False):
         """
@@ -789,25 +1134,44 @@ class ServiceRegistry(object):
                 # Escape the class name
                 clazz = ldapfilter.escape_LDAP(clazz)
 
-            if clazz is None:
-                # Directly use the given filter
-                refs_set = sorted(self.__svc_registry.keys())
+            # Parse the filter
+            try:
+                new_filter = ldapfilter.get_ldap_filter(ldap_filter)
+
+            except ValueError as ex:
+                raise BundleException(ex)
 
+            if clazz is None:
+                spec_refs = None
             else:
                 try:
                     # Only for references with the given specification
-                    refs_set = iter(self.__svc_specs[clazz])
+                    spec_refs = self.__svc_specs[clazz]
 
                 except KeyError:
                     # No matching specification
                     return None
 
-            # Parse the filter
-            try:
-                new_filter = ldapfilter.get_ldap_filter(ldap_filter)
+            # Look for candidates using the equality criteria of the filter
+            candidates = None
+            if new_filter is not None:
+                candidates = self.__index.candidates(new_filter)
 
-            except ValueError as ex:
-                raise BundleException(ex)
+            if candidates is not None \
+                    and (spec_refs is None or len(candidates) < len(spec_refs)):
+                if spec_refs is not None:
+                    # Keep the candidates providing the specification
+                    candidates = [ref for ref in candidates
+                                  if clazz in ref.get_property(OBJECTCLASS)]
+
+                refs_set = iter(sorted(candidates))
+
+            elif spec_refs is None:
+                # Directly use the given filter
+                refs_set = sorted(self.__svc_registry.keys())
+
+            else:
+                refs_set = iter(spec_refs)
 
             if new_filter is not None:
                 # Prepare a generator, as we might not need a complete
@@ -316,29 +316,27 @@ class _IPopoService(object):
                     for stored_instance in self.__instances.values()
                     if stored_instance.factory_name == factory_name]
 
-    def __try_instantiate(self, component_context, instance):
+    def __store_instance(self, component_context, instance):
         """
-        Instantiates a component, if all of its handlers are there. Returns
-        False if a handler is missing.
+        Prepares the handlers of a component and stores it in the registry.
+        Returns None if a handler is missing.
 
         :param component_context: A ComponentContext bean
         :param instance: The component instance
-        :return: True if the component has started,
-                 False if a handler is missing
+        :return: The StoredInstance object, or None if a handler is missing
         """
         with self.__instances_lock:
             # Extract information about the component
             factory_context = component_context.factory_context
             handlers_ids = factory_context.get_handlers_ids()
             name = component_context.name
-            factory_name = factory_context.name
 
             try:
                 # Get handlers
                 handler_factories = self.__get_handler_factories(handlers_ids)
             except KeyError:
                 # A handler is missing, stop here
-                return False
+                return None
 
             # Instantiate the handlers
             all_handlers = set()
@@ -358,17 +356,41 @@ class _IPopoService(object):
 
             # Store the instance
             self.__instances[name] = stored_instance
+            return stored_instance
+
+    def __start_instance(self, stored_instance):
+        """
+        Starts the manager of a stored component and tries to validate it
 
+        :param stored_instance: A StoredInstance object
+        """
         # Start the manager
         stored_instance.start()
 
         # Notify listeners now that every thing is ready to run
         self._fire_ipopo_event(constants.IPopoEvent.INSTANTIATED,
-                               factory_name, name)
+                               stored_instance.factory_name,
+                               stored_instance.name)
 
         # Try to validate it
         stored_instance.update_bindings()
         stored_instance.check_lifecycle()
+
+    def __try_instantiate(self, component_context, instance):
+        """
+        Instantiates a component, if all of its handlers are there. Returns
+        False if a handler is missing.
+
+        :param component_context: A ComponentContext bean
+        :param instance: The component instance
+        :return: True if the component has started,
+                 False if a handler is missing
+        """
+        stored_instance = self.__store_instance(component_context, instance)
+        if stored_instance is None:
+            return False
+
+        self.__start_instance(stored_instance)
         return True
 
     def _autorestart_store_components(self, bundle):
@@ -645,17 +667,17 @@ class _IPopoService(object):
             with self.__instances_lock:
                 self.__remove_handler_factory(svc_ref)
 
-    def instantiate(self, factory_name, name, properties=None):
+    def __create_instance(self, factory_name, name, properties):
         """
-        Instantiates a component from the given factory, with the given name
+        Creates a component instance and its context
 
         :param factory_name: Name of the component factory
         :param name: Name of the instance to be started
-        :return: The component instance
+        :param properties: Instance properties (can be None)
+        :return: A (ComponentContext, component instance) tuple
         :raise TypeError: The given factory is unknown
         :raise ValueError: The given name or factory name is invalid, or an
                            instance with the given name already exists
-        :raise Exception: Something wrong occurred in the factory
         """
         # Test parameters
         if not factory_name or not is_string(factory_name):
@@ -695,6 +717,22 @@ class _IPopoService(object):
             # Set up the component instance context
             component_context = ComponentContext(factory_context, name,
                                                  properties)
+            return component_context, instance
+
+    def instantiate(self, factory_name, name, properties=None):
+        """
+        Instantiates a component from the given factory, with the given name
+
+        :param factory_name: Name of the component factory
+        :param name: Name of the instance to be started
+        :return: The component instance
+        :raise TypeError: The given factory is unknown
+        :raise ValueError: The given name or factory name is invalid, or an
+                           instance with the given name already exists
+        :raise Exception: Something wrong occurred in the factory
+        """
+        component_context, instance = \
+            self.__create_instance(factory_name, name, properties)
 
         # Try to instantiate the component immediately
         if not self.__try_instantiate(component_context, instance):
@@ -703,6 +741,55 @@ class _IPopoService(object):
 
         return instance
 
+    def instantiate_many(self, components):
+        """
+        Instantiates several components at once.
+
+        All the instances are created and stored before the first one is
+        started. They are then started and validated, those without
+        dependencies first: their services are registered before the
+        components which may consume them try to bind, which avoids a round
+        of service events per consumer.
+
+        :param components: A list of (factory name, instance name, properties)
+                           tuples
+        :return: A tuple: (name -> component instance dictionary,
+                 name -> exception dictionary of the failed instantiations)
+        """
+        instances = {}
+        errors = {}
+        stored_instances = []
+        for factory_name, name, properties in components:
+            try:
+                component_context, instance = \
+                    self.__create_instance(factory_name, name, properties)
+            except Exception as ex:
+                errors[name] = ex
+                continue
+
+            instances[name] = instance
+            stored_instance = self.__store_instance(component_context,
+                                                    instance)
+            if stored_instance is None:
+                # A handler is missing, put the component in the queue
+                self.__waiting_handlers[name] = (component_context, instance)
+            else:
+                stored_instances.append(stored_instance)
+
+        # Providers first (stable sort)
+        stored_instances.sort(key=lambda stored: bool(
+            stored.get_handlers(handlers_const.KIND_DEPENDENCY)))
+
+        for stored_instance in stored_instances:
+            try:
+                self.__start_instance(stored_instance)
+            except Exception as ex:
+                _logger.exception("Error starting component '%s': %s",
+                                  stored_instance.name, ex)
+                errors[stored_instance.name] = ex
+
+        return instances, errors
+
     def invalidate(self, name):
         """
         Invalidates the given component
@@ -765,6 +852,47 @@ class _IPopoService(object):
                     raise ValueError("Unknown component instance '{0}'"
                                      .format(name))
 
+    def kill_many(self, names):
+        """
+        Kills several components at once.
+
+        All the components are removed from the registry first, then killed,
+        those with dependencies first: they don't have to be unbound then
+        invalidated when their providers, killed in the same batch,
+        unregister their services.
+
+        :param names: Names of the components to kill
+        :return: A name -> exception dictionary of the failed kills
+        """
+        errors = {}
+        stored_instances = []
+        with self.__instances_lock:
+            for name in names:
+                try:
+                    # Running instance
+                    stored_instances.append(self.__instances.pop(name))
+                except KeyError:
+                    # Queued instance
+                    try:
+                        del self.__waiting_handlers[name]
+                    except KeyError:
+                        errors[name] = ValueError(
+                            "Unknown component instance '{0}'".format(name))
+
+            # Consumers first (stable sort)
+            stored_instances.sort(key=lambda stored: not bool(
+                stored.get_handlers(handlers_const.KIND_DEPENDENCY)))
+
+            for stored_instance in stored_instances:
+                try:
+                    stored_instance.kill()
+                except Exception as ex:
+                    _logger.exception("Error killing component '%s': %s",
+                                      stored_instance.name, ex)
+                    errors[stored_instance.name] = ex
+
+        return errors
+
     def register_factory(self, bundle_context, factory):
         """
         Registers a manually created factory, using decorators programmatically
@@ -27,7 +27,11 @@ Dependency-less LDAP filter parser for Python
 """
 
 from pelix.utilities import is_string
+
+# Standard library
+import collections
 import inspect
+import threading
 
 # ------------------------------------------------------------------------------
 
@@ -61,6 +65,9 @@ OR = 1
 NOT = 2
 """ 'Not' LDAP operation """
 
+FILTERS_CACHE_SIZE = 512
+""" Maximum number of parsed filter strings kept by get_ldap_filter() """
+
 # ------------------------------------------------------------------------------
 
 
@@ -78,6 +85,9 @@ class LDAPFilter(object):
         self.subfilters = []
         self.operator = operator
 
+        # Compiled form of the filter
+        self.__matcher = None
+
     def __eq__(self, other):
         """
         Equality testing
@@ -140,6 +150,20 @@ class LDAPFilter(object):
             raise ValueError("Not operator only handles one child")
 
         self.subfilters.append(ldap_filter)
+        self.__matcher = None
+
+    def compile(self):
+        """
+        Converts this filter and its children into a single function,
+        with pre-computed filter values. The filter must not be modified
+        once compiled.
+
+        :return: A function accepting a dictionary of properties and
+                 returning True if they match this filter
+        """
+        return _compile_operation(self.operator,
+                                  tuple(subfilter.compile()
+                                        for subfilter in self.subfilters))
 
     def matches(self, properties):
         """
@@ -148,21 +172,12 @@ class LDAPFilter(object):
         :param properties: A dictionary of properties
         :return: True if the properties matches this filter, else False
         """
-        # Use a generator, and declare it outside of the method call
-        # => seems to be quite a speed up trick
-        generator = (criterion.matches(properties)
-                     for criterion in self.subfilters)
-
-        # Extract "if" from loops and use built-in methods
-        if self.operator == OR:
-            result = any(generator)
-        else:
-            result = all(generator)
-            if self.operator == NOT:
-                # Revert result
-                return not result
+        matcher = self.__matcher
+        if matcher is None:
+            # Compile the filter on first use
+            matcher = self.__matcher = self.compile()
 
-        return result
+        return matcher(properties)
 
     def normalize(self):
         """
@@ -182,6 +197,7 @@ class LDAPFilter(object):
 
         # Update the instance
         self.subfilters = new_filters
+        self.__matcher = None
 
         size = len(self.subfilters)
         if size > 1:
@@ -220,6 +236,9 @@ class LDAPCriteria(object):
         self.value = value
         self.comparator = comparator
 
+        # Compiled form of the criterion
+        self.__matcher = None
+
     def __eq__(self, other):
         """
         Equality testing
@@ -260,6 +279,22 @@ class LDAPCriteria(object):
                                     comparator2str(self.comparator),
                                     escape_LDAP(str(self.value)))
 
+    def compile(self):
+        """
+        Converts this criterion into a function, with a pre-computed filter
+        value. The criterion must not be modified once compiled.
+
+        :return: A function accepting a dictionary of properties and
+                 returning True if they match this criterion
+        """
+        try:
+            compiler = _COMPARATOR_COMPILER[self.comparator]
+        except KeyError:
+            # Unknown comparator
+            return _compile_comparator(self.name, self.value, self.comparator)
+
+        return compiler(self.name, self.value)
+
     def matches(self, properties):
         """
         Tests if the given criterion matches this LDAP criterion
@@ -267,12 +302,12 @@ class LDAPCriteria(object):
         :param properties: A dictionary of properties
         :return: True if the properties matches this criterion, else False
         """
-        try:
-            # Use the comparator
-            return self.comparator(self.value, properties[self.name])
-        except KeyError:
-            # Criterion key is not in the properties
-            return False
+        matcher = self.__matcher
+        if matcher is None:
+            # Compile the criterion on first use
+            matcher = self.__matcher = self.compile()
+
+        return matcher(properties)
 
     def normalize(self):
         """
@@ -372,24 +407,29 @@ def _comparator_star(filter_value, tested_value):
     """
     Tests a filter containing a joker
     """
+    return _star_parts_comparison(filter_value.split('*'), tested_value)
+
+
+def _star_parts_comparison(parts, tested_value):
+    """
+    Tests a filter containing a joker, already split around its jokers
+    """
     if isinstance(tested_value, ITERABLES):
         for value in tested_value:
-            if _star_comparison(filter_value, value):
+            if _star_comparison(parts, value):
                 return True
     else:
-        return _star_comparison(filter_value, tested_value)
+        return _star_comparison(parts, tested_value)
 
 
-def _star_comparison(filter_value, tested_value):
+def _star_comparison(parts, tested_value):
     """
-    Tests a filter containing a joker
+    Tests a filter containing a joker, split around its jokers
     """
     if not is_string(tested_value):
         # Unhandled value type...
         return False
 
-    parts = filter_value.split('*')
-
     i = 0
     last_part = len(parts) - 1
 
@@ -452,8 +492,15 @@ def _comparator_approximate(filter_value, tested_value):
     If the tested value is a string or an array of string, it compares their
     lower case forms
     """
-    lower_filter_value = filter_value.lower()
+    return _approximate_comparison(filter_value, filter_value.lower(),
+                                   tested_value)
 
+
+def _approximate_comparison(filter_value, lower_filter_value, tested_value):
+    """
+    Tests if the filter value, given with its lower case form, is nearly
+    equal to the tested value
+    """
     if is_string(tested_value):
         # Lower case comparison
         return _comparator_eq(lower_filter_value, tested_value.lower())
@@ -480,24 +527,32 @@ def _comparator_approximate_star(filter_value, tested_value):
     If the tested value is a string or an array of string, it compares their
     lower case forms
     """
-    lower_filter_value = filter_value.lower()
+    return _approximate_star_comparison(filter_value.split('*'),
+                                        filter_value.lower().split('*'),
+                                        tested_value)
+
 
+def _approximate_star_comparison(parts, lower_parts, tested_value):
+    """
+    Tests if the filter value, split around its jokers and given with its
+    lower case form, is nearly equal to the tested value
+    """
     if is_string(tested_value):
         # Lower case comparison
-        return _comparator_star(lower_filter_value, tested_value.lower())
+        return _star_parts_comparison(lower_parts, tested_value.lower())
 
     elif hasattr(tested_value, '__iter__'):
         # Extract a list of strings
         new_tested = [value.lower() for value in tested_value
                       if is_string(value)]
 
-        if _comparator_star(lower_filter_value, new_tested):
+        if _star_parts_comparison(lower_parts, new_tested):
             # Value found in the strings
             return True
 
     # Compare the raw values
-    return _comparator_star(filter_value, tested_value) \
-        or _comparator_star(lower_filter_value, tested_value)
+    return _star_parts_comparison(parts, tested_value) \
+        or _star_parts_comparison(lower_parts, tested_value)
 
 
 def _comparator_le(filter_value, tested_value):
@@ -618,6 +673,249 @@ def operator2str(operator):
 # ------------------------------------------------------------------------------
 
 
+def _compile_operation(operator, matchers):
+    """
+    Makes the function testing the given compiled sub-filters with an LDAP
+    operator
+
+    :param operator: An LDAP filter operator (AND, OR or NOT)
+    :param matchers: A tuple of compiled sub-filters
+    :return: The compiled filter
+    """
+    if operator == OR:
+        def match(properties):
+            """
+            At least one sub-filter must match
+            """
+            for matcher in matchers:
+                if matcher(properties):
+                    return True
+            return False
+
+    elif operator == NOT:
+        def match(properties):
+            """
+            The sub-filters must not all match
+            """
+            for matcher in matchers:
+                if not matcher(properties):
+                    return True
+            return False
+
+    elif len(matchers) == 1:
+        # Single criterion
+        return matchers[0]
+
+    else:
+        def match(properties):
+            """
+            All sub-filters must match
+            """
+            for matcher in matchers:
+                if not matcher(properties):
+                    return False
+            return True
+
+    return match
+
+
+def _compile_comparator(name, filter_value, comparator):
+    """
+    Makes the function testing a property with the given comparator
+    """
+    def match(properties):
+        """
+        Calls the comparator
+        """
+        try:
+            return comparator(filter_value, properties[name])
+        except KeyError:
+            # Criterion key is not in the properties
+            return False
+
+    return match
+
+
+def _compile_presence(name, _):
+    """
+    Makes the function testing the presence of a property
+    """
+    def match(properties):
+        """
+        Tests the presence of the property
+        """
+        try:
+            return _comparator_presence(None, properties[name])
+        except KeyError:
+            # Criterion key is not in the properties
+            return False
+
+    return match
+
+
+def _compile_eq(name, filter_value):
+    """
+    Makes the function testing the equality of a property
+    """
+    def match(properties):
+        """
+        Tests the equality of the property
+        """
+        try:
+            tested_value = properties[name]
+        except KeyError:
+            # Criterion key is not in the properties
+            return False
+
+        if type(tested_value) is str:
+            # String vs string: direct comparison
+            return filter_value == tested_value
+
+        return _comparator_eq(filter_value, tested_value)
+
+    return match
+
+
+def _compile_star(name, filter_value):
+    """
+    Makes the function testing a property against a value with jokers
+    """
+    return _compile_comparator(name, filter_value.split('*'),
+                               _star_parts_comparison)
+
+
+def _compile_approximate(name, filter_value):
+    """
+    Makes the function testing the approximate equality of a property
+    """
+    lower_filter_value = filter_value.lower()
+
+    def match(properties):
+        """
+        Tests the approximate equality of the property
+        """
+        try:
+            tested_value = properties[name]
+        except KeyError:
+            # Criterion key is not in the properties
+            return False
+
+        return _approximate_comparison(filter_value, lower_filter_value,
+                                       tested_value)
+
+    return match
+
+
+def _compile_approximate_star(name, filter_value):
+    """
+    Makes the function testing the approximate equality of a property
+    against a value with jokers
+    """
+    parts = filter_value.split('*')
+    lower_parts = filter_value.lower().split('*')
+
+    def match(properties):
+        """
+        Tests the approximate equality of the property
+        """
+        try:
+            tested_value = properties[name]
+        except KeyError:
+            # Criterion key is not in the properties
+            return False
+
+        return _approximate_star_comparison(parts, lower_parts, tested_value)
+
+    return match
+
+
+def _compile_order(name, filter_value, greater, or_equal):
+    """
+    Makes the function comparing the order of a property and the filter
+    value, pre-converting the filter value to a number.
+    Conversion rules are the same as in _comparator_lt and _comparator_gt.
+
+    :param name: Name of the tested property
+    :param filter_value: The filter value
+    :param greater: If True, the tested value must be greater than the filter
+                    value, else it must be lesser
+    :param or_equal: If True, the tested value can also be equal to the
+                     filter value
+    """
+    literals = None
+    if is_string(filter_value):
+        # Type of tested value -> converted filter value
+        literals = {}
+        try:
+            literals[float] = float(filter_value)
+        except (TypeError, ValueError):
+            # Not a number
+            literals[float] = None
+        try:
+            literals[int] = int(filter_value)
+        except (TypeError, ValueError):
+            # Integer/float comparison trick
+            literals[int] = literals[float]
+
+    def match(properties):
+        """
+        Compares the property with the filter value
+        """
+        try:
+            tested_value = properties[name]
+        except KeyError:
+            # Criterion key is not in the properties
+            return False
+
+        converted = filter_value
+        if literals is not None:
+            value_type = type(tested_value)
+            try:
+                converted = literals[value_type]
+            except KeyError:
+                try:
+                    # Try a conversion
+                    converted = value_type(filter_value)
+                except (TypeError, ValueError):
+                    # Incompatible type
+                    converted = None
+
+        result = False
+        if converted is not None:
+            try:
+                if greater:
+                    result = tested_value > converted
+                else:
+                    result = tested_value < converted
+            except TypeError:
+                # Incompatible type
+                result = False
+
+        if not result and or_equal:
+            return _comparator_eq(filter_value, tested_value)
+
+        return result
+
+    return match
+
+_COMPARATOR_COMPILER = {
+    _comparator_approximate: _compile_approximate,
+    _comparator_approximate_star: _compile_approximate_star,
+    _comparator_eq: _compile_eq,
+    _comparator_star: _compile_star,
+    _comparator_presence: _compile_presence,
+    _comparator_le:
+        lambda name, value: _compile_order(name, value, False, True),
+    _comparator_lt:
+        lambda name, value: _compile_order(name, value, False, False),
+    _comparator_ge:
+        lambda name, value: _compile_order(name, value, True, True),
+    _comparator_gt:
+        lambda name, value: _compile_order(name, value, True, False)}
+
+# ------------------------------------------------------------------------------
+
+
 def _compute_comparator(string, idx):
     """
     Tries to compute the LDAP comparator at the given index
@@ -882,10 +1180,69 @@ def _parse_ldap(ldap_filter):
     return root.normalize()
 
 
+class _FiltersCache(object):
+    """
+    Least-recently used cache of parsed LDAP filters
+    """
+    def __init__(self, size):
+        """
+        Sets up the cache
+
+        :param size: Maximum number of filters to keep
+        """
+        self.__size = size
+
+        # Filter string -> Parsed filter
+        self.__filters = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def clear(self):
+        """
+        Clears the cache
+        """
+        with self.__lock:
+            self.__filters.clear()
+
+    def get(self, ldap_string):
+        """
+        Retrieves the parsed form of the given filter string, parsing it if
+        necessary
+
+        :param ldap_string: An LDAP filter string
+        :return: The parsed filter, can be None
+        :raise ValueError: Invalid filter string
+        """
+        with self.__lock:
+            try:
+                # Move the filter to the end of the cache
+                ldap_filter = self.__filters.pop(ldap_string)
+                self.__filters[ldap_string] = ldap_filter
+                return ldap_filter
+            except KeyError:
+                # Unknown filter
+                pass
+
+        # Parse the filter outside the lock
+        ldap_filter = _parse_ldap(ldap_string)
+
+        with self.__lock:
+            self.__filters[ldap_string] = ldap_filter
+            if len(self.__filters) > self.__size:
+                # Forget the least recently used filter
+                self.__filters.popitem(last=False)
+
+        return ldap_filter
+
+_FILTERS_CACHE = _FiltersCache(FILTERS_CACHE_SIZE)
+
+
 def get_ldap_filter(ldap_filter):
     """
     Retrieves the LDAP filter object corresponding to the given filter.
-    Parses it the argument if it is an LDAPFilter instance
+    Parses it the argument if it is an LDAPFilter instance.
+
+    Parsed filter strings are cached: the returned objects are shared and
+    must not be modified.
 
     :param ldap_filter: An LDAP filter (LDAPFilter or string)
     :return: The corresponding filter, can be None
@@ -900,8 +1257,8 @@ def get_ldap_filter(ldap_filter):
         return ldap_filter
 
     elif is_string(ldap_filter):
-        # Parse the filter
-        return _parse_ldap(ldap_filter)
+        # Parse the filter, or reuse the previously parsed one
+        return _FILTERS_CACHE.get(ldap_filter)
 
     # Unknown type
     raise TypeError("Unhandled filter type {0}"
@@ -951,3 +1308,51 @@ def combine_filters(filters, operator=AND):
         new_filter.append(sub_filter)
 
     return new_filter.normalize()
+
+
+def _get_and_criteria(ldap_filter):
+    """
+    Retrieves the criteria that must all be satisfied for the given filter
+    to match: the filter itself if it is a criterion, or the criteria which
+    are direct children of an AND filter.
+
+    :param ldap_filter: An LDAPFilter or LDAPCriteria object
+    :return: An iterable of LDAPCriteria objects
+    """
+    if isinstance(ldap_filter, LDAPCriteria):
+        return (ldap_filter,)
+    elif isinstance(ldap_filter, LDAPFilter) and ldap_filter.operator == AND:
+        return [criterion for criterion in ldap_filter.subfilters
+                if isinstance(criterion, LDAPCriteria)]
+
+    # Unhandled filter
+    return ()
+
+
+def get_equality_criteria(ldap_filter):
+    """
+    Retrieves the equality criteria that must all be satisfied for the given
+    filter to match: the filter itself if it is an equality criterion, or the
+    equality criteria which are direct children of an AND filter.
+
+    Criteria with a joker (presence or star comparison) are ignored.
+
+    :param ldap_filter: An LDAPFilter or LDAPCriteria object
+    :return: A list of (property name, filter value) tuples
+    """
+    return [(criterion.name, criterion.value)
+            for criterion in _get_and_criteria(ldap_filter)
+            if criterion.comparator is _comparator_eq]
+
+
+def get_presence_criteria(ldap_filter):
+    """
+    Retrieves the names of the properties whose presence is required for the
+    given filter to match, according to its presence criteria, e.g. (name=*),
+    found at the same level as those of get_equality_criteria().
+
+    :param ldap_filter: An LDAPFilter or LDAPCriteria object
+    :return: A list of property names
+    """
+    return [criterion.name for criterion in _get_and_criteria(ldap_filter)
+            if criterion.comparator is _comparator_presence]
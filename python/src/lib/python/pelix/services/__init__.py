@@ -55,6 +55,14 @@ PROP_EVENT_TOPICS = "event.topics"
 PROP_EVENT_FILTER = "event.filter"
 """ Filter on events properties for an event handler """
 
+PROP_EVENT_BATCH = "event.batch"
+"""
+If True, the event handler is notified through its handle_events() method,
+with a list of (topic, properties) tuples, instead of handle_event().
+In the ordered delivery mode, this list contains all the events posted since
+the previous notification of the handler.
+"""
+
 EVENT_PROP_FRAMEWORK_UID = "event.sender.framework.uid"
 """ UID of the framework that emitted the event """
 
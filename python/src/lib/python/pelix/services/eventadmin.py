@@ -46,21 +46,289 @@ import pelix.services
 import pelix.threadpool
 
 # Standard library
+import collections
 import copy
 import fnmatch
 import logging
+import threading
 import time
 
 # ------------------------------------------------------------------------------
 
 _logger = logging.getLogger(__name__)
 
+TOPIC_SEPARATOR = '/'
+""" Separator of the levels of a topic """
+
+QUEUE_FULL_BLOCK = "block"
+"""
+Ordered delivery: post() waits for the handlers queues to have room, during
+QUEUE_FULL_TIMEOUT seconds at most, then drops the event. A post() called
+from a thread of the EventAdmin pool never waits.
+"""
+
+QUEUE_FULL_DROP = "drop"
+""" Ordered delivery: post() drops the events of a handler with a full queue """
+
+QUEUE_FULL_TIMEOUT = 5
+""" Maximum time (in seconds) post() waits for room in the handlers queues """
+
+# ------------------------------------------------------------------------------
+
+
+class _ImmutableProperties(dict):
+    """
+    Event properties dictionary shared by all handlers of an event, in the
+    immutable properties mode
+    """
+    def __readonly(self, *args, **kwargs):
+        """
+        Refuses the modification of the properties
+        """
+        raise TypeError("Event properties are read-only")
+
+    __setitem__ = __delitem__ = __readonly
+    clear = pop = popitem = setdefault = update = __readonly
+
+    def __copy__(self):
+        """
+        Shallow copies are modifiable dictionaries
+        """
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        """
+        Deep copies are modifiable dictionaries
+        """
+        return dict((key, copy.deepcopy(value, memo))
+                    for key, value in self.items())
+
+
+class _Handler(object):
+    """
+    Keeps information about an event handler service
+    """
+    # Try to reduce memory footprint (stored instances)
+    __slots__ = ('reference', 'service', 'ldap_filter', 'batch',
+                 'events', 'scheduled', 'active')
+
+    def __init__(self, reference, service):
+        """
+        Sets up members
+
+        :param reference: The handler service reference
+        :param service: The handler service
+        """
+        self.reference = reference
+        self.service = service
+        self.ldap_filter = None
+
+        # Handler accepts lists of events
+        self.batch = False
+
+        # Ordered delivery: (topic, properties, post time) queue
+        self.events = collections.deque()
+
+        # Ordered delivery: a task is draining the queue
+        self.scheduled = False
+
+        # False once the handler service has been released
+        self.active = True
+
+    def matches(self, properties):
+        """
+        Tests if the given properties match the filter of the handler
+
+        :param properties: Event properties
+        :return: True if the properties match the filter
+        """
+        return self.ldap_filter is None \
+            or self.ldap_filter.matches(properties)
+
+
+class _TopicNode(object):
+    """
+    A level in the tree of subscribed topics
+    """
+    # Try to reduce memory footprint (stored instances)
+    __slots__ = ('children', 'exact', 'prefix')
+
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Next level -> _TopicNode
+        self.children = {}
+
+        # Handlers of the topic ending at this level
+        self.exact = set()
+
+        # Handlers of the topics starting with this level ("level/*")
+        self.prefix = set()
+
+    def is_empty(self):
+        """
+        Tests if this node can be removed from the tree
+        """
+        return not (self.children or self.exact or self.prefix)
+
+
+class _SubscriptionIndex(object):
+    """
+    Index of the topics subscribed by event handlers.
+
+    Exact topics and "prefix/*" patterns are stored in a tree of topic
+    levels; other patterns are tested with fnmatch.
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Root of the topics tree
+        self.__root = _TopicNode()
+
+        # Handlers without topics filter
+        self.__all = set()
+
+        # Pattern -> Handlers, for patterns which can't be stored in the tree
+        self.__patterns = {}
+
+        # Handler -> topics
+        self.__handlers_topics = {}
+
+    def add(self, handler, topics):
+        """
+        Indexes the topics of a handler
+
+        :param handler: A handler bean
+        :param topics: The topics patterns of the handler (can be empty)
+        """
+        self.__handlers_topics[handler] = topics
+        if not topics:
+            self.__all.add(handler)
+            return
+
+        for topic in topics:
+            node, prefix = self.__find_node(topic, True)
+            if node is None:
+                self.__patterns.setdefault(topic, set()).add(handler)
+            elif prefix:
+                node.prefix.add(handler)
+            else:
+                node.exact.add(handler)
+
+    def remove(self, handler):
+        """
+        Removes a handler from the index
+
+        :param handler: A handler bean
+        """
+        try:
+            topics = self.__handlers_topics.pop(handler)
+        except KeyError:
+            # Unknown handler
+            return
+
+        if not topics:
+            self.__all.discard(handler)
+            return
+
+        for topic in topics:
+            node, prefix = self.__find_node(topic, False)
+            if node is None:
+                handlers = self.__patterns.get(topic)
+                if handlers is not None:
+                    handlers.discard(handler)
+                    if not handlers:
+                        del self.__patterns[topic]
+
+            elif prefix:
+                node.prefix.discard(handler)
+            else:
+                node.exact.discard(handler)
+
+        self.__prune(self.__root)
+
+    def get_handlers(self, topic):
+        """
+        Retrieves the handlers which subscribed to the given topic
+
+        :param topic: An event topic
+        :return: A set of handler beans
+        """
+        handlers = set(self.__all)
+
+        node = self.__root
+        for level in topic.split(TOPIC_SEPARATOR):
+            # The remaining levels match the "prefix/*" patterns
+            handlers.update(node.prefix)
+            node = node.children.get(level)
+            if node is None:
+                break
+        else:
+            handlers.update(node.exact)
+
+        for pattern, pattern_handlers in self.__patterns.items():
+            if fnmatch.fnmatch(topic, pattern):
+                handlers.update(pattern_handlers)
+
+        return handlers
+
+    def __find_node(self, pattern, create):
+        """
+        Finds the tree node corresponding to the given topic pattern
+
+        :param pattern: A topic pattern
+        :param create: If True, create missing nodes
+        :return: A (node, is prefix) tuple. The node is None if the pattern
+                 can't be stored in the tree, or if it is unknown and
+                 create is False
+        """
+        prefix = pattern == '*' or (pattern.endswith(TOPIC_SEPARATOR + '*')
+                                    and len(pattern) > 2)
+        if prefix:
+            # "level/*" matches "level/..." topics; "/*" only matches topics
+            # starting with a separator and is left to fnmatch
+            pattern = pattern[:-2]
+
+        if any(char in pattern for char in '*?['):
+            # Complex pattern
+            return None, False
+
+        node = self.__root
+        if not prefix or pattern:
+            for level in pattern.split(TOPIC_SEPARATOR):
+                child = node.children.get(level)
+                if child is None:
+                    if not create:
+                        return None, prefix
+
+                    child = node.children[level] = _TopicNode()
+                node = child
+
+        return node, prefix
+
+    def __prune(self, node):
+        """
+        Removes the empty nodes of the tree
+
+        :param node: The root of the sub-tree to clean up
+        """
+        for level, child in list(node.children.items()):
+            self.__prune(child)
+            if child.is_empty():
+                del node.children[level]
+
 # ------------------------------------------------------------------------------
 
 
 @ComponentFactory(pelix.services.FACTORY_EVENT_ADMIN)
 @Provides(pelix.services.SERVICE_EVENT_ADMIN)
 @Property("_nb_threads", "pool.threads", 10)
+@Property("_immutable_properties", "event.properties.immutable", False)
+@Property("_ordered_delivery", "event.delivery.ordered", False)
+@Property("_queue_size", "event.delivery.queue.size", 0)
+@Property("_queue_full", "event.delivery.queue.full", QUEUE_FULL_BLOCK)
 class EventAdmin(object):
     """
     The EventAdmin implementation
@@ -78,124 +346,367 @@ class EventAdmin(object):
         # Number of threads in the pool
         self._nb_threads = 10
 
+        # If True, all handlers share a read-only copy of the event properties
+        self._immutable_properties = False
+
+        # If True, posted events are queued per handler and delivered in order
+        self._ordered_delivery = False
+
+        # Ordered delivery: maximum size of a handler queue (0 for infinite)
+        self._queue_size = 0
+
+        # Ordered delivery: behaviour when a handler queue is full
+        self._queue_full = QUEUE_FULL_BLOCK
+
         # Thread pool
         self._pool = None
 
-    def _get_handlers_ids(self, topic, properties):
+        # Service ID -> Handler bean
+        self.__handlers = {}
+
+        # Topics subscriptions
+        self.__subscriptions = _SubscriptionIndex()
+
+        # Handlers lock
+        self.__lock = threading.Lock()
+
+        # Ordered delivery: queues condition and statistics
+        self.__queues_condition = threading.Condition()
+        self.__pool_thread = threading.local()
+        self.__max_depth = 0
+        self.__delivered = 0
+        self.__dropped = 0
+        self.__latency_sum = 0
+        self.__latency_max = 0
+
+    def _get_handlers(self, topic, properties):
         """
-        Retrieves the IDs of the listeners that requested to handle this event
+        Retrieves the handlers that requested to handle this event
 
         :param topic: Topic of the event
         :param properties: Associated properties
-        :return: The IDs of the services to call back for this event
+        :return: The handlers beans to call back for this event, sorted like
+                 their service references
         """
-        handlers = []
+        with self.__lock:
+            handlers = self.__subscriptions.get_handlers(topic)
 
-        # Get the handler service references
-        handlers_refs = self._context.get_all_service_references(
-            pelix.services.SERVICE_EVENT_HANDLER, None)
+        return sorted((handler for handler in handlers
+                       if handler.matches(properties)),
+                      key=lambda handler: handler.reference)
 
-        if handlers_refs is None:
-            # No service found
+    def __add_handler(self, reference):
+        """
+        Stores an event handler service
+
+        :param reference: The handler service reference
+        """
+        svc_id = reference.get_property(pelix.constants.SERVICE_ID)
+        with self.__lock:
+            if svc_id in self.__handlers:
+                # Already known handler
+                return
+
+        # Get the service out of the lock: it can call back the framework
+        context = self._context
+        try:
+            service = context.get_service(reference)
+        except pelix.framework.BundleException:
+            # Service disappeared
             return
 
-        for svc_ref in handlers_refs:
-            # Check the LDAP filter
-            ldap_filter = \
-                svc_ref.get_property(pelix.services.PROP_EVENT_FILTER)
-            if self.__match_filter(properties, ldap_filter):
-                # Get the service ID
-                svc_id = svc_ref.get_property(pelix.constants.SERVICE_ID)
-
-                # Filter matches the event, test the topic
-                topics = to_iterable(svc_ref.get_property(
-                    pelix.services.PROP_EVENT_TOPICS), True)
-                if not topics:
-                    # Filter matches, and no topic filter given: notify it
-                    handlers.append(svc_id)
-                else:
-                    for handled_topic in to_iterable(topics, False):
-                        if fnmatch.fnmatch(topic, handled_topic):
-                            # Full match, keep the service ID
-                            handlers.append(svc_id)
-                            break
+        with self.__lock:
+            if svc_id not in self.__handlers:
+                handler = self.__handlers[svc_id] = _Handler(reference,
+                                                             service)
+                self.__index_handler(handler)
+                return
 
-        return handlers
+        # Added by another thread in the meantime
+        context.unget_service(reference)
 
-    def __match_filter(self, properties, ldap_filter):
+    def __index_handler(self, handler):
         """
-        Tests if the given properties match the given filter
+        Updates the filter and topics of a handler, according to its service
+        properties
 
-        :param properties: A set of properties
-        :param ldap_filter: An LDAP filter string, object or None
-        :return: True if the properties match the filter
+        :param handler: A handler bean
         """
-        if not ldap_filter:
-            # No filter
-            return True
+        reference = handler.reference
+        try:
+            handler.ldap_filter = pelix.ldapfilter.get_ldap_filter(
+                reference.get_property(pelix.services.PROP_EVENT_FILTER)
+                or None)
+        except (TypeError, ValueError) as ex:
+            # Don't notify the handler until its filter is fixed
+            _logger.error("Invalid filter for event handler %s: %s",
+                          reference, ex)
+            return
+
+        handler.batch = bool(
+            reference.get_property(pelix.services.PROP_EVENT_BATCH))
 
-        # Normalize the filter
-        ldap_filter = pelix.ldapfilter.get_ldap_filter(ldap_filter)
-        return ldap_filter.matches(properties)
+        topics = to_iterable(
+            reference.get_property(pelix.services.PROP_EVENT_TOPICS), False)
+        self.__subscriptions.add(handler, tuple(topics))
 
-    def __get_service(self, service_id):
+    def __remove_handler(self, reference):
         """
-        Retrieves the reference and the service associated to the given ID,
-        or a (None, None) tuple if no service was found.
+        Forgets an event handler service
 
-        The service must be freed with BundleContext.unget_service() after
-        usage
+        :param reference: The handler service reference
+        """
+        with self.__lock:
+            svc_id = reference.get_property(pelix.constants.SERVICE_ID)
+            try:
+                handler = self.__handlers.pop(svc_id)
+            except KeyError:
+                # Unknown handler
+                return
+
+            self.__subscriptions.remove(handler)
+
+        self.__release_handlers(self._context, [handler])
 
-        :param service_id: A service ID
-        :return: A (reference, service) tuple or (None, None)
+    def __release_handlers(self, context, handlers):
         """
-        try:
-            # Prepare the filter
-            ldap_filter = "({0}={1})".format(pelix.constants.SERVICE_ID,
-                                             service_id)
+        Drops the pending events of the given handlers and releases their
+        services. Must be called without holding the handlers lock.
 
-            # Get the reference
-            ref = self._context.get_service_reference(None, ldap_filter)
-            if ref is None:
-                # Unknown service
-                return None, None
+        :param context: The bundle context
+        :param handlers: Handlers beans removed from the index
+        """
+        with self.__queues_condition:
+            for handler in handlers:
+                handler.active = False
+                handler.events.clear()
 
-            # Get the service
-            return ref, self._context.get_service(ref)
+            # Wake up the senders waiting for room in those queues
+            self.__queues_condition.notify_all()
 
-        except pelix.framework.BundleException:
-            # Service disappeared
-            return None
+        for handler in handlers:
+            context.unget_service(handler.reference)
+
+    def service_changed(self, event):
+        """
+        Called by Pelix when an event handler service event occurs
+
+        :param event: A ServiceEvent object
+        """
+        kind = event.get_kind()
+        reference = event.get_service_reference()
+
+        if kind == pelix.framework.ServiceEvent.REGISTERED:
+            self.__add_handler(reference)
+
+        elif kind == pelix.framework.ServiceEvent.MODIFIED:
+            with self.__lock:
+                svc_id = reference.get_property(pelix.constants.SERVICE_ID)
+                try:
+                    handler = self.__handlers[svc_id]
+                except KeyError:
+                    # Unknown handler
+                    return
+
+                # Re-index the handler
+                self.__subscriptions.remove(handler)
+                self.__index_handler(handler)
+
+        elif kind == pelix.framework.ServiceEvent.UNREGISTERING:
+            self.__remove_handler(reference)
 
-    def __notify_handlers(self, topic, properties, handlers_ids):
+    def __deliver(self, handler, events):
+        """
+        Notifies a handler of events
+
+        :param handler: The handler bean
+        :param events: A list of (topic, properties) tuples
+        """
+        if not handler.active:
+            # Service released since the events were posted
+            return
+
+        if not self._immutable_properties:
+            # Use a copy of the properties each time
+            events = [(topic, copy.deepcopy(properties))
+                      for topic, properties in events]
+
+        try:
+            if handler.batch:
+                handler.service.handle_events(events)
+            else:
+                for topic, properties in events:
+                    if not handler.active:
+                        # Service released during the delivery
+                        break
+
+                    handler.service.handle_event(topic, properties)
+
+        except Exception as ex:
+            _logger.exception("Error notifying event handler %d: %s (%s)",
+                              handler.reference.get_property(
+                                  pelix.constants.SERVICE_ID),
+                              ex, type(ex).__name__)
+
+    def __prepare_properties(self, properties):
+        """
+        Makes the properties given to handlers in the immutable properties
+        mode
+
+        :param properties: Event properties
+        :return: The properties to give to the handlers
+        """
+        if self._immutable_properties:
+            # All handlers share the same copy of the properties
+            return _ImmutableProperties(copy.deepcopy(properties))
+
+        return properties
+
+    def __notify_handlers(self, topic, properties, handlers):
         """
         Notifies the handlers of an event
 
         :param topic: Topic of the event
         :param properties: Associated properties
-        :param handlers_ids: IDs of the services to notify
+        :param handlers: Handlers beans to notify
         """
         if self._context is None:
             # No more context
             return
 
-        for handler_id in handlers_ids:
-            # Define the "ref" variable name (and reset it on each loop)
-            ref = None
-            try:
-                # Get the service
-                ref, handler = self.__get_service(handler_id)
-                if handler is not None:
-                    # Use a copy of the properties each time
-                    handler.handle_event(topic, copy.deepcopy(properties))
+        events = [(topic, self.__prepare_properties(properties))]
+        for handler in handlers:
+            self.__deliver(handler, events)
 
-            except Exception as ex:
-                _logger.exception("Error notifying event handler %d: %s (%s)",
-                                  handler_id, ex, type(ex).__name__)
+    def __notify_posted(self, topic, properties, handlers):
+        """
+        Notifies the handlers of a posted event, from a thread of the pool
 
-            finally:
-                if ref is not None:
-                    self._context.unget_service(ref)
+        :param topic: Topic of the event
+        :param properties: Associated properties
+        :param handlers: Handlers beans to notify
+        """
+        self.__pool_thread.flag = True
+        self.__notify_handlers(topic, properties, handlers)
+
+    def __enqueue_events(self, topic, properties, handlers):
+        """
+        Ordered delivery: adds an event to the queues of the given handlers
+        and schedules the tasks to drain them
+
+        :param topic: Topic of the event
+        :param properties: Associated properties
+        :param handlers: Handlers beans to notify
+        """
+        event = (topic, self.__prepare_properties(properties), time.time())
+        to_schedule = []
+
+        # A single deadline for all handlers. A pool thread mustn't wait: it
+        # could be the one which has to drain the full queue
+        block = self._queue_full == QUEUE_FULL_BLOCK \
+            and not getattr(self.__pool_thread, 'flag', False)
+        deadline = event[2] + QUEUE_FULL_TIMEOUT
+
+        with self.__queues_condition:
+            for handler in handlers:
+                queue = handler.events
+                if self._queue_size and len(queue) >= self._queue_size:
+                    if block:
+                        # Wait for room in the queue
+                        while len(queue) >= self._queue_size \
+                                and handler.active \
+                                and self._context is not None:
+                            remaining = deadline - time.time()
+                            if remaining <= 0:
+                                break
+                            self.__queues_condition.wait(remaining)
+
+                    if not handler.active:
+                        # Handler gone while waiting
+                        continue
+
+                    if len(queue) >= self._queue_size:
+                        # Queue is still full: drop the event
+                        self.__dropped += 1
+                        _logger.warning("Event queue of handler %d is full: "
+                                        "dropping event on %s",
+                                        handler.reference.get_property(
+                                            pelix.constants.SERVICE_ID),
+                                        topic)
+                        continue
+
+                queue.append(event)
+                self.__max_depth = max(self.__max_depth, len(queue))
+
+                if not handler.scheduled:
+                    handler.scheduled = True
+                    to_schedule.append(handler)
+
+        for handler in to_schedule:
+            self._pool.enqueue(self.__drain_queue, handler)
+
+    def __drain_queue(self, handler):
+        """
+        Ordered delivery: notifies a handler of the events in its queue, until
+        it is empty. Only one task drains a given queue at a time.
+
+        :param handler: The handler bean
+        """
+        self.__pool_thread.flag = True
+        latencies = []
+        while True:
+            with self.__queues_condition:
+                # Update statistics of the previous delivery
+                self.__delivered += len(latencies)
+                if latencies:
+                    self.__latency_sum += sum(latencies)
+                    self.__latency_max = max(self.__latency_max,
+                                             max(latencies))
+
+                if not handler.events or not handler.active \
+                        or self._context is None:
+                    # Nothing more to deliver
+                    handler.scheduled = False
+                    return
+
+                # Take all pending events and notify waiting senders
+                events = list(handler.events)
+                handler.events.clear()
+                self.__queues_condition.notify_all()
+
+            now = time.time()
+            latencies = [now - event[2] for event in events]
+            self.__deliver(handler, [(topic, properties)
+                                     for topic, properties, _ in events])
+
+    def get_delivery_stats(self):
+        """
+        Returns the statistics of the ordered delivery mode, with the
+        following entries:
+
+        * queues: Service ID -> current size of the handler queue
+        * max_depth: largest size reached by a handler queue
+        * delivered: number of delivered events
+        * dropped: number of events dropped due to full queues
+        * latency_avg: average time between post() and delivery (seconds)
+        * latency_max: maximum time between post() and delivery (seconds)
+
+        :return: A dictionary
+        """
+        with self.__lock:
+            handlers = list(self.__handlers.items())
+
+        with self.__queues_condition:
+            delivered = self.__delivered
+            return {
+                'queues': dict((svc_id, len(handler.events))
+                               for svc_id, handler in handlers),
+                'max_depth': self.__max_depth,
+                'delivered': delivered,
+                'dropped': self.__dropped,
+                'latency_avg': self.__latency_sum / delivered
+                if delivered else 0,
+                'latency_max': self.__latency_max}
 
     def __setup_properties(self, properties):
         """
@@ -235,10 +746,10 @@ class EventAdmin(object):
         properties = self.__setup_properties(properties)
 
         # Get the currently available handlers
-        handlers_ids = self._get_handlers_ids(topic, properties)
-        if handlers_ids:
+        handlers = self._get_handlers(topic, properties)
+        if handlers:
             # Notify them
-            self.__notify_handlers(topic, properties, handlers_ids)
+            self.__notify_handlers(topic, properties, handlers)
 
     def post(self, topic, properties=None):
         """
@@ -251,11 +762,17 @@ class EventAdmin(object):
         properties = self.__setup_properties(properties)
 
         # Get the currently available handlers
-        handlers_ids = self._get_handlers_ids(topic, properties)
-        if handlers_ids:
+        handlers = self._get_handlers(topic, properties)
+        if not handlers:
+            return
+
+        if self._ordered_delivery:
+            # Enqueue the event in the handlers queues
+            self.__enqueue_events(topic, properties, handlers)
+        else:
             # Enqueue the task in the thread pool
-            self._pool.enqueue(self.__notify_handlers, topic, properties,
-                               handlers_ids)
+            self._pool.enqueue(self.__notify_posted, topic, properties,
+                               handlers)
 
     @Validate
     def validate(self, context):
@@ -279,16 +796,48 @@ class EventAdmin(object):
             # Default value
             self._nb_threads = 10
 
+        self._immutable_properties = bool(self._immutable_properties)
+        self._ordered_delivery = bool(self._ordered_delivery)
+
+        try:
+            self._queue_size = max(0, int(self._queue_size))
+        except (TypeError, ValueError):
+            # Default value
+            self._queue_size = 0
+
+        if self._queue_full not in (QUEUE_FULL_BLOCK, QUEUE_FULL_DROP):
+            _logger.warning("Unknown full queue behaviour: %s",
+                            self._queue_full)
+            self._queue_full = QUEUE_FULL_BLOCK
+
         # Create the thread pool
         self._pool = pelix.threadpool.ThreadPool(self._nb_threads,
                                                  logname="eventadmin-pool")
         self._pool.start()
 
+        # Index the event handlers
+        context.add_service_listener(
+            self, specification=pelix.services.SERVICE_EVENT_HANDLER)
+        for reference in context.get_all_service_references(
+                pelix.services.SERVICE_EVENT_HANDLER) or ():
+            self.__add_handler(reference)
+
     @Invalidate
     def invalidate(self, context):
         """
         Component invalidated
         """
+        # Forget the event handlers
+        context.remove_service_listener(self)
+        with self.__lock:
+            handlers = list(self.__handlers.values())
+            for handler in handlers:
+                self.__subscriptions.remove(handler)
+
+            self.__handlers.clear()
+
+        self.__release_handlers(context, handlers)
+
         # Stop the thread pool (empties its queue)
         self._pool.stop()
         self._pool = None
@@ -296,3 +845,7 @@ class EventAdmin(object):
         # Forget the bundle context
         self._context = None
         self._fw_uid = None
+
+        with self.__queues_condition:
+            # Wake up the senders waiting for room in queues
+            self.__queues_condition.notify_all()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: resolution of a synthetic repository of Java bundles, with the
+version indexes and the resolutions cache of the OSGi bundle repository
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_bundles.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import time
+
+# Tests
+from tests.repositories.test_bundles import REQUIREMENTS, _make_repository, \
+    _random_bundles
+
+# ------------------------------------------------------------------------------
+
+BUNDLES = 1000
+""" Number of bundles in the repository """
+
+REQUESTED = 20
+""" Number of bundles to resolve """
+
+RESOLUTIONS = 10
+""" Number of resolutions of each kind """
+
+LOOKUPS = 20000
+""" Number of package lookups """
+
+# ------------------------------------------------------------------------------
+
+
+def bench_lookups(repository, rand):
+    """
+    Looks for packages with the index, then by scanning a copy of the
+    packages registry
+
+    :return: A (indexed time, scan time) tuple
+    """
+    packages = ["pkg{0}".format(rand.randrange(BUNDLES))
+                for _ in range(LOOKUPS)]
+    requirements = [rand.choice(REQUIREMENTS) for _ in range(LOOKUPS)]
+    registry = dict(repository._packages)
+
+    start = time.time()
+    for package, requirement in zip(packages, requirements):
+        repository.get_package(package, requirement)
+    indexed = time.time() - start
+
+    start = time.time()
+    for package, requirement in zip(packages, requirements):
+        repository.get_package(package, requirement,
+                               package_registry=registry)
+    return indexed, time.time() - start
+
+
+def bench_resolutions(repository, rand):
+    """
+    Resolves random sets of bundles, without then with the cache
+
+    :return: A (cold time, cached time, average closure size) tuple
+    """
+    names = sorted(repository._bundles)
+    requests = [rand.sample(names, REQUESTED) for _ in range(RESOLUTIONS)]
+    system_packages = ["pkg{0}".format(idx) for idx in range(0, BUNDLES, 7)]
+
+    sizes = []
+    repository._resolutions.clear()
+    start = time.time()
+    for requested in requests:
+        sizes.append(len(repository.resolve_installation(
+            requested, None, system_packages)[0]))
+    cold = time.time() - start
+
+    start = time.time()
+    for requested in requests:
+        repository.resolve_installation(requested, None, system_packages)
+    return cold, time.time() - start, sum(sizes) // len(sizes)
+
+
+def main():
+    """
+    Entry point
+    """
+    rand = random.Random(5)
+    start = time.time()
+    repository = _make_repository(_random_bundles(rand, BUNDLES))
+    print("Repository of {0} bundles loaded in {1:.3f}s"
+          .format(BUNDLES, time.time() - start))
+
+    indexed, scan = bench_lookups(repository, rand)
+    print("{0} package lookups: {1:.3f}s indexed, {2:.3f}s scanning"
+          .format(LOOKUPS, indexed, scan))
+
+    cold, cached, size = bench_resolutions(repository, rand)
+    print("Resolution of {0} bundles (closure of ~{1} bundles): "
+          "{2:.1f}ms cold, {3:.2f}ms cached"
+          .format(REQUESTED, size, cold * 1000 / RESOLUTIONS,
+                  cached * 1000 / RESOLUTIONS))
+
+
+if __name__ == "__main__":
+    main()
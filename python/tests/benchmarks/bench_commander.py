@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: time spent by the node composer waiting for the isolates it
+started, before computing a new distribution (it used to sleep 5 seconds).
+
+The node composer itself requires Herald: the wait is measured on the node
+commander, which implements it.
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_commander.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import threading
+import time
+
+# Tests
+from tests.composer.test_commander import bind_composer, make_commander
+
+# ------------------------------------------------------------------------------
+
+START_TIMEOUT = 5
+""" Start timeout of the node composer (seconds) """
+
+SCENARIOS = ((0, 0), (1, .3), (10, .5), (50, 1.))
+""" (Number of starting isolates, maximum start time) """
+
+ROUNDS = 20
+""" Number of waits per scenario """
+
+# ------------------------------------------------------------------------------
+
+
+def bench(isolates, max_delay):
+    """
+    Waits for isolates binding their composer after a random delay
+
+    :param isolates: Number of starting isolates
+    :param max_delay: Maximum start time of an isolate (seconds)
+    :return: A (average wait, average slowest start) tuple (seconds)
+    """
+    rand = random.Random(isolates)
+    waited = slowest = 0.
+    commander = make_commander()
+    try:
+        for round_idx in range(ROUNDS):
+            delays = [rand.uniform(0, max_delay) for _ in range(isolates)]
+            timers = []
+            for idx, delay in enumerate(delays):
+                name = "iso-{0}-{1}".format(round_idx, idx)
+                commander.isolate_starting(name)
+                timers.append(threading.Timer(
+                    delay, bind_composer, (commander, name)))
+
+            start = time.time()
+            for timer in timers:
+                timer.start()
+            commander.wait_starting_isolates(START_TIMEOUT)
+            waited += time.time() - start
+            slowest += max(delays or [0])
+
+            for timer in timers:
+                timer.join()
+    finally:
+        commander.invalidate(None)
+
+    return waited / ROUNDS, slowest / ROUNDS
+
+
+def main():
+    """
+    Entry point
+    """
+    print("Previous implementation: {0:.3f}s per instantiation"
+          .format(START_TIMEOUT))
+    print("{0:>9} {1:>18} {2:>12}".format(
+        "starting", "slowest start (s)", "waited (s)"))
+    for isolates, max_delay in SCENARIOS:
+        waited, slowest = bench(isolates, max_delay)
+        print("{0:>9} {1:>18.4f} {2:>12.4f}".format(
+            isolates, slowest, waited))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: reliability statistics of the candidate isolates while placing
+components one by one, computed from scratch for each vote compared to the
+incremental statistics of the crash criterion.
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_crashing.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import time
+
+# Composer
+from cohorte.composer.beans import RawComponent
+from cohorte.composer.node.beans import EligibleIsolate
+from cohorte.composer.node.criteria.reliability.crashing import CrashCriterion
+
+# ------------------------------------------------------------------------------
+
+SIZES = (1000, 2000, 5000)
+""" Number of components already placed """
+
+ISOLATES = 20
+""" Number of candidate isolates """
+
+PLACED = 500
+""" Number of components placed during the measure """
+
+# ------------------------------------------------------------------------------
+
+
+def bench(size, incremental):
+    """
+    Places PLACED components after the given number of components
+
+    :param size: Number of components already placed
+    :param incremental: Use the incremental statistics
+    :return: The time spent computing the statistics (seconds)
+    """
+    rand = random.Random(size)
+    criterion = CrashCriterion()
+    components = [RawComponent("factory", "comp{0}".format(idx))
+                  for idx in range(size + PLACED)]
+    for component in components:
+        criterion._ratings[component.name] = rand.randint(20, 100)
+
+    isolates = [EligibleIsolate("iso{0}".format(idx), "python")
+                for idx in range(ISOLATES)]
+    for idx, component in enumerate(components[:size]):
+        isolates[idx % ISOLATES].add_component(component)
+
+    duration = 0.
+    for component in components[size:]:
+        start = time.time()
+        for isolate in isolates:
+            if incremental:
+                criterion.get_stats(isolate)
+            else:
+                criterion.compute_stats(isolate.components)
+        duration += time.time() - start
+
+        # Place the component as the distributor does, and change a rating
+        for isolate in isolates:
+            isolate.hide([component])
+        rand.choice(isolates).add_component(component)
+        criterion._update_rating(rand.choice(components).name, -5)
+
+    return duration
+
+
+def main():
+    """
+    Entry point
+    """
+    print("{0:>10} {1:>16} {2:>16}".format("components", "from scratch (s)",
+                                           "incremental (s)"))
+    for size in SIZES:
+        print("{0:>10} {1:>16.3f} {2:>16.3f}".format(
+            size, bench(size, False), bench(size, True)))
+
+
+if __name__ == "__main__":
+    main()
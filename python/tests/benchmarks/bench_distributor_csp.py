@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: constraint-based distribution of 100, 1000 and 5000 components,
+then incremental redistribution after new incompatibilities and components.
+OR-Tools is used if it is installed, else the greedy solver.
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_distributor_csp.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import time
+
+# Composer
+from cohorte.composer.beans import Isolate
+from cohorte.composer.node.beans import WrappedEligibleIsolate
+import cohorte.composer.node.distributor_csp as distributor_csp
+
+# Tests
+from tests.composer.test_distributor_csp import _Criterion, _make_component, \
+    _random_pairs
+
+# ------------------------------------------------------------------------------
+
+SIZES = (100, 1000, 5000)
+""" Number of components """
+
+CONFLICTS = (.5, 3)
+""" Number of incompatible pairs, per component """
+
+# ------------------------------------------------------------------------------
+
+
+def bench(size, conflicts):
+    """
+    Distributes the given number of components, then redistributes them
+
+    :return: A (initial time, number of isolates, incremental time, number
+             of components moved) tuple
+    """
+    rand = random.Random(size)
+    components = [_make_component("c{0:05d}".format(idx))
+                  for idx in range(size)]
+    names = [component.name for component in components]
+    pairs = _random_pairs(rand, names, int(size * conflicts))
+
+    distributor = distributor_csp.IsolateDistributor()
+    distributor._distance_criteria = [_Criterion(pairs)]
+
+    start = time.time()
+    _, new = distributor.distribute(components, [])
+    initial = time.time() - start
+
+    # Existing isolates, 10 new components and 10 new incompatibilities
+    existing = [WrappedEligibleIsolate(Isolate(
+        "iso{0}".format(idx), isolate.language, isolate.components))
+        for idx, isolate in enumerate(new)]
+    components.extend(_make_component("n{0:03d}".format(idx))
+                      for idx in range(10))
+    nb_pairs = len(pairs) + 10
+    while len(pairs) < nb_pairs:
+        pairs.add(tuple(sorted(rand.sample(names, 2))))
+
+    start = time.time()
+    updated, added = distributor.distribute(components, existing)
+    incremental = time.time() - start
+
+    moved = sum(len(isolate.new_components) for isolate in updated) \
+        + sum(len(isolate.components) for isolate in added)
+    return initial, len(new), incremental, moved
+
+
+def main():
+    """
+    Entry point
+    """
+    print("Solver: {0}".format("OR-Tools" if distributor_csp.ortools
+                               else "greedy"))
+    print("{0:>10} {1:>9} {2:>12} {3:>9} {4:>16} {5:>6}".format(
+        "components", "conflicts", "initial (s)", "isolates",
+        "incremental (s)", "moved"))
+    for size in SIZES:
+        for conflicts in CONFLICTS:
+            initial, isolates, incremental, moved = bench(size, conflicts)
+            print("{0:>10} {1:>9} {2:>12.3f} {3:>9} {4:>16.3f} {5:>6}".format(
+                size, int(size * conflicts), initial, isolates, incremental,
+                moved))
+
+
+if __name__ == "__main__":
+    main()
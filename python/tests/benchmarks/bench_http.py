@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: requests per second and number of threads of the HTTP services,
+with a thread per connection, with a thread pool, with keep-alive
+connections and with the asyncio implementation (Python 3.5+).
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_http.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import sys
+import threading
+import time
+
+try:
+    # Python 3
+    import http.client as httplib
+except ImportError:
+    # Python 2
+    import httplib
+
+# Pelix
+import pelix.framework
+import pelix.http as http
+import pelix.ipopo.constants
+from pelix.http.basic import HTTP_SERVICE_KEEP_ALIVE, \
+    HTTP_SERVICE_POOL_SIZE
+
+# ------------------------------------------------------------------------------
+
+CLIENTS = 16
+""" Number of concurrent clients """
+
+REQUESTS = 200
+""" Number of requests per client """
+
+MODES = [
+    ("thread per connection", http.FACTORY_HTTP_BASIC, {}),
+    ("pool of 8 threads", http.FACTORY_HTTP_BASIC,
+     {HTTP_SERVICE_POOL_SIZE: 8}),
+    ("pool + keep-alive", http.FACTORY_HTTP_BASIC,
+     {HTTP_SERVICE_POOL_SIZE: 8, HTTP_SERVICE_KEEP_ALIVE: True}),
+]
+
+if sys.version_info >= (3, 5):
+    MODES.extend((
+        ("asyncio", http.FACTORY_HTTP_ASYNCIO, {}),
+        ("asyncio + keep-alive", http.FACTORY_HTTP_ASYNCIO,
+         {HTTP_SERVICE_KEEP_ALIVE: True}),
+    ))
+
+# ------------------------------------------------------------------------------
+
+
+class _Servlet(object):
+    """
+    Minimal servlet
+    """
+    @staticmethod
+    def do_GET(_, response):
+        response.send_content(200, "ok", "text/plain")
+
+
+def _client(port, keep_alive):
+    """
+    Sends REQUESTS requests to the server
+    """
+    connection = None
+    for _ in range(REQUESTS):
+        if connection is None:
+            connection = httplib.HTTPConnection("localhost", port)
+
+        connection.request("GET", "/bench")
+        response = connection.getresponse()
+        response.read()
+
+        if not keep_alive or response.getheader("connection") == "close":
+            connection.close()
+            connection = None
+
+    if connection is not None:
+        connection.close()
+
+
+def bench(factory, properties):
+    """
+    Measures the given HTTP service
+
+    :return: A (requests per second, maximum number of server threads
+             sampled during the run) tuple
+    """
+    # Threads of the server: without the current, clients and sampler ones
+    base_threads = threading.active_count() + CLIENTS + 1
+
+    framework = pelix.framework.create_framework(
+        ("pelix.ipopo.core", "pelix.http.basic", "pelix.http.aio")
+        if factory == http.FACTORY_HTTP_ASYNCIO
+        else ("pelix.ipopo.core", "pelix.http.basic"))
+    framework.start()
+    context = framework.get_bundle_context()
+    try:
+        properties = dict(properties)
+        properties[http.HTTP_SERVICE_PORT] = 0
+        with pelix.ipopo.constants.use_ipopo(context) as ipopo:
+            ipopo.instantiate(factory, "http-bench", properties)
+
+        svc_ref = context.get_service_reference(http.HTTP_SERVICE)
+        service = context.get_service(svc_ref)
+        service.register_servlet("/bench", _Servlet())
+        port = service.get_access()[1]
+
+        max_threads = [0]
+        running = [True]
+
+        def sample():
+            while running[0]:
+                max_threads[0] = max(max_threads[0],
+                                     threading.active_count() - base_threads)
+                time.sleep(.005)
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+
+        clients = [threading.Thread(
+            target=_client,
+            args=(port, properties.get(HTTP_SERVICE_KEEP_ALIVE, False)))
+            for _ in range(CLIENTS)]
+
+        start = time.time()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        duration = time.time() - start
+
+        running[0] = False
+        sampler.join()
+        return CLIENTS * REQUESTS / duration, max_threads[0]
+    finally:
+        pelix.framework.FrameworkFactory.delete_framework(framework)
+
+
+def main():
+    """
+    Entry point
+    """
+    print("{0:>22} {1:>10} {2:>15}".format("mode", "req/s",
+                                           "server threads"))
+    for name, factory, properties in MODES:
+        rate, threads = bench(factory, properties)
+        print("{0:>22} {1:>10.0f} {2:>15d}".format(name, rate, threads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: instantiation and kill of 500 components, one by one and with the
+bulk methods of iPOPO
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_ipopo.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import time
+
+# Pelix
+import pelix.framework
+from pelix.ipopo.constants import get_ipopo_svc_ref
+
+# Tests
+from tests.pelix.test_ipopo_bulk import make_components
+
+# ------------------------------------------------------------------------------
+
+COMPONENTS = 250
+""" Number of consumers and of providers """
+
+ROUNDS = 3
+""" Number of rounds per method (the best one is kept) """
+
+# ------------------------------------------------------------------------------
+
+
+def one_by_one(ipopo, components):
+    """
+    Instantiates then kills the components one by one
+
+    :return: A (instantiation time, kill time) tuple
+    """
+    start = time.time()
+    for factory, name, properties in components:
+        ipopo.instantiate(factory, name, properties)
+    instantiated = time.time()
+
+    for _, name, _ in reversed(components):
+        ipopo.kill(name)
+    return instantiated - start, time.time() - instantiated
+
+
+def bulk(ipopo, components):
+    """
+    Instantiates then kills the components with the bulk methods
+
+    :return: A (instantiation time, kill time) tuple
+    """
+    start = time.time()
+    ipopo.instantiate_many(components)
+    instantiated = time.time()
+
+    ipopo.kill_many([name for _, name, _ in components])
+    return instantiated - start, time.time() - instantiated
+
+
+def main():
+    """
+    Entry point
+    """
+    framework = pelix.framework.create_framework(('pelix.ipopo.core',))
+    framework.start()
+    try:
+        context = framework.get_bundle_context()
+        context.install_bundle('tests.pelix.ipopo_bundle').start()
+        ipopo = get_ipopo_svc_ref(context)[1]
+        components = make_components(COMPONENTS)
+
+        print("{0} components (consumers declared before providers)"
+              .format(len(components)))
+        print("{0:>12} {1:>16} {2:>10}".format(
+            "method", "instantiate (s)", "kill (s)"))
+        for method in (one_by_one, bulk):
+            results = [method(ipopo, components) for _ in range(ROUNDS)]
+            print("{0:>12} {1:>16.3f} {2:>10.3f}".format(
+                method.__name__, min(result[0] for result in results),
+                min(result[1] for result in results)))
+    finally:
+        pelix.framework.FrameworkFactory.delete_framework(framework)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: LDAP filters parsing with and without the cache, and matching
+with the interpretation of the filter tree compared to compiled filters,
+over service-like properties.
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_ldapfilter.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import timeit
+
+# Pelix
+import pelix.ldapfilter as ldapfilter
+
+# Tests
+from tests.pelix.test_ldapfilter import interpret
+
+# ------------------------------------------------------------------------------
+
+FILTERS = [
+    "(objectClass=cohorte.composer.node.criteria)",
+    "(&(objectClass=pelix.remote.*)(service.ranking>=0))",
+    "(&(endpoint.framework.uuid=ab12-cd34)(!(service.exported.configs=*)))",
+    "(|(event.topics=cohorte/*)(event.topics=pelix/framework/*))",
+    "(&(service.id<=1000)(name~=composer*)(|(isolate=node)(isolate=top)))",
+]
+
+PROPERTIES = [
+    {"objectClass": ["cohorte.composer.node.criteria"], "service.id": 12,
+     "service.ranking": 0, "name": "Composer-Node"},
+    {"objectClass": ["pelix.remote.dispatcher"], "service.id": 1500,
+     "service.ranking": 10, "endpoint.framework.uuid": "ab12-cd34"},
+    {"objectClass": ["pelix.services.eventadmin.handler"], "service.id": 42,
+     "event.topics": ["cohorte/monitor/*", "pelix/framework/stop"],
+     "isolate": "top", "name": "COMPOSER-TOP"},
+]
+
+NUMBER = 2000
+""" Number of runs of each measure """
+
+# ------------------------------------------------------------------------------
+
+
+def main():
+    """
+    Entry point
+    """
+    parsed = [ldapfilter.get_ldap_filter(ldap_string)
+              for ldap_string in FILTERS]
+    pairs = [(ldap_filter, properties) for ldap_filter in parsed
+             for properties in PROPERTIES]
+
+    results = (
+        ("parse", lambda: [ldapfilter._parse_ldap(ldap_string)
+                           for ldap_string in FILTERS]),
+        ("cached parse", lambda: [ldapfilter.get_ldap_filter(ldap_string)
+                                  for ldap_string in FILTERS]),
+        ("interpreted match", lambda: [interpret(ldap_filter, properties)
+                                       for ldap_filter, properties in pairs]),
+        ("compiled match", lambda: [ldap_filter.matches(properties)
+                                    for ldap_filter, properties in pairs]),
+    )
+
+    print("{0:>18} {1:>12}".format("", "us/filter"))
+    for name, method in results:
+        duration = timeit.timeit(method, number=NUMBER)
+        count = len(pairs) if "match" in name else len(FILTERS)
+        print("{0:>18} {1:>12.2f}".format(
+            name, duration / NUMBER / count * 1e6))
+
+
+if __name__ == "__main__":
+    main()
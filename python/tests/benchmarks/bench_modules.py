@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: loading of a Python modules repository without cache, with a cold
+cache and with a warm cache, and cost of the pool of parsing processes
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_modules.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import os
+import shutil
+import tempfile
+import time
+
+# Repositories
+import cohorte.repositories.parallel as parallel
+from cohorte.repositories.python.modules import PythonModuleRepository, \
+    _scan_module
+
+# Tests
+from tests.repositories.test_modules import write_package
+
+# ------------------------------------------------------------------------------
+
+SIZES = (200, 1000, 5000)
+""" Number of modules in the repository """
+
+WORKERS = (1, 0)
+""" Number of parsing processes (0: one per CPU) """
+
+POOL_WORKERS = 2
+""" Number of processes of the pool measured by measure_pool() """
+
+# ------------------------------------------------------------------------------
+
+
+def load(root, data_dir, workers):
+    """
+    Loads the repository
+
+    :return: The loading time (seconds)
+    """
+    start = time.time()
+    repository = PythonModuleRepository()
+    repository._scan_workers = workers
+    repository.load_cache(data_dir)
+    repository.add_directory(root)
+    repository.save_cache()
+    return time.time() - start
+
+
+def bench(size, workers):
+    """
+    Loads a generated repository of the given size
+
+    :return: A (no cache, cold cache, warm cache) times tuple
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        root = os.path.join(directory, "repo")
+        data_dir = os.path.join(directory, "data")
+        os.makedirs(data_dir)
+        write_package(root, "pkg", size)
+
+        return load(root, None, workers), load(root, data_dir, workers), \
+            load(root, data_dir, workers)
+    finally:
+        shutil.rmtree(directory)
+
+
+def measure_pool(workers):
+    """
+    Measures the start-up time of a pool of processes and the time to parse a
+    module in the current process, on the modules of the cohorte package
+
+    :param workers: Number of processes of the pool
+    :return: A (pool start-up, module parsing) times tuple (seconds)
+    """
+    root = os.path.dirname(os.path.dirname(parallel.__file__))
+    tasks = []
+    for dirpath, _, filenames in os.walk(root):
+        tasks.extend((os.path.join(dirpath, filename), filename[:-3], False)
+                     for filename in filenames if filename.endswith(".py"))
+
+    start = time.time()
+    for task in tasks:
+        _scan_module(task)
+    parse = (time.time() - start) / len(tasks)
+
+    # First pool of the process, parsing a module per process
+    min_items = parallel.MIN_PARALLEL_ITEMS
+    parallel.MIN_PARALLEL_ITEMS = 0
+    try:
+        start = time.time()
+        list(parallel.imap(_scan_module, tasks[:workers], workers))
+        startup = time.time() - start - parse
+    finally:
+        parallel.MIN_PARALLEL_ITEMS = min_items
+
+    return startup, parse
+
+
+def main():
+    """
+    Entry point
+    """
+    startup, parse = measure_pool(POOL_WORKERS)
+    print("pool of {0} processes: {1:.3f}s to start, {2:.2f}ms per module "
+          "in process: pays off from {3:.0f} modules (threshold: {4})".format(
+              POOL_WORKERS, startup, parse * 1000,
+              startup / (parse * (1 - 1. / POOL_WORKERS)),
+              parallel.MIN_PARALLEL_ITEMS))
+
+    print("{0:>8} {1:>8} {2:>13} {3:>13} {4:>13}".format(
+        "modules", "workers", "no cache (s)", "cold (s)", "warm (s)"))
+    for size in SIZES:
+        for workers in WORKERS:
+            print("{0:>8} {1:>8} {2:>13.3f} {3:>13.3f} {4:>13.3f}".format(
+                size, workers or "cpus", *bench(size, workers)))
+
+
+if __name__ == "__main__":
+    main()
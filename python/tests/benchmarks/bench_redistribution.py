@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: redistribution passes of the node composer with the vote-based
+isolate distributor and its criteria, voting again for all components
+(previous behaviour), for none of them, and for those of a lost isolate.
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_redistribution.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Composer
+from cohorte.composer.node.beans import Event
+
+# Tests
+from tests.composer.test_distributor import _make_distributor
+from tests.composer.test_redistribution import make_component, make_composer
+
+# ------------------------------------------------------------------------------
+
+COMPONENTS = 1000
+""" Number of components on the node """
+
+ISOLATES = 5
+""" Number of running isolates """
+
+LOST = 21
+""" Number of components of the lost isolate """
+
+# ------------------------------------------------------------------------------
+
+
+def bench(mode):
+    """
+    Runs a redistribution pass
+
+    :param mode: "full" to vote again for all components, "none" for a pass
+                 without event, "lost" after the loss of an isolate
+    :return: The duration of the pass (seconds)
+    """
+    # The last isolate hosts LOST components, the others share the rest
+    distribution = dict(("iso{0}".format(idx), [])
+                        for idx in range(ISOLATES))
+    for idx in range(COMPONENTS):
+        if idx < LOST:
+            isolate = ISOLATES - 1
+        else:
+            isolate = idx % (ISOLATES - 1)
+        distribution["iso{0}".format(isolate)].append("comp{0}".format(idx))
+
+    distributor, compat = _make_distributor(False)
+    composer = make_composer(distributor, distribution)
+    compat._status = composer._status
+
+    if mode == "full":
+        distributor._dirty.update(component.name for component
+                                  in composer._status.get_components())
+    elif mode == "lost":
+        event = Event("iso{0}".format(ISOLATES - 1), "isolate.lost", False)
+        event.components = [make_component(name) for name
+                            in distribution["iso{0}".format(ISOLATES - 1)]]
+        distributor.handle_event(event)
+
+    try:
+        composer._redistribute()
+        return composer.get_redistribution_stats()[-1]["duration"]
+    finally:
+        composer.invalidate(None)
+
+
+def main():
+    """
+    Entry point
+    """
+    print("{0} components on {1} isolates".format(COMPONENTS, ISOLATES))
+    for mode, label in (("full", "full pass (previous behaviour)"),
+                        ("none", "pass without affected component"),
+                        ("lost", "pass after the loss of a {0}-components "
+                                 "isolate".format(LOST))):
+        print("{0:<48} {1:.4f}s".format(label, bench(mode)))
+
+
+if __name__ == "__main__":
+    main()
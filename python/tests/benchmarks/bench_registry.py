@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Benchmark: service registry lookups by an indexed property, compared to a
+scan of all the references, for growing registry sizes.
+
+Run from the "python" directory::
+
+    PYTHONPATH=src/lib/python:. python tests/benchmarks/bench_registry.py
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import timeit
+
+# Pelix
+import pelix.framework
+import pelix.ldapfilter
+from pelix.constants import REGISTRY_INDEXED_PROPERTIES
+
+# ------------------------------------------------------------------------------
+
+SIZES = (100, 1000, 5000)
+""" Number of registered services """
+
+LOOKUPS = 200
+""" Number of lookups per measure """
+
+# ------------------------------------------------------------------------------
+
+
+def bench(size):
+    """
+    Measures the lookups in a registry of the given size
+
+    :param size: Number of services to register
+    :return: A (indexed, scan) tuple of times per lookup (seconds)
+    """
+    framework = pelix.framework.create_framework(
+        (), {REGISTRY_INDEXED_PROPERTIES: "endpoint.framework.uuid"})
+    framework.start()
+    context = framework.get_bundle_context()
+    try:
+        refs = [context.register_service(
+            "spec.{0}".format(idx % 10), object(),
+            {"endpoint.framework.uuid": "fw{0}".format(idx % 50),
+             "rank": idx}).get_reference()
+            for idx in range(size)]
+
+        svc_id = refs[size // 2].get_property("service.id")
+        ldap_filter = "(service.id={0})".format(svc_id)
+        parsed = pelix.ldapfilter.get_ldap_filter(ldap_filter)
+
+        indexed = timeit.timeit(
+            lambda: context.get_all_service_references(None, ldap_filter),
+            number=LOOKUPS)
+        scan = timeit.timeit(
+            lambda: [ref for ref in refs
+                     if parsed.matches(ref.get_properties())],
+            number=LOOKUPS)
+        return indexed / LOOKUPS, scan / LOOKUPS
+    finally:
+        pelix.framework.FrameworkFactory.delete_framework(framework)
+
+
+def main():
+    """
+    Entry point
+    """
+    print("{0:>8} {1:>14} {2:>14}".format("services", "indexed (us)",
+                                          "scan (us)"))
+    for size in SIZES:
+        indexed, scan = bench(size)
+        print("{0:>8} {1:>14.1f} {2:>14.1f}".format(size, indexed * 1e6,
+                                                    scan * 1e6))
+
+
+if __name__ == "__main__":
+    main()
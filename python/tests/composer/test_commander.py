@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: starting isolates barrier tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import threading
+import time
+import unittest
+
+# Cohorte
+import cohorte
+import cohorte.composer
+from cohorte.composer.node.commander import NodeCommander
+
+# ------------------------------------------------------------------------------
+
+NODE_UID = "node-uid"
+""" UID of the local node """
+
+# ------------------------------------------------------------------------------
+
+
+class _Context(object):
+    """
+    Fake bundle context, giving the node UID
+    """
+    def get_property(self, key):
+        """
+        Returns a framework property
+        """
+        if key == cohorte.PROP_NODE_UID:
+            return NODE_UID
+
+
+class _Status(object):
+    """
+    Fake node status: no component to instantiate
+    """
+    def get_components_for_isolate(self, isolate_name):
+        """
+        Returns the components assigned to an isolate
+        """
+        return []
+
+
+class _Reference(object):
+    """
+    Fake isolate composer service reference
+    """
+    def __init__(self, isolate_name, node_uid=NODE_UID):
+        """
+        Sets up members
+        """
+        self.properties = {cohorte.composer.PROP_ISOLATE_NAME: isolate_name,
+                           cohorte.composer.PROP_NODE_UID: node_uid}
+
+    def get_property(self, key):
+        """
+        Returns a service property
+        """
+        return self.properties.get(key)
+
+
+def make_commander():
+    """
+    Prepares a validated node commander
+    """
+    commander = NodeCommander()
+    commander._status = _Status()
+    commander.validate(_Context())
+    return commander
+
+
+def bind_composer(commander, isolate_name, node_uid=NODE_UID):
+    """
+    Binds a (fake) isolate composer to the commander
+    """
+    commander._bind_composer(None, object(), _Reference(isolate_name,
+                                                        node_uid))
+
+# ------------------------------------------------------------------------------
+
+
+class StartingIsolatesTest(unittest.TestCase):
+    """
+    Tests the wait for the isolates being started
+    """
+    def setUp(self):
+        """
+        Prepares the commander
+        """
+        self.commander = make_commander()
+
+    def tearDown(self):
+        """
+        Stops the commander
+        """
+        self.commander.invalidate(None)
+
+    def _wait(self, timeout):
+        """
+        Waits for the starting isolates
+
+        :return: The late isolates and the time spent waiting
+        """
+        start = time.time()
+        late = self.commander.wait_starting_isolates(timeout)
+        return late, time.time() - start
+
+    def test_nothing_starting(self):
+        """
+        No wait when no isolate is starting
+        """
+        late, duration = self._wait(5)
+        self.assertEqual(late, set())
+        self.assertLess(duration, .1)
+
+        # Isolates already bound aren't waited for
+        bind_composer(self.commander, "iso-a")
+        self.commander.isolate_starting("iso-a")
+        late, duration = self._wait(5)
+        self.assertEqual(late, set())
+        self.assertLess(duration, .1)
+
+    def test_bound_or_lost(self):
+        """
+        Isolates are released when they bind their composer or are lost
+        """
+        self.commander.isolate_starting("iso-a")
+        self.commander.isolate_starting("iso-b")
+        threading.Timer(.2, bind_composer, (self.commander, "iso-a")).start()
+        threading.Timer(.4, self.commander.isolate_lost, ("iso-b",)).start()
+
+        late, duration = self._wait(5)
+        self.assertEqual(late, set())
+        self.assertGreaterEqual(duration, .35)
+        self.assertLess(duration, 2)
+
+    def test_timeout(self):
+        """
+        Isolates which never bind their composer are forgotten after the
+        timeout
+        """
+        self.commander.isolate_starting("iso-a")
+        self.commander.isolate_starting("iso-b")
+
+        # Composer of another node
+        bind_composer(self.commander, "iso-a", "other-node")
+        threading.Timer(.1, bind_composer, (self.commander, "iso-b")).start()
+
+        late, duration = self._wait(.5)
+        self.assertEqual(late, set(["iso-a"]))
+        self.assertGreaterEqual(duration, .45)
+        self.assertLess(duration, 2)
+
+        # Not waited for anymore
+        late, duration = self._wait(.5)
+        self.assertEqual(late, set())
+        self.assertLess(duration, .1)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
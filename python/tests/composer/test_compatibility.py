@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: compatibility ratings tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import unittest
+
+# Composer
+from cohorte.composer.node.criteria.distance.compatibility import \
+    CompatibilityCriterion, DEFAULT_RATING, INCOMPATIBLE_RATING, \
+    RECOVERY_DELAY, RECOVERY_RATE, _PairRatings
+
+# ------------------------------------------------------------------------------
+
+
+class _Status(object):
+    """
+    Node status knowing the isolate of some components
+    """
+    def __init__(self, isolates):
+        """
+        Sets up members
+
+        :param isolates: A component name -> isolate name dictionary
+        """
+        self.isolates = isolates
+
+    def get_isolate_for_component(self, name):
+        """
+        Returns the isolate of a component
+        """
+        return self.isolates[name]
+
+# ------------------------------------------------------------------------------
+
+
+class CompatibilityCrashTest(unittest.TestCase):
+    """
+    Tests the ratings modifications on crashes
+    """
+    def _make_criterion(self, isolates):
+        """
+        Prepares a criterion
+        """
+        criterion = CompatibilityCriterion()
+        criterion._status = _Status(isolates)
+        return criterion
+
+    def test_crash_deltas(self):
+        """
+        A crash costs 1 point, 5 points if the previous one was less than a
+        minute ago, 3 times more for components on the same isolate
+        """
+        criterion = self._make_criterion({"a": "iso1", "b": "iso2"})
+        criterion.on_crash(["a", "b"])
+        self.assertEqual(criterion._ratings.get("a", "b"), DEFAULT_RATING - 1)
+        criterion.on_crash(["a", "b"])
+        self.assertEqual(criterion._ratings.get("a", "b"), DEFAULT_RATING - 6)
+
+        criterion = self._make_criterion({"a": "iso1", "b": "iso1",
+                                          "c": "iso1"})
+        criterion.on_crash(["a", "b", "c"])
+        criterion.on_crash(["a", "b", "c"])
+        for pair in (("a", "b"), ("b", "a"), ("a", "c"), ("b", "c")):
+            self.assertEqual(criterion._ratings.get(*pair),
+                             DEFAULT_RATING - 18)
+
+        # Never crashed together
+        self.assertEqual(criterion._ratings.get("a", "d"), DEFAULT_RATING)
+
+    def test_incompatible(self):
+        """
+        Pairs which crashed too often are incompatible forever
+        """
+        criterion = self._make_criterion({"a": "iso1", "b": "iso1"})
+        while not criterion.get_incompatible_pairs():
+            criterion.on_crash(["a", "b"])
+
+        self.assertEqual(criterion.get_incompatible_pairs(),
+                         frozenset([("a", "b")]))
+        self.assertEqual(criterion.on_timer(["a", "b"]), set())
+        self.assertEqual(criterion._ratings.get("a", "b", 1e12),
+                         criterion._ratings.get("a", "b"))
+
+
+class PairRatingsTest(unittest.TestCase):
+    """
+    Tests the sparse store of ratings
+    """
+    def test_recovery(self):
+        """
+        Ratings recover linearly after a delay, up to the default rating
+        """
+        ratings = _PairRatings()
+        self.assertEqual(ratings.update("a", "b", -20, 1000),
+                         DEFAULT_RATING - 20)
+
+        for delay, expected in ((0, -20), (RECOVERY_DELAY, -20),
+                                (RECOVERY_DELAY + 45, -15),
+                                (RECOVERY_DELAY + 90, -10),
+                                (RECOVERY_DELAY + 1000, 0)):
+            self.assertAlmostEqual(ratings.get("b", "a", 1000 + delay),
+                                   DEFAULT_RATING + expected)
+
+        # A new crash starts from the recovered rating
+        self.assertAlmostEqual(
+            ratings.update("a", "b", -5, 1000 + RECOVERY_DELAY + 45),
+            DEFAULT_RATING - 20)
+        self.assertEqual(ratings.get_last_crash("a", "b"),
+                         1000 + RECOVERY_DELAY + 45)
+
+        # Incompatible pairs don't recover
+        self.assertLess(ratings.update("a", "c", -90, 1000),
+                        INCOMPATIBLE_RATING)
+        self.assertEqual(ratings.get("a", "c", 1e12), DEFAULT_RATING - 90)
+
+    def test_evict(self):
+        """
+        Pairs are evicted once they recovered the default rating
+        """
+        ratings = _PairRatings()
+        ratings.update("a", "b", -20, 1000)
+        ratings.update("c", "d", -10, 1000)
+        ratings.update("e", "f", -90, 1000)
+        recovered = 1000 + RECOVERY_DELAY + 20 / RECOVERY_RATE
+
+        self.assertEqual(ratings.evict(1000), set())
+        self.assertEqual(ratings.evict(recovered - 10 / RECOVERY_RATE),
+                         set(["c", "d"]))
+        self.assertEqual(ratings.evict(recovered - 1), set())
+        self.assertEqual(len(ratings), 2)
+        self.assertEqual(ratings.evict(recovered), set(["a", "b"]))
+
+        # Incompatible pairs are kept
+        self.assertEqual(ratings.evict(1e12), set())
+        self.assertEqual(len(ratings), 1)
+        self.assertEqual(ratings.get_pairs(INCOMPATIBLE_RATING, 1e12),
+                         set([("e", "f")]))
+
+        # Crashes delay the eviction
+        for idx in range(50):
+            ratings.update("a", "b", -1, 2000 + idx)
+        self.assertEqual(ratings.evict(2050 + RECOVERY_DELAY), set())
+        self.assertEqual(ratings.evict(1e12), set(["a", "b"]))
+        self.assertEqual(ratings.get("a", "b", 1e12), DEFAULT_RATING)
+
+    def test_max_pairs(self):
+        """
+        The store never holds more than its maximum number of pairs, whatever
+        their kind
+        """
+        ratings = _PairRatings(10)
+        for idx in range(5):
+            ratings.update("frozen", "old{0}".format(idx), -90, idx)
+
+        for idx in range(30):
+            ratings.update("a", "b{0}".format(idx), -idx, 100)
+            self.assertLessEqual(len(ratings), 10)
+
+        # The most recovered pairs have been forgotten first
+        self.assertEqual(ratings.get("a", "b0", 100), DEFAULT_RATING)
+        self.assertEqual(ratings.get("a", "b29", 100), DEFAULT_RATING - 29)
+        self.assertEqual(len(ratings.get_pairs(INCOMPATIBLE_RATING, 100)), 5)
+
+        # Then the oldest incompatible pairs
+        for idx in range(20):
+            ratings.update("frozen", "new{0}".format(idx), -90, 200 + idx)
+            self.assertLessEqual(len(ratings), 10)
+
+        self.assertEqual(ratings.get("frozen", "old0", 300), DEFAULT_RATING)
+        self.assertEqual(ratings.get("frozen", "new19", 300),
+                         DEFAULT_RATING - 90)
+
+    def test_minimum(self):
+        """
+        The minimum rating on an isolate considers the pairs which never
+        crashed as rated with the default rating
+        """
+        ratings = _PairRatings()
+        ratings.update("a", "b", -20, 1000)
+        ratings.update("a", "c", -90, 1000)
+        ratings.update("d", "e", -50, 1000)
+
+        for names, expected in (
+                (set(["a", "b"]), -20), (set(["a", "b", "x"]), -20),
+                (set(["a", "b", "c"]), -90), (set(["a", "d", "e"]), 0),
+                (set(["a", "x"]), 0), (set(["a"]), 0)):
+            nb_others = len(names) - ("a" in names)
+            self.assertEqual(ratings.minimum("a", names, nb_others, 1000),
+                             DEFAULT_RATING + expected, names)
+
+        self.assertEqual(ratings.minimum("x", set(["a", "b"]), 2, 1000),
+                         DEFAULT_RATING)
+
+        # Recovery is taken into account
+        self.assertAlmostEqual(
+            ratings.minimum("a", set(["a", "b"]), 1,
+                            1000 + RECOVERY_DELAY + 45), DEFAULT_RATING - 15)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
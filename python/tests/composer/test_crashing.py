@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: incremental reliability statistics tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import unittest
+
+# Composer
+from cohorte.composer.beans import RawComponent
+from cohorte.composer.node.beans import EligibleIsolate
+from cohorte.composer.node.criteria.reliability.crashing import CrashCriterion
+
+# ------------------------------------------------------------------------------
+
+
+def recompute(ratings, components):
+    """
+    Computes the mean and variance of the ratings of the given components
+    """
+    values = [ratings[component.name] for component in components]
+    mean = float(sum(values)) / len(values)
+    return mean, sum((value - mean) ** 2 for value in values) / len(values)
+
+# ------------------------------------------------------------------------------
+
+
+class CrashStatisticsTest(unittest.TestCase):
+    """
+    Compares the incremental statistics with a computation from scratch
+    """
+    def test_incremental_stats(self):
+        """
+        Statistics follow the moves of components and their ratings
+        """
+        rand = random.Random(1)
+        criterion = CrashCriterion()
+        components = [RawComponent("factory", "comp{0}".format(idx))
+                      for idx in range(100)]
+        for component in components:
+            criterion._ratings[component.name] = rand.randint(0, 100)
+
+        isolates = [EligibleIsolate("iso{0}".format(idx), "python")
+                    for idx in range(5)]
+        for idx, component in enumerate(components[:50]):
+            isolates[idx % 5].add_component(component)
+
+        for _ in range(500):
+            action = rand.random()
+            if action < .3:
+                # Hide (remove) or add a component
+                isolate = rand.choice(isolates)
+                if isolate.components and action < .15:
+                    isolate.hide([rand.choice(list(isolate.components))])
+                else:
+                    isolate.add_component(rand.choice(components))
+            elif action < .6:
+                # Crash or tick
+                names = [component.name
+                         for component in rand.sample(components, 5)]
+                if action < .45:
+                    criterion.on_crash(names)
+                else:
+                    criterion._last_crash.clear()
+                    criterion.on_timer(names)
+            else:
+                criterion._update_rating(rand.choice(components).name,
+                                         rand.randint(-20, 20))
+
+            for isolate in isolates:
+                if isolate.components:
+                    mean, variance = criterion.get_stats(isolate)
+                    expected = recompute(criterion._ratings,
+                                         isolate.components)
+                    self.assertAlmostEqual(mean, expected[0], 6)
+                    self.assertAlmostEqual(variance, expected[1], 6)
+                    self.assertAlmostEqual(
+                        mean, criterion.compute_stats(isolate.components), 6)
+
+
+class CandidateComponentsTest(unittest.TestCase):
+    """
+    Tests the frozen set of components of a candidate isolate
+    """
+    def test_frozen_components(self):
+        """
+        The same frozen set is returned until the visible components change,
+        so that unchanged candidates don't compute their statistics again
+        """
+        criterion = CrashCriterion()
+        components = [RawComponent("factory", "comp{0}".format(idx))
+                      for idx in range(3)]
+        isolate = EligibleIsolate("iso", "python", components[:2])
+        frozen = isolate.components
+        self.assertEqual(frozen, frozenset(components[:2]))
+        self.assertIs(isolate.new_components, frozen)
+
+        criterion.get_stats(isolate)
+        self.assertIs(criterion._isolates[isolate][0], frozen)
+
+        # No modification
+        isolate.hide([components[2]])
+        isolate.unhide(components[2])
+        isolate.unhide(components[0])
+        isolate.add_component(components[1])
+        self.assertIs(isolate.components, frozen)
+
+        # Modifications
+        isolate.hide([components[0]])
+        self.assertEqual(isolate.components, frozenset(components[1:2]))
+        self.assertEqual(frozen, frozenset(components[:2]))
+
+        isolate.unhide(components[0])
+        self.assertEqual(isolate.components, frozenset(components[:2]))
+
+        isolate.add_component(components[2])
+        self.assertEqual(isolate.components, frozenset(components))
+        for value, expected in zip(criterion.get_stats(isolate),
+                                   recompute(criterion._ratings, components)):
+            self.assertAlmostEqual(value, expected, 6)
+        self.assertIs(criterion._isolates[isolate][0], isolate.components)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Composer: concurrent dispatch tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import threading
+import time
+import unittest
+
+# Composer
+from cohorte.composer.beans import Isolate, RawComponent
+from cohorte.composer.dispatch import Dispatcher
+from cohorte.composer.node.commander import NodeCommander
+from cohorte.composer.node.status import NodeStatusStorage
+from cohorte.composer.top.commander import TopCommander
+
+# ------------------------------------------------------------------------------
+
+
+def _answer(value, delay=0):
+    """
+    Returns the given value after a delay
+    """
+    time.sleep(delay)
+    return value
+
+
+def _fail():
+    """
+    Raises an error
+    """
+    raise ValueError("Test error")
+
+
+class DispatcherTest(unittest.TestCase):
+    """
+    Tests the dispatcher results
+    """
+    def setUp(self):
+        self.dispatcher = Dispatcher(2)
+        self.dispatcher.start()
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.dispatcher.stop()
+
+    def test_results(self):
+        """
+        Results, errors and late calls are reported separately
+        """
+        result = self.dispatcher.dispatch(
+            {'a': (_answer, (1,)), 'b': (_fail, ()),
+             'c': (self.release.wait, (5,))}, .5)
+
+        self.assertEqual(result.results, {'a': 1})
+        self.assertEqual(list(result.errors), ['b'])
+        self.assertIsInstance(result.errors['b'], ValueError)
+        self.assertEqual(result.late, set(['c']))
+        self.assertEqual(result.cancelled, set())
+
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats['calls'], 3)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['late'], 1)
+
+    def test_cancel(self):
+        """
+        Calls not started at the deadline are never executed, and keys with
+        a call still running aren't called again
+        """
+        executed = []
+
+        def record(key):
+            executed.append(key)
+
+        result = self.dispatcher.dispatch(
+            {'hang1': (self.release.wait, (5,)),
+             'hang2': (self.release.wait, (5,))}, .3)
+        self.assertEqual(result.late, set(['hang1', 'hang2']))
+        self.assertEqual(result.cancelled, set())
+        self.assertEqual(self.dispatcher.get_running_late(),
+                         set(['hang1', 'hang2']))
+
+        # All threads are busy: calls are cancelled at the deadline
+        calls = dict(('call{0}'.format(idx), (record, (idx,)))
+                     for idx in range(5))
+        result = self.dispatcher.dispatch(calls, .3)
+        self.assertEqual(result.late, set(calls))
+        self.assertEqual(result.cancelled, set(calls))
+
+        # Still running: not called again
+        result = self.dispatcher.dispatch({'hang1': (record, ('x',))}, .3)
+        self.assertEqual(result.cancelled, set(['hang1']))
+
+        # Once released, the cancelled calls still aren't executed
+        self.release.set()
+        time.sleep(.2)
+        self.assertEqual(executed, [])
+        self.assertEqual(self.dispatcher.get_running_late(), set())
+
+        result = self.dispatcher.dispatch({'hang1': (_answer, (2,))}, 1)
+        self.assertEqual(result.results, {'hang1': 2})
+
+    def test_queue_late(self):
+        """
+        Queued calls are never cancelled and keep their order
+        """
+        executed = []
+
+        def record(key):
+            executed.append(key)
+            return key
+
+        result = self.dispatcher.dispatch(
+            {'hang1': (self.release.wait, (5,)),
+             'hang2': (self.release.wait, (5,))}, .3)
+        self.assertEqual(result.late, set(['hang1', 'hang2']))
+
+        # Behind the late calls
+        for idx in range(3):
+            result = self.dispatcher.dispatch(
+                {'hang1': (record, (idx,)), 'other': (record, ('o',))},
+                .2, True)
+            self.assertEqual(result.late, set(['hang1', 'other']))
+            self.assertEqual(result.cancelled, set())
+
+        self.assertEqual(self.dispatcher.wait_late(['hang1'], .2),
+                         set(['hang1']))
+        self.assertEqual(executed, [])
+
+        # Executed in order once the late calls are done
+        self.release.set()
+        self.assertEqual(
+            self.dispatcher.wait_late(['hang1', 'hang2', 'other'], 2), set())
+        self.assertEqual([key for key in executed if key != 'o'], [0, 1, 2])
+        self.assertEqual(executed.count('o'), 3)
+        self.assertEqual(self.dispatcher.get_running_late(), set())
+
+        result = self.dispatcher.dispatch({'hang1': (record, ('x',))}, 1,
+                                          True)
+        self.assertEqual(result.results, {'hang1': 'x'})
+
+# ------------------------------------------------------------------------------
+
+
+class _Composer(object):
+    """
+    Isolate composer killing components after a delay
+    """
+    def __init__(self, delay):
+        self.delay = delay
+
+    def kill(self, names):
+        time.sleep(self.delay)
+
+    def instantiate(self, components):
+        time.sleep(self.delay)
+
+
+class _Status(object):
+    """
+    Node status, with one isolate per component
+    """
+    def __init__(self, names):
+        self.names = set(names)
+        self.lock = threading.Lock()
+
+    def get_isolate_for_component(self, name):
+        return name
+
+    def remove(self, names, isolate=None):
+        with self.lock:
+            self.names.difference_update(names)
+
+
+class _Context(object):
+    """
+    Bundle context
+    """
+    @staticmethod
+    def get_property(_):
+        return None
+
+
+class NodeCommanderTest(unittest.TestCase):
+    """
+    Tests the concurrent calls of the node commander
+    """
+    def test_late_kill(self):
+        """
+        The status is updated when a late kill ends
+        """
+        commander = NodeCommander()
+        commander._timeout = .3
+        commander._status = _Status(['fast', 'slow'])
+        commander._isolate_composer = {'fast': _Composer(0),
+                                       'slow': _Composer(.6)}
+        commander.validate(_Context())
+        try:
+            commander.kill([RawComponent('factory', 'fast'),
+                            RawComponent('factory', 'slow')])
+            self.assertEqual(commander._status.names, set(['slow']))
+            self.assertEqual(commander.get_unresponsive_isolates(),
+                             set(['slow']))
+
+            time.sleep(.5)
+            self.assertEqual(commander._status.names, set())
+        finally:
+            commander.invalidate(_Context())
+
+    def test_late_kill_moved(self):
+        """
+        A late kill doesn't remove a component placed on another isolate in
+        the meantime
+        """
+        status = NodeStatusStorage()
+        status.store([Isolate('slow', 'python',
+                              [RawComponent('factory', 'c1')])])
+
+        commander = NodeCommander()
+        commander._timeout = .3
+        commander._status = status
+        commander._isolate_composer = {'fast': _Composer(0),
+                                       'slow': _Composer(.6)}
+        commander.validate(_Context())
+        try:
+            commander.kill([RawComponent('factory', 'c1')])
+            self.assertEqual(commander.get_unresponsive_isolates(),
+                             set(['slow']))
+
+            # Moved while the kill runs
+            status.clear()
+            status.store([Isolate('fast', 'python',
+                                  [RawComponent('factory', 'c1')])])
+            time.sleep(.5)
+            self.assertEqual(status.get_isolate_for_component('c1'), 'fast')
+            self.assertEqual(len(status.get_components()), 1)
+
+            # Kill on the right isolate
+            commander.kill([RawComponent('factory', 'c1')])
+            self.assertEqual(status.get_components(), [])
+        finally:
+            commander.invalidate(_Context())
+
+    def test_start_after_late_call(self):
+        """
+        Orders to an isolate still handling a late call are queued
+        """
+        composer = _Composer(.5)
+        started = []
+        composer.instantiate = lambda components: \
+            started.extend(components)
+
+        commander = NodeCommander()
+        commander._timeout = .2
+        commander._status = _Status(['slow'])
+        commander._isolate_composer = {'slow': composer}
+        commander.validate(_Context())
+        try:
+            commander.kill([RawComponent('factory', 'slow')])
+            commander.start([Isolate('slow', 'python', ['component'])])
+            self.assertEqual(started, [])
+
+            time.sleep(.6)
+            self.assertEqual(started, ['component'])
+            self.assertEqual(commander._status.names, set())
+        finally:
+            commander.invalidate(_Context())
+
+
+class _TopStatus(object):
+    """
+    Top status, without components
+    """
+    @staticmethod
+    def get_components_for_node(_):
+        return []
+
+
+class TopCommanderTest(unittest.TestCase):
+    """
+    Tests the moves of components by the top commander
+    """
+    def _update(self, stop_delay):
+        """
+        Moves a component from a node taking the given time to stop it
+
+        :return: The components started on the new node
+        """
+        started = []
+        new_node = _Composer(0)
+        new_node.instantiate = started.extend
+
+        commander = TopCommander()
+        commander._timeout = .2
+        commander._status = _TopStatus()
+        commander._node_composers = {'old': [_Composer(stop_delay)],
+                                     'new': [new_node]}
+        commander.validate(_Context())
+        try:
+            component = RawComponent('factory', 'moved')
+            commander.update({}, {component: ('old', 'new')}, {})
+            return started
+        finally:
+            commander.invalidate(_Context())
+
+    def test_move(self):
+        """
+        Components are started once stopped on their previous node
+        """
+        self.assertEqual([component.name for component in self._update(0)],
+                         ['moved'])
+
+        # Late stop, within the extra time
+        self.assertEqual([component.name for component in self._update(.3)],
+                         ['moved'])
+
+        # Not stopped in time: not started
+        self.assertEqual(self._update(.6), [])
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: batch and sequential distribution tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import time
+import unittest
+
+# Composer
+from cohorte.composer.beans import Isolate, RawComponent
+from cohorte.composer.node.beans import WrappedEligibleIsolate
+from cohorte.composer.node.criteria.distance import compatibility, \
+    configuration
+from cohorte.composer.node.criteria.reliability import crashing
+from cohorte.composer.node.distributor import IsolateDistributor
+
+# Vote
+import cohorte.vote.approbation
+import cohorte.vote.core
+
+# ------------------------------------------------------------------------------
+
+
+class _VoteStore(object):
+    """
+    Vote store ignoring votes
+    """
+    @staticmethod
+    def store_vote(vote):
+        pass
+
+
+def _make_distributor(batch):
+    """
+    Prepares a distributor with its criteria
+
+    :param batch: Use the batch vote mode
+    :return: A (distributor, compatibility criterion) tuple
+    """
+    engine = cohorte.vote.approbation.ApprobationEngine()
+    engine._kind = "approbation"
+
+    vote = cohorte.vote.core.VoteCore()
+    vote._engines = [engine]
+    vote._store = _VoteStore()
+
+    compat = compatibility.CompatibilityCriterion()
+    distributor = IsolateDistributor()
+    distributor._vote = vote
+    distributor._batch = batch
+    distributor._distance_criteria = [
+        compat, configuration.ConfigurationIsolateCriterion()]
+    distributor._reliability_criteria = [crashing.CrashCriterion()]
+    return distributor, compat
+
+
+def _make_components(description):
+    """
+    Makes components beans
+
+    :param description: A list of (language, configured isolate) tuples
+    :return: A list of RawComponent beans
+    """
+    components = []
+    for idx, (language, isolate) in enumerate(description):
+        component = RawComponent("factory{0}".format(idx),
+                                 "comp{0:03d}".format(idx))
+        component.language = language
+        component.isolate = isolate
+        components.append(component)
+
+    return components
+
+
+def _placement(isolates):
+    """
+    Converts isolates to a component name -> isolate name dictionary
+    """
+    return dict((component.name, isolate.name) for isolate in isolates
+                for component in isolate.components)
+
+# ------------------------------------------------------------------------------
+
+
+class DistributorTest(unittest.TestCase):
+    """
+    Compares the batch and the sequential distributions
+    """
+    def _distribute_both(self, description, existing=()):
+        """
+        Distributes the described components in both modes.
+
+        Ties between candidates can be resolved differently by both modes:
+        only the components with a configured isolate are compared.
+
+        :return: The (updated, new) placements of the sequential and of the
+                 batch modes
+        """
+        results = []
+        for batch in (False, True):
+            distributor, _ = _make_distributor(batch)
+            candidates = [WrappedEligibleIsolate(Isolate(name, language, []))
+                          for name, language in existing]
+            updated, new = distributor.distribute(
+                _make_components(description), candidates)
+
+            updated = _placement(updated)
+            new = _placement(new)
+            self.assertEqual(len(updated) + len(new), len(description))
+
+            configured = dict(("comp{0:03d}".format(idx), isolate)
+                              for idx, (_, isolate) in enumerate(description)
+                              if isolate)
+            results.append(tuple(
+                dict((name, placement[name]) for name in configured
+                     if name in placement)
+                for placement in (updated, new)))
+
+        return results
+
+    def test_configured_isolates(self):
+        """
+        Configured isolates are created the same way in both modes
+        """
+        sequential, batch = self._distribute_both(
+            [("python", "iso-a"), ("python", "iso-a"), ("python", None),
+             ("java", "iso-b"), ("java", None), ("java", "iso-b")])
+        self.assertEqual(batch, sequential)
+        self.assertEqual(batch, ({}, {"comp000": "iso-a", "comp001": "iso-a",
+                                      "comp003": "iso-b", "comp005": "iso-b"}))
+
+    def test_configured_existing_isolate(self):
+        """
+        A configured isolate which already exists is updated
+        """
+        sequential, batch = self._distribute_both(
+            [("python", "iso-a"), ("python", None), ("python", "iso-a"),
+             ("java", "iso-b")],
+            [("iso-a", "python")])
+        self.assertEqual(batch, sequential)
+        self.assertEqual(batch, ({"comp000": "iso-a", "comp002": "iso-a"},
+                                 {"comp003": "iso-b"}))
+
+    def test_incompatible_components(self):
+        """
+        All components are placed once, without incompatible pairs in the
+        batch mode
+        """
+        rand = random.Random(42)
+        description = [(rand.choice(("python", "java")), None)
+                       for _ in range(60)]
+        names = ["comp{0:03d}".format(idx) for idx in range(60)]
+        pairs = set(tuple(sorted(rand.sample(names, 2))) for _ in range(60))
+
+        for batch in (False, True):
+            distributor, compat = _make_distributor(batch)
+            for name_a, name_b in pairs:
+                compat._ratings.update(name_a, name_b, -40, time.time())
+
+            updated, new = distributor.distribute(
+                _make_components(description), [])
+            self.assertEqual(updated, ())
+
+            placed = [component.name for isolate in new
+                      for component in isolate.components]
+            self.assertEqual(sorted(placed), names)
+
+            if batch:
+                incompatible = compat.get_incompatible_pairs(True)
+                for isolate in new:
+                    content = set(component.name
+                                  for component in isolate.components)
+                    for name_a, name_b in incompatible:
+                        self.assertFalse(name_a in content
+                                         and name_b in content)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: constraint-based distributor tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import unittest
+
+# Composer
+from cohorte.composer.beans import Isolate, RawComponent
+from cohorte.composer.node.beans import WrappedEligibleIsolate
+import cohorte.composer.node.distributor_csp as distributor_csp
+
+# ------------------------------------------------------------------------------
+
+
+class _Criterion(object):
+    """
+    Distance criterion giving fixed incompatible pairs
+    """
+    def __init__(self, pairs):
+        """
+        :param pairs: A set of pairs of components names
+        """
+        self.pairs = pairs
+
+    def get_incompatible_pairs(self):
+        """
+        Returns the incompatible pairs
+        """
+        return self.pairs
+
+
+def _make_component(name, language="python", isolate=None):
+    """
+    Makes a component bean
+    """
+    component = RawComponent("factory-" + name, name)
+    component.language = language
+    component.isolate = isolate
+    return component
+
+
+def _random_pairs(rand, names, count):
+    """
+    Picks random pairs of names
+    """
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add(tuple(sorted(rand.sample(names, 2))))
+    return pairs
+
+# ------------------------------------------------------------------------------
+
+
+class CspDistributorTest(unittest.TestCase):
+    """
+    Tests the constraint-based distributor
+    """
+    def setUp(self):
+        """
+        Prepares the distributor
+        """
+        self.pairs = set()
+        self.distributor = distributor_csp.IsolateDistributor()
+        self.distributor._distance_criteria = [_Criterion(self.pairs)]
+
+    def _check(self, isolates, components):
+        """
+        Checks that all components are placed once, with compatible ones
+        """
+        placed = [component for isolate in isolates
+                  for component in isolate.components]
+        self.assertEqual(sorted(component.name for component in placed),
+                         sorted(component.name for component in components))
+
+        for isolate in isolates:
+            names = set(component.name for component in isolate.components)
+            languages = set(distributor_csp._language_group(
+                component.language) for component in isolate.components)
+            self.assertEqual(len(languages), 1, isolate)
+            for name_a, name_b in self.pairs:
+                self.assertFalse(name_a in names and name_b in names,
+                                 (name_a, name_b))
+
+    def test_distribution(self):
+        """
+        Incompatible components and languages are separated
+        """
+        rand = random.Random(1)
+        components = [_make_component("c{0:03d}".format(idx),
+                                      rand.choice(("python", "python3",
+                                                   "java")))
+                      for idx in range(200)]
+        self.pairs.update(_random_pairs(
+            rand, [component.name for component in components], 400))
+
+        updated, new = self.distributor.distribute(components, [])
+        self.assertEqual(updated, ())
+        self._check(new, components)
+
+    def test_configured_isolates(self):
+        """
+        Components with a configured isolate are placed there
+        """
+        existing = WrappedEligibleIsolate(Isolate("iso-a", "python", []))
+        components = [_make_component("a", isolate="iso-a"),
+                      _make_component("b", isolate="iso-b"),
+                      _make_component("c")]
+
+        updated, new = self.distributor.distribute(components, [existing])
+        self.assertEqual(updated, (existing,))
+        self.assertEqual(set(existing.components), set(components[:1]))
+
+        names = dict((isolate.name, set(isolate.components))
+                     for isolate in new)
+        self.assertEqual(names["iso-b"], set(components[1:2]))
+        self.assertEqual(names[None], set(components[2:]))
+
+    def test_incremental(self):
+        """
+        Only the components which became incompatible are moved
+        """
+        rand = random.Random(2)
+        components = [_make_component("c{0:03d}".format(idx))
+                      for idx in range(100)]
+        names = [component.name for component in components]
+        self.pairs.update(_random_pairs(rand, names, 100))
+
+        _, new = self.distributor.distribute(components, [])
+        existing = [WrappedEligibleIsolate(Isolate(
+            "iso{0}".format(idx), isolate.language, isolate.components))
+            for idx, isolate in enumerate(new)]
+        location = dict((component.name, isolate.name)
+                        for isolate in existing
+                        for component in isolate.components)
+
+        # Make two components of the biggest isolate incompatible
+        biggest = max(existing, key=lambda isolate: len(isolate.components))
+        name_a, name_b = sorted(component.name
+                                for component in biggest.components)[:2]
+        self.pairs.add((name_a, name_b))
+
+        updated, new = self.distributor.distribute(components, existing)
+        self._check(list(updated) + list(new), components)
+
+        moved = set(component.name for isolate in updated
+                    for component in isolate.new_components)
+        moved.update(component.name for isolate in new
+                     for component in isolate.components)
+        self.assertEqual(len(moved), 1)
+        self.assertTrue(moved <= set((name_a, name_b)))
+
+        # Other components didn't move
+        for isolate in updated:
+            for component in isolate.components:
+                if component.name not in moved:
+                    self.assertEqual(location[component.name], isolate.name)
+
+    def test_greedy_solver(self):
+        """
+        The greedy solver fills the existing bins before opening new ones
+        """
+        conflicts = {"a": set("bc"), "b": set("ac"), "c": set("ab")}
+        bins = [set(("d",))]
+        assignment = distributor_csp._greedy_solve("abc", conflicts, bins)
+        self.assertEqual(len(bins), 3)
+        self.assertEqual(len(set(assignment.values())), 3)
+        self.assertIn("d", bins[assignment["a"]] | bins[assignment["b"]]
+                      | bins[assignment["c"]])
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: composition history tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+# Composer
+import cohorte.composer.node.history as history
+
+# ------------------------------------------------------------------------------
+
+
+class _Clock(object):
+    """
+    Replaces the time module of the history: one second per call
+    """
+    def __init__(self):
+        self.now = 1000.
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+# ------------------------------------------------------------------------------
+
+
+class NodeHistoryTest(unittest.TestCase):
+    """
+    Tests the delta-encoded node history
+    """
+    def setUp(self):
+        """
+        Installs the fake clock and prepares a history file
+        """
+        self.clock = _Clock()
+        history.time = self.clock
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "history.log")
+
+    def tearDown(self):
+        """
+        Restores the time module and cleans up the history file
+        """
+        history.time = time
+        shutil.rmtree(self.directory)
+
+    def _make_history(self, filename=None, **properties):
+        """
+        Prepares and validates a NodeHistory component
+        """
+        node_history = history.NodeHistory()
+        node_history._filename = filename
+        for key, value in properties.items():
+            setattr(node_history, key, value)
+        node_history.validate(None)
+        return node_history
+
+    def _store_random(self, node_history, count):
+        """
+        Stores random distributions
+
+        :return: The list of stored (time stamp, distribution) tuples
+        """
+        rand = random.Random(count)
+        distribution = {"iso{0}".format(idx):
+                        ["comp{0}".format(idx * 10 + sub) for sub in range(10)]
+                        for idx in range(20)}
+        stored = []
+        for step in range(count):
+            isolate = "iso{0}".format(rand.randrange(25))
+            distribution[isolate] = sorted(
+                set(distribution.get(isolate, ())).union(
+                    ["new{0}".format(step)]))
+            if rand.random() < .1:
+                distribution.pop("iso{0}".format(rand.randrange(25)), None)
+
+            node_history.store(distribution)
+            stored.append((self.clock.now,
+                           {isolate: tuple(components)
+                            for isolate, components in distribution.items()}))
+        return stored
+
+    def test_reconstruction(self):
+        """
+        Every kept distribution can be reconstructed, older ones are evicted
+        """
+        node_history = self._make_history(_max_entries=200, _checkpoint=7)
+        stored = self._store_random(node_history, 1000)
+
+        self.assertEqual(node_history.items(), stored[-200:])
+        for timestamp, distribution in stored[-200:]:
+            self.assertEqual(node_history.distribution_at(timestamp),
+                             distribution)
+            # Between two stores
+            self.assertEqual(node_history.distribution_at(timestamp + .5),
+                             distribution)
+
+        # Evicted
+        self.assertEqual(node_history.distribution_at(stored[-201][0]), {})
+
+        node_history.keep_recent(stored[-50][0])
+        self.assertEqual(node_history.items(), stored[-50:])
+
+        node_history.clear()
+        self.assertEqual(node_history.items(), [])
+        node_history.invalidate(None)
+
+    def test_max_age(self):
+        """
+        Entries older than the maximum age are evicted
+        """
+        node_history = self._make_history(_max_age=10, _checkpoint=3)
+        stored = self._store_random(node_history, 50)
+        self.assertEqual(node_history.items(), stored[-11:])
+        node_history.invalidate(None)
+
+    def test_reload(self):
+        """
+        The history survives a restart through its file
+        """
+        node_history = self._make_history(self.filename, _max_entries=100,
+                                          _checkpoint=7)
+        stored = self._store_random(node_history, 500)
+        node_history.invalidate(None)
+
+        # Compacted while storing
+        with open(self.filename) as history_file:
+            self.assertLessEqual(len(history_file.readlines()), 201)
+
+        # Corrupted line: ignored
+        with open(self.filename, 'a') as history_file:
+            history_file.write('{"timestamp": \n')
+
+        node_history = self._make_history(self.filename, _max_entries=100,
+                                          _checkpoint=7)
+        self.assertEqual(node_history.items(), stored[-100:])
+
+        # Smaller limit at restart
+        node_history.invalidate(None)
+        node_history = self._make_history(self.filename, _max_entries=20)
+        self.assertEqual(node_history.items(), stored[-20:])
+
+        # Appended after reload
+        stored.extend(self._store_random(node_history, 5))
+        node_history.invalidate(None)
+        node_history = self._make_history(self.filename, _max_entries=20)
+        self.assertEqual(node_history.items(), stored[-20:])
+        node_history.invalidate(None)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Isolate composer: iPOPO agent tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import unittest
+
+# Composer
+from cohorte.composer.beans import RawComponent
+from cohorte.composer.isolate.agents.ipopo import IPopoAgent
+
+# ------------------------------------------------------------------------------
+
+
+class _IPopo(object):
+    """
+    Fake iPOPO service, knowing only the "known" factory
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self.instances = {}
+
+    def instantiate_many(self, components):
+        """
+        Instantiates the components of the known factory
+        """
+        errors = {}
+        for factory, name, properties in components:
+            if factory != "known":
+                errors[name] = TypeError("Unknown factory")
+            else:
+                self.instances[name] = properties
+
+        return dict(self.instances), errors
+
+
+class IPopoAgentTest(unittest.TestCase):
+    """
+    Tests the batch instantiation of the iPOPO agent
+    """
+    def setUp(self):
+        """
+        Prepares the agent
+        """
+        self.ipopo = _IPopo()
+        self.agent = IPopoAgent()
+        self.agent._ipopo = self.ipopo
+
+    def test_invalid_properties(self):
+        """
+        Invalid properties only fail their component
+        """
+        components = set(RawComponent("known", "comp{0}".format(idx))
+                         for idx in range(3))
+        invalid = RawComponent("known", "invalid")
+        invalid.properties = None
+        missing = RawComponent("unknown", "missing")
+
+        instantiated = self.agent.handle(components | set((invalid, missing)))
+        self.assertEqual(instantiated, components)
+        self.assertEqual(sorted(self.ipopo.instances),
+                         ["comp0", "comp1", "comp2"])
+
+        # The component with a missing factory waits for it
+        self.assertEqual(self.agent.handle([missing]), set())
+
+    def test_all_invalid(self):
+        """
+        No instantiation if all properties are invalid
+        """
+        invalid = RawComponent("known", "invalid")
+        invalid.properties = None
+        self.assertEqual(self.agent.handle([invalid]), set())
+        self.assertEqual(self.ipopo.instances, {})
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
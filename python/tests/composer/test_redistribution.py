@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: incremental redistribution tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import unittest
+
+# Composer
+from cohorte.composer.beans import Isolate, RawComponent
+from cohorte.composer.node.beans import EligibleIsolate, Event
+from cohorte.composer.node.composer import NodeComposer
+from cohorte.composer.node.status import NodeStatusStorage
+
+# Tests
+from tests.composer.test_distributor import _make_distributor
+
+# ------------------------------------------------------------------------------
+
+
+class _Peer(object):
+    """
+    Herald peer bean
+    """
+    def __init__(self, name):
+        """
+        Sets up members
+        """
+        self.name = name
+        self.uid = "uid-{0}".format(name)
+
+
+class _Directory(object):
+    """
+    Herald directory, knowing a peer per isolate
+    """
+    def __init__(self, names):
+        """
+        Sets up members
+        """
+        self.names = names
+
+    def get_peers_for_node(self, node_uid):
+        """
+        Returns the peers of the known isolates
+        """
+        return [_Peer(name) for name in self.names]
+
+
+class _Monitor(object):
+    """
+    Monitor keeping the isolates it stopped
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self.stopped = []
+
+    def stop_isolate(self, uid):
+        """
+        Stores the UID of the stopped isolate
+        """
+        self.stopped.append(uid)
+
+
+class _Finder(object):
+    """
+    Component finder, finding all factories
+    """
+    @staticmethod
+    def normalize_all(components):
+        """
+        Associates all components to the same bundle
+        """
+        return dict((component, "bundle") for component in components), []
+
+
+class _Pool(object):
+    """
+    Thread pool keeping the tasks it receives
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self.tasks = []
+
+    def enqueue(self, method, *args):
+        """
+        Stores the task
+        """
+        self.tasks.append((method, args))
+
+    def stop(self):
+        pass
+
+
+class _Commander(object):
+    """
+    Node commander keeping the orders it receives, the running isolates being
+    those of the status
+    """
+    def __init__(self, status):
+        """
+        Sets up members
+        """
+        self.status = status
+        self.killed = []
+        self.started = {}
+
+    def get_running_isolates(self):
+        """
+        Returns the isolates of the status
+        """
+        return [Isolate(name, "python",
+                        self.status.get_components_for_isolate(name))
+                for name in self.status.get_isolates()]
+
+    @staticmethod
+    def wait_starting_isolates(timeout):
+        """
+        No isolate is starting
+        """
+        return []
+
+    @staticmethod
+    def isolate_starting(name):
+        pass
+
+    def kill(self, components):
+        """
+        Stores the names of the killed components
+        """
+        self.killed.extend(component.name for component in components)
+
+    def start(self, isolates):
+        """
+        Stores the names of the started components
+        """
+        for isolate in isolates:
+            self.started.setdefault(isolate.name, set()).update(
+                component.name for component in isolate.components)
+
+
+class _Distributor(object):
+    """
+    Isolate distributor placing components according to a dictionary
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        # Names of the affected components
+        self.dirty = set()
+
+        # Component name -> Isolate name (None: new isolate)
+        self.placement = {}
+
+        # Names of the components distributed by each call
+        self.voted = []
+
+    def pop_dirty(self):
+        """
+        Returns and resets the affected components
+        """
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
+
+    def distribute(self, components, eligible_isolates):
+        """
+        Places the components as configured
+        """
+        self.voted.append(set(component.name for component in components))
+        updated = set()
+        new = {}
+        for component in components:
+            for eligible in eligible_isolates:
+                eligible.hide([component])
+
+            target = self.placement.get(component.name)
+            if target is None:
+                isolate = new.setdefault(
+                    component.language, EligibleIsolate(
+                        None, component.language))
+            else:
+                isolate = [eligible for eligible in eligible_isolates
+                           if eligible.name == target][0]
+                updated.add(isolate)
+
+            isolate.add_component(component)
+
+        return updated, set(new.values())
+
+
+def make_component(name):
+    """
+    Prepares a Python component bean
+    """
+    component = RawComponent("factory-{0}".format(name), name)
+    component.language = "python"
+    return component
+
+
+def make_composer(distributor, distribution):
+    """
+    Prepares a node composer and its status
+
+    :param distributor: The isolate distributor
+    :param distribution: An isolate name -> component names dictionary
+    :return: The node composer
+    """
+    status = NodeStatusStorage()
+    status.store(set(Isolate(name, "python", [make_component(component)
+                                              for component in components])
+                     for name, components in distribution.items()))
+
+    composer = NodeComposer()
+    composer._node_name = "node"
+    composer._node_uid = "node-uid"
+    composer._delay = 3600
+    composer._pool = _Pool()
+    composer._distributor = distributor
+    composer._status = status
+    composer._commander = _Commander(status)
+    composer._directory = _Directory(sorted(distribution))
+    composer._monitor = _Monitor()
+    composer._finder = _Finder()
+    return composer
+
+
+def placement(status):
+    """
+    Returns the component name -> isolate name dictionary of a status
+    """
+    return dict((component, isolate) for isolate in status.get_isolates()
+                for component in (bean.name for bean in
+                                  status.get_components_for_isolate(isolate)))
+
+# ------------------------------------------------------------------------------
+
+
+class RedistributionTest(unittest.TestCase):
+    """
+    Tests the redistribution passes of the node composer
+    """
+    def setUp(self):
+        """
+        Prepares a composer with 3 isolates
+        """
+        self.distributor = _Distributor()
+        self.composer = make_composer(self.distributor, {
+            "iso-a": ["a1", "a2", "a3"], "iso-b": ["b1"], "iso-c": ["c1"]})
+        self.status = self.composer._status
+        self.commander = self.composer._commander
+
+    def tearDown(self):
+        """
+        Stops the redistribution timer
+        """
+        self.composer.invalidate(None)
+
+    def test_nothing_dirty(self):
+        """
+        A pass without affected component doesn't vote
+        """
+        before = placement(self.status)
+        self.composer._redistribute()
+
+        self.assertEqual(self.distributor.voted, [])
+        self.assertEqual(placement(self.status), before)
+        self.assertEqual(self.commander.killed, [])
+        self.assertEqual(self.commander.started, {})
+
+        stats = self.composer.get_redistribution_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["components"], 0)
+        self.assertFalse(stats[0]["modified"])
+
+    def test_dirty_only(self):
+        """
+        Only the affected components are voted for again, the others keeping
+        their isolate
+        """
+        self.distributor.dirty.update(("a2", "c1"))
+        self.distributor.placement.update({"a2": "iso-b", "c1": "iso-c"})
+        self.composer._redistribute()
+
+        self.assertEqual(self.distributor.voted, [set(("a2", "c1"))])
+        self.assertEqual(placement(self.status), {
+            "a1": "iso-a", "a3": "iso-a", "a2": "iso-b", "b1": "iso-b",
+            "c1": "iso-c"})
+
+        # Only the moved component is stopped and started
+        self.assertEqual(self.commander.killed, ["a2"])
+        self.assertEqual(self.commander.started, {"iso-b": set(("a2", "b1"))})
+        self.assertEqual(self.composer._monitor.stopped, [])
+
+        # The dirty set has been reset
+        self.composer._redistribute()
+        self.assertEqual(len(self.distributor.voted), 1)
+
+        stats = self.composer.get_redistribution_stats()
+        self.assertEqual([(stat["components"], stat["modified"])
+                          for stat in stats], [(2, True), (0, False)])
+
+    def test_unchanged(self):
+        """
+        A pass keeping the affected components in place modifies nothing
+        """
+        self.distributor.dirty.add("a1")
+        self.distributor.placement["a1"] = "iso-a"
+        self.composer._redistribute()
+
+        self.assertEqual(self.distributor.voted, [set(("a1",))])
+        self.assertEqual(self.commander.killed, [])
+        self.assertEqual(self.commander.started, {})
+        self.assertEqual(self.composer.get_redistribution_stats()[0]
+                         ["modified"], False)
+
+    def test_emptied_isolate(self):
+        """
+        An isolate emptied by the moves is stopped
+        """
+        self.distributor.dirty.update(("b1", "c1"))
+        self.distributor.placement.update({"b1": "iso-a", "c1": None})
+        self.composer._redistribute()
+
+        current = placement(self.status)
+        self.assertEqual(set(current.values()) - set(("iso-a",)),
+                         set((current["c1"],)))
+        self.assertEqual(current["b1"], "iso-a")
+        self.assertNotIn(current["c1"], ("iso-b", "iso-c"))
+
+        # Both emptied isolates are stopped, their components first
+        self.assertEqual(sorted(self.commander.killed), ["b1", "c1"])
+        self.assertEqual(sorted(self.composer._monitor.stopped),
+                         ["uid-iso-b", "uid-iso-c"])
+
+        # The new isolate is started by the pool
+        self.assertEqual(self.commander.started,
+                         {"iso-a": set(("a1", "a2", "a3", "b1"))})
+        self.assertEqual([args[0].name for _, args in
+                          self.composer._pool.tasks], [current["c1"]])
+
+
+class DirtyComponentsTest(unittest.TestCase):
+    """
+    Tests the components affected by the events given to the distributor
+    """
+    def test_pop_dirty(self):
+        """
+        Lost isolates affect their components, until the next pop
+        """
+        distributor, compat = _make_distributor(False)
+        compat._status = NodeStatusStorage()
+        self.assertEqual(distributor.pop_dirty(), set())
+
+        event = Event("iso-a", "isolate.lost", False)
+        event.components = [make_component("a1"), make_component("a2")]
+        distributor.handle_event(event)
+
+        self.assertEqual(distributor.pop_dirty(), set(("a1", "a2")))
+        self.assertEqual(distributor.pop_dirty(), set())
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Node composer: top composition journal tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+# Composer
+import cohorte
+from cohorte.composer.beans import RawComponent
+from cohorte.composer.node.top_store import JOURNAL_FILENAME, TopStorage
+
+# ------------------------------------------------------------------------------
+
+
+class _Context(object):
+    """
+    Fake bundle context, giving the node data directory
+    """
+    def __init__(self, data_dir):
+        """
+        Sets up members
+        """
+        self.data_dir = data_dir
+
+    def get_property(self, key):
+        """
+        Returns a framework property
+        """
+        if key == cohorte.PROP_NODE_DATA_DIR:
+            return self.data_dir
+
+
+def make_component(name):
+    """
+    Prepares a component bean
+    """
+    component = RawComponent("factory", name)
+    component.properties = {"value": name}
+    component.node = "node"
+    return component
+
+
+def make_composition(uid, nodes, components):
+    """
+    Prepares a composition with the given number of nodes and components per
+    node
+    """
+    return {'name': 'composition-{0}'.format(uid),
+            'distribution': {
+                'node{0}'.format(node): set(
+                    make_component('{0}-{1}-{2}'.format(uid, node, idx))
+                    for idx in range(components))
+                for node in range(nodes)}}
+
+
+def dump(storage):
+    """
+    Converts the content of the storage to comparable values
+    """
+    result = {}
+    for uid in storage.get_uids():
+        content = storage.load(uid)
+        result[uid] = (content['name'], dict(
+            (node, sorted(sorted(vars(component).items())
+                          for component in components))
+            for node, components in content['distribution'].items()))
+    return result
+
+# ------------------------------------------------------------------------------
+
+
+class TopStorageTest(unittest.TestCase):
+    """
+    Tests the top composition journal
+    """
+    def setUp(self):
+        """
+        Prepares the data directory
+        """
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, JOURNAL_FILENAME)
+
+    def tearDown(self):
+        """
+        Cleans up the journal
+        """
+        shutil.rmtree(self.directory)
+
+    def _make_storage(self, data_dir=None):
+        """
+        Prepares and validates a storage
+        """
+        storage = TopStorage()
+        storage._sync = False
+        storage._compact_min = 10
+        storage.validate(_Context(data_dir or self.directory))
+        return storage
+
+    def _reload(self, storage):
+        """
+        Invalidates the given storage and loads a new one from its journal
+        """
+        storage.invalidate(None)
+        return self._make_storage()
+
+    def _count_records(self):
+        """
+        Returns the number of lines in the journal
+        """
+        with open(self.filename, 'rb') as journal:
+            return len(journal.readlines())
+
+    def test_round_trip(self):
+        """
+        Stores, overwrites and removals are recovered at startup
+        """
+        rand = random.Random(3)
+        storage = self._make_storage()
+        for step in range(300):
+            uid = 'uid{0}'.format(rand.randrange(30))
+            if rand.random() < .8:
+                storage.store(uid, make_composition(
+                    step, rand.randrange(1, 4), 5))
+            else:
+                storage.remove(uid)
+
+            # Compaction keeps the journal small
+            self.assertLessEqual(self._count_records(),
+                                 max(10, 2 * len(storage.get_uids())) + 1)
+
+        expected = dump(storage)
+        self.assertTrue(expected)
+
+        storage = self._reload(storage)
+        self.assertEqual(dump(storage), expected)
+        self.assertIsInstance(next(iter(
+            storage.load(sorted(expected)[0])['distribution']['node0'])),
+            RawComponent)
+
+        # Appended after reload
+        storage.store('new', make_composition('new', 1, 1))
+        expected = dump(storage)
+        storage = self._reload(storage)
+        self.assertEqual(dump(storage), expected)
+        storage.invalidate(None)
+
+    def test_corruption(self):
+        """
+        Corrupted and truncated records are ignored
+        """
+        storage = self._make_storage()
+        storage._compact_min = 1000
+        for idx in range(5):
+            storage.store('uid{0}'.format(idx), make_composition(idx, 2, 2))
+        expected = dump(storage)
+        storage.invalidate(None)
+
+        with open(self.filename, 'rb') as journal:
+            lines = journal.readlines()
+
+        # Modified content of the second record and torn write
+        lines[1] = lines[1].replace(b'composition-1', b'composition-X')
+        lines.append(lines[0][:30])
+        with open(self.filename, 'wb') as journal:
+            journal.writelines(lines)
+
+        storage = self._make_storage()
+        del expected['uid1']
+        self.assertEqual(dump(storage), expected)
+
+        # The journal has been rewritten
+        self.assertEqual(self._count_records(), 4)
+        storage = self._reload(storage)
+        self.assertEqual(dump(storage), expected)
+        storage.invalidate(None)
+
+    def test_compaction(self):
+        """
+        The journal is replaced by the compacted file, without a temporary
+        file left behind
+        """
+        storage = self._make_storage()
+        for idx in range(50):
+            storage.store('uid', make_composition(idx, 1, 1))
+        self.assertLessEqual(self._count_records(), 11)
+        self.assertEqual(os.listdir(self.directory), [JOURNAL_FILENAME])
+
+        expected = dump(storage)
+        storage = self._reload(storage)
+        self.assertEqual(dump(storage), expected)
+        storage.invalidate(None)
+
+    def test_interrupted_compaction(self):
+        """
+        The temporary file of an interrupted compaction is used only if the
+        journal has been removed
+        """
+        temp_name = self.filename + '.tmp'
+        storage = self._make_storage()
+        storage.store('uid', make_composition('uid', 1, 1))
+        expected = dump(storage)
+        storage.invalidate(None)
+
+        # Journal removed before the rename (Windows fallback)
+        os.rename(self.filename, temp_name)
+        storage = self._make_storage()
+        self.assertEqual(dump(storage), expected)
+        self.assertFalse(os.path.exists(temp_name))
+        storage.invalidate(None)
+
+        # Interrupted while writing the temporary file
+        with open(temp_name, 'wb') as temp:
+            temp.write(b'0000')
+        storage = self._make_storage()
+        self.assertEqual(dump(storage), expected)
+        self.assertFalse(os.path.exists(temp_name))
+        storage.invalidate(None)
+
+    def test_memory_only(self):
+        """
+        Without a data directory, the content is kept in memory
+        """
+        storage = TopStorage()
+        storage.validate(_Context(None))
+        storage.store('uid', make_composition('uid', 1, 1))
+        self.assertEqual(storage.load('uid')['name'], 'composition-uid')
+        self.assertTrue(storage.remove('uid'))
+        self.assertFalse(storage.remove('uid'))
+        self.assertEqual(os.listdir(self.directory), [])
+        storage.invalidate(None)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
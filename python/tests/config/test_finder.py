@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+File finder: directories index tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+# Finder
+from cohorte.config.finder import _DirectoryIndex
+
+# ------------------------------------------------------------------------------
+
+FILES = ("a/x.txt", "a/.hidden.txt", "a/y.js", "ab/sub/w.txt", "b/y.txt",
+         ".h/z.txt", "c.txt", "d[1]/e.txt", "empty/")
+""" Files of the test tree (directories end with a separator) """
+
+PATTERNS = ("c.txt", "missing.txt", "a/x.txt", "a/.hidden.txt", "*",
+            "*.txt", "*/", "a/", "a", "c.txt/", "a/*", "a/.*", "a/*.txt",
+            "*/*.txt", "*/x.txt", ".*/*", ".h/*", "*/.hidden.txt",
+            "a?/sub/*", "[ab]/*.txt", "[!a]*/*", "*/*/*", "missing/*",
+            "*/missing.txt", "d[[]1]/*", "empty/*", "*/sub", "*/sub/")
+""" Patterns compared with glob, relative to the test tree """
+
+# ------------------------------------------------------------------------------
+
+
+class DirectoryIndexTest(unittest.TestCase):
+    """
+    Compares the directories index with the glob and os modules
+    """
+    def setUp(self):
+        """
+        Prepares the test tree
+        """
+        self.root = tempfile.mkdtemp()
+        for name in FILES:
+            self._write(name)
+        self.index = _DirectoryIndex()
+
+    def tearDown(self):
+        """
+        Removes the test tree
+        """
+        shutil.rmtree(self.root)
+
+    def _write(self, name):
+        """
+        Creates a file or a directory in the test tree
+        """
+        path = os.path.join(self.root, *name.split("/"))
+        if name.endswith("/"):
+            os.makedirs(path)
+            return
+
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as out:
+            out.write(name)
+
+    def _check_glob(self):
+        """
+        Checks that the index gives the same results as glob
+        """
+        for pattern in PATTERNS:
+            # A trailing separator is kept by the empty last part
+            path = os.path.join(self.root, *pattern.split("/"))
+            self.assertEqual(sorted(self.index.glob(path)),
+                             sorted(glob.iglob(path)), pattern)
+
+    def test_glob(self):
+        """
+        The index gives the same results as glob, before and after caching
+        """
+        self._check_glob()
+        self._check_glob()
+
+    def test_invalidation(self):
+        """
+        The index follows the modifications of the indexed directories
+        """
+        self._check_glob()
+        self._write("a/new.txt")
+        self._write("ab/sub/new.txt")
+        self._write("new/")
+        os.remove(os.path.join(self.root, "c.txt"))
+        shutil.rmtree(os.path.join(self.root, "b"))
+        self._check_glob()
+
+        pattern = os.path.join(self.root, "a", "new.txt")
+        self.assertEqual(list(self.index.glob(pattern)), [pattern])
+
+    def test_walk(self):
+        """
+        The index gives the same results as os.walk()
+        """
+        def normalize(items):
+            """
+            Sorts the results of a walk
+            """
+            return sorted((path, sorted(dirs), sorted(files))
+                          for path, dirs, files in items)
+
+        os.symlink(os.path.join(self.root, "ab"),
+                   os.path.join(self.root, "a", "link"))
+        for _ in range(2):
+            self.assertEqual(
+                normalize(self.index.walk(self.root)),
+                normalize(os.walk(self.root, followlinks=True)))
+
+        self._write("ab/sub/deeper/new.txt")
+        self.assertEqual(normalize(self.index.walk(self.root)),
+                         normalize(os.walk(self.root, followlinks=True)))
+
+        self.assertEqual(list(self.index.walk(
+            os.path.join(self.root, "missing"))), [])
+
+    def test_counters(self):
+        """
+        Only the avoided listings are counted as saved
+        """
+        literal = os.path.join(self.root, "a", "x.txt")
+        magic = os.path.join(self.root, "a", "*.txt")
+
+        list(self.index.glob(literal))
+        list(self.index.glob(literal))
+        counters = self.index.get_counters()
+        self.assertEqual(counters["listdir"], 1)
+        self.assertEqual(counters["listdir_saved"], 0)
+
+        list(self.index.glob(magic))
+        list(self.index.glob(magic))
+        counters = self.index.get_counters()
+        self.assertEqual(counters["listdir"], 1)
+        self.assertEqual(counters["listdir_saved"], 2)
+
+        list(self.index.walk(self.root))
+        list(self.index.walk(self.root))
+        counters = self.index.get_counters()
+        self.assertEqual(counters["listdir"], len(list(os.walk(self.root))))
+        self.assertEqual(counters["listdir_saved"], 3 + counters["listdir"])
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
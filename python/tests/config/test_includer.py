@@ -28,6 +28,8 @@ COHORTE file include unit test
 import json
 import logging
 import os
+import shutil
+import tempfile
 import unittest
 
 from cohorte.config import finder as finder
@@ -144,5 +146,205 @@ class testIncluder(unittest.TestCase):
                 _logger.error("====>\t ko :case {} exception={}".format(caseinfo, e))
    
 
+
+# ------------------------------------------------------------------------------
+
+
+class StripCommentsTest(unittest.TestCase):
+    """
+    Tests the single-pass removal of comments
+    """
+    def test_strings(self):
+        """
+        Comment markers in strings are kept
+        """
+        for content in ('{"url": "http://host/path"}',
+                        '{"a": "/* not a comment */", "b": "//"}',
+                        r'{"a": "escaped \" // quote", "b": "\\"}',
+                        '["*/", "/*"]'):
+            self.assertEqual(includer.strip_comments(content), content)
+
+    def test_comments(self):
+        """
+        Line and block comments are removed, even if they contain quotes,
+        their new lines being kept
+        """
+        for content, expected in (
+                ('{"a": 1} // "quoted"', '{"a": 1} '),
+                ('{"a": /* "b": 2 */ 1}', '{"a":  1}'),
+                ('{"a": /* it\'s "open */ "http://x"}', '{"a":  "http://x"}'),
+                ('{/* "\n" \n */"a": 1 // " \n}', '{\n\n"a": 1 \n}'),
+                ('// "\n{"a": "//"} /* " */', '\n{"a": "//"} ')):
+            self.assertEqual(includer.strip_comments(content), expected)
+            self.assertEqual(json.loads(includer.strip_comments(content)),
+                             json.loads(expected))
+
+
+class FilesTestCase(unittest.TestCase):
+    """
+    Base of the tests working on a temporary configuration directory
+    """
+    def setUp(self):
+        """
+        Prepares the includer and its directory
+        """
+        self.root = tempfile.mkdtemp()
+        self.finder = finder.FileFinder()
+        self.finder._roots = [self.root]
+        self.include = includer.FileIncluder()
+        self.include._finder = self.finder
+
+    def tearDown(self):
+        """
+        Removes the directory
+        """
+        shutil.rmtree(self.root)
+
+    def _write(self, name, content):
+        """
+        Writes a file in the configuration directory
+
+        :return: The path to the file
+        """
+        path = os.path.join(self.root, *name.split("/"))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as out:
+            out.write(content)
+        return path
+
+
+class LoadSourceTest(FilesTestCase):
+    """
+    Tests the memoization of the comment-less sources
+    """
+    def test_invalidation(self):
+        """
+        A file is read again only when its modification time or its size
+        changes
+        """
+        # Whole seconds, to be kept as is by os.utime()
+        mtime = 1000000000
+        path = self._write("conf.js", '{"a": 1} // first')
+        os.utime(path, (mtime, mtime))
+        self.assertEqual(self.include.load_source(path), '{"a": 1} ')
+        self.assertIn(os.path.realpath(path), self.include.get_load_times())
+
+        # Same size and modification time: the memoized source is used
+        self._write("conf.js", '{"a": 2} // first')
+        os.utime(path, (mtime, mtime))
+        self.assertEqual(self.include.load_source(path), '{"a": 1} ')
+
+        # Modification time changed
+        os.utime(path, (mtime + 10, mtime + 10))
+        self.assertEqual(self.include.load_source(path), '{"a": 2} ')
+
+        # Size changed
+        self._write("conf.js", '{"a": 3} // second')
+        os.utime(path, (mtime + 10, mtime + 10))
+        self.assertEqual(self.include.load_source(path), '{"a": 3} ')
+
+        # Cache cleared
+        self._write("conf.js", '{"a": 4} // second')
+        os.utime(path, (mtime + 10, mtime + 10))
+        self.assertEqual(self.include.load_source(path), '{"a": 3} ')
+        self.include.clear_cache()
+        self.assertEqual(self.include.get_load_times(), {})
+        self.assertEqual(self.include.load_source(path), '{"a": 4} ')
+
+        os.remove(path)
+        self.assertRaises(OSError, self.include.load_source, path)
+
+
+class ResolveTreeTest(FilesTestCase):
+    """
+    Tests the resolution of $include and $merge entries on the parsed tree
+    """
+    def setUp(self):
+        """
+        Writes the configuration files
+        """
+        FilesTestCase.setUp(self)
+        self._write("main.js", """// Main file
+{
+    "name": "main", /* "quoted" */
+    "greeting": "hello ${who}",
+    "items": [1, {"$include": "item-*.js"}, 4],
+    "nested": [[{"$include": "item-a.js"}]],
+    "sub": {"$include": "sub/obj.js"},
+    "tagged": {"$include": "values.js#values[1]"},
+    "conditional": {"$include": {"path": "item-b.js",
+                                 "condition": "1 < 2"}},
+    "missing": {"$include": "missing.js"},
+    "$merge": ["merged.js"]
+}""")
+        self._write("item-a.js", '{"a": 2} // a')
+        self._write("item-b.js", '{"b": 3} /* b */')
+        self._write("values.js", '{"values": ["x", {"y": "http://y"}]}')
+        self._write("merged.js", '{"extra": {"$include": "item-a.js"}}')
+        self._write("sub/obj.js", '{"leaf": {"$include": "leaf.js"}}')
+        self._write("sub/leaf.js", '["leaf"]')
+        self._write("doc.js", '// Whole document\n{"$include": "sub/obj.js"}')
+        self._write("list.js", '[{"$include": "item-*.js"}, '
+                               '{"$include": "missing.js"}]')
+        self._write("bad.js", '{"a": {"$include": "item-*.js"}}')
+
+    def test_include(self):
+        """
+        Included values are spliced in lists and replace object values
+        """
+        content = self.include.get_content("main.js?who=world", True)
+        items = content.pop("items")
+        self.assertEqual(sorted(items[1:3], key=json.dumps),
+                         [{"a": 2}, {"b": 3}])
+        self.assertEqual((items[0], items[3]), (1, 4))
+        self.assertEqual(content, {
+            "name": "main", "greeting": "hello world", "nested": [[{"a": 2}]],
+            "sub": {"leaf": ["leaf"]}, "tagged": {"y": "http://y"},
+            "conditional": {"b": 3}, "missing": {}, "extra": {"a": 2}})
+
+        self.assertEqual(sorted(self.include.get_content("list.js", True),
+                                key=json.dumps), [{"a": 2}, {"b": 3}, {}])
+
+        # Only the included values of an object value can replace it
+        self.assertRaises(CBadResourceException, self.include.get_content,
+                          "bad.js")
+
+    def test_document(self):
+        """
+        An include can replace a whole document
+        """
+        self.assertEqual(self.include.get_content("doc.js", True),
+                         {"leaf": ["leaf"]})
+        self.assertEqual(json.loads(self.include.get_content("doc.js")),
+                         {"leaf": ["leaf"]})
+
+    def test_read_files(self):
+        """
+        All the files read are listed, and read only once
+        """
+        read_files = []
+        self.include.get_content("main.js?who=world", True, read_files)
+        self.assertEqual(
+            sorted(os.path.relpath(path, self.root) for path in read_files),
+            sorted(os.path.join(*name.split("/")) for name in (
+                "main.js", "item-a.js", "item-b.js", "item-a.js", "sub/obj.js",
+                "sub/leaf.js", "values.js", "item-b.js", "merged.js",
+                "item-a.js")))
+        self.assertEqual(
+            sorted(os.path.relpath(path, self.root)
+                   for path in self.include.get_load_times()),
+            sorted(os.path.join(*name.split("/")) for name in (
+                "main.js", "item-a.js", "item-b.js", "sub/obj.js",
+                "sub/leaf.js", "values.js", "merged.js")))
+
+    def test_missing(self):
+        """
+        A missing file gives a null content
+        """
+        self.assertIsNone(self.include.get_content("missing.js", True))
+        self.assertEqual(self.include.get_content("missing.js"), "null")
+
+
 if __name__ == "__main__":  # call all test
    unittest.main()
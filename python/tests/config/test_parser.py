@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+COHORTE configuration parser: isolates configuration templates tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+# COHORTE
+from cohorte.config import finder, includer, parser, reader
+
+# ------------------------------------------------------------------------------
+
+
+class TemplateCacheTest(unittest.TestCase):
+    """
+    Checks that the configuration templates follow the changes of their
+    sources
+    """
+    def setUp(self):
+        """
+        Prepares a base and a home directories and the parser
+        """
+        self.base = tempfile.mkdtemp()
+        self.home = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.base, "conf"))
+
+        self._write(self.base, "boot-python.js",
+                    {"bundles": [{"name": "pelix.ipopo.core"}],
+                     "properties": {"origin": "base"}})
+        self._write(self.base, "python-isolate.js",
+                    {"properties": {"level": "base", "var": "${COHORTE_TV}"}})
+
+        file_finder = finder.FileFinderAbs()
+        file_finder._roots = [self.base, self.home]
+
+        file_includer = includer.FileIncluderAbs()
+        file_includer._get_finder = lambda: file_finder
+
+        file_reader = reader.ConfigurationFileReader()
+        file_reader._includer = file_includer
+
+        self.parser = parser.BootConfigParser()
+        self.parser._reader = file_reader
+        self.parser._finder = file_finder
+
+        os.environ["COHORTE_TV"] = "first"
+
+    def tearDown(self):
+        """
+        Cleans up the directories and the environment
+        """
+        shutil.rmtree(self.base)
+        shutil.rmtree(self.home)
+        os.environ.pop("COHORTE_TV", None)
+
+    @staticmethod
+    def _write(root, name, content):
+        """
+        Writes a configuration file, with a new modification time
+        """
+        conf_dir = os.path.join(root, "conf")
+        if not os.path.exists(conf_dir):
+            os.mkdir(conf_dir)
+
+        path = os.path.join(conf_dir, name)
+        with open(path, "w") as conf_file:
+            json.dump(content, conf_file)
+
+        # Ensure the stamps of the file and of its directory change
+        stamp = time.time() + 10 * len(os.listdir(conf_dir))
+        os.utime(path, (stamp, stamp))
+        os.utime(conf_dir, (stamp, stamp))
+
+    def _prepare(self):
+        """
+        Prepares an isolate configuration and returns its properties
+        """
+        return self.parser.prepare_isolate(
+            "uid", "isolate", "python", "python", "isolate")["properties"]
+
+    def test_reuse(self):
+        """
+        The template is computed once while nothing changes
+        """
+        first = self._prepare()
+        template = self.parser._templates[("python", "python", "isolate")]
+        self.assertEqual(self._prepare(), first)
+        self.assertIs(
+            self.parser._templates[("python", "python", "isolate")], template)
+        self.assertEqual(first["var"], "first")
+
+    def test_modified_file(self):
+        """
+        A modified file is read again
+        """
+        self._prepare()
+        self._write(self.base, "python-isolate.js",
+                    {"properties": {"level": "modified"}})
+        self.assertEqual(self._prepare()["level"], "modified")
+
+    def test_new_file(self):
+        """
+        A file added in home after the template has been computed is used
+        """
+        self.assertNotIn("home", self._prepare())
+        self._write(self.home, "python-isolate.js",
+                    {"properties": {"home": True}})
+        self.assertTrue(self._prepare()["home"])
+
+    def test_environment(self):
+        """
+        The variables are replaced by the current environment
+        """
+        self.assertEqual(self._prepare()["var"], "first")
+        os.environ["COHORTE_TV"] = "second"
+        self.assertEqual(self._prepare()["var"], "second")
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
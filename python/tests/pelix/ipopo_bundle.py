@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Component factories used by the iPOPO bulk instantiation tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# iPOPO
+from pelix.ipopo.decorators import ComponentFactory, Provides, Requires, \
+    Property, Validate, Invalidate
+
+# ------------------------------------------------------------------------------
+
+PROVIDER_FACTORY = "test-bulk-provider"
+""" Factory of the components providing SERVICE_SPEC """
+
+CONSUMER_FACTORY = "test-bulk-consumer"
+""" Factory of the components consuming SERVICE_SPEC """
+
+SERVICE_SPEC = "test.bulk.service"
+""" Specification of the provided service """
+
+# ------------------------------------------------------------------------------
+
+
+@ComponentFactory(PROVIDER_FACTORY)
+@Provides(SERVICE_SPEC)
+@Property('_index', 'index', 0)
+class Provider(object):
+    """
+    Service provider
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self._index = 0
+
+
+@ComponentFactory(CONSUMER_FACTORY)
+@Requires('_service', SERVICE_SPEC)
+@Requires('_services', SERVICE_SPEC, aggregate=True)
+class Consumer(object):
+    """
+    Service consumer, counting its validations
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self._service = None
+        self._services = None
+        self.validations = 0
+        self.invalidations = 0
+
+    @Validate
+    def validate(self, context):
+        """
+        Component validated
+        """
+        self.validations += 1
+
+    @Invalidate
+    def invalidate(self, context):
+        """
+        Component invalidated
+        """
+        self.invalidations += 1
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+EventAdmin: subscriptions index and handlers unregistration tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import fnmatch
+import itertools
+import sys
+import threading
+import time
+import unittest
+
+# Pelix
+import pelix.framework
+import pelix.services
+import pelix.ipopo.constants
+from pelix.services.eventadmin import _SubscriptionIndex
+
+# ------------------------------------------------------------------------------
+
+TOPICS = ["", "/", "a", "a/", "/a", "a/b", "a/b/c", "a/bc", "ab/c", "b/a",
+          "a//b", "/a/b", "x/y/z"]
+
+PATTERNS = ["*", "/*", "a", "a/*", "a/b", "a/b/*", "/a/*", "a/b*", "a/?",
+            "*/a", "a//*", "[ab]/*", "b/*/c", "x/*"]
+
+# ------------------------------------------------------------------------------
+
+
+class SubscriptionIndexTest(unittest.TestCase):
+    """
+    Compares the subscriptions index with fnmatch
+    """
+    def test_single_patterns(self):
+        """
+        Each pattern must match the same topics as fnmatch
+        """
+        for pattern in PATTERNS:
+            index = _SubscriptionIndex()
+            index.add(pattern, (pattern,))
+            for topic in TOPICS:
+                self.assertEqual(bool(index.get_handlers(topic)),
+                                 fnmatch.fnmatch(topic, pattern),
+                                 "{0!r} on {1!r}".format(pattern, topic))
+
+    def test_combined_patterns(self):
+        """
+        Handlers subscribing to several patterns, some of them removed
+        """
+        index = _SubscriptionIndex()
+        handlers = {}
+        for idx, patterns in enumerate(itertools.combinations(PATTERNS, 2)):
+            handlers[idx] = patterns
+            index.add(idx, patterns)
+
+        # No topics: all events
+        index.add("all", ())
+        handlers["all"] = ("*",)
+
+        for idx in list(handlers)[::3]:
+            index.remove(idx)
+            del handlers[idx]
+
+        for topic in TOPICS:
+            expected = set(
+                handler for handler, patterns in handlers.items()
+                if any(fnmatch.fnmatch(topic, pattern)
+                       for pattern in patterns))
+            self.assertEqual(index.get_handlers(topic), expected, topic)
+
+        # Once everything is removed, nothing matches
+        for handler in list(handlers):
+            index.remove(handler)
+
+        for topic in TOPICS:
+            self.assertEqual(index.get_handlers(topic), set())
+
+# ------------------------------------------------------------------------------
+
+
+class _BlockingHandler(object):
+    """
+    Event handler blocking on its first event
+    """
+    def __init__(self):
+        self.events = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def handle_event(self, topic, properties):
+        self.events.append(topic)
+        self.entered.set()
+        self.release.wait(5)
+
+
+class EventAdminUnregistrationTest(unittest.TestCase):
+    """
+    Events queued for a handler are dropped when it unregisters
+    """
+    def setUp(self):
+        self.framework = pelix.framework.create_framework(
+            ('pelix.ipopo.core', 'pelix.services.eventadmin'))
+        self.framework.start()
+        self.context = self.framework.get_bundle_context()
+        ipopo = pelix.ipopo.constants.get_ipopo_svc_ref(self.context)[1]
+        ipopo.instantiate(pelix.services.FACTORY_EVENT_ADMIN, 'evt-admin',
+                          {'event.delivery.ordered': True})
+        self.eventadmin = self.context.get_service(
+            self.context.get_service_reference(
+                pelix.services.SERVICE_EVENT_ADMIN))
+
+    def tearDown(self):
+        pelix.framework.FrameworkFactory.delete_framework(self.framework)
+
+    def test_unregister_drops_events(self):
+        """
+        Only the event being delivered reaches the unregistered handler
+        """
+        handler = _BlockingHandler()
+        registration = self.context.register_service(
+            pelix.services.SERVICE_EVENT_HANDLER, handler,
+            {pelix.services.PROP_EVENT_TOPICS: 'test/*'})
+
+        for idx in range(5):
+            self.eventadmin.post('test/{0}'.format(idx))
+
+        self.assertTrue(handler.entered.wait(5))
+        self.assertEqual(self.eventadmin.get_delivery_stats()['dropped'], 0)
+        registration.unregister()
+        handler.release.set()
+
+        # Let the delivery task go on with the queue, if it still can
+        threading.Event().wait(.5)
+        self.assertEqual(handler.events, ['test/0'])
+
+
+class _ReposterHandler(_BlockingHandler):
+    """
+    Event handler posting an event on its own topic
+    """
+    def __init__(self, eventadmin_svc):
+        _BlockingHandler.__init__(self)
+        self.eventadmin = eventadmin_svc
+        self.post_time = None
+
+    def handle_event(self, topic, properties):
+        if topic == 'test/repost':
+            start = time.time()
+            self.eventadmin.post('test/other')
+            self.eventadmin.post('test/other')
+            self.post_time = time.time() - start
+
+        _BlockingHandler.handle_event(self, topic, properties)
+
+
+class EventAdminFullQueueTest(unittest.TestCase):
+    """
+    post() with full queues, in the "block" mode
+    """
+    def setUp(self):
+        self.framework = pelix.framework.create_framework(
+            ('pelix.ipopo.core', 'pelix.services.eventadmin'))
+        self.framework.start()
+
+        # The module is reloaded with each framework
+        sys.modules['pelix.services.eventadmin'].QUEUE_FULL_TIMEOUT = .5
+        self.context = self.framework.get_bundle_context()
+        ipopo = pelix.ipopo.constants.get_ipopo_svc_ref(self.context)[1]
+        ipopo.instantiate(pelix.services.FACTORY_EVENT_ADMIN, 'evt-admin',
+                          {'event.delivery.ordered': True,
+                           'event.delivery.queue.size': 1})
+        self.eventadmin = self.context.get_service(
+            self.context.get_service_reference(
+                pelix.services.SERVICE_EVENT_ADMIN))
+
+    def tearDown(self):
+        pelix.framework.FrameworkFactory.delete_framework(self.framework)
+
+    def test_single_deadline(self):
+        """
+        post() waits once for all the full queues
+        """
+        handlers = [_BlockingHandler() for _ in range(3)]
+        for handler in handlers:
+            self.context.register_service(
+                pelix.services.SERVICE_EVENT_HANDLER, handler,
+                {pelix.services.PROP_EVENT_TOPICS: 'test/*'})
+
+        # First event in delivery, second one fills the queues
+        self.eventadmin.post('test/0')
+        for handler in handlers:
+            self.assertTrue(handler.entered.wait(5))
+        self.eventadmin.post('test/1')
+
+        start = time.time()
+        self.eventadmin.post('test/2')
+        duration = time.time() - start
+        self.assertLess(duration, 1)
+        self.assertGreaterEqual(duration, .4)
+        self.assertEqual(self.eventadmin.get_delivery_stats()['dropped'], 3)
+
+        for handler in handlers:
+            handler.release.set()
+
+    def test_post_from_handler(self):
+        """
+        A handler posting to its own full queue doesn't wait
+        """
+        handler = _ReposterHandler(self.eventadmin)
+        handler.release.set()
+        self.context.register_service(
+            pelix.services.SERVICE_EVENT_HANDLER, handler,
+            {pelix.services.PROP_EVENT_TOPICS: 'test/*'})
+
+        self.eventadmin.post('test/repost')
+        for _ in range(50):
+            if handler.post_time is not None:
+                break
+            time.sleep(.1)
+
+        self.assertIsNotNone(handler.post_time)
+        self.assertLess(handler.post_time, .2)
+        self.assertEqual(self.eventadmin.get_delivery_stats()['dropped'], 1)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+asyncio HTTP service: invalid requests tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import socket
+import sys
+import unittest
+
+# Pelix
+import pelix.framework
+import pelix.http as http
+import pelix.ipopo.constants
+
+# ------------------------------------------------------------------------------
+
+
+class _Servlet(object):
+    """
+    Servlet echoing the requests content
+    """
+    @staticmethod
+    def do_POST(request, response):
+        response.send_content(200, request.read_data(), "text/plain")
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "Requires Python 3.5 or newer")
+class AsyncioHttpErrorsTest(unittest.TestCase):
+    """
+    Checks the answers to invalid requests
+    """
+    def setUp(self):
+        """
+        Starts a framework and an asyncio HTTP service
+        """
+        self.framework = pelix.framework.create_framework(
+            ("pelix.ipopo.core", "pelix.http.aio"))
+        self.framework.start()
+        context = self.framework.get_bundle_context()
+        with pelix.ipopo.constants.use_ipopo(context) as ipopo:
+            ipopo.instantiate(http.FACTORY_HTTP_ASYNCIO, "http-aio",
+                              {http.HTTP_SERVICE_PORT: 0})
+
+        svc_ref = context.get_service_reference(http.HTTP_SERVICE)
+        self.http = context.get_service(svc_ref)
+        self.http.register_servlet("/echo", _Servlet())
+        self.port = self.http.get_access()[1]
+        self.module = sys.modules["pelix.http.aio"]
+
+    def tearDown(self):
+        """
+        Stops the framework
+        """
+        pelix.framework.FrameworkFactory.delete_framework(self.framework)
+
+    def _request(self, data):
+        """
+        Sends raw data and returns the status code of the response
+
+        :param data: Request to send (bytes)
+        :return: The HTTP code of the response, or None without response
+        """
+        sock = socket.create_connection(("localhost", self.port), 5)
+        try:
+            sock.sendall(data)
+            response = b""
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                response += chunk
+        finally:
+            sock.close()
+
+        if not response:
+            return None
+        return int(response.split(b" ", 2)[1])
+
+    def test_valid(self):
+        """
+        Checks that a valid request is handled
+        """
+        self.assertEqual(self._request(
+            b"POST /echo HTTP/1.0\r\nContent-Length: 2\r\n\r\nab"), 200)
+
+    def test_malformed(self):
+        """
+        Malformed requests are answered with a 400 error
+        """
+        for data in (b"GARBAGE\r\n\r\n",
+                     b"POST /echo\r\n\r\n",
+                     b"POST /echo HTTP/1.0\r\nno colon here\r\n\r\n",
+                     b"POST /echo HTTP/1.0\r\nContent-Length: x\r\n\r\n",
+                     b"POST /echo HTTP/1.0\r\nContent-Length: -1\r\n\r\n",
+                     b"POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked"
+                     b"\r\n\r\nzz\r\n"):
+            self.assertEqual(self._request(data), 400, data)
+
+    def test_too_large(self):
+        """
+        Too large requests are refused without reading them
+        """
+        self.assertEqual(self._request(
+            "POST /echo HTTP/1.0\r\nContent-Length: {0}\r\n\r\n"
+            .format(self.module.MAX_CONTENT_LENGTH + 1).encode()), 413)
+
+        self.assertEqual(self._request(
+            "POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            "{0:x}\r\n".format(self.module.MAX_CONTENT_LENGTH + 1)
+            .encode()), 413)
+
+        self.assertEqual(self._request(
+            b"GET /" + b"a" * self.module.MAX_LINE_SIZE + b" HTTP/1.0\r\n"),
+            414)
+
+        self.assertEqual(self._request(
+            b"GET /echo HTTP/1.0\r\n"
+            + b"X-Header: value\r\n" * (self.module.MAX_HEADERS + 1)
+            + b"\r\n"), 431)
+
+        self.assertEqual(self._request(
+            b"GET /echo HTTP/1.0\r\nX-Header: "
+            + b"a" * self.module.MAX_LINE_SIZE + b"\r\n\r\n"), 431)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
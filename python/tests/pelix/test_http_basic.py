@@ -0,0 +1,465 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Basic HTTP service: servlets router, thread pool and keep-alive modes tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import socket
+import threading
+import time
+import unittest
+
+# Pelix
+import pelix.framework
+import pelix.http as http
+import pelix.ipopo.constants
+from pelix.http.basic import HttpService, HTTP_SERVICE_KEEP_ALIVE, \
+    HTTP_SERVICE_POOL_QUEUE, HTTP_SERVICE_POOL_SIZE
+
+# ------------------------------------------------------------------------------
+
+
+class _Servlet(object):
+    """
+    Servlet answering "ok", after the release event is set for /block paths
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self.release = threading.Event()
+
+    def do_GET(self, request, response):
+        """
+        Handles a GET request
+        """
+        if request.get_path().startswith("/servlet/block"):
+            self.release.wait(5)
+
+        response.send_content(200, "ok", "text/plain")
+
+    def do_POST(self, request, response):
+        """
+        Handles a POST request, reading the first 5 bytes of the body for the
+        /read paths only
+        """
+        if request.get_path().startswith("/servlet/read"):
+            content = request.get_rfile().read(5)
+        else:
+            content = b"ignored"
+
+        response.send_content(200, content, "text/plain")
+
+
+def _read_response(sock):
+    """
+    Reads a response with a content length from the given socket
+
+    :return: A (status code, headers, content) tuple
+    """
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+
+    head, _, content = data.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict((name.strip().lower(), value.strip()) for name, value in
+                   (line.split(":", 1) for line in lines[1:]))
+
+    length = int(headers.get("content-length", 0))
+    while len(content) < length:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        content += chunk
+
+    return int(lines[0].split()[1]), headers, content
+
+
+def _linear_lookup(servlets, path):
+    """
+    Looks for the servlet of a path by scanning all the servlets paths, as
+    the HTTP service did before the servlets router
+
+    :param servlets: The path -> (servlet, parameters) dictionary
+    :param path: A request path
+    :return: A (servlet, parameters) tuple or None
+    """
+    path = path.lower()
+    if path[-1] != '/':
+        path += '/'
+
+    longest_match = ""
+    for servlet_path in servlets:
+        tested_path = servlet_path
+        if tested_path[-1] != '/':
+            tested_path += '/'
+
+        if path.startswith(tested_path) \
+                and len(servlet_path) > len(longest_match):
+            longest_match = servlet_path
+
+    if not longest_match:
+        return None
+    return servlets[longest_match]
+
+
+class ServletsRouterTest(unittest.TestCase):
+    """
+    Tests the resolution of servlets by the basic HTTP service
+    """
+    def setUp(self):
+        """
+        Prepares a service, without framework
+        """
+        self.http = HttpService()
+        self.http._extra = {}
+
+    def _register(self, *paths):
+        """
+        Registers a servlet per path
+
+        :return: A path -> servlet dictionary
+        """
+        servlets = {}
+        for path in paths:
+            servlets[path] = object()
+            self.assertTrue(self.http.register_servlet(path, servlets[path]))
+        return servlets
+
+    def _lookup(self, path):
+        """
+        Returns the servlet handling the given path, or None
+        """
+        servlet_info = self.http.get_servlet(path)
+        if servlet_info is not None:
+            return servlet_info[0]
+
+    def test_longest_prefix(self):
+        """
+        The servlet with the longest path prefixing the request path is used,
+        whole segments being compared
+        """
+        servlets = self._register("/a", "/a/b", "/a/b/c/", "/ab")
+        for path, expected in (("/a", "/a"), ("/a/", "/a"), ("/a/bc", "/a"),
+                               ("/a/b", "/a/b"), ("/A/B/x?y=z", "/a/b"),
+                               ("/a/b/c", "/a/b/c/"), ("/a/b/c/d/e", "/a/b/c/"),
+                               ("/ab/c", "/ab"), ("/a//b", "/a")):
+            self.assertIs(self._lookup(path), servlets[expected], path)
+
+        for path in ("/", "/abc", "/b/a", "", "a", None):
+            self.assertIsNone(self._lookup(path), path)
+
+    def test_root(self):
+        """
+        The root servlet handles all the paths without a deeper servlet
+        """
+        servlets = self._register("/", "/a")
+        for path, expected in (("/", "/"), ("/b", "/"), ("/ab/c", "/"),
+                               ("/a/b", "/a"), ("//a", "/")):
+            self.assertIs(self._lookup(path), servlets[expected], path)
+
+        self.assertTrue(self.http.unregister("/"))
+        self.assertIsNone(self._lookup("/b"))
+        self.assertIs(self._lookup("/a/b"), servlets["/a"])
+
+    def test_trailing_slash(self):
+        """
+        Paths with and without a trailing slash can be registered: the longest
+        one is used
+        """
+        servlets = self._register("/a", "/a/", "/a/b/")
+        for path in ("/a", "/a/", "/a/c"):
+            self.assertIs(self._lookup(path), servlets["/a/"], path)
+        self.assertIs(self._lookup("/a/b"), servlets["/a/b/"])
+
+        self.assertTrue(self.http.unregister("/a/"))
+        self.assertIs(self._lookup("/a/"), servlets["/a"])
+        self.assertTrue(self.http.unregister("/a"))
+        self.assertIsNone(self._lookup("/a/c"))
+        self.assertIs(self._lookup("/a/b"), servlets["/a/b/"])
+
+        # Empty nodes are removed
+        self.assertTrue(self.http.unregister("/a/b/"))
+        self.assertFalse(self.http.unregister("/a/b/"))
+        self.assertEqual(self.http._router._ServletsRouter__root.children, {})
+
+    def test_parity(self):
+        """
+        The router gives the same servlets as the previous linear scan
+        """
+        rand = random.Random(42)
+
+        def make_path():
+            """
+            Returns a random path
+            """
+            path = "/" + "/".join(rand.choice(("a", "b", "ab", "B", ""))
+                                  for _ in range(rand.randint(0, 3)))
+            if rand.random() < .3 and path[-1] != "/":
+                path += "/"
+            return path
+
+        for _ in range(300):
+            path = make_path()
+            if path.lower() in self.http._servlets:
+                self.assertTrue(self.http.unregister(path))
+            else:
+                self.assertTrue(self.http.register_servlet(path, object()))
+
+            for _ in range(10):
+                path = make_path()
+                self.assertEqual(
+                    self.http.get_servlet(path),
+                    _linear_lookup(self.http._servlets, path), path)
+
+    def test_concurrent_unregister(self):
+        """
+        Lookups without lock never fail while servlets are unregistered
+        """
+        servlets = self._register("/a")
+        deeper = dict((path, object()) for path in ("/a/b", "/a/b/c"))
+        expected = set(servlets.values()) | set(deeper.values())
+        done = threading.Event()
+
+        def modify():
+            """
+            Registers and unregisters the deeper servlets
+            """
+            try:
+                for _ in range(2000):
+                    for path, servlet in deeper.items():
+                        self.http.register_servlet(path, servlet)
+                    for path in deeper:
+                        self.http.unregister(path)
+            finally:
+                done.set()
+
+        thread = threading.Thread(target=modify)
+        thread.start()
+        try:
+            found = set()
+            while not done.is_set():
+                servlet = self._lookup("/a/b/c/d")
+                self.assertIn(servlet, expected)
+                found.add(servlet)
+        finally:
+            thread.join()
+
+        self.assertIn(servlets["/a"], found)
+        self.assertIs(self._lookup("/a/b/c/d"), servlets["/a"])
+        self.assertEqual(
+            list(self.http._router._ServletsRouter__root.children), ["a"])
+
+
+class BasicHttpModesTest(unittest.TestCase):
+    """
+    Tests the execution modes of the basic HTTP service
+    """
+    def _start(self, properties):
+        """
+        Starts a framework and an HTTP service with the given properties
+        """
+        self.framework = pelix.framework.create_framework(
+            ("pelix.ipopo.core", "pelix.http.basic"))
+        self.framework.start()
+        context = self.framework.get_bundle_context()
+
+        properties[http.HTTP_SERVICE_PORT] = 0
+        with pelix.ipopo.constants.use_ipopo(context) as ipopo:
+            ipopo.instantiate(http.FACTORY_HTTP_BASIC, "http-basic",
+                              properties)
+
+        svc_ref = context.get_service_reference(http.HTTP_SERVICE)
+        self.http = context.get_service(svc_ref)
+        self.servlet = _Servlet()
+        self.http.register_servlet("/servlet", self.servlet)
+        self.port = self.http.get_access()[1]
+
+    def tearDown(self):
+        """
+        Stops the framework
+        """
+        self.servlet.release.set()
+        if pelix.framework.FrameworkFactory.is_framework_running(
+                self.framework):
+            pelix.framework.FrameworkFactory.delete_framework(self.framework)
+
+    def _connect(self):
+        """
+        Opens a connection to the server
+        """
+        return socket.create_connection(("localhost", self.port), 5)
+
+    def test_keep_alive(self):
+        """
+        Several requests are handled with a single connection
+        """
+        self._start({HTTP_SERVICE_KEEP_ALIVE: True})
+        sock = self._connect()
+        try:
+            for _ in range(3):
+                sock.sendall(b"GET /servlet HTTP/1.1\r\nHost: test\r\n\r\n")
+                code, headers, content = _read_response(sock)
+                self.assertEqual(code, 200)
+                self.assertEqual(content, b"ok")
+                self.assertNotEqual(headers.get("connection"), "close")
+        finally:
+            sock.close()
+
+    def test_keep_alive_unread_body(self):
+        """
+        The part of a request body which wasn't read by the servlet isn't
+        parsed as the next request
+        """
+        self._start({HTTP_SERVICE_KEEP_ALIVE: True})
+        sock = self._connect()
+        try:
+            for path, expected in (("/servlet", b"ignored"),
+                                   ("/servlet/read", b"xxxxx"),
+                                   ("/unknown", None)):
+                sock.sendall("POST {0} HTTP/1.1\r\nHost: test\r\n"
+                             "Content-Length: 20\r\n\r\n{1}"
+                             .format(path, "x" * 20).encode("ascii"))
+                code, _, content = _read_response(sock)
+                if expected is None:
+                    self.assertEqual(code, 404)
+                else:
+                    self.assertEqual(code, 200)
+                    self.assertEqual(content, expected)
+
+                sock.sendall(b"GET /servlet HTTP/1.1\r\nHost: test\r\n\r\n")
+                code, _, content = _read_response(sock)
+                self.assertEqual(code, 200)
+                self.assertEqual(content, b"ok")
+        finally:
+            sock.close()
+
+    def test_keep_alive_chunked_body(self):
+        """
+        The connection is closed after a request with a chunked body
+        """
+        self._start({HTTP_SERVICE_KEEP_ALIVE: True})
+        sock = self._connect()
+        try:
+            sock.sendall(b"POST /servlet HTTP/1.1\r\nHost: test\r\n"
+                         b"Transfer-Encoding: chunked\r\n\r\n"
+                         b"5\r\nxxxxx\r\n0\r\n\r\n")
+            code, headers, _ = _read_response(sock)
+            self.assertEqual(code, 200)
+            self.assertEqual(sock.recv(16), b"")
+        finally:
+            sock.close()
+
+    def test_stop_keep_alive(self):
+        """
+        Idle kept-alive and queued connections don't delay the stop of the
+        service, and are closed
+        """
+        self._start({HTTP_SERVICE_KEEP_ALIVE: True, HTTP_SERVICE_POOL_SIZE: 1})
+        idle = self._connect()
+        queued = self._connect()
+        try:
+            idle.sendall(b"GET /servlet HTTP/1.1\r\nHost: test\r\n\r\n")
+            self.assertEqual(_read_response(idle)[0], 200)
+
+            # Waits for the only thread of the pool
+            queued.sendall(b"GET /servlet HTTP/1.1\r\nHost: test\r\n\r\n")
+            time.sleep(.2)
+
+            start = time.time()
+            pelix.framework.FrameworkFactory.delete_framework(self.framework)
+            self.assertLess(time.time() - start, 2)
+
+            # The request already received by the queued connection can be
+            # answered before the connection is closed
+            try:
+                self.assertEqual(idle.recv(16), b"")
+                data = b""
+                chunk = queued.recv(4096)
+                while chunk:
+                    data += chunk
+                    chunk = queued.recv(4096)
+
+                if data:
+                    self.assertTrue(data.startswith(b"HTTP/1.1 200 "), data)
+                    self.assertTrue(data.endswith(b"\r\n\r\nok"), data)
+            except socket.timeout:
+                self.fail("Connection not closed")
+            except socket.error:
+                # Connection reset
+                pass
+        finally:
+            idle.close()
+            queued.close()
+
+    def test_no_keep_alive(self):
+        """
+        The connection is closed after each request by default
+        """
+        self._start({})
+        sock = self._connect()
+        try:
+            sock.sendall(b"GET /servlet HTTP/1.1\r\nHost: test\r\n\r\n")
+            self.assertEqual(_read_response(sock)[0], 200)
+            self.assertEqual(sock.recv(16), b"")
+        finally:
+            sock.close()
+
+    def test_pool_rejection(self):
+        """
+        Connections beyond the pool size and queue are refused with a 503
+        """
+        self._start({HTTP_SERVICE_POOL_SIZE: 1, HTTP_SERVICE_POOL_QUEUE: 1})
+        threads = threading.active_count()
+
+        # One connection handled, one waiting for the thread of the pool
+        blocked = [self._connect() for _ in range(2)]
+        try:
+            for sock in blocked:
+                sock.sendall(b"GET /servlet/block HTTP/1.0\r\n\r\n")
+
+            # Let the server accept both connections
+            sock = self._connect()
+            sock.sendall(b"GET /servlet HTTP/1.0\r\n\r\n")
+            self.assertEqual(_read_response(sock)[0], 503)
+            sock.close()
+
+            # No thread created for the connections
+            self.assertEqual(threading.active_count(), threads)
+
+            self.servlet.release.set()
+            for sock in blocked:
+                self.assertEqual(_read_response(sock)[0], 200)
+        finally:
+            for sock in blocked:
+                sock.close()
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+iPOPO bulk instantiation tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import unittest
+
+# Pelix
+import pelix.framework
+from pelix.ipopo.constants import get_ipopo_svc_ref
+from pelix.ipopo.instance import StoredInstance
+
+# Tests
+from tests.pelix.ipopo_bundle import CONSUMER_FACTORY, PROVIDER_FACTORY
+
+# ------------------------------------------------------------------------------
+
+
+def make_components(count):
+    """
+    Prepares the description of consumers, then of their providers
+
+    :param count: Number of consumers and of providers
+    :return: A list of (factory, name, properties) tuples
+    """
+    return [(CONSUMER_FACTORY, "consumer{0}".format(idx), None)
+            for idx in range(count)] \
+        + [(PROVIDER_FACTORY, "provider{0}".format(idx), {"index": idx})
+           for idx in range(count)]
+
+# ------------------------------------------------------------------------------
+
+
+class BulkInstantiationTest(unittest.TestCase):
+    """
+    Compares instantiate_many() and kill_many() with their unitary versions
+    """
+    def setUp(self):
+        """
+        Starts a framework with iPOPO and the test factories
+        """
+        self.framework = pelix.framework.create_framework(
+            ('pelix.ipopo.core',))
+        self.framework.start()
+        context = self.framework.get_bundle_context()
+        context.install_bundle('tests.pelix.ipopo_bundle').start()
+        self.ipopo = get_ipopo_svc_ref(context)[1]
+
+    def tearDown(self):
+        """
+        Stops the framework
+        """
+        pelix.framework.FrameworkFactory.delete_framework(self.framework)
+
+    def _snapshot(self, instances):
+        """
+        Describes the state and bindings of the given consumers
+        """
+        return self.ipopo.get_instances(), dict(
+            (name, (instance.validations, instance.invalidations,
+                    sorted(service._index for service in instance._services)))
+            for name, instance in instances.items()
+            if name.startswith("consumer"))
+
+    def test_same_result(self):
+        """
+        Bulk instantiation gives the same result as one by one
+        """
+        components = make_components(20)
+        instances = dict(
+            (name, self.ipopo.instantiate(factory, name, properties))
+            for factory, name, properties in components)
+        expected = self._snapshot(instances)
+        for _, name, _ in reversed(components):
+            self.ipopo.kill(name)
+        self.assertEqual(self.ipopo.get_instances(), [])
+
+        instances, errors = self.ipopo.instantiate_many(components)
+        self.assertEqual(errors, {})
+        self.assertEqual(self._snapshot(instances), expected)
+
+        # All valid, each consumer validated once
+        self.assertTrue(all(state == StoredInstance.VALID
+                            for _, _, state in expected[0]))
+        self.assertTrue(all(validations == (1, 0, list(range(20)))
+                            for validations in expected[1].values()))
+
+        errors = self.ipopo.kill_many(name for _, name, _ in components)
+        self.assertEqual(errors, {})
+        self.assertEqual(self.ipopo.get_instances(), [])
+
+        # Consumers were killed before their providers
+        self.assertTrue(all(instance.invalidations == 1
+                            for name, instance in instances.items()
+                            if name.startswith("consumer")))
+
+    def test_errors(self):
+        """
+        Failures are reported per component
+        """
+        components = make_components(2)
+        components.append(("unknown-factory", "unknown", None))
+        components.append((PROVIDER_FACTORY, "provider0", None))
+
+        instances, errors = self.ipopo.instantiate_many(components)
+        self.assertEqual(sorted(instances),
+                         ["consumer0", "consumer1", "provider0", "provider1"])
+        self.assertEqual(sorted(errors), ["provider0", "unknown"])
+        self.assertEqual(
+            [state for _, _, state in self.ipopo.get_instances()],
+            [StoredInstance.VALID] * 4)
+
+        errors = self.ipopo.kill_many(["provider0", "unknown", "consumer0"])
+        self.assertEqual(list(errors), ["unknown"])
+        self.assertEqual([name for name, _, _ in self.ipopo.get_instances()],
+                         ["consumer1", "provider1"])
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+LDAP filters: compiled filters and parse cache tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import unittest
+
+# Pelix
+import pelix.ldapfilter as ldapfilter
+
+# ------------------------------------------------------------------------------
+
+PROPERTY_VALUES = [1, 2, 10, -1, 1.5, "1", "abc", "ABC", "a*c", True, False,
+                   None, [1, 2], ["abc", "x"], ("1",), 3.0, "10", "", "1.5",
+                   [], 2 ** 40]
+
+FILTER_VALUES = ["1", "2", "10", "-1", "1.5", "abc", "ABC", "a*", "*c", "*",
+                 "a*c", "*b*", "True", "true", "3.0", "x", "1e3"]
+
+OPERATORS = ["=", "<=", ">=", "~=", "<", ">"]
+
+# ------------------------------------------------------------------------------
+
+
+def interpret(ldap_filter, properties):
+    """
+    Tests the filter by walking through its tree and calling the comparator
+    of each criterion, as LDAPFilter.matches() did before filters were
+    compiled
+    """
+    if isinstance(ldap_filter, ldapfilter.LDAPCriteria):
+        try:
+            return ldap_filter.comparator(ldap_filter.value,
+                                          properties[ldap_filter.name])
+        except KeyError:
+            return False
+
+    results = (interpret(subfilter, properties)
+               for subfilter in ldap_filter.subfilters)
+    if ldap_filter.operator == ldapfilter.OR:
+        return any(results)
+    elif ldap_filter.operator == ldapfilter.NOT:
+        return not all(results)
+    return all(results)
+
+
+def outcome(method, *args):
+    """
+    Returns the boolean result of the call, or the type of the exception it
+    raised
+    """
+    try:
+        return bool(method(*args))
+    except Exception as ex:
+        return type(ex)
+
+# ------------------------------------------------------------------------------
+
+
+class CompiledFilterTest(unittest.TestCase):
+    """
+    Compares compiled filters to the interpretation of their tree
+    """
+    def test_random_filters(self):
+        """
+        Compiled and interpreted filters give the same results
+        """
+        rand = random.Random(1)
+        for _ in range(20000):
+            criterion = "(k{0}{1})".format(rand.choice(OPERATORS),
+                                           rand.choice(FILTER_VALUES))
+            if "*" in criterion and ("(k<" in criterion
+                                     or "(k>" in criterion):
+                # Invalid filter
+                continue
+
+            choice = rand.random()
+            if choice < .3:
+                ldap_string = "({0}{1}(k2={2}))".format(
+                    rand.choice("&|"), criterion, rand.choice(FILTER_VALUES))
+            elif choice < .4:
+                ldap_string = "(!{0})".format(criterion)
+            else:
+                ldap_string = criterion
+
+            properties = {}
+            if rand.random() < .9:
+                properties["k"] = rand.choice(PROPERTY_VALUES)
+            if rand.random() < .5:
+                properties["k2"] = rand.choice(PROPERTY_VALUES)
+
+            parsed = ldapfilter.get_ldap_filter(ldap_string)
+            self.assertEqual(outcome(parsed.matches, properties),
+                             outcome(interpret, parsed, properties),
+                             (ldap_string, properties))
+
+    def test_modified_filter(self):
+        """
+        A filter modified after its first use is compiled again
+        """
+        ldap_filter = ldapfilter.LDAPFilter(ldapfilter.AND)
+        ldap_filter.append(ldapfilter.get_ldap_filter("(a=1)"))
+        self.assertTrue(ldap_filter.matches({"a": 1, "b": 1}))
+
+        ldap_filter.append(ldapfilter.get_ldap_filter("(b=2)"))
+        self.assertFalse(ldap_filter.matches({"a": 1, "b": 1}))
+
+
+class FiltersCacheTest(unittest.TestCase):
+    """
+    Tests the cache of parsed filters
+    """
+    def test_shared(self):
+        """
+        Parsed filters are shared
+        """
+        ldap_string = "(&(objectClass=spec)(service.id=42))"
+        parsed = ldapfilter.get_ldap_filter(ldap_string)
+        self.assertIs(ldapfilter.get_ldap_filter(ldap_string), parsed)
+        self.assertEqual(str(parsed), ldap_string)
+
+    def test_eviction(self):
+        """
+        The least recently used filters are forgotten
+        """
+        cache = ldapfilter._FiltersCache(2)
+        first = cache.get("(a=1)")
+        second = cache.get("(b=1)")
+        self.assertIs(cache.get("(a=1)"), first)
+
+        # (b=1) is the least recently used one
+        cache.get("(c=1)")
+        self.assertIs(cache.get("(a=1)"), first)
+        self.assertIsNot(cache.get("(b=1)"), second)
+
+        with self.assertRaises(ValueError):
+            cache.get("(invalid")
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Service registry: properties index lookups and service events routing tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import unittest
+
+# Pelix
+import pelix.framework
+import pelix.ldapfilter
+from pelix.constants import OBJECTCLASS, REGISTRY_INDEXED_PROPERTIES
+from pelix.internals.events import ServiceEvent
+
+# ------------------------------------------------------------------------------
+
+FILTERS = ["(service.id=12)", "(service.id=0)", "(objectClass=spec.1)",
+           "(endpoint.framework.uuid=fw3)", "(endpoint.framework.uuid=fw*)",
+           "(&(endpoint.framework.uuid=fw3)(rank>=5))",
+           "(&(objectClass=spec.2)(tags=b))", "(tags=a)", "(rank=4)",
+           "(|(service.id=5)(service.id=7))", "(!(tags=a))",
+           "(&(tags=c)(endpoint.framework.uuid=fw1)(objectClass=spec.0))",
+           "(endpoint.framework.uuid=unknown)", "(&(rank=3)(tags=*))",
+           None]
+
+SPECS = [None, "spec.0", "spec.1", "spec.2", "spec.unknown"]
+
+# ------------------------------------------------------------------------------
+
+
+class RegistryIndexTest(unittest.TestCase):
+    """
+    Compares indexed lookups with a full scan of the registry
+    """
+    def setUp(self):
+        """
+        Starts a framework indexing some properties
+        """
+        self.framework = pelix.framework.create_framework(
+            (), {REGISTRY_INDEXED_PROPERTIES: "endpoint.framework.uuid,tags"})
+        self.framework.start()
+        self.context = self.framework.get_bundle_context()
+
+        rand = random.Random(1)
+        self.registrations = []
+        for idx in range(200):
+            properties = {"endpoint.framework.uuid": "fw{0}".format(idx % 7),
+                          "rank": idx % 10}
+            if idx % 3:
+                properties["tags"] = rand.sample(["a", "b", "c", 1], 2)
+
+            self.registrations.append(self.context.register_service(
+                ["spec.{0}".format(idx % 3), "spec.all"], object(),
+                properties))
+
+    def tearDown(self):
+        """
+        Stops the framework
+        """
+        pelix.framework.FrameworkFactory.delete_framework(self.framework)
+
+    def _scan(self, spec, ldap_filter):
+        """
+        Looks for the matching references by testing all of them
+        """
+        ldap_filter = pelix.ldapfilter.get_ldap_filter(ldap_filter)
+        refs = [registration.get_reference()
+                for registration in self.registrations
+                if registration is not None]
+        return [ref for ref in sorted(refs)
+                if (spec is None or spec in ref.get_property(OBJECTCLASS))
+                and (ldap_filter is None
+                     or ldap_filter.matches(ref.get_properties()))] or None
+
+    def _check_all(self):
+        """
+        Checks that all lookups give the same results as a full scan
+        """
+        for spec in SPECS:
+            for ldap_filter in FILTERS:
+                if spec is None and ldap_filter is None:
+                    # Also returns the framework services
+                    continue
+
+                self.assertEqual(
+                    self.context.get_all_service_references(spec,
+                                                            ldap_filter),
+                    self._scan(spec, ldap_filter), (spec, ldap_filter))
+
+    def test_lookup(self):
+        """
+        Indexed lookups give the same results as a full scan
+        """
+        self._check_all()
+
+    def test_modifications(self):
+        """
+        The index follows the modifications of the registry
+        """
+        for idx in range(0, 200, 4):
+            self.registrations[idx].set_properties(
+                {"endpoint.framework.uuid": "fw3", "tags": ["c"]})
+        for idx in range(1, 200, 5):
+            self.registrations[idx].set_properties({"tags": "b"})
+        for idx in range(2, 200, 6):
+            self.registrations[idx].unregister()
+            self.registrations[idx] = None
+
+        self._check_all()
+
+
+# ------------------------------------------------------------------------------
+
+
+class _Recorder(object):
+    """
+    Service listener keeping the events it receives
+    """
+    def __init__(self):
+        """
+        Sets up members
+        """
+        self.events = []
+
+    def service_changed(self, event):
+        """
+        Stores the kind of the event and the name of the service
+        """
+        self.events.append((event.get_kind(), event.get_service_reference()
+                            .get_property("name")))
+
+    def pop(self):
+        """
+        Returns and clears the received events
+        """
+        events = self.events[:]
+        del self.events[:]
+        return events
+
+
+class ServiceEventsRoutingTest(unittest.TestCase):
+    """
+    Tests the routing of service events to the listeners
+    """
+    def setUp(self):
+        """
+        Starts a framework
+        """
+        self.framework = pelix.framework.create_framework(())
+        self.framework.start()
+        self.context = self.framework.get_bundle_context()
+        self.listeners = []
+
+    def tearDown(self):
+        """
+        Stops the framework
+        """
+        pelix.framework.FrameworkFactory.delete_framework(self.framework)
+
+    def _listen(self, ldap_filter, specification="spec"):
+        """
+        Registers a new recording listener
+        """
+        listener = _Recorder()
+        self.context.add_service_listener(listener, ldap_filter,
+                                          specification)
+        self.listeners.append((listener, specification, ldap_filter))
+        return listener
+
+    def _stats(self):
+        """
+        Returns the service events statistics of the framework
+        """
+        return self.framework._dispatcher.get_service_events_stats()
+
+    def _stats_delta(self, before):
+        """
+        Returns the difference between the current statistics and the given
+        ones
+        """
+        return dict((key, value - before[key])
+                    for key, value in self._stats().items())
+
+    def test_routing(self):
+        """
+        Events are routed according to equality and presence criteria, and
+        to the listeners without route
+        """
+        equality = self._listen("(tags=a)")
+        number = self._listen("(&(rank=3)(objectClass=spec))")
+        other_value = self._listen("(tags=z)")
+        presence = self._listen("(tags=*)")
+        other_presence = self._listen("(unknown=*)")
+        unrouted = self._listen("(|(rank=1)(rank=2))")
+        negation = self._listen("(!(tags=a))")
+        no_filter = self._listen(None)
+        other_spec = self._listen(None, "other")
+        any_spec = self._listen("(name=svc)", None)
+
+        before = self._stats()
+        self.context.register_service(
+            "spec", object(), {"name": "svc", "tags": ["a", "b"], "rank": 3})
+
+        registered = [(ServiceEvent.REGISTERED, "svc")]
+        for listener in (equality, number, presence, no_filter, any_spec):
+            self.assertEqual(listener.pop(), registered)
+
+        for listener in (other_value, other_presence, unrouted, negation,
+                         other_spec):
+            self.assertEqual(listener.pop(), [])
+
+        # Only the routed listeners which can match and the unrouted ones
+        # are candidates
+        self.assertEqual(self._stats_delta(before),
+                         {"events": 1, "candidates": 7, "evaluations": 6})
+
+    def test_modified(self):
+        """
+        MODIFIED and MODIFIED_ENDMATCH events are sent when a routed property
+        changes
+        """
+        tag_a = self._listen("(tags=a)")
+        tag_b = self._listen("(tags=b)")
+        presence = self._listen("(flag=*)")
+
+        registration = self.context.register_service(
+            "spec", object(), {"name": "svc", "tags": "a"})
+        self.assertEqual(tag_a.pop(), [(ServiceEvent.REGISTERED, "svc")])
+        self.assertEqual(tag_b.pop(), [])
+        self.assertEqual(presence.pop(), [])
+
+        # Moves from a routed value to another
+        registration.set_properties({"tags": "b", "flag": True})
+        self.assertEqual(tag_a.pop(),
+                         [(ServiceEvent.MODIFIED_ENDMATCH, "svc")])
+        self.assertEqual(tag_b.pop(), [(ServiceEvent.MODIFIED, "svc")])
+        self.assertEqual(presence.pop(), [(ServiceEvent.MODIFIED, "svc")])
+
+        # Moves out of all routed values
+        registration.set_properties({"tags": "c"})
+        self.assertEqual(tag_a.pop(), [])
+        self.assertEqual(tag_b.pop(),
+                         [(ServiceEvent.MODIFIED_ENDMATCH, "svc")])
+        self.assertEqual(presence.pop(), [(ServiceEvent.MODIFIED, "svc")])
+
+        # Moves back into a routed value
+        before = self._stats()
+        registration.set_properties({"tags": ["x", "a"]})
+        self.assertEqual(tag_a.pop(), [(ServiceEvent.MODIFIED, "svc")])
+        self.assertEqual(tag_b.pop(), [])
+        self.assertEqual(presence.pop(), [(ServiceEvent.MODIFIED, "svc")])
+        self.assertEqual(self._stats_delta(before)["candidates"], 2)
+
+        registration.unregister()
+        self.assertEqual(tag_a.pop(), [(ServiceEvent.UNREGISTERING, "svc")])
+        self.assertEqual(tag_b.pop(), [])
+        self.assertEqual(presence.pop(), [(ServiceEvent.UNREGISTERING, "svc")])
+
+    def test_remove_listener(self):
+        """
+        Removed listeners are not notified anymore, whatever their route
+        """
+        listeners = [self._listen(ldap_filter) for ldap_filter in
+                     ("(tags=a)", "(tags=a)", "(tags=*)", "(!(tags=b))",
+                      None)]
+
+        self.context.register_service("spec", object(),
+                                      {"name": "svc1", "tags": "a"})
+        for listener in listeners:
+            self.assertEqual(listener.pop(),
+                             [(ServiceEvent.REGISTERED, "svc1")])
+
+        # The other listener of the same route is still notified
+        self.assertTrue(self.context.remove_service_listener(listeners[0]))
+        self.assertFalse(self.context.remove_service_listener(listeners[0]))
+        self.context.register_service("spec", object(),
+                                      {"name": "svc2", "tags": "a"})
+        self.assertEqual(listeners[0].pop(), [])
+        for listener in listeners[1:]:
+            self.assertEqual(listener.pop(),
+                             [(ServiceEvent.REGISTERED, "svc2")])
+
+        for listener in listeners[1:]:
+            self.assertTrue(self.context.remove_service_listener(listener))
+
+        before = self._stats()
+        self.context.register_service("spec", object(),
+                                      {"name": "svc3", "tags": "a"})
+        for listener in listeners:
+            self.assertEqual(listener.pop(), [])
+        self.assertEqual(self._stats_delta(before),
+                         {"events": 1, "candidates": 0, "evaluations": 0})
+
+        # Listeners can be registered again
+        listener = self._listen("(tags=a)")
+        self.context.register_service("spec", object(),
+                                      {"name": "svc4", "tags": "a"})
+        self.assertEqual(listener.pop(), [(ServiceEvent.REGISTERED, "svc4")])
+
+    def test_parity(self):
+        """
+        Listeners receive the same events as if all their filters were tested
+        """
+        for spec in SPECS:
+            for ldap_filter in FILTERS:
+                self._listen(ldap_filter, spec)
+
+        rand = random.Random(2)
+        registrations = []
+        for step in range(300):
+            properties = {"name": "svc{0}".format(step),
+                          "endpoint.framework.uuid": "fw{0}".format(
+                              rand.randrange(5)),
+                          "rank": rand.randrange(6), "step": step}
+            if rand.random() < .7:
+                properties["tags"] = rand.sample(["a", "b", "c", 1], 2)
+
+            action = rand.random()
+            if action < .5 or not registrations:
+                expected_kind = ServiceEvent.REGISTERED
+                previous = None
+                registrations.append(self.context.register_service(
+                    ["spec.{0}".format(rand.randrange(3)), "spec.all"],
+                    object(), properties))
+                svc_ref = registrations[-1].get_reference()
+            elif action < .8:
+                expected_kind = ServiceEvent.MODIFIED
+                registration = rand.choice(registrations)
+                svc_ref = registration.get_reference()
+                previous = svc_ref.get_properties()
+                del properties["name"]
+                registration.set_properties(properties)
+            else:
+                expected_kind = ServiceEvent.UNREGISTERING
+                registration = registrations.pop(
+                    rand.randrange(len(registrations)))
+                svc_ref = registration.get_reference()
+                previous = None
+                registration.unregister()
+
+            current = svc_ref.get_properties()
+            name = current["name"]
+            for listener, spec, ldap_filter in self.listeners:
+                expected = []
+                ldap_filter = pelix.ldapfilter.get_ldap_filter(ldap_filter)
+                if spec is None or spec in current[OBJECTCLASS]:
+                    if ldap_filter is None or ldap_filter.matches(current):
+                        expected = [(expected_kind, name)]
+                    elif previous is not None \
+                            and ldap_filter.matches(previous):
+                        expected = [(ServiceEvent.MODIFIED_ENDMATCH, name)]
+
+                self.assertEqual(listener.pop(), expected,
+                                 (step, spec, str(ldap_filter)))
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
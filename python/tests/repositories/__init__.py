@@ -0,0 +1,5 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Tests of the Cohorte repositories
+"""
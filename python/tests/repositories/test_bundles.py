@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Java repository: version index and resolution cache tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import unittest
+
+# Repositories
+from cohorte.repositories.java.bundles import Bundle, OSGiBundleRepository, \
+    SYSTEM_BUNDLE
+from cohorte.repositories.java.manifest import Manifest
+
+# ------------------------------------------------------------------------------
+
+VERSIONS = ("1.0.0", "1.2", "2.0.0", "1.5.3", "0.0.0", "3.1", "1.0.0.beta",
+            "2.1.0-SNAPSHOT", None)
+""" Versions of the synthetic bundles and packages """
+
+REQUIREMENTS = (None, "1.0", "[1.0,2.0)", "[1.2,2.0]", "2.0", "[0.5,1.5)",
+                "[2.0,3.0)")
+""" Version requirements of the synthetic bundles """
+
+# ------------------------------------------------------------------------------
+
+
+def _format(elements):
+    """
+    Formats a manifest packages list
+
+    :param elements: A name -> version dictionary
+    :return: The manifest entry
+    """
+    return ','.join(name if version is None
+                    else '{0};version="{1}"'.format(name, version)
+                    for name, version in elements.items())
+
+
+def _make_bundle(index, name, version, exports, imports, requires):
+    """
+    Prepares a bundle without JAR file
+
+    :return: A Bundle object
+    """
+    manifest = Manifest()
+    manifest.entries.update({'Bundle-SymbolicName': name,
+                             'Export-Package': _format(exports),
+                             'Import-Package': _format(imports),
+                             'Require-Bundle': _format(requires)})
+    if version is not None:
+        manifest.entries['Bundle-Version'] = version
+
+    return Bundle('/synthetic/bundle-{0}.jar'.format(index), manifest)
+
+
+def _random_bundles(rand, count):
+    """
+    Generates random bundles, with several versions of the same names
+
+    :param rand: A Random object
+    :param count: Number of bundles
+    :return: A list of Bundle objects
+    """
+    names = max(1, int(count * .8))
+    result = []
+    for index in range(count):
+        exports = dict(("pkg{0}".format(rand.randrange(count)),
+                        rand.choice(VERSIONS))
+                       for _ in range(rand.randint(1, 4)))
+        imports = dict(("pkg{0}".format(rand.randrange(count)),
+                        rand.choice(REQUIREMENTS))
+                       for _ in range(rand.randint(0, 6)))
+        requires = dict(("bundle{0}".format(rand.randrange(names)),
+                         rand.choice(REQUIREMENTS))
+                        for _ in range(rand.randint(0, 2)))
+        result.append(_make_bundle(
+            index, "bundle{0}".format(rand.randrange(names)),
+            rand.choice(VERSIONS), exports, imports, requires))
+
+    return result
+
+
+def _make_repository(bundles):
+    """
+    Prepares a repository containing the given bundles
+    """
+    repository = OSGiBundleRepository()
+    for bundle in bundles:
+        repository._OSGiBundleRepository__add_bundle(bundle)
+    return repository
+
+# ------------------------------------------------------------------------------
+
+
+class VersionIndexTest(unittest.TestCase):
+    """
+    Compares the indexed lookups with the scan of the registries
+    """
+    def test_lookups(self):
+        """
+        Indexed lookups return the same elements as Version.matches() scans
+        """
+        rand = random.Random(5)
+        bundles = _random_bundles(rand, 500)
+        repository = _make_repository(bundles)
+
+        # Copies of the registries aren't indexed
+        bundles_registry = dict(repository._bundles)
+        packages_registry = dict(repository._packages)
+
+        names = sorted(repository._bundles)
+        for _ in range(5000):
+            requirement = rand.choice(REQUIREMENTS)
+
+            package = "pkg{0}".format(rand.randrange(550))
+            self.assertIs(
+                repository.get_package(package, requirement),
+                repository.get_package(package, requirement,
+                                       package_registry=packages_registry))
+
+            name = rand.choice(names)
+            try:
+                expected = repository.get_artifact(name, requirement,
+                                                   registry=bundles_registry)
+            except ValueError:
+                self.assertRaises(ValueError, repository.get_artifact,
+                                  name, requirement)
+            else:
+                self.assertIs(repository.get_artifact(name, requirement),
+                              expected)
+
+    def test_resolution(self):
+        """
+        Resolutions are complete and cached until the repository changes
+        """
+        rand = random.Random(9)
+        repository = _make_repository(_random_bundles(rand, 300))
+        names = sorted(repository._bundles)
+        requested = rand.sample(names, 10)
+        system_packages = ["pkg{0}".format(idx) for idx in range(0, 300, 7)]
+
+        result = repository.resolve_installation(requested, None,
+                                                 system_packages)
+        to_install, dependencies, missing_bundles, missing_packages = result
+
+        # No duplicates (bundles with the same name and version are equal)
+        for index, bundle in enumerate(to_install):
+            self.assertNotIn(bundle, to_install[:index])
+
+        for bundle in to_install:
+            deps = dependencies[bundle]
+            for dep in deps:
+                self.assertIn(dep, to_install)
+
+            for required, attributes in bundle.all_require.items():
+                if required not in missing_bundles:
+                    self.assertTrue(any(
+                        dep.name == required
+                        and dep.version.matches(attributes.get('version'))
+                        for dep in deps))
+
+            for imported, attributes in bundle.all_imports.items():
+                version = attributes.get('version')
+                if imported in missing_packages \
+                        or imported in system_packages \
+                        or bundle.exports(imported, version):
+                    continue
+
+                self.assertTrue(any(dep.exports(imported, version)
+                                    for dep in deps))
+
+        for package in missing_packages:
+            # Not found for at least one of its requirements
+            self.assertTrue(any(
+                repository.get_package(
+                    package, bundle.all_imports[package].get('version'))
+                is None for bundle in to_install
+                if package in bundle.all_imports))
+
+        # Cached results are copies
+        to_install.append(SYSTEM_BUNDLE)
+        dependencies.clear()
+        self.assertEqual(
+            repository.resolve_installation(requested, None,
+                                            system_packages)[0],
+            result[0][:-1])
+        self.assertEqual(len(repository._resolutions), 1)
+
+        # Adding a bundle invalidates the cache
+        repository._OSGiBundleRepository__add_bundle(
+            _make_bundle(1000, "provider", "1.0.0", {"new.package": None},
+                         {}, {}))
+        self.assertFalse(repository._resolutions)
+        self.assertEqual(repository.get_package("new.package").name,
+                         "provider")
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
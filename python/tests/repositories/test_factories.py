@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Factories repositories: factory index and components normalization tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import random
+import unittest
+
+# Composer
+from cohorte.composer.beans import RawComponent
+from cohorte.composer.node.finder import ComponentFinder
+
+# Repositories
+from cohorte.repositories.beans import Artifact
+from cohorte.repositories.factories import FactoryIndex
+from cohorte.repositories.python.ipopo import IPopoRepository
+
+# ------------------------------------------------------------------------------
+
+
+def make_artifact(name, version, factories=None):
+    """
+    Prepares a Python artifact
+
+    :param name: Name of the artifact
+    :param version: Version of the artifact
+    :param factories: Names of the factories it provides, found while
+                      parsing it
+    :return: An Artifact bean
+    """
+    artifact = Artifact("python", name, version,
+                        "/{0}-{1}.py".format(name, version))
+    if factories is not None:
+        artifact.factories = factories
+    return artifact
+
+
+class _ArtifactsRepository(object):
+    """
+    Artifacts repository walking through a list of artifacts
+    """
+    def __init__(self, artifacts):
+        """
+        Sets up members
+        """
+        self.artifacts = artifacts
+
+    def walk(self):
+        """
+        Walks through the artifacts
+        """
+        return iter(self.artifacts)
+
+
+class _FactoriesRepository(object):
+    """
+    Factories repository counting the lookups
+    """
+    def __init__(self, index):
+        """
+        Sets up members
+        """
+        self.index = index
+        self.lookups = 0
+
+    @staticmethod
+    def get_language():
+        """
+        Language of the repository
+        """
+        return "python"
+
+    def find_factory(self, factory, artifact_name=None, artifact_version=None):
+        """
+        Looks for a factory in the index
+        """
+        self.lookups += 1
+        return self.index.find(factory, artifact_name, artifact_version)
+
+# ------------------------------------------------------------------------------
+
+
+class FactoryIndexTest(unittest.TestCase):
+    """
+    Tests the factory index
+    """
+    def setUp(self):
+        """
+        Indexes some artifacts, in a random order
+        """
+        self.artifacts = [make_artifact(name, version) for name, version in
+                          (("beta", "1.0.0"), ("alpha", "2.0.0"),
+                           ("alpha", "1.5.0"), ("alpha", "1.0.0"),
+                           ("gamma", "0.1.0"))]
+        self.index = FactoryIndex("python", "ipopo")
+        for artifact in random.Random(1).sample(self.artifacts,
+                                                len(self.artifacts)):
+            self.index.add(artifact, ["common", "factory-{0}".format(
+                artifact.name)])
+
+    def test_ordering(self):
+        """
+        The artifacts are sorted as the repositories used to, best first
+        """
+        self.assertEqual(self.index.find("common"),
+                         sorted(self.artifacts, reverse=True))
+        self.assertEqual(
+            [str(artifact.version)
+             for artifact in self.index.find("factory-alpha")],
+            ["2.0.0", "1.5.0", "1.0.0"])
+        self.assertEqual(len(self.index), 10)
+        self.assertIn("factory-gamma", self.index)
+        self.assertNotIn("unknown", self.index)
+
+    def test_find(self):
+        """
+        Artifacts can be filtered by name and version
+        """
+        self.assertEqual(self.index.find("common", "alpha", "1.0.0"),
+                         [self.artifacts[3]])
+        self.assertEqual(self.index.find("common", "alpha"),
+                         self.index.find("factory-alpha"))
+        self.assertEqual(self.index.find("common", "beta", "1.0.0"),
+                         [self.artifacts[0]])
+
+        for args in (("unknown",), ("common", "delta"),
+                     ("common", "alpha", "3.0.0")):
+            self.assertRaises(KeyError, self.index.find, *args)
+
+        resolution, unresolved = self.index.find_all(
+            ["common", "factory-beta", "unknown"])
+        self.assertEqual(resolution, {
+            "common": self.index.find("common"),
+            "factory-beta": [self.artifacts[0]]})
+        self.assertEqual(unresolved, set(["unknown"]))
+
+    def test_update(self):
+        """
+        Artifacts can be updated and removed
+        """
+        beta = self.artifacts[0]
+        self.index.add(beta, ["other"])
+        self.assertNotIn("factory-beta", self.index)
+        self.assertEqual(self.index.find("other"), [beta])
+        self.assertNotIn(beta, self.index.find("common"))
+
+        for artifact in self.artifacts:
+            self.index.remove(artifact)
+        self.assertEqual(len(self.index), 0)
+        self.assertNotIn("common", self.index)
+        self.assertEqual(self.index.artifacts(), [])
+
+        # Unknown artifact
+        self.index.remove(beta)
+
+
+class RepositoriesLoadingTest(unittest.TestCase):
+    """
+    Tests the incremental loading of the iPOPO factories repository
+    """
+    def test_bind_unbind(self):
+        """
+        The factories follow the bound artifacts repositories
+        """
+        first = _ArtifactsRepository([make_artifact("a", "1.0.0", ["fa"]),
+                                      make_artifact("b", "1.0.0", ["fb"])])
+        second = _ArtifactsRepository([make_artifact("c", "1.0.0", ["fc"]),
+                                       make_artifact("b", "1.0.0", ["fb"])])
+
+        repository = IPopoRepository()
+        repository._repositories = [first]
+        repository.load_repositories()
+        self.assertEqual(len(repository), 2)
+
+        # Artifacts already known are not read again
+        first.artifacts[0].factories = ["changed"]
+        repository._repositories.append(second)
+        repository._bind_repository(None, second, None)
+        self.assertEqual(sorted(repository.find_factories(
+            ["fa", "fb", "fc", "changed"])[0]), ["fa", "fb", "fc"])
+
+        # Artifacts provided by another repository are kept
+        repository._unbind_repository(None, first, None)
+        repository._repositories.remove(first)
+        self.assertEqual(repository.find_factories(["fa", "fb", "fc"])[1],
+                         set(["fa"]))
+
+        repository._unbind_repository(None, second, None)
+        self.assertEqual(len(repository), 0)
+
+
+class NormalizeAllTest(unittest.TestCase):
+    """
+    Tests the normalization of components by the component finder
+    """
+    def test_normalize_all(self):
+        """
+        The repositories are queried once per distinct requirement
+        """
+        index = FactoryIndex("python", "ipopo")
+        index.add(make_artifact("alpha", "1.0.0"), ["fa", "fb"])
+        index.add(make_artifact("alpha", "2.0.0"), ["fa"])
+
+        repository = _FactoriesRepository(index)
+        finder = ComponentFinder()
+        finder._repositories = [repository]
+
+        components = []
+        for idx in range(30):
+            component = RawComponent(("fa", "fb", "fc")[idx % 3],
+                                     "comp{0}".format(idx))
+            if idx % 2:
+                component.bundle_name = "alpha"
+                component.bundle_version = "1.0.0"
+            components.append(component)
+
+        bundles, missing = finder.normalize_all(components)
+
+        # 3 factories, with and without bundle requirement, including the
+        # missing one
+        self.assertEqual(repository.lookups, 6)
+        self.assertEqual(missing, set(["fc"]))
+        self.assertEqual(len(bundles), 20)
+        for component, bundle in bundles.items():
+            self.assertEqual(bundle, index.find(
+                component.factory, "alpha",
+                "1.0.0" if int(component.name[4:]) % 2 else None)[0])
+            self.assertEqual(component.bundle_name, "alpha")
+            self.assertEqual(component.bundle_version, str(bundle.version))
+            self.assertEqual(component.language, "python")
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -- Content-Encoding: UTF-8 --
+"""
+Python repository: persistent modules cache tests
+
+:author: agent
+:license: Apache Software License 2.0
+
+..
+
+    Copyright 2026 agent
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# Repositories
+import cohorte.repositories.parallel as parallel
+from cohorte.repositories.python.modules import PythonModuleRepository
+
+# ------------------------------------------------------------------------------
+
+MODULE_TEMPLATE = """
+import os
+import {package}.module{previous}
+
+__version__ = "1.{index}.0"
+
+VALUE = {value}
+"""
+""" Content of the generated modules """
+
+# ------------------------------------------------------------------------------
+
+
+def write_package(root, package, count, value=0):
+    """
+    Writes a package of modules importing each other
+
+    :param root: Directory where to create the package
+    :param package: Name of the package
+    :param count: Number of modules
+    :param value: Value stored in the modules
+    :return: The path to the package
+    """
+    path = os.path.join(root, package)
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    with open(os.path.join(path, '__init__.py'), 'w') as filep:
+        filep.write('__version__ = "1.0.0"\n')
+
+    for index in range(count):
+        write_module(path, package, index, value)
+
+    return path
+
+
+def write_module(path, package, index, value):
+    """
+    Writes a module of a package
+    """
+    with open(os.path.join(path, 'module{0}.py'.format(index)), 'w') as filep:
+        filep.write(MODULE_TEMPLATE.format(
+            package=package, index=index, previous=max(0, index - 1),
+            value=value))
+
+
+def load_repository(data_dir, *directories):
+    """
+    Loads a repository using the cache in the given directory
+
+    :return: The repository and the number of parsed files
+    """
+    repository = PythonModuleRepository()
+    repository._scan_workers = 1
+    repository.load_cache(data_dir)
+    for directory in directories:
+        repository.add_directory(directory)
+    repository.save_cache()
+    return repository, repository._cache.parsed
+
+
+def describe_modules(repository):
+    """
+    Returns the description of the modules of the repository
+    """
+    return sorted((module.name, str(module.version),
+                   sorted(module.all_imports), module.file)
+                  for module in repository.walk())
+
+# ------------------------------------------------------------------------------
+
+
+class ModulesCacheTest(unittest.TestCase):
+    """
+    Tests the persistent cache of parsed Python files
+    """
+    def setUp(self):
+        """
+        Prepares the repository directories
+        """
+        self.directory = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.directory, "data")
+        os.makedirs(self.data_dir)
+
+    def tearDown(self):
+        """
+        Cleans up the files
+        """
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        """
+        Warm repositories are identical to cold ones, without parsing
+        """
+        root = os.path.join(self.directory, "repo")
+        write_package(root, "pkg", 20)
+
+        cold, parsed = load_repository(self.data_dir, root)
+        self.assertEqual(parsed, 21)
+
+        warm, parsed = load_repository(self.data_dir, root)
+        self.assertEqual(parsed, 0)
+        self.assertEqual(describe_modules(warm), describe_modules(cold))
+        self.assertIn("pkg.module2", warm.get_artifact("pkg.module3")
+                      .all_imports)
+
+        # Touched, but not modified
+        module = os.path.join(root, "pkg", "module1.py")
+        os.utime(module, (1, 1))
+        warm, parsed = load_repository(self.data_dir, root)
+        self.assertEqual(parsed, 0)
+        self.assertEqual(describe_modules(warm), describe_modules(cold))
+
+        # Modified with the same size
+        write_module(os.path.join(root, "pkg"), "pkg", 1, 1)
+        os.utime(module, (2, 2))
+        warm, parsed = load_repository(self.data_dir, root)
+        self.assertEqual(parsed, 1)
+
+        # Resolution still works
+        resolved = warm.resolve_installation(["pkg.module5"])
+        self.assertIn(warm.get_artifact("pkg.module0"), resolved[0])
+
+    def test_shared(self):
+        """
+        The cache keeps the files visited by other isolates
+        """
+        first = os.path.join(self.directory, "first")
+        second = os.path.join(self.directory, "second")
+        write_package(first, "first", 5)
+        write_package(second, "second", 5)
+
+        self.assertEqual(load_repository(self.data_dir, first)[1], 6)
+        self.assertEqual(load_repository(self.data_dir, second)[1], 6)
+        self.assertEqual(load_repository(self.data_dir, first, second)[1], 0)
+
+        # Removed files are forgotten when the cache is updated
+        shutil.rmtree(os.path.join(first, "first"))
+        write_package(second, "second", 1, 1)
+        os.utime(os.path.join(second, "second", "module0.py"), (1, 1))
+        self.assertEqual(load_repository(self.data_dir, second)[1], 1)
+
+        with open(os.path.join(self.data_dir, "python-modules-cache.json")) \
+                as filep:
+            files = json.load(filep)['files']
+        self.assertEqual(len(files), 6)
+        self.assertTrue(all(os.path.exists(path) for path in files))
+
+    def test_invalid_file(self):
+        """
+        An invalid cache file is ignored
+        """
+        root = os.path.join(self.directory, "repo")
+        write_package(root, "pkg", 5)
+        with open(os.path.join(self.data_dir, "python-modules-cache.json"),
+                  'w') as filep:
+            filep.write('{"format": ')
+
+        self.assertEqual(load_repository(self.data_dir, root)[1], 6)
+        self.assertEqual(load_repository(self.data_dir, root)[1], 0)
+
+    def test_disabled(self):
+        """
+        The cache can be disabled
+        """
+        repository = PythonModuleRepository()
+        os.environ['COHORTE_USE_CACHE'] = 'false'
+        try:
+            self.assertFalse(repository.load_cache(self.data_dir))
+        finally:
+            del os.environ['COHORTE_USE_CACHE']
+
+        self.assertFalse(repository.load_cache(None))
+        self.assertTrue(repository.load_cache(self.data_dir))
+
+
+class ParallelScanTest(unittest.TestCase):
+    """
+    Tests the parsing of modules in a pool of processes
+    """
+    def setUp(self):
+        """
+        Prepares the repository directory and uses a pool for a few files
+        """
+        self.directory = tempfile.mkdtemp()
+        self.min_items = parallel.MIN_PARALLEL_ITEMS
+        parallel.MIN_PARALLEL_ITEMS = 8
+
+        # Count the pools of processes
+        self.pools = 0
+        self.make_pool = parallel._make_pool
+
+        def make_pool(workers):
+            self.pools += 1
+            return self.make_pool(workers)
+
+        parallel._make_pool = make_pool
+
+    def tearDown(self):
+        """
+        Restores the parallel module and cleans up the files
+        """
+        parallel._make_pool = self.make_pool
+        parallel.MIN_PARALLEL_ITEMS = self.min_items
+        shutil.rmtree(self.directory)
+
+    def test_parity(self):
+        """
+        Modules parsed by a pool are identical to those parsed in the current
+        process, invalid files being ignored
+        """
+        root = os.path.join(self.directory, "repo")
+        write_package(root, "pkg", 30)
+        with open(os.path.join(root, "pkg", "invalid.py"), 'w') as filep:
+            filep.write("def invalid(:\n")
+
+        modules = {}
+        for workers in (1, 2):
+            repository = PythonModuleRepository()
+            repository._scan_workers = workers
+            repository.add_directory(root)
+            modules[workers] = describe_modules(repository)
+
+        self.assertEqual(self.pools, 1)
+        self.assertEqual(len(modules[1]), 31)
+        self.assertEqual(modules[2], modules[1])
+
+        # Not enough files for a pool
+        small = os.path.join(self.directory, "small")
+        write_package(small, "small", 5)
+        repository = PythonModuleRepository()
+        repository._scan_workers = 2
+        repository.add_directory(small)
+        self.assertEqual(self.pools, 1)
+        self.assertEqual(len(describe_modules(repository)), 6)
+
+# ------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    unittest.main()